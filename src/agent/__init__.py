@@ -8,5 +8,7 @@ Router Agent가 사용자 질문의 의도를 파악하여 적절한 Agent로 
 """
 
 from .router.graph import ask as router_ask
+from .router.graph import ask_stream as router_ask_stream
+from .warmup import start_warmup, warm_up, warmup_status
 
-__all__ = ["router_ask"]
+__all__ = ["router_ask", "router_ask_stream", "start_warmup", "warm_up", "warmup_status"]
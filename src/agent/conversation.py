@@ -0,0 +1,246 @@
+"""
+대화 상태: 세션별 슬롯 메모리 + 압축 요약으로 후속 질문("그럼 지난달은?")을 이어서 처리
+
+router.ask는 질문마다 독립적으로 처리되므로, history 전체를 프롬프트에 넣는 대신
+세션(session_id)마다 Conversation을 두고 다음 두 가지만 유지한다.
+- 슬롯: 마지막으로 조회/언급된 기간(months), 계정(account), 서비스(service), 의도(intent)
+- 요약: 턴마다 "질문 → 답변 첫 문장" 한 줄 (LLM 없이 추출식, 턴당 추가 호출/비용 없음)
+
+후속 질문이면 context_for가 CONVERSATION_TOKEN_BUDGET 안에 맞춘 [대화 맥락] 블록(오래된 줄부터 제거)과
+슬롯으로 채운 기간, 문서 검색용 질의를 돌려주고, 라우터가 이를 intent/NL2SQL/docs 프롬프트에 넘긴다.
+맥락 블록은 각 프롬프트의 고정 지침 뒤, 질문 바로 앞에 들어가므로 프롬프트 앞부분은 대화와 무관하게 같아
+OpenAI 프롬프트 캐시(prefix 일치)가 유지된다. 독립 질문은 맥락 없이 기존 경로(로컬 분류/캐시)를 그대로 탄다.
+"""
+
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, TypedDict
+
+from .usage import estimate_tokens
+
+CONVERSATION_ENABLED = os.getenv("CONVERSATION_ENABLED", "true").lower() == "true"
+CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "300"))
+CONVERSATION_MAX_TURNS = int(os.getenv("CONVERSATION_MAX_TURNS", "6"))
+CONVERSATION_MAX_SESSIONS = int(os.getenv("CONVERSATION_MAX_SESSIONS", "1000"))
+CONVERSATION_TTL_SEC = float(os.getenv("CONVERSATION_TTL_SEC", "3600"))
+
+# 요약 한 줄에 남길 질문/답변 길이 (글자)
+_QUESTION_CHARS = 60
+_ANSWER_CHARS = 80
+# 이보다 짧고 조사로 끝나는 질문("지난달은?", "Notebook도?")은 후속 질문으로 본다
+_SHORT_FOLLOWUP_CHARS = 15
+
+_FOLLOWUP_PREFIX = re.compile(
+    r"^\s*(?:그럼|그러면|그렇다면|그리고|그중|그 중|그거|그건|그것|거기|그때|이어서|추가로|반대로|"
+    r"what about|how about|and\b|then\b)",
+    re.IGNORECASE,
+)
+_FOLLOWUP_REFERENCE = re.compile(
+    r"그\s*(?:계정|서비스|달|월|기간|결과)|해당\s*(?:계정|서비스|월|달|기간)|위\s*(?:결과|답변)|방금|아까|"
+    r"이전\s*(?:질문|결과|답변)|같은\s*(?:기간|계정|서비스|조건)"
+)
+_SHORT_FOLLOWUP = re.compile(r"(?:은|는|도|만)\s*\??\s*$")
+
+_ACCOUNT = re.compile(r"(?<!\d)\d{12}(?!\d)")
+# 질문 표현(소문자) → 서비스 유형 (시맨틱 레이어 v_cost_by_service의 service 값, SERVICE_TYPES)
+_SERVICES = {
+    "endpoint": "Endpoint", "엔드포인트": "Endpoint",
+    "notebook": "Notebook", "노트북": "Notebook",
+    "training": "Training", "트레이닝": "Training", "학습": "Training",
+    "processing": "Processing", "프로세싱": "Processing",
+    "studio": "Studio", "스튜디오": "Studio",
+    "featurestore": "FeatureStore", "feature store": "FeatureStore", "피처 스토어": "FeatureStore",
+    "피처스토어": "FeatureStore",
+    "datatransfer": "DataTransfer", "data transfer": "DataTransfer", "데이터 전송": "DataTransfer",
+    "storage": "Storage", "스토리지": "Storage",
+}
+_YYYYMM = re.compile(r"^\d{6}$")
+
+
+class TurnContext(TypedDict):
+    text: str                       # 프롬프트에 넣을 [대화 맥락] 블록 (질문 앞에 붙임)
+    months: Optional[List[str]]     # SQL Agent에 넘길 기간 (질문의 기간 표현, 없으면 슬롯)
+    search_query: str               # 문서 검색 질의 (이전 주제 + 후속 질문)
+    intent: Optional[str]           # 직전 턴의 의도 (분류 실패 시/추측 실행 후보)
+
+
+def is_followup(question: str) -> bool:
+    """앞 대화에 기대는 질문인지 (접속/지시 표현, 또는 조사로 끝나는 짧은 질문)"""
+    q = (question or "").strip()
+    if not q:
+        return False
+    if _FOLLOWUP_PREFIX.search(q) or _FOLLOWUP_REFERENCE.search(q):
+        return True
+    return len(q) <= _SHORT_FOLLOWUP_CHARS and bool(_SHORT_FOLLOWUP.search(q))
+
+
+def extract_services(text: str) -> List[str]:
+    lowered = (text or "").lower()
+    found: List[str] = []
+    for alias, service in _SERVICES.items():
+        if alias in lowered and service not in found:
+            found.append(service)
+    return found
+
+
+def extract_account(text: str) -> Optional[str]:
+    m = _ACCOUNT.search(text or "")
+    return m.group(0) if m else None
+
+
+def question_months(question: str) -> Optional[List[str]]:
+    """질문의 기간 표현 → 처리된 월 목록 (기간, 단일 월 순으로 해석)"""
+    from .sql_agent.month_range import parse_month_range, parse_month
+    from .sql_agent.schema_provider import list_processed_months
+
+    available = list_processed_months()
+    return parse_month_range(question, available) or parse_month(question, available)
+
+
+def result_months(result: Dict[str, Any]) -> Optional[List[str]]:
+    """SQL 응답이 실제로 조회한 월 (여러 달이면 months, 아니면 base_dir 폴더명; latest 링크는 실제 월로)"""
+    if result.get("months"):
+        return list(result["months"])
+    base_dir = result.get("base_dir")
+    if not base_dir:
+        return None
+    name = os.path.basename(os.path.realpath(base_dir))
+    return [name] if _YYYYMM.match(name) else None
+
+
+def _format_months(months: List[str]) -> str:
+    labels = [f"{ym[:4]}-{ym[4:]}" for ym in months]
+    return labels[0] if len(labels) == 1 else f"{labels[0]}~{labels[-1]}"
+
+
+def _clip(text: str, limit: int) -> str:
+    text = re.sub(r"\s+", " ", text or "").strip()
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def _first_sentence(answer: str) -> str:
+    """답변 요약: 마크다운 기호를 걷어낸 첫 문장"""
+    text = re.sub(r"[#*`>|]+", " ", answer or "")
+    text = re.sub(r"\s+", " ", text).strip()
+    m = re.search(r"[.!?。](?=\s|$)", text)
+    return _clip(text[:m.end()] if m else text, _ANSWER_CHARS)
+
+
+class Conversation:
+    """한 세션의 슬롯과 턴 요약"""
+
+    def __init__(self, token_budget: int = CONVERSATION_TOKEN_BUDGET, max_turns: int = CONVERSATION_MAX_TURNS):
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.turns: List[str] = []
+        self.slots: Dict[str, Any] = {}
+        self.topic: Optional[str] = None    # 마지막 독립 질문 (후속 질문의 문서 검색 질의에 사용)
+        self.updated_at = time.time()
+        self._lock = threading.Lock()
+
+    def context_for(self, question: str) -> Optional[TurnContext]:
+        """후속 질문이면 프롬프트 맥락/슬롯으로 채운 조건, 아니면 None"""
+        with self._lock:
+            if not self.turns or not is_followup(question):
+                return None
+            months = question_months(question) or self.slots.get("months")
+            return {
+                "text": self.render(),
+                "months": months,
+                "search_query": f"{self.topic} {question}" if self.topic else question,
+                "intent": self.slots.get("intent"),
+            }
+
+    def update(self, question: str, result: Dict[str, Any], followup: bool = False) -> None:
+        """응답을 받은 뒤 슬롯/요약 갱신 (독립 질문은 슬롯을 새로, 후속 질문은 덮어쓰기만)"""
+        intent = result.get("intent")
+        with self._lock:
+            slots = dict(self.slots) if followup else {"months": self.slots.get("months")}
+            slots["intent"] = intent
+            services = extract_services(question)
+            if services:
+                slots["service"] = services
+            account = extract_account(question)
+            if account:
+                slots["account"] = account
+            if intent == "sql" and not result.get("error"):
+                slots["months"] = result_months(result) or slots.get("months")
+            self.slots = {k: v for k, v in slots.items() if v}
+            if not followup:
+                self.topic = question.strip()
+
+            answer = result.get("message") if result.get("error") else result.get("answer")
+            self.turns.append(f"Q: {_clip(question, _QUESTION_CHARS)} → A: {_first_sentence(str(answer or ''))}")
+            del self.turns[:-self.max_turns]
+            self.updated_at = time.time()
+
+    def render(self) -> str:
+        """토큰 예산 안의 [대화 맥락] 블록 (넘치면 오래된 턴부터 제외)"""
+        facts = []
+        if self.slots.get("months"):
+            facts.append(f"기간 {_format_months(self.slots['months'])}")
+        if self.slots.get("service"):
+            facts.append(f"서비스 {', '.join(self.slots['service'])}")
+        if self.slots.get("account"):
+            facts.append(f"계정 {self.slots['account']}")
+
+        turns = list(self.turns)
+        while True:
+            lines = ["[대화 맥락]"]
+            if facts:
+                lines.append(f"기억된 조건: {' · '.join(facts)}")
+            if turns:
+                lines.append("이전 대화:")
+                lines.extend(f"- {t}" for t in turns)
+            lines.append("아래 질문에서 생략된 기간/서비스/계정은 위 맥락을 따른다.")
+            text = "\n".join(lines) + "\n\n"
+            if len(turns) <= 1 or estimate_tokens(text) <= self.token_budget:
+                return text
+            turns.pop(0)
+
+
+class ConversationStore:
+    """session_id → Conversation (메모리 LRU, 유휴 TTL이 지나면 새 대화)"""
+
+    def __init__(self, max_sessions: int = CONVERSATION_MAX_SESSIONS, ttl_sec: float = CONVERSATION_TTL_SEC):
+        self.max_sessions = max_sessions
+        self.ttl_sec = ttl_sec
+        self._sessions: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Conversation:
+        with self._lock:
+            conversation = self._sessions.get(session_id)
+            if conversation is None or time.time() - conversation.updated_at > self.ttl_sec:
+                conversation = Conversation()
+                self._sessions[session_id] = conversation
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return conversation
+
+    def reset(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+_CONVERSATION_STORE = None  # singleton
+
+
+def get_conversation_store() -> Optional[ConversationStore]:
+    """공용 대화 상태 저장소 (CONVERSATION_ENABLED=false면 None)"""
+    global _CONVERSATION_STORE
+    if _CONVERSATION_STORE is None and CONVERSATION_ENABLED:
+        _CONVERSATION_STORE = ConversationStore()
+    return _CONVERSATION_STORE
+
+
+def get_conversation(session_id: Optional[str]) -> Optional[Conversation]:
+    """세션의 대화 상태 (세션 ID가 없거나 비활성화면 None → 단발 질문으로 처리)"""
+    store = get_conversation_store()
+    if store is None or not session_id:
+        return None
+    return store.get(session_id)
@@ -1,18 +1,19 @@
 """
 Docs Agent: SageMaker/Cloud Radar 공식 문서 기반 RAG Q&A 그래프
+후속 질문은 라우터가 넘긴 검색 질의(이전 주제 + 질문)로 문서를 찾고, 대화 맥락을 답변 프롬프트의 질문 앞에 넣는다
 """
 
 import os
-from typing import Dict, Any, TypedDict, List
+from typing import Dict, Any, TypedDict, List, Optional
 from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
-from langchain_tavily import TavilySearch
 from functools import lru_cache
 import json
 
 from .retriever import get_retriever
+from ..tracing import span, traced_node
+from ..llm_clients import get_chat_model
 
 
 # 전역 체인 캐시
@@ -36,7 +37,7 @@ DOCS_ANSWER_PROMPT = """당신은 AWS SageMaker 전문가입니다. 제공된 
 - 코드나 명령어는 코드 블록으로 표시하세요.
 - URL이나 참조 링크가 있다면 포함하세요.
 
-[사용자 질문]
+{conversation}[사용자 질문]
 {question}
 
 [관련 문서 컨텍스트]
@@ -90,7 +91,7 @@ WEB_ANSWER_PROMPT = """당신은 AWS SageMaker 전문가입니다. 문서 컨텍
 4. **정확성**: 신뢰할 수 있는 정보만 사용하세요.
 5. **한국어**: 모든 답변은 한국어로 작성하세요.
 
-[사용자 질문]
+{conversation}[사용자 질문]
 {question}
 
 [문서 컨텍스트]
@@ -102,12 +103,8 @@ WEB_ANSWER_PROMPT = """당신은 AWS SageMaker 전문가입니다. 문서 컨텍
 위의 정보를 종합하여 질문에 답변해주세요:"""
 
 
-def _make_llm():
-    """LLM 인스턴스 생성"""
-    model = "gpt-4o-mini"
-    temperature = 0.1
-    timeout = 30.0
-    return ChatOpenAI(model=model, temperature=temperature, timeout=timeout)
+# 답변/품질 평가/웹 답변 체인이 같은 공용 LLM 인스턴스 사용 (llm_clients 레지스트리)
+_LLM_SETTINGS = {"model": "gpt-4o-mini", "temperature": 0.1, "timeout": 30.0}
 
 
 def _get_answer_chain():
@@ -115,7 +112,7 @@ def _get_answer_chain():
     global _ANSWER_CHAIN
     
     if _ANSWER_CHAIN is None:
-        llm = _make_llm()
+        llm = get_chat_model(**_LLM_SETTINGS)
         prompt = ChatPromptTemplate.from_template(DOCS_ANSWER_PROMPT)
         _ANSWER_CHAIN = prompt | llm | StrOutputParser()
     
@@ -127,7 +124,7 @@ def _get_quality_chain():
     global _QUALITY_CHAIN
     
     if _QUALITY_CHAIN is None:
-        llm = _make_llm()
+        llm = get_chat_model(**_LLM_SETTINGS)
         prompt = ChatPromptTemplate.from_template(QUALITY_EVALUATION_PROMPT)
         _QUALITY_CHAIN = prompt | llm | JsonOutputParser()
     
@@ -139,7 +136,7 @@ def _get_web_search_chain():
     global _WEB_SEARCH_CHAIN
     
     if _WEB_SEARCH_CHAIN is None:
-        llm = _make_llm()
+        llm = get_chat_model(**_LLM_SETTINGS)
         prompt = ChatPromptTemplate.from_template(WEB_ANSWER_PROMPT)
         _WEB_SEARCH_CHAIN = prompt | llm | StrOutputParser()
     
@@ -177,6 +174,7 @@ def _web_search(question: str) -> str:
             return "웹 검색을 사용할 수 없습니다. TAVILY_API_KEY 환경 변수가 설정되지 않았습니다."
         
         # Tavily 검색 도구 초기화
+        from langchain_tavily import TavilySearch
         search_tool = TavilySearch(max_results=5, topic="general")
         query = f"technology {question}"
 
@@ -197,14 +195,15 @@ def _web_search(question: str) -> str:
         return f"웹 검색 실패: {str(e)}"
 
 
-def _generate_enhanced_answer(question: str, docs_context: str, web_results: str) -> str:
+def _generate_enhanced_answer(question: str, docs_context: str, web_results: str, conversation: str = "") -> str:
     """웹 검색 결과를 포함한 향상된 답변 생성"""
     try:
         web_chain = _get_web_search_chain()
         answer = web_chain.invoke({
             "question": question,
             "docs_context": docs_context,
-            "web_results": web_results
+            "web_results": web_results,
+            "conversation": conversation
         })
         return answer
     except Exception as e:
@@ -213,6 +212,8 @@ def _generate_enhanced_answer(question: str, docs_context: str, web_results: str
 
 class DocsAgentState(TypedDict):
     question: str
+    search_query: str
+    conversation: str
     context: str
     answer: str
     result: dict
@@ -221,7 +222,7 @@ class DocsAgentState(TypedDict):
 def retrieve_node(state: DocsAgentState) -> DocsAgentState:
     """검색 노드: 질문에 대한 관련 문서 검색"""
     retriever = get_retriever()
-    context = retriever.get_relevant_context(state["question"])
+    context = retriever.get_relevant_context(state.get("search_query") or state["question"])
     return {**state, "context": context}
 
 
@@ -229,6 +230,7 @@ def answer_node(state: DocsAgentState) -> DocsAgentState:
     """응답 노드: 컨텍스트를 바탕으로 답변 생성 (품질 평가 및 웹 검색 포함)"""
     question = state["question"]
     context = state["context"]
+    conversation = state.get("conversation") or ""
     
     try:
         if not context:
@@ -244,7 +246,8 @@ def answer_node(state: DocsAgentState) -> DocsAgentState:
             answer_chain = _get_answer_chain()
             initial_answer = answer_chain.invoke({
                 "question": question,
-                "context": context_text
+                "context": context_text,
+                "conversation": conversation
             })
             
             # 2단계: 답변 품질 평가
@@ -259,13 +262,14 @@ def answer_node(state: DocsAgentState) -> DocsAgentState:
                 print(f"🔍 답변 품질이 낮습니다 (점수: {quality_result.get('overall_score', 0)}/10). 웹 검색을 수행합니다...")
                 
                 # 웹 검색 수행
-                web_results = _web_search(question)
+                web_results = _web_search(state.get("search_query") or question)
                 
                 # 웹 검색 결과를 포함한 향상된 답변 생성
                 enhanced_answer = _generate_enhanced_answer(
                     question=question,
                     docs_context=context_text,
-                    web_results=web_results
+                    web_results=web_results,
+                    conversation=conversation
                 )
                 
                 # 향상된 답변의 품질 재평가
@@ -310,9 +314,9 @@ def format_node(state: DocsAgentState) -> DocsAgentState:
 
 # Docs Agent StateGraph 정의
 graph = StateGraph(DocsAgentState)
-graph.add_node("retrieve", retrieve_node)
-graph.add_node("answer", answer_node)
-graph.add_node("format", format_node)
+graph.add_node("retrieve", traced_node("docs.retrieve", retrieve_node))
+graph.add_node("answer", traced_node("docs.answer", answer_node))
+graph.add_node("format", traced_node("docs.format", format_node))
 
 graph.set_entry_point("retrieve")
 graph.add_edge("retrieve", "answer")
@@ -322,19 +326,22 @@ graph.add_edge("format", END)
 DOCS_GRAPH = graph.compile()
 
 
-def ask(question: str) -> Dict[str, Any]:
+def ask(question: str, conversation: Optional[str] = None, search_query: Optional[str] = None) -> Dict[str, Any]:
     """
     Docs Agent 진입점: 문서 기반 질의응답
     
     Args:
         question: 사용자 질문
+        conversation: 후속 질문의 대화 맥락 블록 (conversation.TurnContext.text)
+        search_query: 문서/웹 검색 질의 (생략 시 질문)
         
     Returns:
         문서 기반 답변 결과
     """
     try:
-        state = {"question": question}
-        final = DOCS_GRAPH.invoke(state)
+        state = {"question": question, "conversation": conversation or "", "search_query": search_query or question}
+        with span("docs.ask"):
+            final = DOCS_GRAPH.invoke(state)
         return final["result"]
         
     except Exception as e:
@@ -3,25 +3,34 @@
 문서 질의에 대한 관련 문서 검색 (LangChain + Chroma)
 """
 
-from typing import List, Dict, Any, Tuple
+from typing import TYPE_CHECKING, List, Dict, Any, Tuple
 import os
 import time
+import threading
 from dotenv import load_dotenv
-from langchain_community.vectorstores import Chroma
-from langchain_openai import OpenAIEmbeddings
 from langsmith import traceable
 from langchain.callbacks import LangChainTracer
 
+from ..usage import record_embedding
+from ..llm_clients import get_embeddings
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import Chroma
+
 # .env 파일 로드
 load_dotenv()
 
+# (index_dir, embed_model) → Chroma, 프로세스당 한 번만 로드
+_VECTORSTORES: Dict[Tuple[str, str], "Chroma"] = {}
+_VECTORSTORES_LOCK = threading.Lock()
+
 
 def _get_embeddings(model_name: str):
-    """임베딩 모델 초기화"""
-    return OpenAIEmbeddings(model=model_name, dimensions=1536)
+    """임베딩 모델 (공용 HTTP 풀/제한기 사용)"""
+    return get_embeddings(model_name, dimensions=1536)
 
 
-def load_vectorstore(index_dir: str, embed_model: str) -> Chroma:
+def load_vectorstore(index_dir: str, embed_model: str) -> "Chroma":
     """
     Chroma 벡터스토어 로드
     
@@ -32,6 +41,7 @@ def load_vectorstore(index_dir: str, embed_model: str) -> Chroma:
     Returns:
         Chroma 벡터스토어 인스턴스
     """
+    from langchain_community.vectorstores import Chroma
     return Chroma(
         collection_name="sagemaker_docs",
         persist_directory=index_dir,
@@ -39,6 +49,15 @@ def load_vectorstore(index_dir: str, embed_model: str) -> Chroma:
     )
 
 
+def get_vectorstore(index_dir: str, embed_model: str) -> "Chroma":
+    """공유 Chroma 벡터스토어 (첫 호출 시 로드, 이후 재사용)"""
+    key = (index_dir, embed_model)
+    with _VECTORSTORES_LOCK:
+        if key not in _VECTORSTORES:
+            _VECTORSTORES[key] = load_vectorstore(index_dir, embed_model)
+        return _VECTORSTORES[key]
+
+
 def _avg_score(scores: List[float]) -> float:
     """평균 점수 계산"""
     return sum(scores) / max(1, len(scores))
@@ -123,9 +142,10 @@ def retrieve(
     
     try:
         # 벡터스토어 로드
-        vs = load_vectorstore(index_dir, embed_model)
+        vs = get_vectorstore(index_dir, embed_model)
         
-        # relevance score: 0~1 (LangChain이 보장)
+        # relevance score: 0~1 (LangChain이 보장) — 질의 임베딩 1회 호출
+        record_embedding(embed_model, [question])
         docs_with_scores = vs.similarity_search_with_relevance_scores(question, k=top_k)
         
         # 점수 추출 및 평균 계산 (정규화된 점수 사용)
@@ -3,12 +3,15 @@ General Agent: 일반적인 대화/안내 응답 그래프
 """
 
 import os
-from typing import Dict, Any, TypedDict
+from typing import Dict, Any, Iterator, TypedDict
 from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
+from ..streaming import StreamEvent, stream_graph, answer_events
+from ..tracing import span, traced_node
+from ..llm_clients import get_chat_model
+
 
 class GeneralAgentState(TypedDict):
     question: str
@@ -40,13 +43,6 @@ SYSTEM_PROMPT = """당신은 FinOps RAG Agent의 General Assistant다.
 """
 
 
-def _make_llm():
-    model = "gpt-4o-mini"
-    temperature = 0.2
-    timeout = 20.0
-    return ChatOpenAI(model=model, temperature=temperature, timeout=timeout)
-
-
 def _get_general_chain():
     global _GENERAL_CHAIN
     if _GENERAL_CHAIN is None:
@@ -54,7 +50,7 @@ def _get_general_chain():
             ("system", SYSTEM_PROMPT),
             ("human", "{question}")
         ])
-        _GENERAL_CHAIN = prompt | _make_llm() | StrOutputParser()
+        _GENERAL_CHAIN = prompt | get_chat_model("gpt-4o-mini", temperature=0.2, timeout=20.0) | StrOutputParser()
     return _GENERAL_CHAIN
 
 
@@ -75,10 +71,11 @@ def process_node(state: GeneralAgentState) -> GeneralAgentState:
         )
 
     # 2) 후처리(너무 길면 자르기)
-    if len(response) > 1000:
-        response = response[:1000] + " …"
+    return {**state, "response": _truncate(response)}
+
 
-    return {**state, "response": response}
+def _truncate(response: str, limit: int = 1000) -> str:
+    return response[:limit] + " …" if len(response) > limit else response
 
 
 def format_node(state: GeneralAgentState) -> GeneralAgentState:
@@ -91,10 +88,15 @@ def format_node(state: GeneralAgentState) -> GeneralAgentState:
     return {**state, "result": result}
 
 
+def answer_result(answer: str) -> Dict[str, Any]:
+    """이미 생성된 답변(라우터의 의도+답변 통합 호출)을 ask와 같은 결과 형식으로"""
+    return format_node({"question": "", "response": _truncate(answer.strip()), "result": {}})["result"]
+
+
 # General Agent StateGraph 정의
 graph = StateGraph(GeneralAgentState)
-graph.add_node("process", process_node)
-graph.add_node("format", format_node)
+graph.add_node("process", traced_node("general.process", process_node))
+graph.add_node("format", traced_node("general.format", format_node))
 
 graph.set_entry_point("process")
 graph.add_edge("process", "format")
@@ -115,7 +117,8 @@ def ask(question: str) -> Dict[str, Any]:
     """
     try:
         state = {"question": question}
-        final = GENERAL_GRAPH.invoke(state)
+        with span("general.ask"):
+            final = GENERAL_GRAPH.invoke(state)
         return final["result"]
         
     except Exception as e:
@@ -125,3 +128,16 @@ def ask(question: str) -> Dict[str, Any]:
             "intent": "general",
             "answer": "죄송합니다. 응답 생성 중 오류가 발생했습니다."
         }
+
+
+def ask_stream(question: str) -> Iterator[StreamEvent]:
+    """ask의 스트리밍 버전: 답변 토큰 이벤트 후 final 이벤트"""
+    try:
+        yield from stream_graph(GENERAL_GRAPH, {"question": question}, answer_nodes=("process",))
+    except Exception as e:
+        yield from answer_events({
+            "error": True,
+            "message": f"General Agent 처리 중 오류 발생: {str(e)}",
+            "intent": "general",
+            "answer": "죄송합니다. 응답 생성 중 오류가 발생했습니다."
+        })
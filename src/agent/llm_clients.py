@@ -0,0 +1,476 @@
+"""
+LLM 클라이언트 레지스트리: 모델별 공유 HTTP 풀 + 전역 동시성/속도 제한 + 지연 히스토그램
+
+- get_chat_model/get_embeddings: 같은 설정이면 같은 ChatOpenAI/OpenAIEmbeddings 인스턴스를 돌려준다.
+  모듈마다 따로 만들던 클라이언트를 대신하며, 추적/사용량 콜백이 항상 붙는다.
+- HTTP: 모델마다 keep-alive httpx.Client/AsyncClient를 하나씩 둔다 (h2 패키지가 있으면 HTTP/2).
+- 제한: 모든 모델의 요청이 하나의 LLMLimiter를 거친다 — 동시 요청 수(LLM_MAX_CONCURRENCY),
+  분당 요청 수(LLM_MAX_RPM, 0이면 제한 없음). 429 응답은 Retry-After(없으면 지수 백오프+지터)만큼
+  모든 요청을 멈췄다가 같은 요청을 다시 보낸다. 나머지 오류 재시도는 openai SDK(max_retries)에 맡긴다.
+- 관측: 모델별 호출 지연(응답 본문 종료까지)과 대기열 대기 시간 히스토그램, 429/재시도 수 —
+  pool_stats()의 queue_wait가 늘어나면 풀이 포화된 것이다.
+
+httpx 비동기 커넥션은 생성된 이벤트 루프에 묶이므로, 비동기 커넥션 풀은 (모델, 이벤트 루프)마다
+따로 두고 AsyncClient가 요청 시점에 실행 중인 루프의 풀을 고른다. 동기 코드(Streamlit 등)에서
+비동기 파이프라인을 돌릴 때는 run_async로 프로세스 공용 백그라운드 루프에 제출해 풀을 공유한다.
+"""
+
+import os
+import time
+import random
+import asyncio
+import threading
+import importlib.util
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+import httpx
+
+from .tracing import get_llm_callback
+from .usage import get_usage_callback
+
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+LLM_HTTP_TIMEOUT_SEC = float(os.getenv("LLM_HTTP_TIMEOUT_SEC", "60"))
+# HTTP/2는 h2 패키지(httpx[http2])가 설치된 경우에만 사용
+LLM_HTTP2_ENABLED = (os.getenv("LLM_HTTP2_ENABLED", "true").lower() == "true"
+                     and importlib.util.find_spec("h2") is not None)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MAX_RPM = int(os.getenv("LLM_MAX_RPM", "0"))
+LLM_RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", "3"))
+LLM_BACKOFF_BASE_SEC = float(os.getenv("LLM_BACKOFF_BASE_SEC", "0.5"))
+LLM_BACKOFF_MAX_SEC = float(os.getenv("LLM_BACKOFF_MAX_SEC", "30"))
+
+DEFAULT_POOL = "default"
+# 히스토그램 버킷 상한(ms), 마지막은 +Inf
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# 전역 클라이언트/루프(singleton)
+_HTTP_CLIENTS: Dict[str, httpx.Client] = {}
+_ASYNC_HTTP_CLIENTS: Dict[str, httpx.AsyncClient] = {}
+# (모델, id(루프)) -> (루프, transport): 비동기 커넥션 풀은 루프마다 따로
+_ASYNC_TRANSPORTS: Dict[tuple, tuple] = {}
+_CHAT_MODELS: Dict[tuple, Any] = {}
+_EMBEDDINGS: Dict[tuple, Any] = {}
+_POOL_STATS: Dict[str, "PoolStats"] = {}
+_LIMITER: Optional["LLMLimiter"] = None
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+# 클라이언트 생성 중 get_limiter/get_pool_stats를 다시 부르므로 재진입 가능
+_LOCK = threading.RLock()
+
+
+# ── 관측 ────────────────────────────────────────────────────
+class LatencyHistogram:
+    """누적 버킷 없이 구간별 개수를 세는 지연 히스토그램 (분위수는 버킷 상한으로 근사)"""
+
+    def __init__(self, buckets_ms: tuple = LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        i = next((i for i, bound in enumerate(self.buckets_ms) if ms <= bound), len(self.buckets_ms))
+        self.counts[i] += 1
+        self.count += 1
+        self.sum_ms += ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return float(self.buckets_ms[i]) if i < len(self.buckets_ms) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"<={b}" for b in self.buckets_ms] + [f">{self.buckets_ms[-1]}"]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum_ms / self.count, 1) if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class PoolStats:
+    """모델(HTTP 풀)별 호출 지연/대기열 대기 히스토그램과 상태 코드 집계"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.queue_wait = LatencyHistogram()
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, wait_ms: float, latency_ms: Optional[float], status_code: Optional[int]) -> None:
+        with self._lock:
+            self.requests += 1
+            self.queue_wait.observe(wait_ms)
+            if latency_ms is not None:
+                self.latency.observe(latency_ms)
+            if status_code == 429:
+                self.throttled += 1
+            elif status_code is None or status_code >= 500:
+                self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"requests": self.requests, "throttled": self.throttled, "errors": self.errors,
+                    "latency": self.latency.snapshot(), "queue_wait": self.queue_wait.snapshot()}
+
+
+def get_pool_stats(model: str = DEFAULT_POOL) -> PoolStats:
+    with _LOCK:
+        return _POOL_STATS.setdefault(model, PoolStats())
+
+
+def pool_stats() -> Dict[str, Any]:
+    """전역 제한기 상태와 모델별 히스토그램"""
+    with _LOCK:
+        models = dict(_POOL_STATS)
+    return {"limiter": get_limiter().stats(), "models": {m: s.snapshot() for m, s in models.items()}}
+
+
+# ── 전역 동시성/속도 제한 ────────────────────────────────────
+class LLMLimiter:
+    """동시 요청 수 + 분당 요청 수 제한, 429 후 전체 일시 정지 (sync/async 공용)"""
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, max_rpm: int = LLM_MAX_RPM):
+        self.max_concurrency = max_concurrency
+        self.max_rpm = max_rpm
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._paused_until = 0.0
+        self._starts: Deque[float] = deque()
+        self._stats = {"acquired": 0, "throttled": 0}
+
+    def _try_acquire(self) -> Optional[float]:
+        """획득하면 None, 아니면 다시 시도하기까지 기다릴 초 (_cond 보유 상태에서 호출)"""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._in_flight >= self.max_concurrency:
+            return 0.05
+        if self.max_rpm > 0:
+            while self._starts and now - self._starts[0] >= 60:
+                self._starts.popleft()
+            if len(self._starts) >= self.max_rpm:
+                return self._starts[0] + 60 - now
+            self._starts.append(now)
+        self._in_flight += 1
+        self._max_in_flight = max(self._max_in_flight, self._in_flight)
+        self._stats["acquired"] += 1
+        return None
+
+    def acquire(self) -> None:
+        with self._cond:
+            while (wait := self._try_acquire()) is not None:
+                self._cond.wait(wait)
+
+    async def acquire_async(self) -> None:
+        # 이벤트 루프를 막지 않도록 잠금은 짧게 잡고 대기는 asyncio.sleep으로
+        while True:
+            with self._cond:
+                wait = self._try_acquire()
+            if wait is None:
+                return
+            await asyncio.sleep(min(wait, 0.05))
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def throttle(self, delay_sec: float) -> None:
+        """429: delay_sec 동안 새 요청을 보내지 않음"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay_sec)
+            self._stats["throttled"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {**self._stats, "in_flight": self._in_flight, "max_in_flight": self._max_in_flight,
+                    "max_concurrency": self.max_concurrency, "max_rpm": self.max_rpm,
+                    "paused_sec": round(max(0.0, self._paused_until - time.monotonic()), 3)}
+
+
+def get_limiter() -> LLMLimiter:
+    global _LIMITER
+    with _LOCK:
+        if _LIMITER is None:
+            _LIMITER = LLMLimiter()
+        return _LIMITER
+
+
+def retry_delay(response: httpx.Response, attempt: int) -> float:
+    """429 재시도 대기: retry-after-ms/Retry-After 헤더, 없으면 지수 백오프 + 지터"""
+    for header, scale in (("retry-after-ms", 1000.0), ("retry-after", 1.0)):
+        try:
+            return min(LLM_BACKOFF_MAX_SEC, float(response.headers[header]) / scale)
+        except (KeyError, ValueError):
+            continue
+    backoff = min(LLM_BACKOFF_MAX_SEC, LLM_BACKOFF_BASE_SEC * 2 ** attempt)
+    return backoff * (0.5 + random.random() / 2)
+
+
+# ── 제한/관측을 거치는 transport ─────────────────────────────
+class _Release:
+    """응답 본문이 끝날 때(스트리밍 포함) 한 번만 슬롯 반환 + 지연 기록"""
+
+    def __init__(self, limiter: LLMLimiter, stats: PoolStats, wait_ms: float, start: float, status_code: int):
+        self._limiter, self._stats = limiter, stats
+        self._wait_ms, self._start, self._status_code = wait_ms, start, status_code
+        self._done = False
+
+    def __call__(self) -> None:
+        if self._done:
+            return
+        self._done = True
+        self._limiter.release()
+        self._stats.observe(self._wait_ms, (time.perf_counter() - self._start) * 1000, self._status_code)
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]):
+        self._stream, self._release = stream, release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream, self._release = stream, release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+def _wrap(response: httpx.Response, stream: Any) -> httpx.Response:
+    return httpx.Response(status_code=response.status_code, headers=response.headers, stream=stream,
+                          extensions=response.extensions)
+
+
+class LimitedTransport(httpx.BaseTransport):
+    """전역 제한기로 동시성/속도를 제한하고 429를 재시도하는 동기 transport"""
+
+    def __init__(self, inner: httpx.BaseTransport, model: str = DEFAULT_POOL,
+                 limiter: Optional[LLMLimiter] = None, retries: int = LLM_RATE_LIMIT_RETRIES):
+        self._inner = inner
+        self._limiter = limiter or get_limiter()
+        self._stats = get_pool_stats(model)
+        self._retries = retries
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self._retries + 1):
+            queued = time.perf_counter()
+            self._limiter.acquire()
+            wait_ms = (time.perf_counter() - queued) * 1000
+            start = time.perf_counter()
+            try:
+                response = self._inner.handle_request(request)
+            except BaseException:
+                self._limiter.release()
+                self._stats.observe(wait_ms, (time.perf_counter() - start) * 1000, None)
+                raise
+            release = _Release(self._limiter, self._stats, wait_ms, start, response.status_code)
+            if response.status_code == 429 and attempt < self._retries:
+                response.close()
+                release()
+                self._limiter.throttle(retry_delay(response, attempt))
+                continue
+            return _wrap(response, _ReleasingStream(response.stream, release))
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        self._inner.close()
+
+
+class AsyncLimitedTransport(httpx.AsyncBaseTransport):
+    """LimitedTransport의 비동기 버전 (같은 전역 제한기 공유)"""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, model: str = DEFAULT_POOL,
+                 limiter: Optional[LLMLimiter] = None, retries: int = LLM_RATE_LIMIT_RETRIES):
+        self._inner = inner
+        self._limiter = limiter or get_limiter()
+        self._stats = get_pool_stats(model)
+        self._retries = retries
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self._retries + 1):
+            queued = time.perf_counter()
+            await self._limiter.acquire_async()
+            wait_ms = (time.perf_counter() - queued) * 1000
+            start = time.perf_counter()
+            try:
+                response = await self._inner.handle_async_request(request)
+            except BaseException:
+                self._limiter.release()
+                self._stats.observe(wait_ms, (time.perf_counter() - start) * 1000, None)
+                raise
+            release = _Release(self._limiter, self._stats, wait_ms, start, response.status_code)
+            if response.status_code == 429 and attempt < self._retries:
+                await response.aclose()
+                release()
+                self._limiter.throttle(retry_delay(response, attempt))
+                continue
+            return _wrap(response, _AsyncReleasingStream(response.stream, release))
+        raise AssertionError("unreachable")
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+# ── HTTP 클라이언트 ─────────────────────────────────────────
+def _limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_KEEPALIVE)
+
+
+def get_http_client(model: str = DEFAULT_POOL) -> httpx.Client:
+    """동기 LLM 호출용 모델별 공유 httpx.Client"""
+    with _LOCK:
+        client = _HTTP_CLIENTS.get(model)
+        if client is None or client.is_closed:
+            transport = httpx.HTTPTransport(limits=_limits(), http2=LLM_HTTP2_ENABLED)
+            client = _HTTP_CLIENTS[model] = httpx.Client(
+                transport=LimitedTransport(transport, model, _LIMITER), timeout=LLM_HTTP_TIMEOUT_SEC)
+        return client
+
+
+def _get_async_transport(model: str) -> AsyncLimitedTransport:
+    """실행 중인 이벤트 루프에 묶인 모델별 비동기 커넥션 풀"""
+    loop = asyncio.get_running_loop()
+    key = (model, id(loop))
+    with _LOCK:
+        entry = _ASYNC_TRANSPORTS.get(key)
+        if entry is None or entry[0] is not loop:
+            # 닫힌 루프의 풀은 다시 쓸 수 없으므로 버림 (id가 새 루프에 재사용된 경우 포함)
+            for stale in [k for k, (owner, _) in _ASYNC_TRANSPORTS.items() if k == key or owner.is_closed()]:
+                del _ASYNC_TRANSPORTS[stale]
+            transport = httpx.AsyncHTTPTransport(limits=_limits(), http2=LLM_HTTP2_ENABLED)
+            entry = _ASYNC_TRANSPORTS[key] = (loop, AsyncLimitedTransport(transport, model, _LIMITER))
+        return entry[1]
+
+
+class _LoopLocalTransport(httpx.AsyncBaseTransport):
+    """요청을 실행 중인 이벤트 루프의 커넥션 풀로 보내는 transport"""
+
+    def __init__(self, model: str):
+        self._model = model
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await _get_async_transport(self._model).handle_async_request(request)
+
+    async def aclose(self) -> None:
+        # 다른 루프의 커넥션은 그 루프에서만 닫을 수 있으므로 현재 루프의 풀만 닫음
+        loop = asyncio.get_running_loop()
+        with _LOCK:
+            entry = _ASYNC_TRANSPORTS.pop((self._model, id(loop)), None)
+        if entry is not None and entry[0] is loop:
+            await entry[1].aclose()
+
+
+def get_async_http_client(model: str = DEFAULT_POOL) -> httpx.AsyncClient:
+    """비동기 LLM 호출용 모델별 공유 httpx.AsyncClient
+
+    어느 이벤트 루프에서 호출해도 되며, 커넥션 풀은 호출 시점의 루프마다 따로 쓴다.
+    """
+    with _LOCK:
+        client = _ASYNC_HTTP_CLIENTS.get(model)
+        if client is None or client.is_closed:
+            client = _ASYNC_HTTP_CLIENTS[model] = httpx.AsyncClient(
+                transport=_LoopLocalTransport(model), timeout=LLM_HTTP_TIMEOUT_SEC)
+        return client
+
+
+# ── 모델 레지스트리 ─────────────────────────────────────────
+def get_chat_model(model: str = "gpt-4o-mini", temperature: float = 0.0, timeout: float = 30.0,
+                   **kwargs: Any) -> Any:
+    """공용 ChatOpenAI (설정이 같으면 같은 인스턴스)
+
+    langchain_openai/openai import가 ~1초 걸려 첫 사용 시점에 로드한다.
+    """
+    key = (model, temperature, timeout, tuple(sorted(kwargs.items())))
+    with _LOCK:
+        if key in _CHAT_MODELS:
+            return _CHAT_MODELS[key]
+    from langchain_openai import ChatOpenAI
+    llm = ChatOpenAI(model=model, temperature=temperature, timeout=timeout,
+                     http_client=get_http_client(model), http_async_client=get_async_http_client(model),
+                     callbacks=[get_llm_callback(), get_usage_callback()], **kwargs)
+    with _LOCK:
+        return _CHAT_MODELS.setdefault(key, llm)
+
+
+def get_embeddings(model: str = "text-embedding-3-small", **kwargs: Any) -> Any:
+    """공용 OpenAIEmbeddings (같은 HTTP 풀/제한기 사용)"""
+    key = (model, tuple(sorted(kwargs.items())))
+    with _LOCK:
+        if key in _EMBEDDINGS:
+            return _EMBEDDINGS[key]
+    from langchain_openai import OpenAIEmbeddings
+    embeddings = OpenAIEmbeddings(model=model, http_client=get_http_client(model),
+                                  http_async_client=get_async_http_client(model), **kwargs)
+    with _LOCK:
+        return _EMBEDDINGS.setdefault(key, embeddings)
+
+
+# ── 공용 이벤트 루프 ────────────────────────────────────────
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP
+    with _LOCK:
+        if _LOOP is None or _LOOP.is_closed():
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name="llm-async-loop", daemon=True).start()
+        return _LOOP
+
+
+def run_async(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """코루틴을 공용 백그라운드 이벤트 루프에서 실행하고 결과를 기다림
+
+    여러 스레드(사용자 세션)가 동시에 호출해도 하나의 루프와 커넥션 풀을 공유한다.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _get_loop())
+    return future.result(timeout)
+
+
+def close_http_clients() -> None:
+    """공유 클라이언트, 모델 인스턴스와 백그라운드 루프 정리 (테스트/종료 시)"""
+    global _LOOP
+    with _LOCK:
+        http_clients: List[httpx.Client] = list(_HTTP_CLIENTS.values())
+        loop = _LOOP
+        # 공용 루프의 풀만 여기서 닫을 수 있고, 다른 루프(asyncio.run 등)의 풀은 루프와 함께 정리됨
+        async_transports = [t for owner, t in _ASYNC_TRANSPORTS.values() if owner is loop]
+        _HTTP_CLIENTS.clear()
+        _ASYNC_HTTP_CLIENTS.clear()
+        _ASYNC_TRANSPORTS.clear()
+        _CHAT_MODELS.clear()
+        _EMBEDDINGS.clear()
+        _LOOP = None
+    for client in http_clients:
+        client.close()
+    if loop is not None:
+        for transport in async_transports:
+            asyncio.run_coroutine_threadsafe(transport.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
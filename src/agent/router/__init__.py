@@ -3,6 +3,9 @@ Router Agent: 사용자 질문의 의도를 파악하여 적절한 Agent로 라
 """
 
 from .intent_router import classify_intent
-from .graph import ask
+from .fast_intent import classify_intent_fast
+from .intent_cache import get_intent_cache
+from .response_cache import get_response_cache
+from .graph import ask, ask_stream
 
-__all__ = ["classify_intent", "ask"]
+__all__ = ["classify_intent", "classify_intent_fast", "get_intent_cache", "get_response_cache", "ask", "ask_stream"]
@@ -0,0 +1,186 @@
+"""
+로컬 의도 분류기: LLM 호출 없이 ~1ms 안에 끝나는 1단계 분류
+
+- 규칙: 인사/도움말 같은 짧은 문장, 수치 질의 키워드, 문서/설정 질문 키워드
+- kNN: intent_examples.json의 라벨된 예시를 문자 n-gram 해싱 벡터(text_vector)로 임베딩해
+  상위 k개 유사 예시의 가중 투표
+둘의 결과를 합쳐 신뢰도를 매기고, classify_intent는 신뢰도가 FAST_INTENT_THRESHOLD
+미만일 때만 LLM 분류로 넘어간다. "비용이 어떻게 계산되나요?"처럼 수치/문서 신호가
+섞인 질문은 규칙이 판단하지 않고 예시 유사도에 맡긴다.
+"비용/요금/비중" 단어만으로는 수치 질의라고 보지 않는다 ("비용 최적화 팁", "요금표 보여줘").
+집계/기간 신호가 함께 없으면 sql 신뢰도를 WEAK_SQL_MAX_CONFIDENCE로 낮춰 LLM이 판단하게 한다.
+예시(intent_examples.json)에는 테스트 골든셋 질문을 넣지 않는다 (평가가 정확 일치 0.99로 새지 않도록).
+"""
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ...utils.text_vector import embed_text, embed_texts, top_k_similar
+
+
+FAST_INTENT_ENABLED = os.getenv("INTENT_FAST_ENABLED", "true").lower() == "true"
+FAST_INTENT_THRESHOLD = float(os.getenv("INTENT_FAST_THRESHOLD", "0.8"))
+INTENT_EXAMPLES_PATH = Path(__file__).with_name("intent_examples.json")
+KNN_K = 5
+KNN_MIN_SIMILARITY = 0.35
+KNN_EXACT_SIMILARITY = 0.95
+WEAK_SQL_MAX_CONFIDENCE = 0.7
+
+_GENERAL_EXACT = re.compile(
+    r"^(안녕(하세요)?|하이|ㅎㅇ|hi|hello|반가워(요)?|감사(합니다|해요)?|고마워(요)?|고맙습니다|"
+    r"도움말?|help|헬프|수고(했어|하셨습니다)?)[\s!?.~]*$",
+    re.IGNORECASE,
+)
+# 시스템 자체에 대한 질문(사용법/기능/정체)은 "어떻게" 등이 있어도 general
+_GENERAL_META = re.compile(
+    r"(이\s*시스템|이\s*챗봇|(^|\s)(너|넌|당신)(는|가|의)?\s).*(누구|이름|사용|쓰|할\s*수)|"
+    r"(무엇을|뭘|뭐|어떤\s*질문을?)\s*할\s*수|^사용법(\s*알려\s*줘)?[\s?!.]*$",
+    re.IGNORECASE,
+)
+# 집계/기간 신호 (이것만 있어도 수치 질의)
+_SQL_KEYWORDS = re.compile(
+    r"얼마|합계|총액|사용량|사용 ?시간|추이|통계|그래프|상위|top\s*\d|가장\s*(비싼|높은|긴|많이)|"
+    r"월별|계정별|타입별|유형별|비율|누락률|분포|집계|분석|내역|증가|감소|"
+    r"\d+\s*월|이번\s*달|지난\s*달|전월|최근|올해|작년",
+    re.IGNORECASE,
+)
+# 수치 질의에 자주 나오지만 혼자서는 근거가 약한 단어
+_SQL_WEAK_KEYWORDS = re.compile(r"비용|요금|비중")
+_DOCS_KEYWORDS = re.compile(
+    r"방법|어떻게|설정|구성|개념|설명|가이드|튜토리얼|레퍼런스|문서|작동|동작|원리|차이|사용법|"
+    r"예제|무엇인가요|뭐야|란\?|이란|절차|모범\s*사례|(하는|만드는|쓰는|보는)\s*법",
+    re.IGNORECASE,
+)
+
+_INDEX = None  # singleton
+_INDEX_LOCK = threading.Lock()
+
+
+class IntentExampleIndex:
+    """라벨된 예시 질문의 벡터 인덱스 (메모리, 수십~수백 개 규모)"""
+
+    def __init__(self, examples: List[Dict[str, str]]):
+        self.questions = [ex["question"] for ex in examples]
+        self.intents = [ex["intent"] for ex in examples]
+        self.matrix = embed_texts(self.questions)
+
+    @classmethod
+    def from_file(cls, path: Path = INTENT_EXAMPLES_PATH) -> "IntentExampleIndex":
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def search(self, question: str, k: int = KNN_K) -> List[Tuple[str, str, float]]:
+        """유사도 상위 k개의 (예시 질문, 의도, 유사도)"""
+        hits = top_k_similar(embed_text(question), self.matrix, k)
+        return [(self.questions[i], self.intents[i], score) for i, score in hits]
+
+
+def get_intent_index() -> IntentExampleIndex:
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = IntentExampleIndex.from_file()
+    return _INDEX
+
+
+def _rule_vote(question: str) -> Optional[Dict[str, object]]:
+    """규칙 기반 판단 — 신호가 한쪽으로만 있을 때만 의도를 정함"""
+    if _GENERAL_EXACT.match(question):
+        return {"intent": "general", "confidence": 0.97, "reason": "규칙: 인사/도움말"}
+    if _GENERAL_META.search(question):
+        return {"intent": "general", "confidence": 0.9, "reason": "규칙: 시스템 사용/기능 문의"}
+    strong_hits = [m.group(0) for m in _SQL_KEYWORDS.finditer(question)]
+    sql_hits = [m.group(0) for m in _SQL_WEAK_KEYWORDS.finditer(question)] + strong_hits
+    docs_hits = [m.group(0) for m in _DOCS_KEYWORDS.finditer(question)]
+    if sql_hits and not docs_hits:
+        if not strong_hits:
+            return {"intent": "sql", "confidence": WEAK_SQL_MAX_CONFIDENCE,
+                    "reason": f"규칙: 비용 키워드만 있음({', '.join(sql_hits[:3])}), 집계/기간 신호 없음"}
+        return {"intent": "sql", "confidence": min(0.95, 0.85 + 0.05 * (len(sql_hits) - 1)),
+                "reason": f"규칙: 수치 질의 키워드({', '.join(sql_hits[:3])})"}
+    if docs_hits and not sql_hits:
+        return {"intent": "docs", "confidence": min(0.95, 0.85 + 0.05 * (len(docs_hits) - 1)),
+                "reason": f"규칙: 문서/설정 질문 키워드({', '.join(docs_hits[:3])})"}
+    return None
+
+
+def _is_weak_sql(question: str) -> bool:
+    """비용/요금/비중 단어는 있지만 집계/기간 신호는 없는 질문"""
+    return bool(_SQL_WEAK_KEYWORDS.search(question)) and not _SQL_KEYWORDS.search(question)
+
+
+def _knn_vote(question: str, index: IntentExampleIndex) -> Optional[Dict[str, object]]:
+    """유사 예시 가중 투표 — 신뢰도는 득표율 × 최고 유사도(최대 0.95), 예시와 같은 질문이면 0.99"""
+    hits = [h for h in index.search(question) if h[2] >= KNN_MIN_SIMILARITY]
+    if not hits:
+        return None
+    best_question, intent, best_score = hits[0]
+    if best_score >= KNN_EXACT_SIMILARITY:
+        return {"intent": intent, "confidence": 0.99, "reason": f"유사 예시: '{best_question}' ({best_score:.2f})"}
+    votes: Dict[str, float] = {}
+    for _, intent, score in hits:
+        votes[intent] = votes.get(intent, 0.0) + score
+    intent = max(votes, key=votes.get)
+    best_question, _, best_score = next(h for h in hits if h[1] == intent)
+    share = votes[intent] / sum(votes.values())
+    confidence = float(np.clip(share * min(1.0, best_score / 0.6), 0.0, 0.95))
+    return {"intent": intent, "confidence": round(confidence, 3),
+            "reason": f"유사 예시: '{best_question}' ({best_score:.2f})"}
+
+
+def classify_intent_fast(question: str) -> Optional[Dict[str, object]]:
+    """규칙 + kNN으로 의도 추정 (판단 근거가 없으면 None)
+
+    Returns:
+        {"intent", "confidence", "reason", "source"} — source는 "rule" | "knn" | "rule+knn"
+    """
+    q = (question or "").strip()
+    if not q:
+        return None
+    knn = _knn_vote(q, get_intent_index())
+    if knn and knn["confidence"] >= 0.99:
+        # 라벨된 예시와 같은 질문은 규칙보다 예시를 따름
+        return {**knn, "source": "knn"}
+    result = _combine(_rule_vote(q), knn)
+    if result and result["intent"] == "sql" and _is_weak_sql(q):
+        # 비슷한 예시가 sql이어도 비용 단어만으로는 확신하지 않음 → LLM 판단
+        result["confidence"] = min(result["confidence"], WEAK_SQL_MAX_CONFIDENCE)
+    return result
+
+
+def _combine(rule: Optional[Dict[str, object]], knn: Optional[Dict[str, object]]) -> Optional[Dict[str, object]]:
+    """규칙과 예시 투표를 합친 결과"""
+    if rule and knn:
+        if rule["intent"] == knn["intent"]:
+            confidence = min(0.99, max(rule["confidence"], knn["confidence"]) + 0.03)
+            return {**rule, "confidence": round(confidence, 3),
+                    "reason": f"{rule['reason']}, {knn['reason']}", "source": "rule+knn"}
+        # 규칙과 예시가 엇갈리면 반대쪽 신뢰도만큼 깎아 LLM에 맡김 (LLM 실패 시 추정값으로 사용)
+        winner, loser = (rule, knn) if rule["confidence"] >= knn["confidence"] else (knn, rule)
+        return {**winner, "confidence": round(winner["confidence"] - 0.5 * loser["confidence"], 3),
+                "reason": f"{rule['reason']} / {knn['reason']} (불일치)", "source": "rule+knn"}
+    if rule:
+        return {**rule, "source": "rule"}
+    if knn:
+        return {**knn, "source": "knn"}
+    return None
+
+
+def rank_intents(question: str, k: int = 3) -> List[str]:
+    """가능성 높은 의도 순서 (라우터의 추측 실행 후보) — 로컬 분류 결과, 이어서 예시 유사도 득표순"""
+    q = (question or "").strip()
+    if not q:
+        return []
+    fast = classify_intent_fast(q)
+    ranked = [fast["intent"]] if fast else []
+    votes: Dict[str, float] = {}
+    for _, intent, score in get_intent_index().search(q):
+        votes[intent] = votes.get(intent, 0.0) + max(score, 0.0)
+    ranked += [intent for intent in sorted(votes, key=votes.get, reverse=True) if intent not in ranked]
+    return ranked[:k]
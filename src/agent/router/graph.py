@@ -1,11 +1,76 @@
 """
 Router Agent: 사용자 질문을 의도에 따라 적절한 Agent로 라우팅하는 메인 그래프
+의도 분류(LLM 왕복) 동안 각 Agent의 사전 준비(prefetch)를 병렬로 시작하고,
+분류된 의도가 아닌 Agent의 준비 작업은 취소한다.
+
+추측 실행(speculative dispatch): 로컬 분류기가 확신하지 못해 LLM 분류가 필요한 질문은
+로컬 추정 상위 후보 Agent를 LLM 분류와 동시에 실행하고, 최종 의도와 같은 후보의 결과를
+그대로 쓴다. 다른 후보는 취소(시작 전) 또는 결과 폐기(실행 중)한다.
+Agent는 조회/답변 생성만 하므로 폐기된 실행의 부작용은 LLM 호출 비용뿐이다.
+
+LLM 분류 호출이 general 답변까지 만들어 준 경우(intent_answer) General Agent는 호출하지 않는다.
+
+응답 캐시(response_cache): 의도가 정해지면 (질문, 의도, 데이터 버전)으로 이전 응답을 찾아
+Agent 실행 없이 반환한다. 데이터가 바뀐(ETL 게시) stale 응답도 즉시 반환하고 백그라운드에서 갱신한다.
+
+추적(tracing): ask/ask_stream이 루트 span을 열고, 라우터/Agent 노드와 LLM 호출이 그 아래 span으로
+기록된다. 응답에는 trace_id, elapsed_ms, 단계별 시간(timings), 토큰 합계가 붙는다.
+
+사용량(usage): 요청마다 UsageMeter를 열어 LLM/임베딩 호출 수, 토큰, 추정 비용을 집계해 응답에 붙이고
+요청(세션) 단위로 사용량 저장소에 기록한다. 폐기된 추측 실행의 호출도 비용이므로 함께 합산된다.
+
+대화(conversation): session_id가 있으면 세션의 대화 상태를 불러와, 후속 질문("그럼 지난달은?")이면
+대화 맥락 블록과 슬롯(기간/서비스/계정)을 분류·NL2SQL·문서 프롬프트에 넘긴다. 후속 질문은 질문만으로
+답이 정해지지 않으므로 사전 준비와 응답 캐시를 쓰지 않고, 직전 턴의 의도를 추측 실행 후보로 쓴다.
 """
 
-from typing import Dict, Any, TypedDict
+import os
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple, TypedDict
 from langgraph.graph import StateGraph, END
 
 from .intent_router import classify_intent, IntentType
+from .fast_intent import classify_intent_fast, rank_intents, FAST_INTENT_THRESHOLD
+from .response_cache import get_response_cache, data_version, ResponseCache, CACHEABLE_INTENTS
+from ..streaming import StreamEvent, intent_event, answer_events, final_event
+from ..tracing import Span, span, activate, annotate, iterate_in_span, traced_node, trace_summary, \
+    submit_in_context, current_span, TRACE_ENABLED
+from ..usage import UsageMeter, track_usage, iterate_metered, record_usage
+from ..conversation import Conversation, TurnContext, get_conversation
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_ENABLED = os.getenv("ROUTER_PREFETCH_ENABLED", "true").lower() == "true"
+SPECULATIVE_ENABLED = os.getenv("ROUTER_SPECULATIVE_ENABLED", "true").lower() == "true"
+SPECULATIVE_TOP_K = int(os.getenv("ROUTER_SPECULATIVE_TOP_K", "1"))
+SPECULATIVE_WORKERS = int(os.getenv("ROUTER_SPECULATIVE_WORKERS", "4"))
+
+# 추측 실행과 stale 응답 백그라운드 갱신에 사용
+_SPECULATION_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _SPECULATION_POOL
+    with _POOL_LOCK:
+        if _SPECULATION_POOL is None:
+            _SPECULATION_POOL = ThreadPoolExecutor(max_workers=SPECULATIVE_WORKERS,
+                                                   thread_name_prefix="router-speculation")
+        return _SPECULATION_POOL
+
+
+def _start_sql_prefetch(question: str):
+    from ..sql_agent import start_prefetch
+    return start_prefetch(question)
+
+
+# intent → 질문을 받아 cancel()이 가능한 사전 준비 핸들을 반환하는 함수
+PREFETCHERS: Dict[str, Callable[[str], Any]] = {
+    "sql": _start_sql_prefetch,
+}
 
 
 class RouterState(TypedDict):
@@ -13,21 +78,172 @@ class RouterState(TypedDict):
     intent: IntentType
     intent_confidence: float
     intent_reason: str
+    intent_answer: str
     sql_result: Dict[str, Any]
     docs_result: Dict[str, Any]
     general_result: Dict[str, Any]
     final_result: Dict[str, Any]
+    prefetch: Dict[str, Any]
+    speculation: Dict[str, Any]
+    cache_status: str                  # "hit" | "stale" | "miss" | "off"
+    data_version: Optional[str]
+    context: Optional[TurnContext]     # 후속 질문의 대화 맥락 (독립 질문이면 None)
 
 
-def prepare_node(state: RouterState) -> RouterState:
-    """준비 노드: 질문의 의도를 분류"""
-    intent_result = classify_intent(state["question"])
-    return {
+def _start_prefetches(question: str) -> Dict[str, Any]:
+    """의도 분류와 병렬로 각 Agent의 사전 준비 시작 (실패해도 라우팅에는 영향 없음)"""
+    if not PREFETCH_ENABLED:
+        return {}
+    handles = {}
+    for intent, start in PREFETCHERS.items():
+        try:
+            handles[intent] = start(question)
+        except Exception as e:
+            logger.warning(f"{intent} prefetch 시작 실패: {e}")
+    return handles
+
+
+def _speculation_candidates(question: str) -> List[str]:
+    """추측 실행할 Agent 후보 (로컬 분류로 바로 확정되는 질문은 없음)"""
+    if not SPECULATIVE_ENABLED or SPECULATIVE_TOP_K <= 0:
+        return []
+    fast = classify_intent_fast(question)
+    if fast is not None and fast["confidence"] >= FAST_INTENT_THRESHOLD:
+        return []
+    return rank_intents(question, SPECULATIVE_TOP_K)
+
+
+def _followup_candidates(context: TurnContext) -> List[str]:
+    """후속 질문의 추측 실행 후보: 질문만으로는 로컬 추정이 어려워 직전 턴의 의도"""
+    if not SPECULATIVE_ENABLED or SPECULATIVE_TOP_K <= 0 or context.get("intent") not in DISPATCHERS:
+        return []
+    return [context["intent"]]
+
+
+def _prepare(state: RouterState, speculate: Optional[Callable[[str, RouterState], Any]] = None) -> RouterState:
+    """사전 준비/추측 실행을 시작하고 의도를 분류한 뒤, 선택되지 않은 작업은 취소"""
+    question = state["question"]
+    context = state.get("context")
+    prefetch = _start_prefetches(question) if context is None else {}
+    speculation = {}
+    if speculate is not None:
+        candidates = _speculation_candidates(question) if context is None else _followup_candidates(context)
+        for intent in candidates:
+            try:
+                speculation[intent] = speculate(intent, {**state, "prefetch": {
+                    k: v for k, v in prefetch.items() if k == intent
+                }})
+            except Exception as e:
+                logger.warning(f"{intent} 추측 실행 시작 실패: {e}")
+
+    if context is None:
+        intent_result = classify_intent(question)
+        cached, cache_status, version = _lookup_response(question, intent_result["intent"])
+    else:
+        intent_result = _classify_followup(question, context)
+        cached, cache_status, version = None, "off", None
+    chosen = intent_result["intent"]
+    answer = intent_result.get("answer", "")
+    annotate(**{"router.intent": chosen, "router.response_cache": cache_status,
+                "router.followup": context is not None})
+    # 이미 답이 있으면(분류 호출의 답변, 캐시된 응답) 모두, 아니면 선택되지 않은 작업만 취소
+    answered = bool(answer) or cached is not None
+    for handles in (prefetch, speculation):
+        for intent, handle in handles.items():
+            if intent != chosen or answered:
+                handle.cancel()
+    prepared = {
         **state, 
-        "intent": intent_result["intent"],
+        "prefetch": {k: v for k, v in prefetch.items() if k == chosen},
+        "speculation": {k: v for k, v in speculation.items() if k == chosen and not answered},
+        "intent": chosen,
         "intent_confidence": intent_result["confidence"],
-        "intent_reason": intent_result["reason"]
+        "intent_reason": intent_result["reason"],
+        "intent_answer": answer,
+        "cache_status": cache_status,
+        "data_version": version
     }
+    if cached is not None:
+        prepared["final_result"] = cached
+    return prepared
+
+
+def _classify_followup(question: str, context: TurnContext) -> Dict[str, Any]:
+    """후속 질문 분류: 대화 맥락과 함께 LLM 분류, 실패하면 직전 턴의 의도 유지"""
+    result = classify_intent(question, context=context["text"])
+    if result["source"] in ("fallback", "default") and context.get("intent") in DISPATCHERS:
+        return {"intent": context["intent"], "confidence": 0.5, "reason": "분류 실패로 직전 대화의 의도 유지",
+                "source": "conversation"}
+    return result
+
+
+def _lookup_response(question: str, intent: str) -> Tuple[Optional[Dict[str, Any]], str, Optional[str]]:
+    """응답 캐시 조회: (캐시된 응답, hit | stale | miss | off, 현재 데이터 버전)"""
+    cache = get_response_cache()
+    if cache is None or intent not in CACHEABLE_INTENTS:
+        return None, "off", None
+    try:
+        version = data_version(intent)
+        found = cache.get(question, intent, version)
+    except Exception as e:
+        # 캐시 오류는 응답을 막지 않음
+        logger.warning(f"응답 캐시 조회 실패: {e}")
+        return None, "off", None
+    if found is None:
+        return None, "miss", version
+    result, stale = found
+    if stale and cache.begin_refresh(question, intent):
+        _get_pool().submit(_refresh_response, cache, question, intent, version)
+    return result, "stale" if stale else "hit", version
+
+
+def _refresh_response(cache: ResponseCache, question: str, intent: str, version: str) -> None:
+    """stale 응답을 다시 계산해 교체 (의도는 캐시 키에 있으므로 분류 없이 Agent만 실행)"""
+    try:
+        with track_usage() as meter, span("router.refresh", **{"router.intent": intent}):
+            state = DISPATCHERS[intent]({"question": question, "intent": intent})
+        cache.put(question, intent, version, state["final_result"])
+        record_usage(meter.summary(), question=question, intent=intent, kind="refresh",
+                     elapsed_ms=meter.elapsed_ms)
+    except Exception as e:
+        logger.warning(f"{intent} 응답 갱신 실패: {e}")
+    finally:
+        cache.end_refresh(question, intent)
+
+
+def _store_response(state: RouterState, result: Dict[str, Any]) -> None:
+    """캐시 miss였던 응답 저장 (오류 응답은 캐시가 거부)"""
+    cache = get_response_cache()
+    if cache is None or state.get("cache_status") != "miss":
+        return
+    try:
+        cache.put(state["question"], state["intent"], state["data_version"], result)
+    except Exception as e:
+        logger.warning(f"응답 캐시 저장 실패: {e}")
+
+
+def _speculate_dispatch(intent: str, state: RouterState) -> Any:
+    return submit_in_context(_get_pool(), _run_speculation, intent, state)
+
+
+def _run_speculation(intent: str, state: RouterState) -> RouterState:
+    with span(f"router.speculate_{intent}"):
+        return DISPATCHERS[intent](state)
+
+
+def _speculative_result(state: RouterState, intent: str) -> Optional[RouterState]:
+    """의도가 확정된 Agent의 추측 실행 결과 (없으면 None → 지금 실행)"""
+    future = (state.get("speculation") or {}).get(intent)
+    if future is None:
+        return None
+    out = future.result()
+    key = f"{intent}_result"
+    return {**state, key: out[key], "final_result": out["final_result"]}
+
+
+def prepare_node(state: RouterState) -> RouterState:
+    """준비 노드: 사전 준비와 추측 실행을 시작하고 질문의 의도를 분류"""
+    return _prepare(state, _speculate_dispatch)
 
 
 def route_node(state: RouterState) -> RouterState:
@@ -35,12 +251,32 @@ def route_node(state: RouterState) -> RouterState:
     return state
 
 
+def _sql_context(state: RouterState) -> Dict[str, Any]:
+    """후속 질문이면 SQL Agent에 넘길 대화 맥락과 (슬롯으로 채운) 기간"""
+    context = state.get("context")
+    if context is None:
+        return {}
+    return {"conversation": context["text"], "months": context["months"]}
+
+
+def _docs_context(state: RouterState) -> Dict[str, Any]:
+    """후속 질문이면 Docs Agent에 넘길 대화 맥락과 검색 질의"""
+    context = state.get("context")
+    if context is None:
+        return {}
+    return {"conversation": context["text"], "search_query": context["search_query"]}
+
+
 def dispatch_sql_node(state: RouterState) -> RouterState:
     """SQL Agent로 디스패치"""
     from ..sql_agent import ask as sql_ask
     
+    speculative = _speculative_result(state, "sql")
+    if speculative is not None:
+        return speculative
     try:
-        result = sql_ask(state["question"])
+        result = sql_ask(state["question"], prefetch=(state.get("prefetch") or {}).get("sql"),
+                         **_sql_context(state))
         return {**state, "sql_result": result, "final_result": result}
     except Exception as e:
         error_result = {
@@ -56,8 +292,11 @@ def dispatch_docs_node(state: RouterState) -> RouterState:
     # TODO: Docs Agent 호출 구현
     from ..docs_agent.graph import ask as docs_ask
     
+    speculative = _speculative_result(state, "docs")
+    if speculative is not None:
+        return speculative
     try:
-        result = docs_ask(state["question"])
+        result = docs_ask(state["question"], **_docs_context(state))
         return {**state, "docs_result": result, "final_result": result}
     except Exception as e:
         error_result = {
@@ -71,8 +310,15 @@ def dispatch_docs_node(state: RouterState) -> RouterState:
 def dispatch_general_node(state: RouterState) -> RouterState:
     """General Agent로 디스패치"""
     # TODO: General Agent 호출 구현
-    from ..general_agent.graph import ask as general_ask
+    from ..general_agent.graph import ask as general_ask, answer_result
     
+    if state.get("intent_answer"):
+        # 의도 분류 호출이 이미 답변을 생성 → 두 번째 LLM 왕복 생략
+        result = answer_result(state["intent_answer"])
+        return {**state, "general_result": result, "final_result": result}
+    speculative = _speculative_result(state, "general")
+    if speculative is not None:
+        return speculative
     try:
         result = general_ask(state["question"])
         return {**state, "general_result": result, "final_result": result}
@@ -85,8 +331,18 @@ def dispatch_general_node(state: RouterState) -> RouterState:
         return {**state, "general_result": error_result, "final_result": error_result}
 
 
+# intent → 디스패치 노드 (추측 실행에도 사용)
+DISPATCHERS: Dict[str, Callable[[RouterState], RouterState]] = {
+    "sql": dispatch_sql_node,
+    "docs": dispatch_docs_node,
+    "general": dispatch_general_node,
+}
+
+
 def route_condition(state: RouterState) -> str:
-    """라우팅 조건: 의도에 따라 다음 노드 결정"""
+    """라우팅 조건: 의도에 따라 다음 노드 결정 (캐시된 응답이 있으면 종료)"""
+    if state.get("cache_status") in ("hit", "stale"):
+        return "cached"
     return state["intent"]
 
 
@@ -94,11 +350,11 @@ def route_condition(state: RouterState) -> str:
 graph = StateGraph(RouterState)
 
 # 노드 추가
-graph.add_node("prepare", prepare_node)
+graph.add_node("prepare", traced_node("router.prepare", prepare_node))
 graph.add_node("route", route_node)
-graph.add_node("dispatch_sql", dispatch_sql_node)
-graph.add_node("dispatch_docs", dispatch_docs_node)
-graph.add_node("dispatch_general", dispatch_general_node)
+graph.add_node("dispatch_sql", traced_node("router.dispatch_sql", dispatch_sql_node))
+graph.add_node("dispatch_docs", traced_node("router.dispatch_docs", dispatch_docs_node))
+graph.add_node("dispatch_general", traced_node("router.dispatch_general", dispatch_general_node))
 
 # 엣지 설정
 graph.set_entry_point("prepare")
@@ -109,7 +365,8 @@ graph.add_conditional_edges(
     {
         "sql": "dispatch_sql",
         "docs": "dispatch_docs", 
-        "general": "dispatch_general"
+        "general": "dispatch_general",
+        "cached": END
     }
 )
 graph.add_edge("dispatch_sql", END)
@@ -119,24 +376,183 @@ graph.add_edge("dispatch_general", END)
 ROUTER_GRAPH = graph.compile()
 
 
-def ask(question: str) -> Dict[str, Any]:
+def ask(question: str, session_id: Optional[str] = None) -> Dict[str, Any]:
     """
     메인 진입점: 사용자 질문을 받아 적절한 Agent로 라우팅
     
     Args:
         question: 사용자 질문
+        session_id: 대화 세션 ID (선택, 후속 질문 맥락과 사용량 집계에 사용)
         
     Returns:
         선택된 Agent의 응답 결과
     """
+    root = _start_root("router.ask")
+    meter = UsageMeter()
     try:
-        state = {"question": question}
-        final = ROUTER_GRAPH.invoke(state)
-        return final["final_result"]
+        conversation = get_conversation(session_id)
+        context = conversation.context_for(question) if conversation is not None else None
+        with activate(root), track_usage(meter):
+            final = ROUTER_GRAPH.invoke({"question": question, "context": context})
+        _store_response(final, final["final_result"])
+        result = _finish(final["final_result"], root, meter, question, session_id, "ask", final.get("cache_status"))
+        _remember(conversation, question, result, context)
+        return result
         
     except Exception as e:
-        return {
+        if root is not None:
+            root.fail(e)
+        return _finish({
             "error": True,
             "message": f"Router Agent 처리 중 오류 발생: {str(e)}",
             "intent": "unknown"
-        }
+        }, root, meter, question, session_id, "ask")
+
+
+def _start_root(name: str) -> Optional[Span]:
+    # 이미 span 안에서 호출되면(배치/벤치 등) 그 trace의 자식으로
+    return Span(name, current_span()) if TRACE_ENABLED else None
+
+
+def _with_trace(result: Dict[str, Any], root: Optional[Span]) -> Dict[str, Any]:
+    """루트 span을 닫고 응답에 trace 요약을 붙인 사본 반환 (캐시된 원본은 그대로)"""
+    if root is None:
+        return result
+    root.end()
+    return {**result, **trace_summary(root.trace_id), "elapsed_ms": int(root.duration_ms)}
+
+
+def _finish(result: Dict[str, Any], root: Optional[Span], meter: UsageMeter, question: str,
+            session_id: Optional[str], kind: str, cache_status: Optional[str] = None) -> Dict[str, Any]:
+    """응답 마무리: trace 요약과 사용량(usage)을 붙이고 요청 사용량을 저장소에 기록"""
+    result = _with_trace(result, root)
+    usage = meter.summary()
+    record_usage(usage, question=question, intent=result.get("intent"), kind=kind, session_id=session_id,
+                 trace_id=result.get("trace_id"), cache_status=cache_status,
+                 elapsed_ms=result.get("elapsed_ms", meter.elapsed_ms))
+    return {**result, "usage": usage}
+
+
+def _remember(conversation: Optional[Conversation], question: str, result: Dict[str, Any],
+              context: Optional[TurnContext]) -> None:
+    """응답을 세션 대화 상태(슬롯/요약)에 반영 (라우터 오류 응답은 제외, 갱신 실패는 응답을 막지 않음)"""
+    if conversation is None or result.get("intent") not in DISPATCHERS:
+        return
+    try:
+        conversation.update(question, result, followup=context is not None)
+    except Exception as e:
+        logger.warning(f"대화 상태 갱신 실패: {e}")
+
+
+def _stream_sql(state: RouterState) -> Iterator[StreamEvent]:
+    from ..sql_agent import ask_stream as sql_ask_stream
+    return sql_ask_stream(state["question"], prefetch=(state.get("prefetch") or {}).get("sql"),
+                          **_sql_context(state))
+
+
+def _stream_general(state: RouterState) -> Iterator[StreamEvent]:
+    from ..general_agent.graph import ask_stream as general_ask_stream, answer_result
+    if state.get("intent_answer"):
+        return answer_events(answer_result(state["intent_answer"]))
+    return general_ask_stream(state["question"])
+
+
+def _stream_docs(state: RouterState) -> Iterator[StreamEvent]:
+    # Docs Agent는 초안 답변을 품질 평가 후 웹 검색으로 다시 쓸 수 있어 완성된 답변만 전달
+    return answer_events(dispatch_docs_node(state)["final_result"])
+
+
+# intent → 스트리밍 디스패처
+STREAMERS: Dict[str, Callable[[RouterState], Iterator[StreamEvent]]] = {
+    "sql": _stream_sql,
+    "docs": _stream_docs,
+    "general": _stream_general,
+}
+
+_STREAM_DONE = object()
+
+
+class SpeculativeStream:
+    """백그라운드 스레드에서 스트림을 미리 소비해 큐에 쌓아 두는 추측 실행 핸들"""
+
+    def __init__(self, events: Callable[[RouterState], Iterator[StreamEvent]], state: RouterState):
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._cancelled = threading.Event()
+        self._future = submit_in_context(_get_pool(), self._run, events, state)
+
+    def _run(self, events: Callable[[RouterState], Iterator[StreamEvent]], state: RouterState) -> None:
+        try:
+            for event in events(state):
+                if self._cancelled.is_set():
+                    break
+                self._queue.put(event)
+        except Exception as e:
+            self._queue.put(e)
+        finally:
+            self._queue.put(_STREAM_DONE)
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        self._future.cancel()
+
+    def events(self) -> Iterator[StreamEvent]:
+        """쌓인 이벤트부터 차례로 (스트림이 끝날 때까지 대기)"""
+        while True:
+            item = self._queue.get()
+            if item is _STREAM_DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+def _speculate_stream(intent: str, state: RouterState) -> SpeculativeStream:
+    return SpeculativeStream(STREAMERS[intent], state)
+
+
+def ask_stream(question: str, session_id: Optional[str] = None) -> Iterator[StreamEvent]:
+    """
+    ask의 스트리밍 버전: intent 이벤트 → 답변 token 이벤트들 → final 이벤트
+    
+    Args:
+        question: 사용자 질문
+        session_id: 대화 세션 ID (선택, 후속 질문 맥락과 사용량 집계에 사용)
+        
+    Returns:
+        스트리밍 이벤트 이터레이터 (형식은 src/agent/streaming.py 참고)
+    """
+    root = _start_root("router.ask_stream")
+    meter = UsageMeter()
+    try:
+        conversation = get_conversation(session_id)
+        context = conversation.context_for(question) if conversation is not None else None
+        with activate(root), track_usage(meter):
+            with span("router.prepare", **{"langgraph.node": "prepare"}):
+                state = _prepare({"question": question, "context": context}, _speculate_stream)
+        yield intent_event(state["intent"])
+        if state.get("final_result") is not None:
+            events = answer_events(state["final_result"])
+        else:
+            speculative = state["speculation"].get(state["intent"])
+            events = speculative.events() if speculative is not None else STREAMERS[state["intent"]](state)
+        # 스트림 생성기는 소비될 때 실행되므로 각 next()를 루트 span/meter 안에서 실행
+        for event in iterate_in_span(root, iterate_metered(meter, events)):
+            if event["type"] == "final":
+                _store_response(state, event["result"])
+                event = final_event(_finish(event["result"], root, meter, question, session_id, "stream",
+                                            state.get("cache_status")))
+                _remember(conversation, question, event["result"], context)
+            yield event
+        
+    except Exception as e:
+        if root is not None:
+            root.fail(e)
+        yield from answer_events(_finish({
+            "error": True,
+            "message": f"Router Agent 처리 중 오류 발생: {str(e)}",
+            "intent": "unknown"
+        }, root, meter, question, session_id, "stream"))
+    finally:
+        # 소비자가 중간에 멈춘 경우에도 루트 span 기록
+        if root is not None:
+            root.end()
@@ -0,0 +1,139 @@
+"""
+의도 분류 캐시: 정규화된 질문 → LLM 분류 결과 (SQLite, 프로세스 간 공유)
+
+- 키: 유니코드 정규화(NFKC) + 소문자 + 공백 축약 + 문장부호 제거한 질문과 분류기 버전
+- 저장소: SQLite 파일(WAL) — Streamlit 재시작 후에도 유지되고 여러 워커가 함께 사용
+- TTL: created_at 기준으로 만료된 항목은 조회 시 삭제
+- 오류 미캐시: LLM 실패로 만든 기본값/로컬 추정(source가 default/fallback)은 저장하지 않음
+- 통계: hits/misses/expired/skipped/writes와 hit_rate (프로세스별)
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
+DEFAULT_DB_PATH = os.getenv("INTENT_CACHE_PATH", str(PROJECT_ROOT / "data/cache/intent_cache.sqlite3"))
+DEFAULT_TTL_SEC = float(os.getenv("INTENT_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("INTENT_CACHE_MAX_ENTRIES", "10000"))
+CACHE_ENABLED = os.getenv("INTENT_CACHE_ENABLED", "true").lower() == "true"
+# 분류 프롬프트/모델이 바뀌면 올려서 이전 결과를 무시
+CACHE_VERSION = "2"
+
+UNCACHEABLE_SOURCES = frozenset({"default", "fallback"})
+
+_PUNCT = re.compile(r"[^\w\s]+")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """캐시 키용 질문 정규화: "이번달  비용?" / "이번달 비용" / "이번달 비용!!" 은 같은 키"""
+    text = unicodedata.normalize("NFKC", question or "").lower()
+    return _SPACE.sub(" ", _PUNCT.sub(" ", text)).strip()
+
+
+class IntentCache:
+    """TTL이 있는 SQLite 의도 분류 캐시 (db_path=None이면 메모리 전용)"""
+
+    def __init__(self, db_path: Optional[str] = DEFAULT_DB_PATH, ttl_sec: float = DEFAULT_TTL_SEC,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "skipped": 0, "writes": 0}
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._con = sqlite3.connect(db_path or ":memory:", timeout=5.0, check_same_thread=False)
+        if db_path:
+            # 여러 프로세스가 읽는 동안에도 쓰기 가능
+            self._con.execute("PRAGMA journal_mode=WAL")
+            self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS intent_cache ("
+            " key TEXT PRIMARY KEY, question TEXT, result TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._con.execute("CREATE INDEX IF NOT EXISTS intent_cache_created ON intent_cache(created_at)")
+        self._con.commit()
+
+    @staticmethod
+    def _make_key(question: str) -> str:
+        return f"v{CACHE_VERSION}:{normalize_question(question)}"
+
+    def get(self, question: str) -> Optional[Dict[str, Any]]:
+        """캐시된 분류 결과 (없거나 만료되면 None)"""
+        key = self._make_key(question)
+        with self._lock:
+            row = self._con.execute(
+                "SELECT result, created_at FROM intent_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            if time.time() - row[1] > self.ttl_sec:
+                self._con.execute("DELETE FROM intent_cache WHERE key = ?", (key,))
+                self._con.commit()
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            return json.loads(row[0])
+
+    def put(self, question: str, result: Dict[str, Any]) -> bool:
+        """분류 결과 저장 (오류 기반 결과는 저장하지 않고 False 반환)"""
+        with self._lock:
+            if result.get("source") in UNCACHEABLE_SOURCES:
+                self._stats["skipped"] += 1
+                return False
+            self._con.execute(
+                "INSERT OR REPLACE INTO intent_cache (key, question, result, created_at) VALUES (?, ?, ?, ?)",
+                (self._make_key(question), question, json.dumps(result, ensure_ascii=False), time.time()),
+            )
+            # 한도를 넘으면 오래된 항목부터 삭제
+            self._con.execute(
+                "DELETE FROM intent_cache WHERE key IN ("
+                " SELECT key FROM intent_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._con.commit()
+            self._stats["writes"] += 1
+            return True
+
+    def clear(self) -> None:
+        """모든 항목 삭제"""
+        with self._lock:
+            self._con.execute("DELETE FROM intent_cache")
+            self._con.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계 반환 (hit_rate = hits / 조회 수)"""
+        with self._lock:
+            entries = self._con.execute("SELECT count(*) FROM intent_cache").fetchone()[0]
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": entries,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "ttl_sec": self.ttl_sec,
+            }
+
+
+_INTENT_CACHE = None  # singleton
+
+
+def get_intent_cache() -> Optional[IntentCache]:
+    """공용 의도 캐시 (INTENT_CACHE_ENABLED=false이거나 DB를 열 수 없으면 None)"""
+    global _INTENT_CACHE
+    if _INTENT_CACHE is None and CACHE_ENABLED:
+        try:
+            _INTENT_CACHE = IntentCache()
+        except sqlite3.Error:
+            return None
+    return _INTENT_CACHE
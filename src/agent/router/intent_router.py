@@ -1,21 +1,31 @@
 """
 의도 분류기: 사용자 질문을 분석하여 적절한 Agent로 라우팅
 LLM + 규칙 하이브리드 방식으로 정확도와 유연성을 향상
+1단계로 로컬 분류기(fast_intent: 규칙 + 예시 kNN)를 쓰고, 신뢰도가 임계값 미만일 때만 LLM 호출
+LLM 분류 결과는 정규화된 질문 기준 SQLite 캐시(intent_cache)에 TTL과 함께 저장해 프로세스 간 공유
+LLM 분류 호출은 general 의도의 최종 답변(answer)도 함께 생성해, 라우터가 General Agent
+호출(두 번째 LLM 왕복)을 생략할 수 있게 한다 (INTENT_INLINE_ANSWER_ENABLED)
+후속 질문은 대화 맥락(conversation.TurnContext.text)과 함께 LLM으로 분류한다. 맥락은 질문 바로 앞에 들어가
+지침 부분(prefix)은 항상 같은 프롬프트가 된다. 질문만으로 의도가 정해지지 않으므로 로컬 분류/캐시는 건너뛴다.
 """
 
-from typing import Literal, TypedDict
-from functools import lru_cache
+from typing import Any, Literal, NotRequired, Optional, TypedDict
 import json
 import logging
 import os
 from pathlib import Path
 
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.runnables import RunnableConfig
 
+from .fast_intent import classify_intent_fast, FAST_INTENT_ENABLED, FAST_INTENT_THRESHOLD
+from .intent_cache import get_intent_cache
+from ..general_agent.graph import SYSTEM_PROMPT as GENERAL_SYSTEM_PROMPT
+from ..tracing import annotate
+from ..llm_clients import get_chat_model
+
 # .env 파일 로드
 project_root = Path(__file__).parent.parent.parent.parent
 env_path = project_root / ".env"
@@ -27,6 +37,8 @@ else:
 
 logger = logging.getLogger(__name__)
 
+INLINE_ANSWER_ENABLED = os.getenv("INTENT_INLINE_ANSWER_ENABLED", "true").lower() == "true"
+
 IntentType = Literal["sql", "docs", "general"]
 
 
@@ -34,13 +46,22 @@ class IntentResult(TypedDict):
     intent: IntentType          # "sql" | "docs" | "general"
     confidence: float           # 0.0 ~ 1.0
     reason: str                 # 분류 근거(한글 요약)
+    source: str                 # "rule" | "knn" | "rule+knn" | "llm" | "fallback" | "default" | "conversation"
+    answer: NotRequired[str]    # general일 때 LLM 분류 호출이 함께 생성한 최종 답변
 
 
 # --- LLM 분류기 설정 ---
-_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, timeout=20)
+_llm = None  # singleton (첫 LLM 분류 또는 warmup 시 생성)
+
+
+def _get_llm():
+    global _llm
+    if _llm is None:
+        # 공용 레지스트리가 첫 사용 시점에 langchain_openai를 로드
+        _llm = get_chat_model("gpt-4o-mini", temperature=0.0, timeout=20.0)
+    return _llm
 
-_prompt = ChatPromptTemplate.from_template(
-    """너는 질문 의도 분류기다. 사용자 질문을 분석하여 적절한 의도를 분류해라.
+_CLASSIFY_TEMPLATE = """너는 질문 의도 분류기다. 사용자 질문을 분석하여 적절한 의도를 분류해라.
 
 가능한 의도는 "sql", "docs", "general" 뿐이다.
 
@@ -53,7 +74,7 @@ _prompt = ChatPromptTemplate.from_template(
   예시: "안녕", "도움말", "감사합니다", "고마워"
 
 반드시 JSON만 출력:
-{{"intent": "sql|docs|general", "confidence": 0.0~1.0, "reason": "짧은 근거"}}
+{json_format}
 
 주의사항:
 - 문서 설명/설정/개념 질문은 docs
@@ -62,29 +83,85 @@ _prompt = ChatPromptTemplate.from_template(
 - 모호하면 가장 가능성 높은 하나만 고르되 reason에 근거 서술
 - SQL 키워드가 포함돼도 "문서 설명을 해달라"면 docs
 - 비용 분석이 아니라 "설정 방법/동작 방식"은 docs
+{answer_section}
+{conversation}질문: {question}"""
 
-질문: {question}"""
+_JSON_FORMAT = '{{"intent": "sql|docs|general", "confidence": 0.0~1.0, "reason": "짧은 근거"}}'
+_JSON_FORMAT_WITH_ANSWER = (
+    '{{"intent": "sql|docs|general", "confidence": 0.0~1.0, "reason": "짧은 근거", '
+    '"answer": "general이면 사용자에게 보여줄 최종 답변, 아니면 빈 문자열"}}'
 )
+# general이면 General Agent의 지침 그대로 답변까지 작성 (sql/docs는 answer를 비워 토큰 절약)
+_ANSWER_SECTION = """
+answer 작성 (intent가 general일 때만, 아래 General Assistant 지침을 따른다):
+{general_guide}
+"""
+
+
+def _build_prompt(inline_answer: bool) -> ChatPromptTemplate:
+    template = _CLASSIFY_TEMPLATE.replace("{json_format}", _JSON_FORMAT_WITH_ANSWER if inline_answer else _JSON_FORMAT)
+    template = template.replace("{answer_section}", _ANSWER_SECTION if inline_answer else "")
+    prompt = ChatPromptTemplate.from_template(template)
+    return prompt.partial(general_guide=GENERAL_SYSTEM_PROMPT) if inline_answer else prompt
+
+
+_prompt = _build_prompt(INLINE_ANSWER_ENABLED)
 
 _parser = JsonOutputParser()
 
 
-@lru_cache(maxsize=512)
-def classify_intent(question: str) -> IntentResult:
+def classify_intent(question: str, context: Optional[str] = None) -> IntentResult:
     """
     사용자 질문의 의도를 분류하여 적절한 Agent 타입을 반환
-    LLM 기반 분류로 정확도와 유연성을 향상
+    로컬 분류기가 충분히 확신하면 그 결과를, 아니면 (캐시된) LLM 분류 결과를 사용
     
     Args:
         question: 사용자 질문
+        context: 후속 질문의 대화 맥락 블록 (주면 맥락과 함께 LLM으로 분류, 캐시 미사용)
         
     Returns:
-        IntentResult: intent, confidence, reason을 포함한 분류 결과
+        IntentResult: intent, confidence, reason, source를 포함한 분류 결과
     """
     q = (question or "").strip()
     if not q:
-        return {"intent": "general", "confidence": 0.5, "reason": "빈 질문"}
+        return {"intent": "general", "confidence": 0.5, "reason": "빈 질문", "source": "default"}
+    
+    fast = classify_intent_fast(q) if FAST_INTENT_ENABLED else None
+    if context:
+        result = _classify_with_llm(q, fast, context)
+        annotate(**{"intent.source": result["source"], "intent.followup": True})
+        return result
+    if fast is not None and fast["confidence"] >= FAST_INTENT_THRESHOLD:
+        logger.info(f"Fast classification: {fast['intent']} (conf: {fast['confidence']}) for: {q}")
+        annotate(**{"intent.source": fast["source"]})
+        return fast
     
+    cache = get_intent_cache()
+    cached = _cache_call(cache, "get", q)
+    annotate(**{"intent.cache_hit": cached is not None})
+    if cached is not None:
+        annotate(**{"intent.source": cached.get("source")})
+        return cached
+    result = _classify_with_llm(q, fast)
+    annotate(**{"intent.source": result["source"]})
+    # LLM 실패로 만든 결과(fallback/default)는 캐시가 거부
+    _cache_call(cache, "put", q, result)
+    return result
+
+
+def _cache_call(cache: Any, method: str, *args: Any) -> Any:
+    # 캐시 DB 오류(잠김 등)는 분류를 막지 않음
+    if cache is None:
+        return None
+    try:
+        return getattr(cache, method)(*args)
+    except Exception as e:
+        logger.warning(f"Intent cache {method} failed: {e}")
+        return None
+
+
+def _classify_with_llm(q: str, fallback: Optional[IntentResult] = None, context: str = "") -> IntentResult:
+    """LLM 분류 (실패 시 로컬 분류기의 추정, 그것도 없으면 general)"""
     try:
         # LangSmith 트레이싱 설정
         config: RunnableConfig = {
@@ -93,8 +170,8 @@ def classify_intent(question: str) -> IntentResult:
         }
         
         # LLM 체인 실행
-        chain = _prompt | _llm | _parser
-        out = chain.invoke({"question": q}, config=config)
+        chain = _prompt | _get_llm() | _parser
+        out = chain.invoke({"question": q, "conversation": context}, config=config)
         
         # 결과 검증
         intent = out.get("intent", "general")
@@ -106,12 +183,19 @@ def classify_intent(question: str) -> IntentResult:
             raise ValueError(f"Invalid intent: {intent}")
         
         logger.info(f"LLM classification successful: {intent} (conf: {conf}) for: {q}")
-        return {"intent": intent, "confidence": conf, "reason": reason}
+        result: IntentResult = {"intent": intent, "confidence": conf, "reason": reason, "source": "llm"}
+        answer = out.get("answer")
+        if INLINE_ANSWER_ENABLED and intent == "general" and isinstance(answer, str) and answer.strip():
+            result["answer"] = answer.strip()
+        return result
         
     except Exception as e:
-        # LLM 실패 시 기본값 반환
         logger.warning(f"LLM classification failed for: {q}, error: {str(e)}")
-        return {"intent": "general", "confidence": 0.3, "reason": f"LLM 실패로 기본값 사용: {str(e)}"}
+        if fallback is not None:
+            return {**fallback, "reason": f"{fallback['reason']} (LLM 실패로 로컬 분류 사용)", "source": "fallback"}
+        # LLM 실패 시 기본값 반환
+        return {"intent": "general", "confidence": 0.3, "reason": f"LLM 실패로 기본값 사용: {str(e)}",
+                "source": "default"}
 
 
 # --- 하위 호환성을 위한 기존 함수 ---
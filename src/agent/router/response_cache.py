@@ -0,0 +1,161 @@
+"""
+라우터 응답 캐시: (정규화된 질문, 의도) → 최종 응답, 데이터 버전 기반 stale-while-revalidate
+
+- 키: intent_cache.normalize_question + 의도
+- 데이터 버전: sql은 처리된 CUR 스냅샷(월 폴더별 manifest 해시 + latest 링크 대상),
+  docs는 문서 인덱스 manifest(data/docs/manifest.json), 그 외 의도는 고정
+- 신선(hit): 저장 당시 버전과 현재 버전이 같고 TTL 이내 → 즉시 반환
+- stale: 버전이 바뀌었거나(ETL 게시) TTL이 지났지만 최대 stale 기간 이내 → 이전 응답을 즉시
+  반환하고, 라우터가 백그라운드에서 다시 계산해 교체 (키당 동시에 하나만)
+- 오류 응답/요약 대기 응답은 저장하지 않음
+- 저장소: 프로세스 메모리 LRU (응답에 Decimal/date 샘플 행이 있어 직렬화하지 않음)
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .intent_cache import normalize_question, PROJECT_ROOT
+
+
+DEFAULT_TTL_SEC = float(os.getenv("ROUTER_RESPONSE_CACHE_TTL_SEC", "3600"))
+DEFAULT_MAX_STALE_SEC = float(os.getenv("ROUTER_RESPONSE_CACHE_MAX_STALE_SEC", str(24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("ROUTER_RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+CACHE_ENABLED = os.getenv("ROUTER_RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+# general 응답은 대화 맥락에 따라 달라질 수 있어 기본 제외
+CACHEABLE_INTENTS = frozenset(
+    i.strip() for i in os.getenv("ROUTER_RESPONSE_CACHE_INTENTS", "sql,docs").split(",") if i.strip()
+)
+DOCS_MANIFEST_PATH = os.getenv("ROUTER_DOCS_MANIFEST_PATH", str(PROJECT_ROOT / "data/docs/manifest.json"))
+
+
+def _sql_data_version() -> str:
+    from ..sql_agent import schema_provider
+
+    h = hashlib.sha256()
+    for month in schema_provider.list_processed_months():
+        month_dir = os.path.join(schema_provider.DATA_ROOT, month)
+        h.update(f"{month}:{schema_provider.get_snapshot_version(month_dir)}\n".encode())
+    latest = os.path.join(schema_provider.DATA_ROOT, "latest")
+    h.update(os.path.basename(os.path.realpath(latest)).encode())
+    return h.hexdigest()[:16]
+
+
+def _docs_data_version() -> str:
+    try:
+        return hashlib.sha256(Path(DOCS_MANIFEST_PATH).read_bytes()).hexdigest()[:16]
+    except OSError:
+        return "none"
+
+
+def data_version(intent: str) -> str:
+    """의도별 응답이 의존하는 데이터의 현재 버전"""
+    if intent == "sql":
+        return _sql_data_version()
+    if intent == "docs":
+        return _docs_data_version()
+    return "static"
+
+
+def is_cacheable_result(result: Dict[str, Any]) -> bool:
+    return not result.get("error") and result.get("answer_source") != "pending"
+
+
+class ResponseCache:
+    """데이터 버전을 기록하는 stale-while-revalidate 응답 캐시 (항목 수 기준 LRU)"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_sec: float = DEFAULT_TTL_SEC,
+                 max_stale_sec: float = DEFAULT_MAX_STALE_SEC):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.max_stale_sec = max_stale_sec
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "writes": 0, "skipped": 0, "refreshes": 0}
+
+    @staticmethod
+    def _make_key(question: str, intent: str) -> str:
+        return f"{intent}:{normalize_question(question)}"
+
+    def get(self, question: str, intent: str, version: str) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """(응답, stale 여부) — 없거나 최대 stale 기간이 지났으면 None"""
+        key = self._make_key(question, intent)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            age = time.time() - entry["created_at"]
+            if age > self.max_stale_sec:
+                del self._entries[key]
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            stale = entry["version"] != version or age > self.ttl_sec
+            self._stats["stale_hits" if stale else "hits"] += 1
+            return entry["result"], stale
+
+    def put(self, question: str, intent: str, version: str, result: Dict[str, Any]) -> bool:
+        """응답 저장 (오류/요약 대기 응답은 저장하지 않고 False)
+
+        version은 응답을 계산하기 전에 읽은 값을 넘긴다 — 계산 중 ETL이 게시되면 다음 조회에서 stale.
+        """
+        key = self._make_key(question, intent)
+        with self._lock:
+            self._refreshing.discard(key)
+            if not is_cacheable_result(result):
+                self._stats["skipped"] += 1
+                return False
+            self._entries[key] = {"result": result, "version": version, "created_at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._stats["writes"] += 1
+            return True
+
+    def begin_refresh(self, question: str, intent: str) -> bool:
+        """백그라운드 갱신 시작 표시 (이미 갱신 중이면 False)"""
+        key = self._make_key(question, intent)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._stats["refreshes"] += 1
+            return True
+
+    def end_refresh(self, question: str, intent: str) -> None:
+        with self._lock:
+            self._refreshing.discard(self._make_key(question, intent))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._refreshing.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계 반환 (hit_rate는 stale 응답 포함)"""
+        with self._lock:
+            served = self._stats["hits"] + self._stats["stale_hits"]
+            lookups = served + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "refreshing": len(self._refreshing),
+                "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+            }
+
+
+_RESPONSE_CACHE = None  # singleton
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """공용 응답 캐시 (ROUTER_RESPONSE_CACHE_ENABLED=false면 None)"""
+    global _RESPONSE_CACHE
+    if _RESPONSE_CACHE is None and CACHE_ENABLED:
+        _RESPONSE_CACHE = ResponseCache()
+    return _RESPONSE_CACHE
@@ -2,22 +2,45 @@
 SQL Agent: CUR 기반 비용 분석 질의 응답
 """
 
-from .graph import ask, ask_with_debug, get_available_months, get_schema_info
-from .schema_provider import resolve_base_dir, get_schema_json, scan_parquet_files
+from .graph import ask, ask_async, ask_stream, ask_astream, ask_with_debug, get_available_months, get_schema_info
+from .schema_provider import resolve_base_dir, get_schema_json, scan_parquet_files, get_snapshot_version
 from .nl2sql import generate_sql
-from .executor import execute_safe_sql
+from .executor import execute_safe_sql, fetch_result_page, fetch_result_page_arrow, QueryResult, QueryExecutionError
 from .summary import summarize_answer, summarize_error
+from .result_cache import get_result_cache
+from .repair import get_repair_stats
+from .example_store import get_example_store, confirm_sql_example
+from .month_range import parse_month_range
+from .prefetch import start_prefetch, SQLPrefetch
+from .batch import ask_batch, ask_batch_async
 
 __all__ = [
     "ask", 
+    "ask_async",
+    "ask_stream",
+    "ask_astream",
     "ask_with_debug", 
     "get_available_months", 
     "get_schema_info",
     "resolve_base_dir",
     "get_schema_json", 
     "scan_parquet_files",
+    "get_snapshot_version",
     "generate_sql",
     "execute_safe_sql",
+    "fetch_result_page",
+    "fetch_result_page_arrow",
+    "QueryResult",
+    "QueryExecutionError",
     "summarize_answer",
-    "summarize_error"
+    "summarize_error",
+    "get_result_cache",
+    "get_repair_stats",
+    "get_example_store",
+    "confirm_sql_example",
+    "parse_month_range",
+    "start_prefetch",
+    "SQLPrefetch",
+    "ask_batch",
+    "ask_batch_async"
 ]
@@ -0,0 +1,155 @@
+"""
+결정적 답변 렌더러: 흔한 결과 형태는 LLM 호출 없이 템플릿으로 답변 생성
+
+지원 형태:
+- 단일 값 (1행 × 1열): "총 비용은 1,234.56 USD예요."
+- 작은 Top-N 표 (ORDER BY ... LIMIT, 라벨 1열 + 숫자 1열)
+- 2열 분해 (라벨 + 숫자, 최대 MAX_TEMPLATE_ROWS행): 항목별 값 + 비중
+
+그 외(다중 숫자 컬럼, 큰 결과, NULL 포함 등)는 None을 반환하여 LLM 요약을 사용한다.
+금액 표기는 요약 프롬프트 규칙(소수점 둘째 자리 + USD)을 따른다.
+"""
+
+import math
+import re
+from numbers import Number
+from typing import Any, Dict, List, Optional
+
+
+MAX_TEMPLATE_ROWS = 10
+
+NOT_FOUND_ANSWER = "현재 해당 정보는 찾을 수 없어요."
+
+# 컬럼명 → 한글 라벨 (자주 쓰이는 집계 별칭)
+_COLUMN_LABELS = {
+    "cost": "비용",
+    "total_cost": "총 비용",
+    "unblended_cost": "비용(Unblended)",
+    "blended_cost": "비용(Blended)",
+    "lineitem_unblendedcost": "비용(Unblended)",
+    "lineitem_blendedcost": "비용(Blended)",
+    "hours": "사용 시간",
+    "usage_hours": "사용 시간",
+    "total_hours": "총 사용 시간",
+    "endpoint_hours": "Endpoint 사용 시간",
+    "spot_share": "Spot 비중",
+    "training_spot_share": "Training Spot 비중",
+    "tag_missing_rate": "태그 누락률",
+    "untagged_cost": "태그 미부착 비용",
+    "untagged_share": "태그 미부착 비용 비중",
+    "count": "건수",
+    "cnt": "건수",
+}
+
+# 영문 단위 단서는 식별자 토큰(_ 구분) 단위로만 일치 ("generated"의 rate, "duration"의 ratio 오탐 방지)
+# 금액/시간은 CUR의 붙여 쓴 이름(lineitem_unblendedcost, usagehours)도 있어 토큰 끝 일치를 허용
+# amount는 CUR의 usage_amount(사용량)에도 쓰이므로 금액 단서로 보지 않음
+_COST_PATTERN = re.compile(r"(?:^|_)[a-z]*(?:cost|spend|price|usd)(?:_|$)|비용|금액", re.IGNORECASE)
+_HOURS_PATTERN = re.compile(r"(?:^|_)[a-z]*(?:hours?|hrs)(?:_|$)|시간", re.IGNORECASE)
+_RATIO_PATTERN = re.compile(r"(?:^|_)(?:ratio|share|rate|pct|percent)(?:_|$)|비중|비율", re.IGNORECASE)
+_COUNT_PATTERN = re.compile(r"(?:^|_)(?:count|cnt|num)(?:_|$)|건수|개수", re.IGNORECASE)
+_TOP_N_PATTERN = re.compile(r"(?is)\border\s+by\b.*\blimit\s+\d+")
+
+
+def _is_number(value: Any) -> bool:
+    if isinstance(value, bool) or not isinstance(value, Number):
+        return False
+    return not (isinstance(value, float) and math.isnan(value))
+
+
+def _label(column: str) -> str:
+    return _COLUMN_LABELS.get(column.lower(), column)
+
+
+def _topic(word: str) -> str:
+    """한글 받침에 맞춰 은/는 조사를 붙임 (한글이 아니면 '은(는)')"""
+    last = word.rstrip(")")[-1:] if word else ""
+    if "가" <= last <= "힣":
+        return word + ("은" if (ord(last) - 0xAC00) % 28 else "는")
+    return word + "은(는)"
+
+
+def format_value(column: str, value: float, decimals: bool = False) -> str:
+    """컬럼명으로 단위를 추정하여 값을 포맷 (금액은 소수점 둘째 자리 + USD)
+
+    decimals가 True면 정수 값도 소수점 둘째 자리로 표시 (목록의 항목/합계 자릿수 통일)
+    """
+    if _RATIO_PATTERN.search(column):
+        pct = value * 100 if 0 <= value <= 1 else value
+        return f"{pct:,.2f}%"
+    if _COST_PATTERN.search(column):
+        return f"{value:,.2f} USD"
+    if _HOURS_PATTERN.search(column):
+        return f"{value:,.2f}시간"
+    if _COUNT_PATTERN.search(column) and float(value).is_integer():
+        return f"{int(value):,}건"
+    if float(value).is_integer() and not decimals:
+        return f"{int(value):,}"
+    return f"{value:,.2f}"
+
+
+def _render_scalar(column: str, value: Any) -> str:
+    return f"현재 데이터 기준으로 {_topic(_label(column))} {format_value(column, value)}예요."
+
+
+def _render_list(sql: str, label_col: str, value_col: str, rows: List[Dict[str, Any]]) -> str:
+    is_top_n = bool(_TOP_N_PATTERN.search(sql))
+    total = sum(r[value_col] for r in rows)
+    show_share = not is_top_n and total > 0 and not _RATIO_PATTERN.search(value_col)
+    # 항목 중 하나라도 소수면 모든 항목과 합계를 같은 자릿수로
+    decimals = not all(float(r[value_col]).is_integer() for r in rows)
+
+    if is_top_n:
+        header = f"{_label(value_col)} 기준 상위 {len(rows)}개 항목이에요."
+    else:
+        header = f"{label_col}별 {_topic(_label(value_col))} 다음과 같아요."
+
+    lines = [header, ""]
+    for i, r in enumerate(rows, 1):
+        line = f"{i}. {r[label_col]}: {format_value(value_col, r[value_col], decimals)}"
+        if show_share:
+            line += f" ({r[value_col] / total * 100:.1f}%)"
+        lines.append(line)
+
+    if not is_top_n and len(rows) > 1 and not _RATIO_PATTERN.search(value_col):
+        lines += ["", f"합계는 {format_value(value_col, total, decimals)}예요."]
+    return "\n".join(lines)
+
+
+def render_answer(sql: str, columns: List[str], rows: List[Dict[str, Any]], row_count: int) -> Optional[str]:
+    """결과 형태가 단순하면 템플릿 답변을 반환하고, 아니면 None (LLM 요약 필요)
+
+    Args:
+        sql: 실행한 SQL
+        columns: 결과 컬럼 목록
+        rows: 결과 행 (row_count가 MAX_TEMPLATE_ROWS 이하이면 전체 행)
+        row_count: 전체 결과 행 수
+
+    Returns:
+        템플릿 답변 문자열 또는 None
+    """
+    if row_count == 0:
+        return NOT_FOUND_ANSWER
+    if row_count > MAX_TEMPLATE_ROWS or len(rows) != row_count:
+        return None
+
+    # 단일 값
+    if row_count == 1 and len(columns) == 1:
+        value = rows[0][columns[0]]
+        return _render_scalar(columns[0], value) if _is_number(value) else None
+
+    # 라벨 1열 + 숫자 1열
+    if len(columns) == 2:
+        numeric = [c for c in columns if all(_is_number(r[c]) for r in rows)]
+        if len(numeric) != 1:
+            return None
+        value_col = numeric[0]
+        label_col = columns[0] if columns[1] == value_col else columns[1]
+        if any(r[label_col] is None for r in rows):
+            return None
+        if row_count == 1:
+            return (f"현재 데이터 기준으로 {rows[0][label_col]}의 {_topic(_label(value_col))} "
+                    f"{format_value(value_col, rows[0][value_col])}예요.")
+        return _render_list(sql, label_col, value_col, rows)
+
+    return None
@@ -0,0 +1,111 @@
+"""
+SQL Agent 배치 질의: 정기 리포트처럼 여러 질문을 한 번에 처리
+
+- 같은 월(또는 같은 기간)의 질문들은 스키마/시맨틱 뷰 준비를 한 번만 한다.
+- 공백만 다른 같은 질문은 한 번만 실행하고 결과를 복사한다.
+- NL2SQL → 실행 → 요약을 질문별로 비동기 실행하되 동시 실행 수를 제한한다.
+- batch_summaries를 켜면 LLM 요약이 필요한 결과를 모아 여러 개씩 한 번에 요약한다.
+"""
+
+import os
+import re
+import copy
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from .graph import SQL_GRAPH, _build_state
+from .schema_provider import list_processed_months
+from .month_range import parse_month_range
+from .summary import summarize_error, abatch_summarize, SUMMARY_BATCH_SIZE
+from ..llm_clients import run_async
+
+
+BATCH_MAX_CONCURRENCY = int(os.getenv("SQL_BATCH_MAX_CONCURRENCY", "8"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(question: str) -> str:
+    return _WHITESPACE.sub(" ", (question or "").strip())
+
+
+def _scope_key(question: str, month: str, available: List[str]) -> Optional[Tuple[str, ...]]:
+    """질문이 읽는 데이터 범위 — 여러 달 질문이면 월 목록, 아니면 None(month 단일 폴더)"""
+    if month != "latest":
+        return None
+    months = parse_month_range(question, available)
+    return tuple(months) if months and len(months) > 1 else None
+
+
+def _shared_states(questions: List[str], month: str) -> List[Dict[str, Any]]:
+    """질문별 초기 상태 — 같은 데이터 범위는 스키마 추출을 한 번만 하고 공유"""
+    available = list_processed_months() if month == "latest" else []
+    by_scope: Dict[Optional[Tuple[str, ...]], Any] = {}
+    states = []
+    for question in questions:
+        key = _scope_key(question, month, available)
+        if key not in by_scope:
+            try:
+                by_scope[key] = _build_state(question, month, list(key) if key else None)
+            except Exception as e:
+                by_scope[key] = e
+        shared = by_scope[key]
+        states.append(shared if isinstance(shared, Exception) else {**shared, "question": question})
+    return states
+
+
+async def ask_batch_async(questions: List[str], month: str = "latest",
+                          max_concurrency: int = BATCH_MAX_CONCURRENCY,
+                          batch_summaries: bool = False,
+                          summary_batch_size: int = SUMMARY_BATCH_SIZE) -> List[Dict[str, Any]]:
+    """여러 질문을 동시에 처리하고 입력 순서대로 결과 반환
+
+    Args:
+        questions: 질문 목록 (공백 차이만 있는 중복은 한 번만 실행)
+        month: 분석할 월 (기본값: "latest")
+        max_concurrency: 동시에 실행할 질문 수
+        batch_summaries: LLM 요약을 summary_batch_size개씩 묶어 한 번에 호출
+        summary_batch_size: 한 번의 요약 호출에 넣을 결과 수
+
+    Returns:
+        질문별 SQL 분석 결과 (ask와 같은 형식)
+    """
+    unique: Dict[str, int] = {}
+    for question in questions:
+        unique.setdefault(_normalize(question), len(unique))
+    unique_questions = list(unique)
+
+    states = await asyncio.to_thread(_shared_states, unique_questions, month)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _run(question: str, state: Any) -> Dict[str, Any]:
+        if isinstance(state, Exception):
+            return summarize_error(question, state)
+        async with semaphore:
+            try:
+                final = await SQL_GRAPH.ainvoke({**state, "defer_summary": batch_summaries})
+                return final["result"]
+            except Exception as e:
+                return summarize_error(question, e)
+
+    results = await asyncio.gather(*(_run(q, s) for q, s in zip(unique_questions, states)))
+    if batch_summaries:
+        await abatch_summarize(results, unique_questions, batch_size=summary_batch_size)
+
+    # 중복 질문은 같은 결과의 복사본
+    seen = set()
+    ordered = []
+    for question in questions:
+        index = unique[_normalize(question)]
+        result = results[index]
+        ordered.append(result if index not in seen else copy.deepcopy(result))
+        seen.add(index)
+    return ordered
+
+
+def ask_batch(questions: List[str], month: str = "latest",
+              max_concurrency: int = BATCH_MAX_CONCURRENCY,
+              batch_summaries: bool = False,
+              summary_batch_size: int = SUMMARY_BATCH_SIZE) -> List[Dict[str, Any]]:
+    """ask_batch_async의 동기 버전 (공용 이벤트 루프/HTTP 풀에서 실행)"""
+    return run_async(ask_batch_async(questions, month, max_concurrency, batch_summaries, summary_batch_size))
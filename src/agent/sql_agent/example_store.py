@@ -0,0 +1,155 @@
+"""
+NL2SQL few-shot 예시 저장소: 검증된 질문 → SQL 쌍을 로컬 벡터 인덱스로 검색
+
+- 시드: sql_examples.json (README 주요 시나리오 기반으로 큐레이션)
+- 확정 예시: 사용자가 UI에서 정답으로 확인한 쌍을 JSONL로 누적 저장
+- 검색: 문자 n-gram 해싱 임베딩(src/utils/text_vector) 코사인 유사도 top-k
+  (외부 임베딩 API를 호출하지 않으므로 NL2SQL 지연에 거의 영향이 없다)
+
+예시 SQL의 경로는 프롬프트 규칙과 같은 'data/processed/latest/...'를 사용하며,
+생성된 SQL은 nl2sql._sanitize_paths에서 실제 base_dir로 치환된다.
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from ...utils.text_vector import embed_text, embed_texts, top_k_similar
+from .schema_provider import PROJECT_ROOT, DATA_ROOT
+from .guardrails import parse_select
+
+
+SEED_EXAMPLES_PATH = Path(__file__).with_name("sql_examples.json")
+CONFIRMED_EXAMPLES_PATH = os.getenv(
+    "SQL_EXAMPLES_PATH", str(PROJECT_ROOT / "data/cache/sql_examples.jsonl")
+)
+FEW_SHOT_K = int(os.getenv("SQL_FEW_SHOT_K", "3"))
+MIN_SIMILARITY = float(os.getenv("SQL_FEW_SHOT_MIN_SIMILARITY", "0.2"))
+
+# 한글 음차/동의어 → 영문 표기 (문자 n-gram이 표기 차이를 넘지 못하므로 임베딩 전에 통일)
+_ALIASES = {
+    "세이지메이커": "sagemaker", "엔드포인트": "endpoint", "노트북": "notebook", "트레이닝": "training", "학습": "training",
+    "스팟": "spot", "온디맨드": "ondemand", "스튜디오": "studio", "프로세싱": "processing",
+    "처리 작업": "processing", "스토리지": "storage", "저장소": "storage",
+    "피처 스토어": "featurestore", "피처스토어": "featurestore", "feature store": "featurestore",
+    "데이터 전송": "datatransfer", "서버리스": "serverless",
+}
+
+
+def _normalize_question(question: str) -> str:
+    return " ".join(question.split()).lower()
+
+
+def _embedding_text(question: str) -> str:
+    text = _normalize_question(question)
+    for alias, canonical in _ALIASES.items():
+        text = text.replace(alias, canonical)
+    return text
+
+
+def _to_prompt_path(sql: str, base_dir: Optional[str]) -> str:
+    """실행 SQL의 실제 데이터 경로를 프롬프트 규칙 경로(data/processed/latest)로 되돌림"""
+    sql = sql.strip()
+    for d in filter(None, {base_dir, base_dir and os.path.realpath(base_dir)}):
+        sql = sql.replace(d.rstrip("/").replace("\\", "/"), "data/processed/latest")
+    return sql.replace(DATA_ROOT.rstrip("/") + "/", "data/processed/")
+
+
+class SQLExampleStore:
+    """질문 → SQL 예시 저장소 (시드 + 사용자 확정 예시)"""
+
+    def __init__(self, seed_path: Optional[str] = str(SEED_EXAMPLES_PATH),
+                 confirmed_path: Optional[str] = CONFIRMED_EXAMPLES_PATH):
+        self.seed_path = Path(seed_path) if seed_path else None
+        self.confirmed_path = Path(confirmed_path) if confirmed_path else None
+        self._lock = threading.Lock()
+        self._examples: List[Dict[str, Any]] = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._load()
+
+    def _load(self) -> None:
+        examples = []
+        if self.seed_path and self.seed_path.exists():
+            for ex in json.loads(self.seed_path.read_text(encoding="utf-8")):
+                examples.append({**ex, "source": "seed"})
+        if self.confirmed_path and self.confirmed_path.exists():
+            with open(self.confirmed_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        examples.append({**json.loads(line), "source": "confirmed"})
+
+        # 같은 질문은 나중에 확정된 SQL이 우선
+        by_question = {_normalize_question(ex["question"]): ex for ex in examples}
+        self._examples = list(by_question.values())
+        self._matrix = embed_texts([_embedding_text(ex["question"]) for ex in self._examples])
+
+    def __len__(self) -> int:
+        return len(self._examples)
+
+    def search(self, question: str, k: int = FEW_SHOT_K,
+               min_similarity: float = MIN_SIMILARITY) -> List[Dict[str, Any]]:
+        """질문과 유사한 예시 top-k (유사도 min_similarity 미만은 제외)"""
+        with self._lock:
+            hits = top_k_similar(embed_text(_embedding_text(question)), self._matrix, k)
+            return [
+                {**self._examples[i], "score": round(score, 4)}
+                for i, score in hits if score >= min_similarity
+            ]
+
+    def add(self, question: str, sql: str, base_dir: Optional[str] = None) -> Dict[str, Any]:
+        """사용자가 확정한 질문 → SQL 쌍을 추가 (단일 SELECT만 허용, 같은 질문은 덮어씀)
+
+        Raises:
+            SQLGuardrailError: SELECT 한 문장이 아닌 SQL
+        """
+        sql = _to_prompt_path(sql, base_dir)
+        parse_select(sql)
+        example = {"question": question.strip(), "sql": sql}
+
+        with self._lock:
+            if self.confirmed_path:
+                self.confirmed_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.confirmed_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(example, ensure_ascii=False) + "\n")
+
+            key = _normalize_question(question)
+            vec = embed_text(_embedding_text(example["question"]))[None, :]
+            for i, ex in enumerate(self._examples):
+                if _normalize_question(ex["question"]) == key:
+                    self._examples[i] = {**example, "source": "confirmed"}
+                    self._matrix[i] = vec[0]
+                    break
+            else:
+                self._examples.append({**example, "source": "confirmed"})
+                self._matrix = np.vstack([self._matrix, vec]) if len(self._matrix) else vec
+        return example
+
+
+def format_examples(examples: List[Dict[str, Any]]) -> str:
+    """프롬프트에 넣을 예시 블록 (예시가 없으면 빈 문자열)"""
+    if not examples:
+        return ""
+    lines = ["검증된 질문/SQL 예시 (테이블 선택과 컬럼 사용을 참고하라):"]
+    for ex in examples:
+        lines.append(f"Q: {ex['question']}")
+        lines.append(f"SQL: {ex['sql']}")
+    return "\n".join(lines)
+
+
+_EXAMPLE_STORE = None  # singleton
+
+
+def get_example_store() -> SQLExampleStore:
+    global _EXAMPLE_STORE
+    if _EXAMPLE_STORE is None:
+        _EXAMPLE_STORE = SQLExampleStore()
+    return _EXAMPLE_STORE
+
+
+def confirm_sql_example(question: str, sql: str, base_dir: Optional[str] = None) -> Dict[str, Any]:
+    """UI 피드백용: 정답으로 확인된 질문/SQL을 예시 저장소에 추가"""
+    return get_example_store().add(question, sql, base_dir)
@@ -1,11 +1,278 @@
 import os
+import time
+import threading
 import duckdb
 import pandas as pd
-from typing import Optional
+import pyarrow as pa
+from typing import Optional, Dict, Any, List
+
+from .result_cache import get_result_cache, CACHE_ENABLED
+from ..tracing import annotate
+from .schema_provider import DATA_ROOT
+from .guardrails import guard_sql, check_estimated_cost, SQLGuardrailError, MAX_RESULT_ROWS
+from ...core.semantic_layer import (
+    register_semantic_views, register_month_range_views, SEMANTIC_VIEW_NAMES, MONTH_RANGE_VIEW_NAMES,
+)
+
+# 이 행 수 이하의 결과만 전체를 가져와 결과 캐시에 저장한다 (그 이상은 지연 평가 유지)
+RESULT_CACHE_MAX_ROWS = int(os.getenv("SQL_RESULT_CACHE_MAX_ROWS", "10000"))
+
+# 쿼리 단위 실행 한도: 벽시계 제한 시간, DuckDB 메모리 한도, 반환 최대 행 수
+QUERY_TIMEOUT_SEC = float(os.getenv("SQL_QUERY_TIMEOUT_SEC", "30"))
+QUERY_MEMORY_LIMIT = os.getenv("SQL_QUERY_MEMORY_LIMIT", "1GB")
+MAX_FETCH_ROWS = MAX_RESULT_ROWS
+
+_NUMERIC_TYPE_PREFIXES = (
+    "TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT",
+    "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT", "UHUGEINT",
+    "FLOAT", "DOUBLE", "DECIMAL",
+)
+
+
+class QueryExecutionError(RuntimeError):
+    """실행 한도에 걸려 중단된 쿼리 (summarize_error가 kind로 원인을 설명)"""
+    
+    kind = "execution"
+    
+    def __init__(self, message: str, limit: Any = None, elapsed_sec: Optional[float] = None):
+        super().__init__(message)
+        self.limit = limit
+        self.elapsed_sec = elapsed_sec
+
+
+class QueryTimeoutError(QueryExecutionError):
+    """제한 시간 초과로 중단"""
+    kind = "timeout"
+
+
+class QueryMemoryError(QueryExecutionError):
+    """메모리 한도 초과로 중단"""
+    kind = "memory"
+
+
+class QueryCancelledError(QueryExecutionError):
+    """외부 요청(cancel)으로 중단"""
+    kind = "cancelled"
+
+
+def _connect() -> duckdb.DuckDBPyConnection:
+    """쿼리 전용 in-memory 연결 (메모리 한도 적용)"""
+    return duckdb.connect(config={"memory_limit": QUERY_MEMORY_LIMIT})
+
+
+def _quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _to_float(value: Any) -> float:
+    return float(value) if value is not None else 0.0
+
+
+class QueryResult:
+    """지연 평가되는 SQL 실행 결과 (DuckDB relation 래퍼)
+    
+    전체 결과를 미리 가져오지 않고, 필요한 정보만 DuckDB에서 계산한다.
+    - 행 수 + 숫자 컬럼 통계: 한 번의 집계 쿼리
+    - 샘플 행: LIMIT 쿼리 (Arrow 기반 결과는 zero-copy slice)
+    - 전체/페이지 결과: 요청 시에만 Arrow로 조회 (최대 max_rows행)
+    - 잘림 여부: 실행 SQL에는 LIMIT max_rows + 1이 주입되어, max_rows 다음 행이 있을 때만 truncated
+    
+    내부 전달은 Arrow Table/RecordBatchReader로 하고, pandas/JSON 변환은
+    UI(df, fetch_page)나 LLM 프롬프트(sample_rows) 같은 경계에서만 한다.
+    
+    모든 조회는 결과 생성 시점부터의 벽시계 제한 시간(timeout) 안에서 실행되며,
+    시간이 지나면 watchdog 타이머가 DuckDB interrupt()로 실행 중인 쿼리를 중단한다.
+    """
+    
+    def __init__(self, sql: str, con: duckdb.DuckDBPyConnection,
+                 relation: duckdb.DuckDBPyRelation, cached: bool = False,
+                 timeout: float = QUERY_TIMEOUT_SEC, max_rows: int = MAX_FETCH_ROWS,
+                 table: Optional[pa.Table] = None):
+        self.sql = sql
+        self._con = con
+        self.cached = cached
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self._attach(relation)
+        # 이미 메모리에 있는 결과(캐시 등) — 샘플/페이지는 복사 없이 slice
+        self._table = table.slice(0, max_rows) if table is not None else None
+        self._started = time.monotonic()
+        self._cancelled = threading.Event()
+        self._aggregates: Optional[Dict[str, Any]] = None
+        self._truncated: Optional[bool] = None
+    
+    def _attach(self, relation: Optional[duckdb.DuckDBPyRelation]) -> None:
+        """결과 relation 연결: 조회/통계는 max_rows행까지, 그 다음 행은 잘림 여부 판단에만 사용"""
+        self._full = relation
+        self._relation = relation.limit(self.max_rows) if relation is not None else None
+    
+    @classmethod
+    def from_sql(cls, sql: str, precheck: bool = False, timeout: float = QUERY_TIMEOUT_SEC,
+                 max_rows: int = MAX_FETCH_ROWS, base_dir: Optional[str] = None,
+                 month_dirs: Optional[List[str]] = None) -> "QueryResult":
+        con = _connect()
+        try:
+            if month_dirs:
+                # 여러 달 논리 테이블(cur_*) 등록 — 요청한 월의 파일만 읽음
+                register_month_range_views(con, month_dirs)
+            elif base_dir is not None:
+                # 표준 지표 뷰(v_*) 등록 — 사전 집계 파일이 있으면 fact 대신 사용
+                register_semantic_views(con, base_dir)
+            result = cls(sql, con, None, timeout=timeout, max_rows=max_rows)
+            if precheck:
+                result._run(check_estimated_cost, con, sql)
+            result._attach(result._run(con.sql, sql))
+            return result
+        except Exception:
+            con.close()
+            raise
+    
+    @classmethod
+    def from_arrow(cls, sql: str, table: pa.Table, cached: bool = False,
+                   max_rows: int = MAX_FETCH_ROWS) -> "QueryResult":
+        con = _connect()
+        return cls(sql, con, con.from_arrow(table), cached=cached, max_rows=max_rows, table=table)
+    
+    @classmethod
+    def from_dataframe(cls, sql: str, df: pd.DataFrame) -> "QueryResult":
+        con = _connect()
+        return cls(sql, con, con.from_df(df))
+    
+    # ── 실행 한도 ─────────────────────────────────────────────
+    def _run(self, fn, *args):
+        """남은 제한 시간 안에서 fn을 실행하고, DuckDB 예외를 구조화된 오류로 변환"""
+        if self._cancelled.is_set():
+            raise QueryCancelledError("쿼리가 취소되었습니다")
+        elapsed = time.monotonic() - self._started
+        remaining = self.timeout - elapsed
+        if remaining <= 0:
+            raise QueryTimeoutError(f"쿼리 제한 시간({self.timeout:g}초)을 초과했습니다",
+                                    limit=self.timeout, elapsed_sec=elapsed)
+        
+        fired = threading.Event()
+        con = self._con
+        
+        def _interrupt():
+            fired.set()
+            con.interrupt()
+        
+        watchdog = threading.Timer(remaining, _interrupt)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            return fn(*args)
+        except duckdb.InterruptException:
+            elapsed = time.monotonic() - self._started
+            if self._cancelled.is_set() and not fired.is_set():
+                raise QueryCancelledError("쿼리가 취소되었습니다", elapsed_sec=elapsed)
+            raise QueryTimeoutError(f"쿼리 제한 시간({self.timeout:g}초)을 초과해 중단했습니다",
+                                    limit=self.timeout, elapsed_sec=elapsed)
+        except duckdb.OutOfMemoryException as e:
+            raise QueryMemoryError(f"쿼리 메모리 한도({QUERY_MEMORY_LIMIT})를 초과해 중단했습니다: {e}",
+                                   limit=QUERY_MEMORY_LIMIT,
+                                   elapsed_sec=time.monotonic() - self._started)
+        finally:
+            watchdog.cancel()
+    
+    def cancel(self) -> None:
+        """다른 스레드에서 실행 중인 조회를 중단"""
+        self._cancelled.set()
+        if self._con is not None:
+            self._con.interrupt()
+    
+    # ── 조회 ──────────────────────────────────────────────────
+    @property
+    def columns(self) -> List[str]:
+        return list(self._relation.columns)
+    
+    @property
+    def numeric_columns(self) -> List[str]:
+        return [
+            col for col, typ in zip(self._relation.columns, self._relation.types)
+            if str(typ).upper().startswith(_NUMERIC_TYPE_PREFIXES)
+        ]
+    
+    def _compute_aggregates(self) -> Dict[str, Any]:
+        """행 수와 숫자 컬럼별 sum/mean/min/max를 한 번의 집계 쿼리로 계산"""
+        if self._aggregates is None:
+            numeric_cols = self.numeric_columns
+            exprs = ["count(*)"]
+            for col in numeric_cols:
+                q = _quote_ident(col)
+                exprs += [f"sum({q})", f"avg({q})", f"min({q})", f"max({q})"]
+            row = self._run(lambda: self._relation.aggregate(", ".join(exprs)).fetchone())
+            
+            summary = {}
+            for i, col in enumerate(numeric_cols):
+                s, m, lo, hi = row[1 + i * 4: 5 + i * 4]
+                summary[col] = {
+                    "sum": _to_float(s),
+                    "mean": _to_float(m),
+                    "min": _to_float(lo),
+                    "max": _to_float(hi),
+                }
+            self._aggregates = {"row_count": int(row[0]), "numeric_summary": summary}
+        return self._aggregates
+    
+    def row_count(self) -> int:
+        return self._compute_aggregates()["row_count"]
+    
+    def numeric_summary(self) -> Dict[str, Dict[str, float]]:
+        return self._compute_aggregates()["numeric_summary"]
+    
+    @property
+    def truncated(self) -> bool:
+        """결과가 max_rows에서 잘렸는지 여부 (정확히 max_rows행이면 다음 행이 있는지 확인)"""
+        if self._truncated is None:
+            self._truncated = self.row_count() >= self.max_rows and self._run(
+                lambda: self._full.limit(1, self.max_rows).fetchone()) is not None
+        return self._truncated
+    
+    def head_arrow(self, n: int) -> pa.Table:
+        return self.fetch_page_arrow(0, n)
+    
+    def sample_rows(self, n: int = 5) -> List[Dict[str, Any]]:
+        """앞 n행을 파이썬 값 dict 목록으로 (pandas를 거치지 않음)"""
+        return self.head_arrow(n).to_pylist()
+    
+    def fetch_page_arrow(self, offset: int = 0, limit: int = 100) -> pa.Table:
+        limit = max(0, min(limit, self.max_rows - offset))
+        if self._table is not None:
+            return self._table.slice(offset, limit)
+        return self._run(lambda: self._relation.limit(limit, offset).arrow())
+    
+    def fetch_page(self, offset: int = 0, limit: int = 100) -> pd.DataFrame:
+        return self.fetch_page_arrow(offset, limit).to_pandas()
+    
+    def record_batches(self, batch_size: int = 10_000) -> pa.RecordBatchReader:
+        """최대 max_rows행을 batch_size행씩 스트리밍하는 RecordBatchReader"""
+        if self._table is not None:
+            return self._table.slice(0, self.max_rows).to_reader(max_chunksize=batch_size)
+        return self._run(lambda: self._relation.limit(self.max_rows).fetch_arrow_reader(batch_size))
+    
+    def arrow(self) -> pa.Table:
+        return self.head_arrow(self.max_rows)
+    
+    def df(self) -> pd.DataFrame:
+        return self.arrow().to_pandas()
+    
+    def __len__(self) -> int:
+        return self.row_count()
+    
+    def close(self) -> None:
+        if self._con is not None:
+            self._con.close()
+            self._con = None
+    
+    def __enter__(self) -> "QueryResult":
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
 
 
 def run_sql(sql: str) -> pd.DataFrame:
-    """DuckDB로 SQL을 실행합니다.
+    """DuckDB로 SQL을 실행합니다 (제한 시간/메모리 한도/최대 행 수 적용).
     
     Args:
         sql: 실행할 SQL 쿼리
@@ -14,63 +281,147 @@ def run_sql(sql: str) -> pd.DataFrame:
         실행 결과 DataFrame
         
     Raises:
+        QueryExecutionError: 실행 한도에 걸려 중단된 경우
         RuntimeError: SQL 실행 중 오류가 발생한 경우
     """
     try:
-        # DuckDB 연결 생성
-        con = duckdb.connect()
+        with QueryResult.from_sql(sql) as result:
+            return result.df()
+    except QueryExecutionError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"SQL 실행 오류: {e}")
+
+
+def run_sql_arrow(sql: str) -> pa.Table:
+    """DuckDB로 SQL을 실행하고 결과를 Arrow Table로 반환합니다 (실행 한도 적용).
+    
+    Args:
+        sql: 실행할 SQL 쿼리
         
-        # SQL 실행
-        df = con.execute(sql).df()
-        con.close()
+    Returns:
+        실행 결과 Arrow Table
         
-        return df
+    Raises:
+        QueryExecutionError: 실행 한도에 걸려 중단된 경우
+        RuntimeError: SQL 실행 중 오류가 발생한 경우
+    """
+    try:
+        with QueryResult.from_sql(sql) as result:
+            return result.arrow()
+    except QueryExecutionError:
+        raise
     except Exception as e:
         raise RuntimeError(f"SQL 실행 오류: {e}")
 
 
-def validate_sql(sql: str) -> bool:
-    """SQL의 안전성을 검증합니다.
+def validate_sql(sql: str, allowed_dirs: Optional[List[str]] = None) -> bool:
+    """SQL의 안전성을 검증합니다 (파서 기반, guardrails 참고).
     
     Args:
         sql: 검증할 SQL 쿼리
+        allowed_dirs: read_parquet가 읽을 수 있는 디렉토리 (기본값: data/processed)
         
     Returns:
         안전한 경우 True, 그렇지 않으면 False
     """
-    sql_upper = sql.upper().strip()
-    
-    # 위험한 명령어 차단
-    dangerous_keywords = [
-        'INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE', 'ALTER', 
-        'TRUNCATE', 'GRANT', 'REVOKE', 'EXECUTE', 'CALL'
-    ]
-    
-    for keyword in dangerous_keywords:
-        if keyword in sql_upper:
-            return False
-    
-    # SELECT로 시작하는지 확인
-    if not sql_upper.startswith('SELECT'):
+    try:
+        guard_sql(sql, allowed_dirs or [DATA_ROOT], allowed_tables=SEMANTIC_VIEW_NAMES)
+        return True
+    except SQLGuardrailError:
         return False
-    
-    return True
 
 
-def execute_safe_sql(sql: str) -> pd.DataFrame:
+def execute_safe_sql(sql: str, base_dir: Optional[str] = None,
+                     timeout: float = QUERY_TIMEOUT_SEC,
+                     max_rows: int = MAX_FETCH_ROWS,
+                     month_dirs: Optional[List[str]] = None) -> QueryResult:
     """안전한 SQL만 실행합니다.
     
+    결과는 지연 평가되는 QueryResult로 반환됩니다. base_dir가 주어지면
+    (정규화된 SQL, 스냅샷 해시) 기준 결과 캐시를 사용하며, RESULT_CACHE_MAX_ROWS
+    이하의 작은 결과만 전체를 가져와 캐시에 저장합니다.
+    
     Args:
         sql: 실행할 SQL 쿼리
+        base_dir: 쿼리 대상 데이터 디렉토리 (결과 캐시 키에 사용)
+        timeout: 벽시계 제한 시간(초), 이후 조회까지 포함한 전체 예산
+        max_rows: 반환할 최대 행 수 (초과분은 LIMIT으로 잘림)
+        month_dirs: 여러 달 질의 시 대상 월 폴더 목록 (cur_* 논리 테이블로 노출, 결과 캐시 미사용)
         
     Returns:
-        실행 결과 DataFrame
+        실행 결과 QueryResult
         
     Raises:
-        ValueError: 안전하지 않은 SQL인 경우
+        SQLGuardrailError(ValueError): 안전하지 않거나 예상 비용이 너무 큰 SQL인 경우
+        QueryExecutionError(RuntimeError): 제한 시간/메모리 한도 초과 또는 취소된 경우
         RuntimeError: SQL 실행 중 오류가 발생한 경우
     """
-    if not validate_sql(sql):
-        raise ValueError(f"안전하지 않은 SQL: {sql}")
+    # 파서 기반 검증 + LIMIT 주입 (read_parquet는 base_dir 내부만 허용)
+    # 잘림 여부를 알 수 있도록 한 행 더 (max_rows + 1) 읽고, 결과는 max_rows행까지만 노출
+    if month_dirs:
+        safe_sql = guard_sql(sql, month_dirs, allowed_tables=MONTH_RANGE_VIEW_NAMES, max_rows=max_rows + 1)
+    else:
+        # 시맨틱 뷰는 base_dir가 있을 때만 등록되므로 그때만 참조 허용
+        allowed_tables = SEMANTIC_VIEW_NAMES if base_dir else None
+        safe_sql = guard_sql(sql, [base_dir or DATA_ROOT], allowed_tables=allowed_tables, max_rows=max_rows + 1)
     
-    return run_sql(sql)
+    try:
+        if month_dirs:
+            return QueryResult.from_sql(safe_sql, precheck=True, timeout=timeout, max_rows=max_rows,
+                                        month_dirs=month_dirs)
+        if base_dir is None or not CACHE_ENABLED:
+            return QueryResult.from_sql(safe_sql, precheck=True, timeout=timeout, max_rows=max_rows,
+                                        base_dir=base_dir)
+        
+        cache = get_result_cache()
+        table = cache.get(safe_sql, base_dir)
+        annotate(**{"sql.result_cache_hit": table is not None})
+        if table is not None:
+            return QueryResult.from_arrow(safe_sql, table, cached=True, max_rows=max_rows)
+        
+        # EXPLAIN 추정 카디널리티 사전 점검 후 실행
+        result = QueryResult.from_sql(safe_sql, precheck=True, timeout=timeout, max_rows=max_rows,
+                                      base_dir=base_dir)
+        # 한도+1 행까지만 읽어 보고, 한도 이하라면 그것이 전체 결과이므로 캐시
+        # (max_rows 다음 행도 함께 캐시해 캐시된 결과의 잘림 여부가 유지됨)
+        try:
+            head = result._run(lambda: result._full.limit(RESULT_CACHE_MAX_ROWS + 1).arrow())
+        except Exception:
+            result.close()
+            raise
+        if head.num_rows <= RESULT_CACHE_MAX_ROWS:
+            result.close()
+            cache.put(safe_sql, base_dir, head)
+            return QueryResult.from_arrow(safe_sql, head, max_rows=max_rows)
+        return result
+    except (SQLGuardrailError, QueryExecutionError):
+        raise
+    except Exception as e:
+        raise RuntimeError(f"SQL 실행 오류: {e}")
+
+
+def fetch_result_page_arrow(sql: str, page: int = 0, page_size: int = 100,
+                            base_dir: Optional[str] = None,
+                            month_dirs: Optional[List[str]] = None) -> pa.Table:
+    """UI 표시용으로 결과의 한 페이지만 Arrow Table로 조회합니다 (st.dataframe에 그대로 전달).
+    
+    Args:
+        sql: 실행할 SQL 쿼리
+        page: 0부터 시작하는 페이지 번호
+        page_size: 페이지당 행 수
+        base_dir: 쿼리 대상 데이터 디렉토리 (결과 캐시 키에 사용)
+        month_dirs: 여러 달 질의 시 대상 월 폴더 목록
+        
+    Returns:
+        해당 페이지의 Arrow Table
+    """
+    with execute_safe_sql(sql, base_dir=base_dir, month_dirs=month_dirs) as result:
+        return result.fetch_page_arrow(offset=page * page_size, limit=page_size)
+
+
+def fetch_result_page(sql: str, page: int = 0, page_size: int = 100,
+                      base_dir: Optional[str] = None,
+                      month_dirs: Optional[List[str]] = None) -> pd.DataFrame:
+    """fetch_result_page_arrow의 DataFrame 버전"""
+    return fetch_result_page_arrow(sql, page, page_size, base_dir, month_dirs).to_pandas()
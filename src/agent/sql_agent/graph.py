@@ -1,18 +1,37 @@
 """
 SQL Agent: CUR 기반 비용 분석 질의 응답 그래프
 기존 ask.py의 SQL 체인 (nl2sql → exec → summary)을 이동
+실행 오류 시 repair ↔ exec 루프로 제한된 횟수/시간 안에서 SQL 자가 수정
+"최근 3개월" 같은 기간 질문은 해당 월들을 union한 논리 테이블(cur_*)로 질의
+각 노드는 동기/비동기 구현을 함께 가지며 ask는 invoke, ask_async는 ainvoke로 실행
+ask_stream/ask_astream은 요약 노드의 LLM 토큰을 이벤트로 흘려보냄
+라우터가 후속 질문에 넘기는 대화 맥락(conversation)은 NL2SQL/repair 프롬프트에 들어감
 """
 
 import os
-from typing import Dict, Any, List, TypedDict
+import json
+import asyncio
+import time
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, TypedDict
 
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableLambda
 
 # SQL Agent 내부 모듈들 import
-from .schema_provider import resolve_base_dir, get_schema_json, scan_parquet_files
-from .nl2sql import generate_sql
-from .executor import execute_safe_sql
-from .summary import summarize_answer, summarize_error
+from .schema_provider import (
+    resolve_base_dir, get_schema_json, scan_parquet_files, list_processed_months, DATA_ROOT,
+)
+from .month_range import parse_month_range
+from .nl2sql import generate_sql, agenerate_sql
+from .executor import execute_safe_sql, QueryTimeoutError, QUERY_TIMEOUT_SEC
+from .summary import summarize_answer, asummarize_answer, summarize_error
+from .repair import (
+    repair_sql, arepair_sql, classify_error, is_repairable, get_repair_stats,
+    REPAIR_MAX_ATTEMPTS, REPAIR_BUDGET_SEC,
+)
+from ..streaming import StreamEvent, stream_graph, astream_graph, answer_events
+from ..tracing import span, traced_node
+from ...core.semantic_layer import get_month_range_schema, describe_month_range_views, MONTH_RANGE_VIEWS
 
 
 class SQLAgentState(TypedDict):
@@ -21,103 +40,346 @@ class SQLAgentState(TypedDict):
     base_dir: str
     schema_json: str
     source_files: list
+    months: list
+    month_dirs: list
+    semantic_views: str
+    conversation: str
+    defer_summary: bool
     sql: str
-    df: Any
+    query_result: Any
     result: dict
+    error: Any
+    error_class: str
+    repair_attempts: int
+    repair_history: list
+    started_at: float
 
 
 def nl2sql_node(state: SQLAgentState) -> SQLAgentState:
     """NL2SQL 노드: 자연어 질문을 SQL로 변환"""
-    sql = generate_sql(state["question"], state["schema_json"], state["base_dir"])
-    return {**state, "sql": sql}
+    sql = generate_sql(state["question"], state["schema_json"], state["base_dir"],
+                       semantic_views=state.get("semantic_views"), conversation=state.get("conversation"))
+    return _after_nl2sql(state, sql)
+
+
+async def anl2sql_node(state: SQLAgentState) -> SQLAgentState:
+    sql = await agenerate_sql(state["question"], state["schema_json"], state["base_dir"],
+                              semantic_views=state.get("semantic_views"), conversation=state.get("conversation"))
+    return _after_nl2sql(state, sql)
+
+
+def _after_nl2sql(state: SQLAgentState, sql: str) -> SQLAgentState:
+    return {
+        **state,
+        "sql": sql,
+        "error": None,
+        "repair_attempts": 0,
+        "repair_history": [],
+        "started_at": state.get("started_at") or time.monotonic(),
+    }
+
+
+def _remaining_budget(state: SQLAgentState) -> float:
+    """SQL 수정 루프에 남은 지연 예산(초)"""
+    return REPAIR_BUDGET_SEC - (time.monotonic() - state["started_at"])
 
 
 def exec_node(state: SQLAgentState) -> SQLAgentState:
-    """실행 노드: SQL을 실행하여 DataFrame 반환"""
-    df = execute_safe_sql(state["sql"])
-    return {**state, "df": df}
+    """실행 노드: SQL을 실행하여 지연 평가 QueryResult 반환 (오류는 state에 기록)
+
+    수정된 SQL의 재실행은 남은 repair 예산 안에서만 실행한다.
+    """
+    timeout = QUERY_TIMEOUT_SEC
+    if state.get("repair_attempts"):
+        timeout = min(timeout, _remaining_budget(state))
+    try:
+        if timeout <= 0:
+            raise QueryTimeoutError(f"SQL 수정 예산({REPAIR_BUDGET_SEC:g}초)을 모두 사용했습니다",
+                                    limit=REPAIR_BUDGET_SEC)
+        query_result = execute_safe_sql(state["sql"], base_dir=state["base_dir"], timeout=timeout,
+                                        month_dirs=state.get("month_dirs"))
+        error = None
+    except Exception as e:
+        query_result, error = None, e
+
+    # 직전 repair 시도의 성공/실패를 오류 분류별로 기록
+    history = list(state.get("repair_history") or [])
+    if history:
+        history[-1] = {**history[-1], "success": error is None}
+        get_repair_stats().record(history[-1]["error_class"], error is None)
+
+    return {
+        **state,
+        "query_result": query_result,
+        "error": error,
+        "error_class": classify_error(error) if error is not None else None,
+        "repair_history": history,
+    }
+
+
+async def aexec_node(state: SQLAgentState) -> SQLAgentState:
+    # DuckDB 실행은 블로킹이므로 스레드 풀에서 실행
+    return await asyncio.to_thread(exec_node, state)
+
+
+def route_after_exec(state: SQLAgentState) -> str:
+    """실행 결과에 따라 summary / repair / error 분기
+
+    수정 가능한 오류이고, 시도 횟수와 전체 지연 예산이 남아 있을 때만 repair로 보낸다.
+    """
+    if state.get("error") is None:
+        return "summary"
+    if (is_repairable(state["error_class"])
+            and state["repair_attempts"] < REPAIR_MAX_ATTEMPTS
+            and _remaining_budget(state) > 0):
+        return "repair"
+    return "error"
+
+
+def repair_node(state: SQLAgentState) -> SQLAgentState:
+    """수정 노드: 오류 메시지 + 축소된 스키마로 SQL 재생성 (LLM 호출은 남은 예산 안에서)"""
+    try:
+        sql = repair_sql(state["question"], state["sql"], state["error"],
+                         state["schema_json"], state["base_dir"],
+                         semantic_views=state.get("semantic_views"), conversation=state.get("conversation"),
+                         timeout=_remaining_budget(state))
+    except Exception:
+        sql = None
+    return _after_repair(state, sql)
+
+
+async def arepair_node(state: SQLAgentState) -> SQLAgentState:
+    try:
+        sql = await arepair_sql(state["question"], state["sql"], state["error"],
+                                state["schema_json"], state["base_dir"],
+                                semantic_views=state.get("semantic_views"),
+                                conversation=state.get("conversation"),
+                                timeout=_remaining_budget(state))
+    except Exception:
+        sql = None
+    return _after_repair(state, sql)
+
+
+def _after_repair(state: SQLAgentState, sql: Optional[str]) -> SQLAgentState:
+    history = list(state.get("repair_history") or [])
+    history.append({
+        "sql": state["sql"],
+        "error_class": state["error_class"],
+        "error": str(state["error"]),
+        "success": None,
+    })
+    if sql is None:
+        # 수정 SQL 생성 자체가 실패하면 원래 SQL로 재실행하지 않고 원래 오류로 종료
+        history[-1]["success"] = False
+        get_repair_stats().record(state["error_class"], False)
+        return {**state, "repair_history": history}
+    return {
+        **state,
+        "sql": sql,
+        "repair_attempts": state["repair_attempts"] + 1,
+        "repair_history": history,
+    }
+
+
+def route_after_repair(state: SQLAgentState) -> str:
+    """수정 SQL을 만들었으면 재실행, 생성에 실패했으면 error"""
+    return "error" if state["repair_history"][-1]["success"] is False else "exec"
+
+
+def error_node(state: SQLAgentState) -> SQLAgentState:
+    """오류 노드: 수정하지 못한 실행 오류를 오류 응답으로 변환"""
+    result = summarize_error(state["question"], state["error"])
+    result.update({"sql": state["sql"], "repair_attempts": state["repair_attempts"]})
+    return {**state, "result": result}
 
 
 def summary_node(state: SQLAgentState) -> SQLAgentState:
-    """요약 노드: SQL 실행 결과를 요약"""
-    result = summarize_answer(
-        state["question"], 
-        state["sql"], 
-        state["df"], 
-        state["source_files"]
-    )
+    """요약 노드: SQL 실행 결과를 요약 (집계/샘플만 조회 후 연결 해제)"""
+    with state["query_result"] as query_result:
+        result = summarize_answer(
+            state["question"], 
+            state["sql"], 
+            query_result, 
+            state["source_files"],
+            defer_llm=state.get("defer_summary", False)
+        )
+    return _after_summary(state, result)
+
+
+async def asummary_node(state: SQLAgentState) -> SQLAgentState:
+    with state["query_result"] as query_result:
+        result = await asummarize_answer(state["question"], state["sql"], query_result, state["source_files"],
+                                         defer_llm=state.get("defer_summary", False))
+    return _after_summary(state, result)
+
+
+def _after_summary(state: SQLAgentState, result: Dict[str, Any]) -> SQLAgentState:
+    result["repair_attempts"] = state.get("repair_attempts", 0)
+    # 결과 표 페이지 조회(UI)가 같은 데이터 범위로 재실행할 수 있도록 기록
+    result["base_dir"] = state["base_dir"]
+    if state.get("months"):
+        result["months"] = state["months"]
+        result["month_dirs"] = state["month_dirs"]
     return {**state, "result": result}
 
 
 # SQL Agent StateGraph 정의
 graph = StateGraph(SQLAgentState)
-graph.add_node("nl2sql", nl2sql_node)
-graph.add_node("exec", exec_node)
-graph.add_node("summary", summary_node)
+graph.add_node("nl2sql", traced_node("sql.nl2sql", RunnableLambda(nl2sql_node, afunc=anl2sql_node)))
+graph.add_node("exec", traced_node("sql.exec", RunnableLambda(exec_node, afunc=aexec_node)))
+graph.add_node("repair", traced_node("sql.repair", RunnableLambda(repair_node, afunc=arepair_node)))
+graph.add_node("summary", traced_node("sql.summary", RunnableLambda(summary_node, afunc=asummary_node)))
+graph.add_node("error", traced_node("sql.error", error_node))
 
 graph.set_entry_point("nl2sql")
 graph.add_edge("nl2sql", "exec")
-graph.add_edge("exec", "summary")
+graph.add_conditional_edges("exec", route_after_exec, {
+    "summary": "summary",
+    "repair": "repair",
+    "error": "error",
+})
+graph.add_conditional_edges("repair", route_after_repair, {
+    "exec": "exec",
+    "error": "error",
+})
 graph.add_edge("summary", END)
+graph.add_edge("error", END)
 
 SQL_GRAPH = graph.compile()
 
 
-def ask(question: str, month: str = "latest") -> Dict[str, Any]:
+def _build_state(question: str, month: str = "latest",
+                 months: Optional[List[str]] = None) -> Dict[str, Any]:
+    """그래프 초기 상태 구성
+
+    month가 latest이고 질문에 기간 표현("최근 3개월" 등)이 있으면(또는 months를 직접 주면)
+    해당 월 폴더들을 union한 논리 테이블로 질의하는 여러 달 모드가 된다.
+    """
+    if months is None and month == "latest":
+        months = parse_month_range(question, list_processed_months())
+    if months and len(months) > 1:
+        month_dirs = [os.path.join(DATA_ROOT, ym) for ym in months]
+        schema_json = json.dumps(get_month_range_schema(month_dirs), ensure_ascii=False, indent=2)
+        return {
+            "question": question,
+            "month": month,
+            # 최신 월을 기준 디렉토리로 사용 (경로 보정/가드레일 기준)
+            "base_dir": month_dirs[-1],
+            "schema_json": schema_json,
+            "source_files": [
+                f"{ym}/{file_name}" for ym, d in zip(months, month_dirs)
+                for file_name, _ in MONTH_RANGE_VIEWS.values() if os.path.exists(os.path.join(d, file_name))
+            ],
+            "months": months,
+            "month_dirs": month_dirs,
+            "semantic_views": describe_month_range_views(month_dirs, months),
+        }
+
+    if months:
+        month = months[0]
+    base_dir = resolve_base_dir(month)
+    return {
+        "question": question,
+        "month": month,
+        "base_dir": base_dir,
+        "schema_json": get_schema_json(base_dir),
+        "source_files": [os.path.basename(f) for f in scan_parquet_files(base_dir)],
+    }
+
+
+def _initial_state(question: str, month: str = "latest", months: Optional[List[str]] = None,
+                   prefetch: Any = None, conversation: Optional[str] = None) -> Dict[str, Any]:
+    """사전 준비(prefetch.SQLPrefetch)된 상태가 같은 질문/월이면 재사용, 아니면 새로 구성"""
+    state = None
+    if prefetch is not None and months is None and prefetch.matches(question, month):
+        state = prefetch.state()
+    if state is None:
+        state = _build_state(question, month, months)
+    return {**state, "conversation": conversation} if conversation else state
+
+
+def ask(question: str, month: str = "latest", months: Optional[List[str]] = None,
+        prefetch: Any = None, conversation: Optional[str] = None) -> Dict[str, Any]:
     """
     SQL Agent 진입점: 자연어 질문 → (NL2SQL 체인) → SQL 실행 → (요약 체인) → 결과 반환
     
     Args:
         question: 사용자 질문
         month: 분석할 월 (기본값: "latest")
+        months: 여러 달 질의 대상 월 목록 (YYYYMM, 생략 시 질문의 기간 표현으로 해석)
+        prefetch: 라우터가 의도 분류 중 시작한 사전 준비 핸들 (start_prefetch)
+        conversation: 후속 질문의 대화 맥락 블록 (conversation.TurnContext.text)
         
     Returns:
         SQL 분석 결과
     """
     try:
-        base_dir = resolve_base_dir(month)
-        schema_json = get_schema_json(base_dir)
-        source_files = [os.path.basename(f) for f in scan_parquet_files(base_dir)]
-        
-        state = {
-            "question": question,
-            "month": month,
-            "base_dir": base_dir,
-            "schema_json": schema_json,
-            "source_files": source_files
-        }
-        
-        final = SQL_GRAPH.invoke(state)
+        with span("sql.ask"):
+            state = _initial_state(question, month, months, prefetch, conversation)
+            final = SQL_GRAPH.invoke(state)
         return final["result"]
         
     except Exception as e:
         return summarize_error(question, e)
 
 
-def ask_with_debug(question: str, month: str = "latest") -> Dict[str, Any]:
+async def ask_async(question: str, month: str = "latest", months: Optional[List[str]] = None,
+                    prefetch: Any = None, conversation: Optional[str] = None) -> Dict[str, Any]:
+    """ask의 비동기 버전: LLM 호출은 ainvoke, DuckDB/파일 작업은 스레드 풀에서 실행
+
+    하나의 이벤트 루프에서 여러 질문을 동시에 처리할 수 있다.
+    동기 코드에서는 llm_clients.run_async(ask_async(...))로 공용 루프에서 실행한다.
+    """
+    try:
+        with span("sql.ask"):
+            state = await asyncio.to_thread(_initial_state, question, month, months, prefetch, conversation)
+            final = await SQL_GRAPH.ainvoke(state)
+        return final["result"]
+
+    except Exception as e:
+        return summarize_error(question, e)
+
+
+def ask_stream(question: str, month: str = "latest", months: Optional[List[str]] = None,
+               prefetch: Any = None, conversation: Optional[str] = None) -> Iterator[StreamEvent]:
+    """ask의 스트리밍 버전: 요약 체인의 토큰 이벤트를 차례로, 마지막에 final 이벤트를 반환
+
+    이벤트 형식은 src/agent/streaming.py 참고. 템플릿 답변/오류는 token 1개 + final.
+    """
+    try:
+        state = _initial_state(question, month, months, prefetch, conversation)
+        yield from stream_graph(SQL_GRAPH, state, answer_nodes=("summary",))
+    except Exception as e:
+        yield from answer_events(summarize_error(question, e))
+
+
+async def ask_astream(question: str, month: str = "latest", months: Optional[List[str]] = None,
+                      prefetch: Any = None, conversation: Optional[str] = None) -> AsyncIterator[StreamEvent]:
+    """ask_stream의 비동기 버전"""
+    try:
+        state = await asyncio.to_thread(_initial_state, question, month, months, prefetch, conversation)
+        async for event in astream_graph(SQL_GRAPH, state, answer_nodes=("summary",)):
+            yield event
+    except Exception as e:
+        for event in answer_events(summarize_error(question, e)):
+            yield event
+
+
+def ask_with_debug(question: str, month: str = "latest",
+                   months: Optional[List[str]] = None) -> Dict[str, Any]:
     """디버그 정보를 포함하여 질문 처리"""
     try:
-        base_dir = resolve_base_dir(month)
-        schema_json = get_schema_json(base_dir)
-        source_files = [os.path.basename(f) for f in scan_parquet_files(base_dir)]
-        
-        state = {
-            "question": question,
-            "month": month,
-            "base_dir": base_dir,
-            "schema_json": schema_json,
-            "source_files": source_files
-        }
-        
+        state = _build_state(question, month, months)
         final = SQL_GRAPH.invoke(state)
         result = final["result"]
         
         # 디버그 정보 추가
         result.update({
             "debug": {
-                "base_dir": base_dir,
-                "schema_json": schema_json,
-                "source_files": source_files,
+                "base_dir": state["base_dir"],
+                "months": state.get("months"),
+                "schema_json": state["schema_json"],
+                "source_files": state["source_files"],
                 "state": final  # 전체 상태 정보 포함
             }
         })
@@ -0,0 +1,283 @@
+"""
+SQL 가드레일: DuckDB 파서(AST) 기반 검증 + EXPLAIN 기반 비용 사전 점검
+
+- 단일 SELECT 문만 허용 (duckdb.extract_statements + json_serialize_sql)
+- 허용된 함수만 사용 가능 (연산자는 허용)
+- 테이블 함수는 read_parquet만 허용하며, 경로는 활성 데이터 디렉토리 내부로 제한
+- 일반 테이블 참조는 범위 안의 CTE 또는 허용된 뷰 이름만 가능 (파일 경로 replacement scan 차단)
+- EXPLAIN 추정 카디널리티가 한도를 넘는 쿼리(예: 폭주하는 cross join) 차단
+- 최상위 LIMIT이 없거나 너무 크면 LIMIT을 주입
+
+부분 문자열 검사와 달리 created_at 같은 컬럼명이 CREATE로 오인되지 않는다.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import duckdb
+
+
+MAX_RESULT_ROWS = int(os.getenv("SQL_MAX_RESULT_ROWS", "100000"))
+MAX_ESTIMATED_ROWS = int(os.getenv("SQL_MAX_ESTIMATED_ROWS", "50000000"))
+
+ALLOWED_TABLE_FUNCTIONS = {"read_parquet", "parquet_scan"}
+
+ALLOWED_FUNCTIONS = {
+    # 집계
+    "sum", "avg", "mean", "min", "max", "count", "count_star", "median", "mode",
+    "quantile", "quantile_cont", "quantile_disc", "stddev", "stddev_pop", "stddev_samp",
+    "variance", "var_pop", "var_samp", "any_value", "first", "last", "arg_max", "arg_min",
+    "argmax", "argmin", "max_by", "min_by", "string_agg", "group_concat", "list", "array_agg",
+    "bool_and", "bool_or", "approx_count_distinct", "approx_quantile", "product", "fsum",
+    "sumkahan", "corr", "covar_pop", "covar_samp", "histogram", "entropy", "count_if",
+    # 윈도우
+    "row_number", "rank", "dense_rank", "percent_rank", "cume_dist", "ntile",
+    "lag", "lead", "first_value", "last_value", "nth_value",
+    # 수학
+    "round", "round_even", "floor", "ceil", "ceiling", "abs", "sqrt", "power", "pow",
+    "ln", "log", "log10", "log2", "exp", "sign", "greatest", "least", "trunc", "mod",
+    # 문자열
+    "lower", "upper", "lcase", "ucase", "length", "strlen", "substr", "substring",
+    "trim", "ltrim", "rtrim", "replace", "concat", "concat_ws", "split_part", "contains",
+    "starts_with", "ends_with", "prefix", "suffix", "regexp_matches", "regexp_replace",
+    "regexp_extract", "left", "right", "lpad", "rpad", "strpos", "instr", "position",
+    "reverse", "format", "printf", "string_split", "like_escape", "ilike_escape",
+    "~~", "!~~", "~~*", "!~~*", "||",
+    # 날짜/시간
+    "date_trunc", "datetrunc", "date_part", "datepart", "extract", "year", "month", "day",
+    "week", "quarter", "hour", "minute", "dayofweek", "dayofmonth", "dayofyear",
+    "strftime", "strptime", "date_diff", "datediff", "date_add", "date_sub",
+    "current_date", "now", "today", "make_date", "epoch", "to_timestamp", "last_day",
+    "monthname", "dayname",
+    # 조건/리스트
+    "coalesce", "ifnull", "nullif", "if", "iff", "list_value", "list_sum", "unnest",
+    "len", "array_length",
+}
+
+
+class SQLGuardrailError(ValueError):
+    """가드레일 위반 (안전하지 않거나 너무 비싼 SQL)"""
+
+
+def _walk(node: Any) -> Iterable[Dict[str, Any]]:
+    """AST(JSON)의 모든 dict 노드를 순회"""
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk(item)
+
+
+def parse_select(sql: str) -> Dict[str, Any]:
+    """단일 SELECT 문인지 확인하고 AST(JSON)를 반환합니다.
+
+    Raises:
+        SQLGuardrailError: 파싱 실패, 다중 문장, SELECT가 아닌 문장
+    """
+    try:
+        statements = duckdb.extract_statements(sql)
+    except duckdb.Error as e:
+        raise SQLGuardrailError(f"SQL 파싱 실패: {e}")
+    if len(statements) != 1:
+        raise SQLGuardrailError(f"하나의 SQL 문만 허용됩니다 (입력: {len(statements)}개)")
+    if statements[0].type != duckdb.StatementType.SELECT:
+        raise SQLGuardrailError(f"SELECT 문만 허용됩니다 (입력: {statements[0].type.name})")
+
+    con = duckdb.connect()
+    try:
+        ast = json.loads(con.execute("SELECT json_serialize_sql(?)", [sql]).fetchone()[0])
+    finally:
+        con.close()
+    if ast.get("error"):
+        raise SQLGuardrailError(f"SQL 파싱 실패: {ast.get('error_message')}")
+    return ast["statements"][0]
+
+
+def _constant_strings(node: Dict[str, Any]) -> Optional[List[str]]:
+    """read_parquet 경로 인자에서 상수 문자열 목록을 추출 (상수가 아니면 None)"""
+    if node.get("class") == "CONSTANT":
+        value = node["value"]
+        return [value["value"]] if isinstance(value.get("value"), str) else None
+    if node.get("class") == "FUNCTION" and node.get("function_name") == "list_value":
+        paths = []
+        for child in node.get("children", []):
+            sub = _constant_strings(child)
+            if sub is None:
+                return None
+            paths.extend(sub)
+        return paths
+    return None
+
+
+def _is_within(path: str, allowed_dirs: List[str]) -> bool:
+    real = os.path.realpath(path)
+    for d in allowed_dirs:
+        root = os.path.realpath(d)
+        if real == root or real.startswith(root + os.sep):
+            return True
+    return False
+
+
+def _cte_names(node: Dict[str, Any]) -> Set[str]:
+    """이 노드가 정의하는 CTE 이름 (해당 SELECT 노드와 그 하위에서만 유효)"""
+    cte_map = node.get("cte_map")
+    if not isinstance(cte_map, dict):
+        return set()
+    return {entry["key"].lower() for entry in cte_map.get("map", [])}
+
+
+def _looks_like_path(name: str) -> bool:
+    """파일 replacement scan으로 해석될 수 있는 테이블 이름 (경로 구분자나 확장자 포함)"""
+    return "/" in name or "\\" in name or bool(os.path.splitext(name)[1])
+
+
+def check_ast(statement: Dict[str, Any], allowed_dirs: List[str],
+              allowed_tables: Optional[Set[str]] = None) -> None:
+    """AST를 순회하며 함수/테이블 함수/테이블 참조를 검증합니다.
+
+    CTE 이름은 정의된 SELECT 노드의 범위 안에서만 참조 가능하다
+    (하위 쿼리의 CTE 이름으로 바깥 FROM의 파일 경로를 가리는 우회 차단).
+
+    Raises:
+        SQLGuardrailError: 허용되지 않은 함수, 경로, 테이블 참조
+    """
+    allowed_tables = {t.lower() for t in (allowed_tables or set())}
+
+    # 테이블 함수 호출 노드는 아래에서 별도로 검증
+    table_function_ids = {
+        id(node["function"]) for node in _walk(statement) if node.get("type") == "TABLE_FUNCTION"
+    }
+
+    def _check(node: Any, scope: frozenset) -> None:
+        if isinstance(node, list):
+            for item in node:
+                _check(item, scope)
+            return
+        if not isinstance(node, dict):
+            return
+        names = _cte_names(node)
+        if names:
+            scope = scope | names
+        _check_node(node, scope)
+        for value in node.values():
+            _check(value, scope)
+
+    def _check_node(node: Dict[str, Any], scope: frozenset) -> None:
+        if node.get("type") == "TABLE_FUNCTION":
+            func = node["function"]
+            name = func.get("function_name", "").lower()
+            if name not in ALLOWED_TABLE_FUNCTIONS:
+                raise SQLGuardrailError(f"허용되지 않은 테이블 함수: {name}")
+            args = [c for c in func.get("children", []) if c.get("class") != "COMPARISON"]
+            paths = _constant_strings(args[0]) if args else None
+            if not paths:
+                raise SQLGuardrailError("read_parquet 경로는 문자열 상수여야 합니다")
+            for path in paths:
+                if not _is_within(path, allowed_dirs):
+                    raise SQLGuardrailError(f"허용된 데이터 디렉토리 밖의 파일입니다: {path}")
+
+        elif node.get("type") == "BASE_TABLE":
+            raw = node.get("table_name", "")
+            name = raw.lower()
+            if _looks_like_path(raw) or (name not in scope and name not in allowed_tables):
+                raise SQLGuardrailError(f"허용되지 않은 테이블 참조: {raw}")
+
+        elif (node.get("class") == "FUNCTION" and not node.get("is_operator")
+              and id(node) not in table_function_ids):
+            name = node.get("function_name", "").lower()
+            if name not in ALLOWED_FUNCTIONS:
+                raise SQLGuardrailError(f"허용되지 않은 함수: {name}")
+
+        elif node.get("class") == "WINDOW":
+            # sum(...) OVER (...) 같은 윈도우 식은 FUNCTION이 아니라 WINDOW 노드로 파싱됨
+            name = node.get("function_name", "").lower()
+            if name not in ALLOWED_FUNCTIONS:
+                raise SQLGuardrailError(f"허용되지 않은 윈도우 함수: {name}")
+
+    _check(statement, frozenset())
+
+
+def _top_level_limit(statement: Dict[str, Any]) -> Optional[int]:
+    """최상위 노드의 상수 LIMIT 값을 반환 (없거나 상수가 아니면 None)"""
+    for modifier in statement["node"].get("modifiers", []):
+        if modifier.get("type") == "LIMIT_MODIFIER":
+            limit = modifier.get("limit") or {}
+            value = (limit.get("value") or {}).get("value") if limit.get("class") == "CONSTANT" else None
+            return value if isinstance(value, int) else None
+    return None
+
+
+def inject_limit(sql: str, statement: Dict[str, Any], max_rows: int = MAX_RESULT_ROWS) -> str:
+    """최상위 LIMIT이 없거나 max_rows보다 크면 LIMIT을 씌운 SQL을 반환"""
+    body = sql.strip().rstrip(";").strip()
+    limit = _top_level_limit(statement)
+    if limit is not None and limit <= max_rows:
+        return body
+    return f"SELECT * FROM (\n{body}\n) AS _guarded LIMIT {max_rows}"
+
+
+def guard_sql(sql: str, allowed_dirs: List[str], allowed_tables: Optional[Set[str]] = None,
+              max_rows: int = MAX_RESULT_ROWS) -> str:
+    """파서 기반 검증 후 LIMIT이 주입된 실행용 SQL을 반환합니다.
+
+    Args:
+        sql: 검증할 SQL
+        allowed_dirs: read_parquet가 읽을 수 있는 디렉토리 목록
+        allowed_tables: 참조 가능한 뷰/테이블 이름
+        max_rows: 주입할 최대 LIMIT
+
+    Returns:
+        실행용 SQL (끝 세미콜론 없음)
+
+    Raises:
+        SQLGuardrailError: 가드레일 위반
+    """
+    statement = parse_select(sql)
+    check_ast(statement, allowed_dirs, allowed_tables)
+    return inject_limit(sql, statement, max_rows)
+
+
+def _plan_estimates(node: Dict[str, Any], out: List[int]) -> int:
+    """EXPLAIN 노드의 추정 카디널리티 (cross product는 자식의 곱으로 추정)"""
+    children = [_plan_estimates(c, out) for c in node.get("children", [])]
+    est = (node.get("extra_info") or {}).get("Estimated Cardinality")
+    name = node.get("name", "").strip().upper()
+    if est is not None:
+        value = int(est)
+    elif name in ("CROSS_PRODUCT", "NESTED_LOOP_JOIN", "BLOCKWISE_NL_JOIN") and children:
+        value = 1
+        for c in children:
+            value *= max(c, 1)
+    else:
+        value = max(children, default=0)
+    out.append(value)
+    return value
+
+
+def estimate_cardinality(con: duckdb.DuckDBPyConnection, sql: str) -> int:
+    """EXPLAIN (FORMAT JSON) 계획에서 가장 큰 중간 결과의 추정 행 수를 반환"""
+    rows = con.execute(f"EXPLAIN (FORMAT JSON) {sql}").fetchall()
+    estimates: List[int] = []
+    for _, plan_json in rows:
+        for root in json.loads(plan_json):
+            _plan_estimates(root, estimates)
+    return max(estimates, default=0)
+
+
+def check_estimated_cost(con: duckdb.DuckDBPyConnection, sql: str,
+                         max_estimated_rows: int = MAX_ESTIMATED_ROWS) -> int:
+    """추정 카디널리티가 한도를 넘으면 실행 전에 차단합니다.
+
+    Raises:
+        SQLGuardrailError: 추정 행 수가 max_estimated_rows 초과
+    """
+    estimated = estimate_cardinality(con, sql)
+    if estimated > max_estimated_rows:
+        raise SQLGuardrailError(
+            f"예상 처리 행 수가 너무 많습니다 (추정 {estimated:,}행 > 한도 {max_estimated_rows:,}행). "
+            f"조건을 추가하거나 집계 테이블을 사용해 주세요."
+        )
+    return estimated
@@ -0,0 +1,131 @@
+"""
+여러 달 질의 지원: 질문의 기간 표현 → 월 목록 해석
+
+"최근 3개월", "지난 세 달", "2025년 6월부터 8월까지", "202506~202508" 같은 표현을
+처리된 월 폴더(data/processed/YYYYMM) 중 해당하는 월 목록으로 바꾼다.
+기간 표현이 없으면 None을 반환하여 기존 단일 월(latest) 흐름을 유지한다.
+parse_month는 "지난달", "2025년 7월" 같은 단일 월 표현을 해석한다 (대화 후속 질문의 기간 슬롯).
+"""
+
+import re
+from typing import List, Optional
+
+
+_KOREAN_NUMBERS = {
+    "한": 1, "두": 2, "세": 3, "석": 3, "네": 4, "넉": 4, "다섯": 5, "여섯": 6,
+    "일곱": 7, "여덟": 8, "아홉": 9, "열": 10, "열두": 12,
+}
+
+_NUMBER = r"(\d{1,2}|" + "|".join(sorted(_KOREAN_NUMBERS, key=len, reverse=True)) + r")"
+
+# "최근 3개월", "지난 세 달", "3개월간", "3개월 동안"
+_LAST_N = re.compile(rf"(?:최근|지난|직전)\s*{_NUMBER}\s*(?:개월|달)|{_NUMBER}\s*(?:개월|달)\s*(?:간|동안|치)")
+# "최근 분기", "최근 반년", "최근 1년"
+_LAST_PERIOD = re.compile(r"(?:최근|지난|직전)\s*(분기|반년|1년|일년|한 해)")
+_PERIOD_MONTHS = {"분기": 3, "반년": 6, "1년": 12, "일년": 12, "한 해": 12}
+
+# "2025년 6월부터 8월까지", "2025-06 ~ 2025-08", "202506~202508"
+# 끝 월은 "월"이 붙거나 연도를 포함한 YYYYMM/YYYY-MM 형태만 ("8월에서 10개 계정"의 10은 월이 아님)
+_YM = r"(\d{4})\s*(?:년|[.\-/])?\s*(\d{1,2})\s*월?"
+_END_YM = (r"(?:(\d{4})\s*(?:년|[.\-/])?\s*(\d{1,2})\s*월"
+           r"|(\d{4})\s*[.\-/]?\s*(\d{2})(?!\d)"
+           r"|(\d{1,2})\s*월)")
+_EXPLICIT = re.compile(rf"{_YM}\s*(?:부터|~|–|-|에서)\s*{_END_YM}")
+
+
+def _to_int(token: str) -> int:
+    return int(token) if token.isdigit() else _KOREAN_NUMBERS[token]
+
+
+def _month_index(ym: str) -> int:
+    return int(ym[:4]) * 12 + int(ym[4:]) - 1
+
+
+def _months_between(start: str, end: str) -> List[str]:
+    first, last = sorted((_month_index(start), _month_index(end)))
+    return [f"{i // 12:04d}{i % 12 + 1:02d}" for i in range(first, last + 1)]
+
+
+def parse_month_range(question: str, available_months: List[str]) -> Optional[List[str]]:
+    """질문의 기간 표현을 사용 가능한 월 목록(YYYYMM, 오름차순)으로 해석합니다.
+
+    Args:
+        question: 사용자 질문
+        available_months: 처리된 월 목록 (YYYYMM)
+
+    Returns:
+        해당 월 목록, 기간 표현이 없거나 해당 월이 없으면 None
+    """
+    available = sorted(available_months)
+    if not available:
+        return None
+
+    m = _EXPLICIT.search(question)
+    if m:
+        start_year, start_month, year_a, month_a, year_b, month_b, month_c = m.groups()
+        start = f"{start_year}{int(start_month):02d}"
+        end = f"{year_a or year_b or start_year}{int(month_a or month_b or month_c):02d}"
+        wanted = set(_months_between(start, end))
+        months = [ym for ym in available if ym in wanted]
+        return months or None
+
+    n = None
+    m = _LAST_N.search(question)
+    if m:
+        n = _to_int(next(g for g in m.groups() if g))
+    else:
+        m = _LAST_PERIOD.search(question)
+        if m:
+            n = _PERIOD_MONTHS[m.group(1)]
+    if not n:
+        return None
+
+    # 최신 월 기준으로 달력상 N개월 (데이터가 없는 월은 제외)
+    wanted = set(_months_between(available[-1], _shift(available[-1], -(n - 1))))
+    return [ym for ym in available if ym in wanted] or None
+
+
+# 단일 월: "이번달", "지난달", "지지난달", "2025년 7월", "2025-07", "202507", "7월"
+_RELATIVE_MONTH = [
+    (re.compile(r"지지난\s*(?:달|월)"), -2),
+    (re.compile(r"(?:지난|저번)\s*(?:달|월)|전월"), -1),
+    (re.compile(r"이번\s*(?:달|월)|당월|금월"), 0),
+]
+_SINGLE_YM = re.compile(r"(20\d{2})\s*(?:년\s*|[.\-/]\s*)?(\d{1,2})(?:\s*월|(?!\d))")
+_BARE_MONTH = re.compile(r"(?<!\d)(\d{1,2})\s*월")
+
+
+def parse_month(question: str, available_months: List[str]) -> Optional[List[str]]:
+    """질문의 단일 월 표현을 [YYYYMM]으로 해석합니다 (상대 표현은 최신 월 기준).
+
+    Args:
+        question: 사용자 질문
+        available_months: 처리된 월 목록 (YYYYMM)
+
+    Returns:
+        [해당 월], 표현이 없거나 해당 월 데이터가 없으면 None
+    """
+    available = sorted(available_months)
+    if not available:
+        return None
+
+    ym = None
+    for pattern, offset in _RELATIVE_MONTH:
+        if pattern.search(question):
+            ym = _shift(available[-1], offset)
+            break
+    else:
+        m = _SINGLE_YM.search(question)
+        if m:
+            ym = f"{m.group(1)}{int(m.group(2)):02d}"
+        else:
+            m = _BARE_MONTH.search(question)
+            if m:
+                # 연도 없는 "7월"은 데이터가 있는 가장 최근의 7월
+                ym = next((a for a in reversed(available) if int(a[4:]) == int(m.group(1))), None)
+    return [ym] if ym in available else None
+
+
+def _shift(ym: str, months: int) -> str:
+    i = _month_index(ym) + months
+    return f"{i // 12:04d}{i % 12 + 1:02d}"
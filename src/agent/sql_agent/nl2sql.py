@@ -1,14 +1,19 @@
 import os, json, re
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, Optional
 
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain.schema.runnable import RunnableLambda
 
+from .guardrails import parse_select, SQLGuardrailError
+from ..llm_clients import get_chat_model
+from .example_store import get_example_store, format_examples, FEW_SHOT_K
+from ...core.semantic_layer import describe_semantic_views
+
 # ─────────────────────────────────────────────────────────────
 # 전역 체인 관리
 # ─────────────────────────────────────────────────────────────
@@ -20,8 +25,12 @@ SYSTEM_PROMPT_TEMPLATE = """당신은 AWS SageMaker 비용 분석 챗봇이다.
 아래는 파일과 컬럼 목록이다:
 {schema_json}
 
+표준 지표 뷰 (FROM 절에서 테이블처럼 바로 사용, read_parquet 불필요):
+{semantic_views}
+
 스키마 분석 가이드:
 1. **테이블 선택**: 질문의 의도에 맞는 가장 적절한 테이블을 선택하라
+   - 총비용, Endpoint 사용 시간, Spot 비중, 태그 누락률, 태그 미부착 비용, 서비스별 비용: 위의 v_* 뷰를 우선 사용
    - 전체 비용 요약: monthly_summary.parquet
    - 상세 비용 분석: fact_sagemaker_costs.parquet  
    - 특정 서비스별 집계: agg_*.parquet (예: agg_notebook_hours.parquet)
@@ -30,7 +39,7 @@ SYSTEM_PROMPT_TEMPLATE = """당신은 AWS SageMaker 비용 분석 챗봇이다.
 
 3. **쿼리 작성 원칙**:
    - 하나의 테이블에서만 쿼리하라 (UNION 사용 금지)
-   - 서비스별 분석이 필요한 경우 fact_sagemaker_costs.parquet의 is_* 컬럼을 활용하라
+   - 서비스별 비교는 v_cost_by_service를 쓰고, 그 외 세부 필터가 필요할 때만 fact_sagemaker_costs.parquet의 is_* 컬럼을 활용하라
    - 복잡한 집계보다는 단순한 GROUP BY를 사용하라
 
 규칙:
@@ -42,22 +51,20 @@ SYSTEM_PROMPT_TEMPLATE = """당신은 AWS SageMaker 비용 분석 챗봇이다.
 - 위의 스키마에서 실제 존재하는 컬럼명만 사용한다.
 - 복잡한 쿼리보다는 단순하고 명확한 쿼리를 작성한다.
 - 날짜 필터는 하드코딩하지 말고 실제 데이터에 맞게 조정한다.
+
+{examples}
 """
 
-def _make_llm():
-    model = "gpt-4o-mini"
-    temperature = 0.0
-    timeout = 25.0
-    return ChatOpenAI(model=model, temperature=temperature, timeout=timeout)
+# NL2SQL/수리 체인 공용 LLM 설정 (llm_clients 레지스트리가 같은 인스턴스를 돌려줌)
+_LLM_SETTINGS = {"model": "gpt-4o-mini", "temperature": 0.0, "timeout": 25.0}
 
 def _post_validate_sql(sql: str) -> str:
-    """SELECT-only, 금지 키워드 검증."""
+    """단일 SELECT 문인지 파서로 검증 (경로/비용 검증은 executor에서 수행)."""
     s = sql.strip().rstrip(";")
-    if not re.match(r"(?is)^\s*select\b", s):
-        raise ValueError("NL2SQL: SELECT 문이 아닙니다.")
-    forbidden = r"(?is)\b(insert|update|delete|create|alter|drop|truncate|attach|copy|pragma)\b"
-    if re.search(forbidden, s):
-        raise ValueError("NL2SQL: 금지된 키워드가 포함되어 있습니다.")
+    try:
+        parse_select(s)
+    except SQLGuardrailError as e:
+        raise ValueError(f"NL2SQL: {e}")
     return s + ";"
 
 def _sanitize_paths(sql: str, base_dir: str) -> str:
@@ -68,45 +75,45 @@ def _sanitize_paths(sql: str, base_dir: str) -> str:
     base_dir = base_dir.rstrip("/").replace("\\", "/")
     return sql.replace("data/processed/latest", base_dir)
 
+def _parse_sql_output(text: str) -> str:
+    """LLM 출력({"sql": "..."} JSON 또는 SQL 텍스트)에서 SQL을 추출하고 검증."""
+    # 1) JSON 파싱 (더 강건한 파싱)
+    try:
+        # 텍스트에서 JSON 부분만 추출
+        text = text.strip()
+        if text.startswith("```json"):
+            text = text[7:]
+        if text.endswith("```"):
+            text = text[:-3]
+        text = text.strip()
+        
+        obj = json.loads(text)
+        sql = obj.get("sql") or ""
+    except Exception as e:
+        # JSON 파싱 실패 시 텍스트에서 SQL 부분만 추출 시도
+        try:
+            # SQL 키워드로 시작하는 부분 찾기
+            sql_match = re.search(r'SELECT\s+.*?(?:;|$)', text, re.IGNORECASE | re.DOTALL)
+            if sql_match:
+                sql = sql_match.group(0).strip()
+                if not sql.endswith(';'):
+                    sql += ';'
+            else:
+                raise ValueError(f"SQL을 찾을 수 없습니다: {text[:200]}")
+        except Exception as e2:
+            raise ValueError(f"NL2SQL: JSON 파싱 실패: {e}. SQL 추출 실패: {e2}. 원문: {text[:200]}")
+    
+    return _post_validate_sql(sql)
+
 def build_nl2sql_chain():
     prompt = ChatPromptTemplate.from_messages([
         ("system", SYSTEM_PROMPT_TEMPLATE),
-        ("user", "{question}")
+        # 대화 맥락(후속 질문만)은 사용자 메시지의 질문 앞에 → 시스템 프롬프트 prefix는 그대로
+        ("user", "{conversation}{question}")
     ])
-    llm = _make_llm()
+    llm = get_chat_model(**_LLM_SETTINGS)
     parser = StrOutputParser()
-
-    def parse_and_validate(text: str) -> str:
-        # 1) JSON 파싱 (더 강건한 파싱)
-        try:
-            # 텍스트에서 JSON 부분만 추출
-            text = text.strip()
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.endswith("```"):
-                text = text[:-3]
-            text = text.strip()
-            
-            obj = json.loads(text)
-            sql = obj.get("sql") or ""
-        except Exception as e:
-            # JSON 파싱 실패 시 텍스트에서 SQL 부분만 추출 시도
-            try:
-                # SQL 키워드로 시작하는 부분 찾기
-                import re
-                sql_match = re.search(r'SELECT\s+.*?(?:;|$)', text, re.IGNORECASE | re.DOTALL)
-                if sql_match:
-                    sql = sql_match.group(0).strip()
-                    if not sql.endswith(';'):
-                        sql += ';'
-                else:
-                    raise ValueError(f"SQL을 찾을 수 없습니다: {text[:200]}")
-            except Exception as e2:
-                raise ValueError(f"NL2SQL: JSON 파싱 실패: {e}. SQL 추출 실패: {e2}. 원문: {text[:200]}")
-        
-        return _post_validate_sql(sql)
-
-    return prompt | llm | parser | RunnableLambda(parse_and_validate)
+    return prompt | llm | parser | RunnableLambda(_parse_sql_output)
 
 def get_nl2sql_chain():
     global _NL2SQL_CHAIN
@@ -117,13 +124,39 @@ def get_nl2sql_chain():
 # ─────────────────────────────────────────────────────────────
 # 외부에서 쓰는 함수(래퍼) — ask.py가 이걸 호출
 # ─────────────────────────────────────────────────────────────
-def generate_sql(question: str, schema_json: str, base_dir: str, model: str = "gpt-4o-mini") -> str:
+def _chain_inputs(question: str, schema_json: str, base_dir: str,
+                  semantic_views: Optional[str] = None, conversation: Optional[str] = None) -> Dict[str, Any]:
+    # 유사한 검증 예시 top-k를 few-shot으로 삽입 (로컬 벡터 검색)
+    examples = get_example_store().search(question, k=FEW_SHOT_K) if FEW_SHOT_K > 0 else []
+    return {
+        "question": question,
+        "schema_json": schema_json,
+        "semantic_views": semantic_views or describe_semantic_views(base_dir) or "(없음)",
+        "examples": format_examples(examples),
+        "conversation": conversation or "",
+    }
+
+
+def generate_sql(question: str, schema_json: str, base_dir: str, model: str = "gpt-4o-mini",
+                 semantic_views: Optional[str] = None, conversation: Optional[str] = None) -> str:
     """
     질문+스키마를 기반으로 SQL을 생성한다(체인 기반).
     - base_dir는 경로 보정에 사용된다.
+    - semantic_views를 주면 base_dir의 시맨틱 뷰 설명 대신 사용한다(여러 달 질의).
+    - conversation은 후속 질문의 대화 맥락 블록(질문 앞에 붙음).
     - 반환값은 최종 실행 가능한 DuckDB SQL 문자열.
     """
     chain = get_nl2sql_chain()
-    raw_sql = chain.invoke({"question": question, "schema_json": schema_json})
+    raw_sql = chain.invoke(_chain_inputs(question, schema_json, base_dir, semantic_views, conversation))
     fixed_sql = _sanitize_paths(raw_sql, base_dir)
     return fixed_sql
+
+
+async def agenerate_sql(question: str, schema_json: str, base_dir: str,
+                        semantic_views: Optional[str] = None, conversation: Optional[str] = None) -> str:
+    """generate_sql의 비동기 버전 (예시 검색/뷰 설명은 스레드에서, LLM은 ainvoke)"""
+    chain = get_nl2sql_chain()
+    inputs = await asyncio.to_thread(_chain_inputs, question, schema_json, base_dir,
+                                   semantic_views, conversation)
+    raw_sql = await chain.ainvoke(inputs)
+    return _sanitize_paths(raw_sql, base_dir)
@@ -0,0 +1,88 @@
+"""
+SQL Agent 사전 준비(prefetch): 라우터가 의도를 분류하는 동안 미리 할 수 있는 작업
+
+월 폴더 해석 + 스키마 추출(그래프 초기 상태), 시맨틱 뷰 정의 캐시, few-shot 예시 저장소 로딩을
+백그라운드 스레드에서 먼저 실행한다. 의도가 sql이 아니면 cancel()로 중단하며,
+실행 중인 작업은 단계 사이에서 멈춘다(이미 끝난 단계의 캐시는 그대로 남음).
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from typing import Any, Dict, Optional
+
+from .graph import _build_state
+from .example_store import get_example_store, FEW_SHOT_K
+from ...core.semantic_layer import describe_semantic_views
+
+
+PREFETCH_WORKERS = int(os.getenv("SQL_PREFETCH_WORKERS", "4"))
+
+# 전역 스레드 풀(singleton)
+_PREFETCH_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _PREFETCH_POOL
+    with _POOL_LOCK:
+        if _PREFETCH_POOL is None:
+            _PREFETCH_POOL = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="sql-prefetch")
+        return _PREFETCH_POOL
+
+
+class SQLPrefetch:
+    """질문 하나에 대한 사전 준비 작업 핸들"""
+
+    def __init__(self, question: str, month: str = "latest"):
+        self.question = question
+        self.month = month
+        self.elapsed_sec: Optional[float] = None
+        self._cancelled = threading.Event()
+        self._future = _get_pool().submit(self._run)
+
+    def _checkpoint(self) -> None:
+        if self._cancelled.is_set():
+            raise CancelledError()
+
+    def _run(self) -> Dict[str, Any]:
+        start = time.monotonic()
+        self._checkpoint()
+        state = _build_state(self.question, self.month)
+        self._checkpoint()
+        # 시맨틱 뷰 정의/설명 캐시 (여러 달 모드는 _build_state에서 이미 준비됨)
+        if not state.get("months"):
+            describe_semantic_views(state["base_dir"])
+        self._checkpoint()
+        # 예시 저장소 로딩 + 임베딩
+        if FEW_SHOT_K > 0:
+            get_example_store().search(self.question, k=FEW_SHOT_K)
+        self.elapsed_sec = time.monotonic() - start
+        return state
+
+    def cancel(self) -> None:
+        """사전 준비 중단 (대기 중이면 실행하지 않고, 실행 중이면 다음 단계 전에 멈춤)"""
+        self._cancelled.set()
+        self._future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def matches(self, question: str, month: str) -> bool:
+        return self.question == question and self.month == month
+
+    def state(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """준비된 그래프 초기 상태 (취소/실패 시 None — 호출자가 직접 다시 만들어 오류를 드러냄)"""
+        if self.cancelled:
+            return None
+        try:
+            return dict(self._future.result(timeout))
+        except Exception:
+            return None
+
+
+def start_prefetch(question: str, month: str = "latest") -> SQLPrefetch:
+    """백그라운드에서 SQL Agent 사전 준비 시작"""
+    return SQLPrefetch(question, month)
@@ -0,0 +1,221 @@
+"""
+SQL 자가 수정(repair): 실행 오류 메시지 + 축소된 스키마로 SQL을 다시 생성
+
+- 오류 분류: DuckDB 오류 메시지/예외 타입으로 error_class 결정
+- 수정 가능 여부: 바인더/카탈로그/파서/타입 변환/파일 경로/가드레일 오류만 재시도
+  (제한 시간/메모리 초과/취소는 같은 쿼리를 다시 만들어도 비용만 늘어나므로 제외)
+- 스키마 축소: 실패한 SQL이 참조한 파일의 컬럼만 프롬프트에 포함
+- 통계: error_class별 수정 시도/성공 횟수
+- 지연 예산: 그래프가 남은 REPAIR_BUDGET_SEC를 timeout으로 넘기면 LLM 호출을 그 안에서 끊는다
+"""
+
+import os
+import json
+import asyncio
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+
+from langchain.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain.schema.runnable import RunnableLambda
+
+from .nl2sql import _LLM_SETTINGS, _parse_sql_output, _sanitize_paths
+from ..llm_clients import get_chat_model
+from ..tracing import submit_in_context
+from .executor import QueryExecutionError
+from .guardrails import SQLGuardrailError
+from ...core.semantic_layer import describe_semantic_views
+
+
+REPAIR_MAX_ATTEMPTS = int(os.getenv("SQL_REPAIR_MAX_ATTEMPTS", "2"))
+REPAIR_BUDGET_SEC = float(os.getenv("SQL_REPAIR_BUDGET_SEC", "40"))
+REPAIR_WORKERS = int(os.getenv("SQL_REPAIR_WORKERS", "4"))
+
+REPAIRABLE_ERROR_CLASSES = {
+    "binder_column", "catalog", "parser", "type_conversion", "missing_file", "guardrail",
+}
+
+# (error_class, 오류 메시지 패턴) — 위에서부터 먼저 일치하는 분류 사용
+_ERROR_PATTERNS = [
+    ("binder_column", re.compile(r"Binder Error", re.IGNORECASE)),
+    ("catalog", re.compile(r"Catalog Error", re.IGNORECASE)),
+    ("parser", re.compile(r"Parser Error|syntax error", re.IGNORECASE)),
+    ("type_conversion", re.compile(r"Conversion Error|Could not convert|Cannot compare", re.IGNORECASE)),
+    ("missing_file", re.compile(r"No files found|IO Error", re.IGNORECASE)),
+]
+
+_PARQUET_NAME = re.compile(r"([\w\-]+\.parquet)")
+
+_REPAIR_CHAIN = None  # singleton
+
+# 제한 시간이 있는 동기 repair 호출용 스레드 풀 (singleton)
+_REPAIR_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+REPAIR_PROMPT_TEMPLATE = """당신은 AWS SageMaker 비용 분석용 DuckDB SQL을 고치는 전문가다.
+이전에 생성한 SQL이 실행 중 오류가 났다. 오류 메시지를 보고 SQL을 수정하라.
+
+[사용 가능한 파일과 컬럼]
+{schema_json}
+
+[표준 지표 뷰 (FROM 절에서 테이블처럼 사용)]
+{semantic_views}
+
+규칙:
+- DuckDB SQL만 작성한다. SELECT만 허용된다.
+- 위의 스키마/뷰에 실제 존재하는 파일/뷰/컬럼만 사용한다.
+- 파일을 읽을 때는 read_parquet() 함수를 사용한다 (경로: {base_dir}/파일명.parquet)
+- 원래 질문의 의도는 유지하고, 오류의 원인만 고친다.
+- 결과는 JSON으로 {{"sql": "..."}} 형식으로만 반환한다.
+"""
+
+REPAIR_USER_TEMPLATE = """{conversation}[질문]
+{question}
+
+[실패한 SQL]
+{sql}
+
+[오류 메시지]
+{error}
+"""
+
+
+def classify_error(error: Exception) -> str:
+    """실행 오류를 error_class 문자열로 분류"""
+    if isinstance(error, QueryExecutionError):
+        return error.kind
+    if isinstance(error, SQLGuardrailError):
+        return "guardrail"
+    message = str(error)
+    for error_class, pattern in _ERROR_PATTERNS:
+        if pattern.search(message):
+            return error_class
+    return "other"
+
+
+def is_repairable(error_class: str) -> bool:
+    return error_class in REPAIRABLE_ERROR_CLASSES
+
+
+def prune_schema(schema_json: str, sql: str) -> str:
+    """실패한 SQL이 참조한 파일의 스키마만 남김 (참조 파일이 스키마에 없으면 전체 유지)"""
+    schema = json.loads(schema_json)
+    referenced = set(_PARQUET_NAME.findall(sql))
+    pruned = {name: cols for name, cols in schema.items() if name in referenced}
+    if not pruned:
+        return schema_json
+    return json.dumps(pruned, ensure_ascii=False, indent=2)
+
+
+def build_repair_chain():
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", REPAIR_PROMPT_TEMPLATE),
+        ("user", REPAIR_USER_TEMPLATE)
+    ])
+    return prompt | get_chat_model(**_LLM_SETTINGS) | StrOutputParser() | RunnableLambda(_parse_sql_output)
+
+
+def get_repair_chain():
+    global _REPAIR_CHAIN
+    if _REPAIR_CHAIN is None:
+        _REPAIR_CHAIN = build_repair_chain()
+    return _REPAIR_CHAIN
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _REPAIR_POOL
+    with _POOL_LOCK:
+        if _REPAIR_POOL is None:
+            _REPAIR_POOL = ThreadPoolExecutor(max_workers=REPAIR_WORKERS, thread_name_prefix="sql-repair")
+        return _REPAIR_POOL
+
+
+def _repair_inputs(question: str, sql: str, error: Exception, schema_json: str, base_dir: str,
+                   semantic_views: Optional[str] = None, conversation: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "conversation": conversation or "",
+        "question": question,
+        "sql": sql,
+        "error": str(error)[:1000],
+        "schema_json": prune_schema(schema_json, sql),
+        "semantic_views": semantic_views or describe_semantic_views(base_dir) or "(없음)",
+        "base_dir": base_dir.rstrip("/").replace("\\", "/"),
+    }
+
+
+def repair_sql(question: str, sql: str, error: Exception, schema_json: str, base_dir: str,
+               semantic_views: Optional[str] = None, conversation: Optional[str] = None,
+               timeout: Optional[float] = None) -> str:
+    """오류 메시지와 축소된 스키마로 SQL을 다시 생성한다.
+
+    conversation은 후속 질문의 대화 맥락 블록으로, NL2SQL과 같이 질문 앞에 붙는다
+    ("그럼 지난달은?"만으로는 원래 의도를 알 수 없으므로).
+    timeout(초)이 주어지면 LLM 응답을 그만큼만 기다린다 (초과 시 TimeoutError).
+
+    Returns:
+        수정된 SQL (경로 보정 포함)
+    """
+    chain = get_repair_chain()
+    inputs = _repair_inputs(question, sql, error, schema_json, base_dir, semantic_views, conversation)
+    if timeout is None:
+        raw_sql = chain.invoke(inputs)
+    else:
+        future = submit_in_context(_get_pool(), chain.invoke, inputs)
+        try:
+            raw_sql = future.result(timeout=max(timeout, 0.0))
+        except TimeoutError:
+            future.cancel()
+            raise
+    return _sanitize_paths(raw_sql, base_dir)
+
+
+async def arepair_sql(question: str, sql: str, error: Exception, schema_json: str, base_dir: str,
+                      semantic_views: Optional[str] = None, conversation: Optional[str] = None,
+                      timeout: Optional[float] = None) -> str:
+    """repair_sql의 비동기 버전 (timeout 초과 시 LLM 호출을 취소하고 TimeoutError)"""
+    chain = get_repair_chain()
+    inputs = await asyncio.to_thread(_repair_inputs, question, sql, error, schema_json, base_dir,
+                                     semantic_views, conversation)
+    raw_sql = await asyncio.wait_for(chain.ainvoke(inputs), timeout=None if timeout is None else max(timeout, 0.0))
+    return _sanitize_paths(raw_sql, base_dir)
+
+
+class RepairStats:
+    """error_class별 수정 시도/성공 통계 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, error_class: str, success: bool) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(error_class, {"attempts": 0, "successes": 0})
+            counts["attempts"] += 1
+            counts["successes"] += int(success)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """{error_class: {attempts, successes, success_rate}}"""
+        with self._lock:
+            return {
+                error_class: {
+                    **counts,
+                    "success_rate": counts["successes"] / counts["attempts"] if counts["attempts"] else 0.0,
+                }
+                for error_class, counts in self._counts.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+_REPAIR_STATS = None  # singleton
+
+
+def get_repair_stats() -> RepairStats:
+    global _REPAIR_STATS
+    if _REPAIR_STATS is None:
+        _REPAIR_STATS = RepairStats()
+    return _REPAIR_STATS
@@ -0,0 +1,248 @@
+"""
+SQL 결과 캐시: 정규화된 SQL + 데이터 스냅샷(manifest 해시) 기반 LRU 캐시
+
+- 메모리: 바이트 기준 LRU (Arrow Table.nbytes 합계로 제한)
+- 디스크: 메모리에서 밀려난 항목은 Arrow IPC 파일로 spill 후 재사용
+- 무효화: ETL이 새 스냅샷을 게시하면 manifest 해시가 바뀌므로,
+  해당 디렉토리의 이전 스냅샷 항목은 메모리/디스크에서 함께 제거된다.
+  spill 파일 이름에 디렉토리 ID를 넣어 두어, 재시작 후 디렉토리를 처음 조회할 때도
+  이전 프로세스가 남긴 다른 스냅샷 파일을 지운다.
+- 시작 시 정리: 쓰다 만 .tmp, 보관 기한(SQL_RESULT_CACHE_DISK_MAX_AGE_SEC)이 지난 파일을 지우고
+  디스크 한도를 적용한다 (더 이상 조회되지 않는 디렉토리의 파일도 결국 사라진다).
+"""
+
+import os
+import re
+import hashlib
+import time
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Any
+
+import pyarrow as pa
+
+from .schema_provider import PROJECT_ROOT, get_snapshot_version
+
+
+DEFAULT_MAX_MEMORY_BYTES = int(os.getenv("SQL_RESULT_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+DEFAULT_MAX_DISK_BYTES = int(os.getenv("SQL_RESULT_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024)))
+DEFAULT_MAX_DISK_AGE_SEC = float(os.getenv("SQL_RESULT_CACHE_DISK_MAX_AGE_SEC", str(7 * 24 * 3600)))
+DEFAULT_CACHE_DIR = os.getenv("SQL_RESULT_CACHE_DIR", str(PROJECT_ROOT / "data/cache/sql_results"))
+CACHE_ENABLED = os.getenv("SQL_RESULT_CACHE_ENABLED", "true").lower() == "true"
+
+# 문자열 리터럴('...')과 따옴표 식별자("...")는 정규화 대상에서 제외
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_LINE_COMMENT = re.compile(r"--[^\n]*")
+_BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+# spill 파일 이름: {디렉토리 ID}_{스냅샷}_{SQL 해시}.arrow
+_SPILL_NAME = re.compile(r"^[0-9a-f]{8}_[0-9a-f]{16}_[0-9a-f]{32}\.arrow$")
+
+
+def normalize_sql(sql: str) -> str:
+    """캐시 키용 SQL 정규화: 주석 제거, 공백 축약, 대소문자 통일, 끝 세미콜론 제거.
+
+    문자열 리터럴 내부는 값이 달라질 수 있으므로 그대로 유지한다.
+    """
+    parts = _QUOTED.split(sql)
+    out = []
+    for i, part in enumerate(parts):
+        if i % 2 == 1:
+            out.append(part)
+            continue
+        part = _BLOCK_COMMENT.sub(" ", _LINE_COMMENT.sub(" ", part))
+        out.append(re.sub(r"\s+", " ", part).lower())
+    return "".join(out).strip().rstrip(";").strip()
+
+
+class ResultCache:
+    """바이트 기준 LRU + Arrow 디스크 spill 결과 캐시"""
+
+    def __init__(self, max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 max_disk_age_sec: float = DEFAULT_MAX_DISK_AGE_SEC):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_disk_age_sec = max_disk_age_sec
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._entries: "OrderedDict[str, pa.Table]" = OrderedDict()
+        self._entry_snapshot: Dict[str, str] = {}
+        self._memory_bytes = 0
+        self._snapshots: Dict[str, str] = {}  # realpath(base_dir) -> 현재 스냅샷 해시
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        if self.cache_dir and self.cache_dir.exists():
+            self._prune_disk()
+
+    # ── 키/스냅샷 ─────────────────────────────────────────────
+    @staticmethod
+    def _dir_id(real_dir: str) -> str:
+        return hashlib.sha256(real_dir.encode("utf-8")).hexdigest()[:8]
+
+    def _current_snapshot(self, base_dir: str) -> str:
+        """base_dir의 현재 스냅샷(디렉토리 ID 포함)을 확인하고, 바뀌었으면 이전 스냅샷 항목을 무효화"""
+        real = os.path.realpath(base_dir)
+        snapshot = f"{self._dir_id(real)}_{get_snapshot_version(real)[:16]}"
+        previous = self._snapshots.get(real)
+        if previous != snapshot:
+            if previous is not None:
+                self._invalidate_locked(previous)
+            else:
+                self._drop_stale_spills(snapshot)
+            self._snapshots[real] = snapshot
+        return snapshot
+
+    @staticmethod
+    def _make_key(sql: str, snapshot: str) -> str:
+        digest = hashlib.sha256(normalize_sql(sql).encode("utf-8")).hexdigest()[:32]
+        return f"{snapshot}_{digest}"
+
+    def _spill_path(self, key: str) -> Optional[Path]:
+        return self.cache_dir / f"{key}.arrow" if self.cache_dir else None
+
+    # ── 조회/저장 ─────────────────────────────────────────────
+    def get(self, sql: str, base_dir: str) -> Optional[pa.Table]:
+        """캐시된 결과를 반환 (없으면 None)"""
+        with self._lock:
+            snapshot = self._current_snapshot(base_dir)
+            key = self._make_key(sql, snapshot)
+
+            table = self._entries.get(key)
+            if table is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return table
+
+            table = self._read_spill(key)
+            if table is not None:
+                self._stats["disk_hits"] += 1
+                self._insert_locked(key, snapshot, table)
+                return table
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, sql: str, base_dir: str, table: pa.Table) -> None:
+        """결과를 캐시에 저장 (단일 항목이 메모리 한도를 넘으면 디스크에만 저장)"""
+        with self._lock:
+            snapshot = self._current_snapshot(base_dir)
+            key = self._make_key(sql, snapshot)
+            if table.nbytes > self.max_memory_bytes:
+                self._write_spill(key, table)
+                return
+            self._insert_locked(key, snapshot, table)
+
+    def _insert_locked(self, key: str, snapshot: str, table: pa.Table) -> None:
+        if key in self._entries:
+            self._memory_bytes -= self._entries.pop(key).nbytes
+        self._entries[key] = table
+        self._entry_snapshot[key] = snapshot
+        self._memory_bytes += table.nbytes
+
+        # 바이트 한도를 넘으면 오래된 항목부터 디스크로 밀어냄
+        while self._memory_bytes > self.max_memory_bytes and len(self._entries) > 1:
+            old_key, old_table = self._entries.popitem(last=False)
+            self._entry_snapshot.pop(old_key, None)
+            self._memory_bytes -= old_table.nbytes
+            self._stats["evictions"] += 1
+            self._write_spill(old_key, old_table)
+
+    # ── 디스크 spill ─────────────────────────────────────────
+    def _read_spill(self, key: str) -> Optional[pa.Table]:
+        path = self._spill_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            with pa.memory_map(str(path), "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+            os.utime(path)  # 디스크 LRU 갱신
+            return table
+        except (OSError, pa.ArrowInvalid):
+            path.unlink(missing_ok=True)
+            return None
+
+    def _write_spill(self, key: str, table: pa.Table) -> None:
+        path = self._spill_path(key)
+        if path is None or table.nbytes > self.max_disk_bytes:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with pa.OSFile(str(tmp_path), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+            self._trim_disk()
+        except OSError:
+            pass
+
+    def _trim_disk(self) -> None:
+        """디스크 사용량이 한도를 넘으면 오래 사용되지 않은 파일부터 삭제"""
+        files = sorted(self.cache_dir.glob("*.arrow"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        for p in files:
+            if total <= self.max_disk_bytes:
+                break
+            total -= p.stat().st_size
+            p.unlink(missing_ok=True)
+
+    def _drop_stale_spills(self, snapshot: str) -> None:
+        """이 프로세스에서 디렉토리를 처음 볼 때, 같은 디렉토리의 다른 스냅샷 파일(재시작 전 잔여물) 삭제"""
+        if not (self.cache_dir and self.cache_dir.exists()):
+            return
+        dir_id = snapshot.split("_", 1)[0]
+        for p in self.cache_dir.glob(f"{dir_id}_*.arrow"):
+            if not p.name.startswith(f"{snapshot}_"):
+                p.unlink(missing_ok=True)
+
+    def _prune_disk(self) -> None:
+        """시작 시 디스크 정리: .tmp/이름 형식이 다른 파일/보관 기한이 지난 파일 삭제 후 용량 한도 적용"""
+        cutoff = time.time() - self.max_disk_age_sec
+        try:
+            for p in self.cache_dir.glob("*.tmp"):
+                p.unlink(missing_ok=True)
+            for p in self.cache_dir.glob("*.arrow"):
+                if not _SPILL_NAME.match(p.name) or p.stat().st_mtime < cutoff:
+                    p.unlink(missing_ok=True)
+            self._trim_disk()
+        except OSError:
+            pass
+
+    # ── 무효화/통계 ──────────────────────────────────────────
+    def _invalidate_locked(self, snapshot: Optional[str] = None) -> None:
+        for key in [k for k, s in self._entry_snapshot.items() if snapshot is None or s == snapshot]:
+            self._memory_bytes -= self._entries.pop(key).nbytes
+            self._entry_snapshot.pop(key, None)
+        if self.cache_dir and self.cache_dir.exists():
+            pattern = f"{snapshot}_*.arrow" if snapshot else "*.arrow"
+            for p in self.cache_dir.glob(pattern):
+                p.unlink(missing_ok=True)
+        self._stats["invalidations"] += 1
+
+    def invalidate(self, snapshot: Optional[str] = None) -> None:
+        """특정 스냅샷(또는 전체) 항목을 제거"""
+        with self._lock:
+            self._invalidate_locked(snapshot)
+            if snapshot is None:
+                self._snapshots.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 통계 반환"""
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "memory_bytes": self._memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+            }
+
+
+_RESULT_CACHE = None  # singleton
+
+
+def get_result_cache() -> ResultCache:
+    global _RESULT_CACHE
+    if _RESULT_CACHE is None:
+        _RESULT_CACHE = ResultCache()
+    return _RESULT_CACHE
@@ -1,8 +1,9 @@
 import os
 import glob
+import hashlib
 import duckdb
 import json
-from typing import Dict, List
+from typing import Dict, List, Optional
 from pathlib import Path
 
 
@@ -37,6 +38,16 @@ def resolve_base_dir(month: str = "latest") -> str:
     return base
 
 
+def list_processed_months() -> List[str]:
+    """처리된 월 폴더 목록 (YYYYMM, 오름차순, latest 링크 제외)"""
+    if not os.path.isdir(DATA_ROOT):
+        return []
+    return sorted(
+        d for d in os.listdir(DATA_ROOT)
+        if len(d) == 6 and d.isdigit() and os.path.isdir(os.path.join(DATA_ROOT, d))
+    )
+
+
 def scan_parquet_files(base_dir: str) -> List[str]:
     """지정된 디렉토리에서 parquet 파일들을 찾습니다.
     
@@ -49,18 +60,22 @@ def scan_parquet_files(base_dir: str) -> List[str]:
     return glob.glob(os.path.join(base_dir, "*.parquet"))
 
 
-def extract_schema(file_path: str) -> Dict[str, List[str]]:
+def extract_schema(file_path: str, con: Optional[duckdb.DuckDBPyConnection] = None) -> Dict[str, List[str]]:
     """parquet 파일의 스키마를 추출합니다.
     
     Args:
         file_path: parquet 파일 경로
+        con: 사용할 DuckDB 연결 (생략 시 새 연결 — 전역 기본 연결은 스레드 간 공유되므로 쓰지 않음)
         
     Returns:
         {파일명: [컬럼명들]} 형태의 딕셔너리
     """
     sql = f"DESCRIBE SELECT * FROM read_parquet('{file_path}') LIMIT 0"
-    df = duckdb.sql(sql).df()
-    return {os.path.basename(file_path): df["column_name"].tolist()}
+    if con is None:
+        with duckdb.connect() as own:
+            return extract_schema(file_path, own)
+    columns = [row[0] for row in con.execute(sql).fetchall()]
+    return {os.path.basename(file_path): columns}
 
 
 def get_schema_json(base_dir: str) -> str:
@@ -73,6 +88,32 @@ def get_schema_json(base_dir: str) -> str:
         스키마 정보가 담긴 JSON 문자열
     """
     schema = {}
-    for f in scan_parquet_files(base_dir):
-        schema.update(extract_schema(f))
+    with duckdb.connect() as con:
+        for f in scan_parquet_files(base_dir):
+            schema.update(extract_schema(f, con))
     return json.dumps(schema, ensure_ascii=False, indent=2)
+
+
+def get_snapshot_version(base_dir: str) -> str:
+    """처리된 데이터 스냅샷의 버전 해시를 반환합니다.
+    
+    ETL이 게시한 manifest.json 내용의 해시를 사용하며, manifest가 없으면
+    parquet 파일들의 이름/크기/수정시각으로 대신 계산합니다.
+    'latest' 심볼릭 링크와 실제 월 폴더는 같은 버전을 가집니다.
+    
+    Args:
+        base_dir: 데이터 디렉토리 경로
+        
+    Returns:
+        16진수 해시 문자열
+    """
+    h = hashlib.sha256()
+    manifest_path = os.path.join(os.path.realpath(base_dir), "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "rb") as f:
+            h.update(f.read())
+    else:
+        for f in sorted(scan_parquet_files(base_dir)):
+            st = os.stat(f)
+            h.update(f"{os.path.basename(f)}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
@@ -1,25 +1,38 @@
 import os, json
+import asyncio
+import datetime
+from decimal import Decimal
 import pandas as pd
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union
 
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
+
+from .executor import QueryResult, QueryExecutionError
+from .guardrails import SQLGuardrailError
+from .answer_renderer import render_answer, MAX_TEMPLATE_ROWS
+from ..llm_clients import get_chat_model
+
+# 단순한 결과 형태(단일 값/Top-N/2열 분해)는 LLM 없이 템플릿으로 답변
+TEMPLATE_ANSWERS_ENABLED = os.getenv("SQL_TEMPLATE_ANSWERS", "true").lower() == "true"
 
 # 전역 요약 체인(singleton)
 _SUMMARY_CHAIN = None
+_BATCH_SUMMARY_CHAIN = None
 
-SUMMARY_PROMPT = """당신은 친근하고 도움이 되는 AWS SageMaker 비용 분석 어시스턴트입니다.
-사용자가 비용 관련 질문을 했을 때, 아래 정보를 바탕으로 자연스럽고 이해하기 쉽게 답변해주세요.
-
-답변 스타일:
+_ANSWER_STYLE = """답변 스타일:
 - 친근하고 자연스러운 톤으로 대화하듯이 답해주세요
 - 정확한 수치를 포함하되, 너무 딱딱하지 않게 표현해주세요
 - 금액은 소수점 둘째 자리까지 표기하고 USD 단위를 붙여주세요
 - 필요하면 "약", "총", "현재까지" 같은 표현을 사용해서 자연스럽게 만들어주세요
 - 불확실한 경우에는 "현재 데이터 기준으로는", "확인된 범위 내에서는" 같은 표현을 사용해주세요
 - 쿼리 결과 샘플에서 데이터를 찾을 수 없다면, 현재 해당 정보는 찾을 수 없어요. 라고 답해주세요
+"""
+
+SUMMARY_PROMPT = """당신은 친근하고 도움이 되는 AWS SageMaker 비용 분석 어시스턴트입니다.
+사용자가 비용 관련 질문을 했을 때, 아래 정보를 바탕으로 자연스럽고 이해하기 쉽게 답변해주세요.
 
+""" + _ANSWER_STYLE + """
 [질문]
 {question}
 
@@ -30,66 +43,221 @@ SUMMARY_PROMPT = """당신은 친근하고 도움이 되는 AWS SageMaker 비용
 {sample}
 """
 
-def _make_summary_llm():
-    model = "gpt-4o-mini"
-    temperature = 0.0
-    timeout = 20.0
-    return ChatOpenAI(model=model, temperature=temperature, timeout=timeout)
+# 단건/배치 요약 체인 공용 LLM 설정 (llm_clients 레지스트리가 같은 인스턴스를 돌려줌)
+_LLM_SETTINGS = {"model": "gpt-4o-mini", "temperature": 0.0, "timeout": 20.0}
 
 def _get_summary_chain():
     global _SUMMARY_CHAIN
     if _SUMMARY_CHAIN is None:
         prompt = ChatPromptTemplate.from_template(SUMMARY_PROMPT)
-        _SUMMARY_CHAIN = prompt | _make_summary_llm() | StrOutputParser()
+        _SUMMARY_CHAIN = prompt | get_chat_model(**_LLM_SETTINGS) | StrOutputParser()
     return _SUMMARY_CHAIN
 
+# 여러 질문의 요약을 한 번의 LLM 호출로 생성 (배치 질의용)
+BATCH_SUMMARY_PROMPT = """당신은 친근하고 도움이 되는 AWS SageMaker 비용 분석 어시스턴트입니다.
+아래 항목마다 질문, 실행한 SQL, 쿼리 결과 샘플(최대 5행)이 있습니다. 항목별로 따로 답변해주세요.
+
+""" + _ANSWER_STYLE + """
+반드시 JSON 배열만 출력하세요. 항목마다 하나씩, id는 입력과 같게:
+[{{"id": 0, "answer": "..."}}, ...]
+
+[항목(JSON)]
+{items}
+"""
+
+SUMMARY_BATCH_SIZE = int(os.getenv("SQL_SUMMARY_BATCH_SIZE", "5"))
+
+def _get_batch_summary_chain():
+    global _BATCH_SUMMARY_CHAIN
+    if _BATCH_SUMMARY_CHAIN is None:
+        prompt = ChatPromptTemplate.from_template(BATCH_SUMMARY_PROMPT)
+        _BATCH_SUMMARY_CHAIN = prompt | get_chat_model(**_LLM_SETTINGS) | JsonOutputParser()
+    return _BATCH_SUMMARY_CHAIN
+
+def _json_default(value: Any) -> Any:
+    # Arrow → 파이썬 값 변환 결과(Decimal, date/datetime 등)는 LLM 프롬프트용 JSON에서만 변환
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
 def _sample_for_prompt(rows: List[Dict[str, Any]]) -> str:
-    return json.dumps(rows, ensure_ascii=False)
-
-def summarize_answer(question: str, sql: str, df: pd.DataFrame, source_files: List[str] = None) -> Dict[str, Any]:
-    """SQL 실행 결과를 포맷팅 + LLM 요약."""
-    # 샘플 데이터 (최대 5행)
-    sample_rows = df.head(5).to_dict(orient="records")
-
-    # 숫자 컬럼 요약
-    numeric_summary = {}
-    for col in df.select_dtypes(include=['number']).columns:
-        numeric_summary[col] = {
-            "sum": float(df[col].sum()) if len(df) else 0.0,
-            "mean": float(df[col].mean()) if len(df) else 0.0,
-            "min": float(df[col].min()) if len(df) else 0.0,
-            "max": float(df[col].max()) if len(df) else 0.0,
-        }
-
-    # LLM 요약 실행
+    return json.dumps(rows, ensure_ascii=False, default=_json_default)
+
+def _prepare_summary(sql: str, df: Union[QueryResult, pd.DataFrame], use_templates: bool) -> Dict[str, Any]:
+    """DuckDB 조회(샘플/행 수/숫자 요약)와 템플릿 답변까지 — LLM 호출 전 단계"""
+    result = df if isinstance(df, QueryResult) else QueryResult.from_dataframe(sql, df)
+
+    # 템플릿 판단용 행 (최대 MAX_TEMPLATE_ROWS) — 앞 5행은 샘플로 사용
+    head_rows = result.sample_rows(MAX_TEMPLATE_ROWS)
+
+    # 행 수 + 숫자 컬럼 요약 (단일 집계 쿼리)
+    row_count = result.row_count()
+    return {
+        "result": result,
+        "sample_rows": head_rows[:5],
+        "row_count": row_count,
+        "numeric_summary": result.numeric_summary(),
+        "truncated": result.truncated,
+        "answer": render_answer(sql, result.columns, head_rows, row_count) if use_templates else None,
+    }
+
+
+def _finish_summary(prepared: Dict[str, Any], sql: str, answer: str, answer_source: str,
+                    source_files: List[str] = None) -> Dict[str, Any]:
+    result = prepared["result"]
+    # 최대 행 수에서 잘린 결과는 답변에 명시
+    if prepared["truncated"]:
+        answer += f"\n\n(결과가 많아 최대 {result.max_rows:,}행까지만 조회했어요. 조건을 좁히면 전체를 볼 수 있어요.)"
+
+    return {
+        "answer": answer,
+        "sql": sql,
+        "sample_rows": prepared["sample_rows"],
+        "row_count": prepared["row_count"],
+        "truncated": prepared["truncated"],
+        "column_count": len(result.columns),
+        "numeric_summary": prepared["numeric_summary"],
+        "source_files": source_files or [],
+        "answer_source": answer_source,
+        "intent": "sql",
+        "error": False
+    }
+
+
+def summarize_answer(question: str, sql: str, df: Union[QueryResult, pd.DataFrame], source_files: List[str] = None,
+                     use_templates: bool = TEMPLATE_ANSWERS_ENABLED, defer_llm: bool = False) -> Dict[str, Any]:
+    """SQL 실행 결과를 포맷팅 + 요약.
+
+    결과 전체를 가져오지 않고 DuckDB에서 집계(행 수/숫자 요약)와 LIMIT(샘플)만 조회한다.
+    결과 형태가 단순하면 템플릿으로 답변하고, 복잡한 경우에만 LLM을 호출한다.
+    defer_llm이면 LLM 요약 대신 answer_source="pending"으로 반환한다(batch_summarize로 일괄 요약).
+    """
+    prepared = _prepare_summary(sql, df, use_templates)
+    if prepared["answer"] is not None:
+        return _finish_summary(prepared, sql, prepared["answer"], "template", source_files)
+    if defer_llm:
+        return _finish_summary(prepared, sql, "", "pending", source_files)
+
+    # 복잡한 결과만 LLM 요약 실행
     try:
         chain = _get_summary_chain()
         answer = chain.invoke({
             "question": question,
             "sql": sql,
-            "sample": _sample_for_prompt(sample_rows)
+            "sample": _sample_for_prompt(prepared["sample_rows"])
         }).strip()
     except Exception as e:
         answer = f"[요약 생성 실패] {e} — SQL 결과를 반환합니다.\n생성된 SQL:\n{sql}"
+    return _finish_summary(prepared, sql, answer, "llm", source_files)
+
+
+async def asummarize_answer(question: str, sql: str, df: Union[QueryResult, pd.DataFrame],
+                            source_files: List[str] = None,
+                            use_templates: bool = TEMPLATE_ANSWERS_ENABLED,
+                            defer_llm: bool = False) -> Dict[str, Any]:
+    """summarize_answer의 비동기 버전 (DuckDB 조회는 스레드에서, LLM 요약은 ainvoke)"""
+    prepared = await asyncio.to_thread(_prepare_summary, sql, df, use_templates)
+    if prepared["answer"] is not None:
+        return _finish_summary(prepared, sql, prepared["answer"], "template", source_files)
+    if defer_llm:
+        return _finish_summary(prepared, sql, "", "pending", source_files)
+
+    try:
+        chain = _get_summary_chain()
+        answer = (await chain.ainvoke({
+            "question": question,
+            "sql": sql,
+            "sample": _sample_for_prompt(prepared["sample_rows"])
+        })).strip()
+    except Exception as e:
+        answer = f"[요약 생성 실패] {e} — SQL 결과를 반환합니다.\n생성된 SQL:\n{sql}"
+    return _finish_summary(prepared, sql, answer, "llm", source_files)
+
+async def abatch_summarize(results: List[Dict[str, Any]], questions: List[str],
+                           batch_size: int = SUMMARY_BATCH_SIZE) -> None:
+    """answer_source가 pending인 결과들을 batch_size개씩 한 번의 LLM 호출로 요약 (결과 dict를 갱신)
+
+    배치 응답에서 빠진 항목이나 배치 호출 실패 시에는 항목별 요약 체인으로 대신한다.
+    """
+    pending = [(q, r) for q, r in zip(questions, results) if r.get("answer_source") == "pending"]
+    groups = [pending[i:i + max(1, batch_size)] for i in range(0, len(pending), max(1, batch_size))]
+
+    async def _one(question: str, result: Dict[str, Any]) -> str:
+        try:
+            return (await _get_summary_chain().ainvoke({
+                "question": question,
+                "sql": result["sql"],
+                "sample": _sample_for_prompt(result["sample_rows"])
+            })).strip()
+        except Exception as e:
+            return f"[요약 생성 실패] {e} — SQL 결과를 반환합니다.\n생성된 SQL:\n{result['sql']}"
+
+    async def _group(group: List[Any]) -> None:
+        answers: Dict[int, str] = {}
+        if len(group) > 1:
+            items = [{"id": i, "question": q, "sql": r["sql"], "sample": r["sample_rows"]}
+                     for i, (q, r) in enumerate(group)]
+            try:
+                out = await _get_batch_summary_chain().ainvoke({
+                    "items": json.dumps(items, ensure_ascii=False, default=_json_default)
+                })
+                answers = {int(a["id"]): str(a["answer"]).strip() for a in out if str(a.get("answer", "")).strip()}
+            except Exception:
+                answers = {}
+        for i, (question, result) in enumerate(group):
+            answer = answers.get(i)
+            source = "llm_batch"
+            if answer is None:
+                answer, source = await _one(question, result), "llm"
+            # 잘림 안내가 이미 answer에 있으면 그 앞에 요약을 붙임
+            result["answer"] = answer + result["answer"]
+            result["answer_source"] = source
+
+    await asyncio.gather(*(_group(g) for g in groups))
+
+
+# 실행 중단 사유별 사용자 안내 문구
+_ERROR_EXPLANATIONS = {
+    "timeout": "쿼리가 제한 시간({limit:g}초) 안에 끝나지 않아 중단했어요. 기간이나 조건을 좁혀서 다시 질문해 주세요.",
+    "memory": "쿼리가 메모리 한도({limit})를 넘어 중단했어요. 집계 단위를 줄이거나 조건을 추가해 주세요.",
+    "cancelled": "요청이 취소되어 쿼리를 중단했어요.",
+    "guardrail": "안전하지 않거나 너무 큰 쿼리라서 실행하지 않았어요: {message}",
+}
+
+
+def _error_type(error: Exception) -> str:
+    if isinstance(error, QueryExecutionError):
+        return error.kind
+    if isinstance(error, SQLGuardrailError):
+        return "guardrail"
+    if isinstance(error, ValueError):
+        return "validation"
+    return "execution"
 
-    return {
-        "answer": answer,
-        "sql": sql,
-        "sample_rows": sample_rows,
-        "row_count": len(df),
-        "column_count": len(df.columns),
-        "numeric_summary": numeric_summary,
-        "source_files": source_files or [],
-        "intent": "sql",
-        "error": False
-    }
 
 def summarize_error(question: str, error: Exception) -> Dict[str, Any]:
-    """에러 응답 포맷."""
+    """에러 응답 포맷.
+
+    실행 한도(제한 시간/메모리/취소)나 가드레일로 중단된 경우
+    error_type과 함께 무엇이 잘렸는지 설명하는 답변을 만든다.
+    """
+    error_type = _error_type(error)
+    limit = getattr(error, "limit", None)
+    template = _ERROR_EXPLANATIONS.get(error_type)
+    if template:
+        answer = template.format(limit=limit, message=str(error))
+    else:
+        answer = f"질문 '{question}' 처리 중 오류가 발생했습니다: {str(error)}"
+
     return {
-        "answer": f"질문 '{question}' 처리 중 오류가 발생했습니다: {str(error)}",
+        "answer": answer,
         "error": True,
+        "error_type": error_type,
         "error_message": str(error),
+        "error_limit": limit,
+        "elapsed_sec": getattr(error, "elapsed_sec", None),
         "sql": None,
         "sample_rows": [],
         "row_count": 0,
@@ -0,0 +1,85 @@
+"""
+스트리밍 응답 이벤트: 라우터 → Agent → 답변 체인까지 토큰 단위로 전달
+
+이벤트는 dict이며 type별 필드는 다음과 같다.
+- {"type": "intent", "intent": "sql"}   라우터가 의도를 분류한 직후 (라우터 스트림만)
+- {"type": "token", "text": "..."}      답변 토큰 (이어 붙이면 최종 답변)
+- {"type": "final", "result": {...}}    기존 ask()와 같은 구조화된 최종 결과 (항상 마지막)
+
+LangGraph의 messages 스트림 모드로 답변 노드 안의 LLM 토큰만 골라 전달하므로
+노드 코드는 invoke/ainvoke를 그대로 쓴다. 템플릿 답변처럼 LLM을 거치지 않으면
+최종 답변을 토큰 하나로 보낸다.
+"""
+
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional
+
+StreamEvent = Dict[str, Any]
+
+
+def intent_event(intent: str) -> StreamEvent:
+    return {"type": "intent", "intent": intent}
+
+
+def token_event(text: str) -> StreamEvent:
+    return {"type": "token", "text": text}
+
+
+def final_event(result: Dict[str, Any]) -> StreamEvent:
+    return {"type": "final", "result": result}
+
+
+def answer_events(result: Dict[str, Any]) -> Iterator[StreamEvent]:
+    """스트리밍하지 않는 결과를 token 1개 + final 이벤트로 변환"""
+    answer = result.get("answer") or result.get("message") or ""
+    if answer:
+        yield token_event(answer)
+    yield final_event(result)
+
+
+def _token_text(chunk: Any, metadata: Dict[str, Any], answer_nodes: Iterable[str]) -> Optional[str]:
+    if metadata.get("langgraph_node") not in answer_nodes:
+        return None
+    content = getattr(chunk, "content", None)
+    return content if isinstance(content, str) and content else None
+
+
+def _closing_events(streamed: str, result: Dict[str, Any]) -> Iterator[StreamEvent]:
+    # 노드가 스트리밍 후 덧붙인 내용(잘림 안내 등)이나, 스트리밍되지 않은 답변을 마저 보냄
+    # 답변 체인 출력은 strip되므로 앞 공백은 비교에서 제외
+    answer, streamed = result.get("answer") or "", streamed.lstrip()
+    if answer.startswith(streamed) and len(answer) > len(streamed):
+        yield token_event(answer[len(streamed):])
+    yield final_event(result)
+
+
+def stream_graph(graph: Any, state: Dict[str, Any], answer_nodes: Iterable[str],
+                 result_key: str = "result") -> Iterator[StreamEvent]:
+    """컴파일된 그래프를 실행하며 answer_nodes의 LLM 토큰과 최종 결과를 이벤트로 반환"""
+    answer_nodes = set(answer_nodes)
+    streamed, last = "", {}
+    for mode, chunk in graph.stream(state, stream_mode=["messages", "values"]):
+        if mode == "values":
+            last = chunk
+            continue
+        text = _token_text(chunk[0], chunk[1], answer_nodes)
+        if text:
+            streamed += text
+            yield token_event(text)
+    yield from _closing_events(streamed, last[result_key])
+
+
+async def astream_graph(graph: Any, state: Dict[str, Any], answer_nodes: Iterable[str],
+                        result_key: str = "result") -> AsyncIterator[StreamEvent]:
+    """stream_graph의 비동기 버전"""
+    answer_nodes = set(answer_nodes)
+    streamed, last = "", {}
+    async for mode, chunk in graph.astream(state, stream_mode=["messages", "values"]):
+        if mode == "values":
+            last = chunk
+            continue
+        text = _token_text(chunk[0], chunk[1], answer_nodes)
+        if text:
+            streamed += text
+            yield token_event(text)
+    for event in _closing_events(streamed, last[result_key]):
+        yield event
@@ -0,0 +1,351 @@
+"""
+노드/LLM 단위 지연 시간 추적 (LangSmith 없이 로컬에서)
+
+- span: 이름, trace_id/span_id/parent, 시작/종료 시각, 속성(토큰, 캐시 적중 등), 상태
+- 현재 span은 contextvars로 전달 — 그래프 노드는 traced_node, LLM 호출은 LLMTracingCallback이
+  현재 span의 자식으로 기록한다. 스레드 풀에 넘기는 작업은 contextvars.copy_context().run으로 감싼다.
+- 저장: 최근 trace를 메모리(SpanStore)에 두고, 루트 span이 끝나면 trace 전체를 OTLP/JSON
+  (resourceSpans) 한 줄로 파일에 추가한다 — OpenTelemetry Collector의 otlpjsonfile 수신기나
+  Jaeger/Tempo 가져오기에 그대로 쓸 수 있다 (opentelemetry 패키지 불필요).
+- 응답 dict에는 trace_summary로 trace_id, elapsed_ms, 단계별 시간(timings), 토큰 합계를 붙인다.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableLambda
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() == "true"
+# 빈 값이면 파일로 내보내지 않음 (메모리 저장소만)
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", str(PROJECT_ROOT / "data/traces/spans.otlp.jsonl"))
+TRACE_MAX_TRACES = int(os.getenv("TRACE_MAX_TRACES", "200"))
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "finops-rag-agent")
+
+_CURRENT_SPAN: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """하나의 작업 구간 (OTel span과 같은 필드)"""
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+    def fail(self, error: BaseException) -> None:
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            get_span_store().record(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name, "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "start_ns": self.start_ns, "end_ns": self.end_ns, "duration_ms": round(self.duration_ms, 2),
+            "attributes": dict(self.attributes), "status": self.status, "error": self.error,
+        }
+
+
+# ── OTLP/JSON 변환 ──────────────────────────────────────────
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(span: Span) -> Dict[str, Any]:
+    out = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+        "status": {"code": 2, "message": span.error} if span.status == "error" else {"code": 1},
+    }
+    if span.parent_id:
+        out["parentSpanId"] = span.parent_id
+    return out
+
+
+def to_otlp_json(spans: List[Span]) -> Dict[str, Any]:
+    """span 목록 → OTLP ExportTraceServiceRequest(JSON 인코딩)"""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": [_otlp_span(s) for s in spans]}],
+    }]}
+
+
+class SpanStore:
+    """최근 trace의 span 보관 + 루트 span 종료 시 OTLP/JSON 파일 내보내기"""
+
+    def __init__(self, export_path: Optional[str] = TRACE_EXPORT_PATH, max_traces: int = TRACE_MAX_TRACES):
+        self.export_path = Path(export_path) if export_path else None
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._exported: set = set()
+        self._lock = threading.Lock()
+
+    def record(self, span: Span) -> None:
+        with self._lock:
+            spans = self._traces.setdefault(span.trace_id, [])
+            spans.append(span)
+            self._traces.move_to_end(span.trace_id)
+            while len(self._traces) > self.max_traces:
+                old, _ = self._traces.popitem(last=False)
+                self._exported.discard(old)
+            if span.parent_id is None:
+                batch = list(spans)
+                self._exported.add(span.trace_id)
+            elif span.trace_id in self._exported:
+                # 루트 종료 뒤에 끝난 span(취소된 추측 실행 등)은 따로 내보냄
+                batch = [span]
+            else:
+                return
+        self._export(batch)
+
+    def _export(self, spans: List[Span]) -> None:
+        if self.export_path is None:
+            return
+        try:
+            self.export_path.parent.mkdir(parents=True, exist_ok=True)
+            line = json.dumps(to_otlp_json(spans), ensure_ascii=False)
+            with self._lock, open(self.export_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"trace 내보내기 실패: {e}")
+
+    def get_trace(self, trace_id: str) -> List[Dict[str, Any]]:
+        """trace의 span 목록 (시작 시각 순)"""
+        with self._lock:
+            spans = list(self._traces.get(trace_id, []))
+        return [s.to_dict() for s in sorted(spans, key=lambda s: s.start_ns)]
+
+    def recent_trace_ids(self, n: int = 20) -> List[str]:
+        with self._lock:
+            return list(self._traces)[-n:][::-1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+            self._exported.clear()
+
+
+_SPAN_STORE = None  # singleton
+
+
+def get_span_store() -> SpanStore:
+    global _SPAN_STORE
+    if _SPAN_STORE is None:
+        _SPAN_STORE = SpanStore()
+    return _SPAN_STORE
+
+
+# ── span 생성/전달 ──────────────────────────────────────────
+def current_span() -> Optional[Span]:
+    return _CURRENT_SPAN.get()
+
+
+def annotate(**attributes: Any) -> None:
+    """현재 span에 속성 추가 (캐시 적중 등, span 밖이면 무시)"""
+    span = _CURRENT_SPAN.get()
+    if span is not None:
+        span.set(**attributes)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """현재 span의 자식 span을 열고 블록 동안 현재 span으로 둠 (현재 span이 없으면 새 trace)"""
+    if not TRACE_ENABLED:
+        yield None
+        return
+    s = Span(name, _CURRENT_SPAN.get(), attributes)
+    token = _CURRENT_SPAN.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.fail(e)
+        raise
+    finally:
+        _CURRENT_SPAN.reset(token)
+        s.end()
+
+
+@contextmanager
+def activate(s: Optional[Span]) -> Iterator[None]:
+    """이미 열린 span을 블록 동안만 현재 span으로 (제너레이터가 yield 사이에 span을 넘길 때)"""
+    token = _CURRENT_SPAN.set(s)
+    try:
+        yield
+    finally:
+        _CURRENT_SPAN.reset(token)
+
+
+def iterate_in_span(s: Optional[Span], events: Iterator[Any]) -> Iterator[Any]:
+    """이터레이터의 각 next()를 span 안에서 실행 — 스트리밍 중 실행되는 노드도 같은 trace에 기록"""
+    iterator = iter(events)
+    while True:
+        with activate(s):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def traced_node(name: str, node: Any) -> Any:
+    """LangGraph 노드(함수, 코루틴 함수, RunnableLambda)를 span으로 감쌈"""
+    if isinstance(node, RunnableLambda):
+        afunc = getattr(node, "afunc", None)
+        return RunnableLambda(traced_node(name, node.func),
+                              afunc=traced_node(name, afunc) if afunc is not None else None,
+                              name=node.name)
+
+    if asyncio.iscoroutinefunction(node):
+        async def _async_node(state):
+            with span(name, **{"langgraph.node": name}):
+                return await node(state)
+        _async_node.__name__ = getattr(node, "__name__", name)
+        return _async_node
+
+    def _node(state):
+        with span(name, **{"langgraph.node": name}):
+            return node(state)
+    _node.__name__ = getattr(node, "__name__", name)
+    return _node
+
+
+def trace_summary(trace_id: str) -> Dict[str, Any]:
+    """응답 dict에 붙일 trace 요약: trace_id, 단계별 시간(시작 순), LLM 토큰 합계"""
+    spans = get_span_store().get_trace(trace_id)
+    by_id = {s["span_id"]: s for s in spans}
+
+    def _depth(s):
+        depth = 0
+        while s["parent_id"] in by_id:
+            s, depth = by_id[s["parent_id"]], depth + 1
+        return depth
+
+    tokens = {"input": 0, "output": 0}
+    for s in spans:
+        tokens["input"] += int(s["attributes"].get("gen_ai.usage.input_tokens", 0))
+        tokens["output"] += int(s["attributes"].get("gen_ai.usage.output_tokens", 0))
+    return {
+        "trace_id": trace_id,
+        "timings": [{"name": s["name"], "ms": round(s["duration_ms"], 1), "depth": _depth(s)} for s in spans],
+        "tokens": tokens,
+    }
+
+
+# ── LLM 호출 ────────────────────────────────────────────────
+class LLMTracingCallback(BaseCallbackHandler):
+    """LLM 호출마다 현재 span의 자식 span(모델, 입출력 토큰)을 기록하는 LangChain 콜백"""
+
+    # 비동기 호출에서도 호출한 쪽 context(현재 span)에서 실행
+    run_inline = True
+
+    def __init__(self):
+        self._open: Dict[Any, Span] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: Any, kwargs: Dict[str, Any]) -> None:
+        parent = _CURRENT_SPAN.get()
+        if not TRACE_ENABLED or parent is None:
+            return
+        model = llm_model_name(kwargs)
+        s = Span(f"llm {model or 'unknown'}", parent, {"gen_ai.request.model": model})
+        with self._lock:
+            self._open[run_id] = s
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            s = self._open.pop(run_id, None)
+        if s is None:
+            return
+        s.set(**{f"gen_ai.usage.{k}": v for k, v in token_usage(response).items()})
+        s.end()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            s = self._open.pop(run_id, None)
+        if s is not None:
+            s.fail(error)
+            s.end()
+
+
+def llm_model_name(kwargs: Dict[str, Any]) -> Optional[str]:
+    """on_llm_start/on_chat_model_start 인자에서 모델명"""
+    params = kwargs.get("invocation_params") or {}
+    return params.get("model") or params.get("model_name") or (kwargs.get("metadata") or {}).get("ls_model_name")
+
+
+def token_usage(response: Any) -> Dict[str, int]:
+    """LLMResult에서 입력/출력 토큰 수 (llm_output.token_usage 또는 message.usage_metadata)"""
+    usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+    if usage:
+        return {"input_tokens": int(usage.get("prompt_tokens", 0)),
+                "output_tokens": int(usage.get("completion_tokens", 0))}
+    for generations in getattr(response, "generations", None) or []:
+        for gen in generations:
+            meta = getattr(getattr(gen, "message", None), "usage_metadata", None)
+            if meta:
+                return {"input_tokens": int(meta.get("input_tokens", 0)),
+                        "output_tokens": int(meta.get("output_tokens", 0))}
+    return {}
+
+
+_LLM_CALLBACK = None  # singleton
+
+
+def get_llm_callback() -> LLMTracingCallback:
+    """공용 추적 콜백 (llm_clients.get_chat_model이 모든 ChatOpenAI에 붙임)"""
+    global _LLM_CALLBACK
+    if _LLM_CALLBACK is None:
+        _LLM_CALLBACK = LLMTracingCallback()
+    return _LLM_CALLBACK
+
+
+def submit_in_context(pool: Any, fn: Callable, *args: Any) -> Any:
+    """현재 context(현재 span 포함)를 복사해 스레드 풀에 제출"""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
@@ -0,0 +1,322 @@
+"""
+LLM 토큰/비용 집계 (요청별, 세션별)
+
+- UsageCallback: LLM 호출이 끝날 때마다 모델, 입출력 토큰, 추정 비용을 현재 요청의 UsageMeter에 더하는
+  LangChain 콜백. 요청 meter는 contextvars로 전달되어 추측 실행 스레드의 호출도 같은 요청에 합산된다.
+  호출 위치(step)는 현재 span 이름(sql.nl2sql, docs.answer 등)으로 기록 — 어느 경로가 비용을 쓰는지 구분
+- 임베딩 호출은 콜백이 없어 record_embedding으로 직접 기록 (토큰 수는 글자 수 기반 추정)
+- 가격: MODEL_PRICES (USD / 1M tokens), LLM_PRICES_JSON 환경변수로 모델별 덮어쓰기
+- 라우터 ask/ask_stream이 요청마다 meter를 열고, 응답 dict에 usage 요약을 붙인 뒤
+  UsageStore(SQLite)에 요청 단위로 저장 → summary()로 의도/단계/세션별 합계 조회
+"""
+
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+import contextvars
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from .tracing import current_span, llm_model_name, token_usage
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+USAGE_METRICS_ENABLED = os.getenv("USAGE_METRICS_ENABLED", "true").lower() == "true"
+USAGE_METRICS_PATH = os.getenv("USAGE_METRICS_PATH", str(PROJECT_ROOT / "data/metrics/usage.sqlite3"))
+USAGE_METRICS_MAX_ROWS = int(os.getenv("USAGE_METRICS_MAX_ROWS", "100000"))
+
+# USD / 1M tokens (input, output) — 모델명은 접두사로 매칭 (gpt-4o-mini-2024-07-18 → gpt-4o-mini)
+MODEL_PRICES: Dict[str, tuple] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "text-embedding-3-small": (0.02, 0.0),
+    "text-embedding-3-large": (0.13, 0.0),
+    "text-embedding-ada-002": (0.10, 0.0),
+}
+MODEL_PRICES.update({k: tuple(v) for k, v in json.loads(os.getenv("LLM_PRICES_JSON", "{}")).items()})
+
+_CURRENT_METER: contextvars.ContextVar[Optional["UsageMeter"]] = contextvars.ContextVar("usage_meter", default=None)
+
+
+def model_price(model: Optional[str]) -> Optional[tuple]:
+    """모델의 (입력, 출력) 가격 — 가장 긴 접두사 일치, 모르는 모델은 None"""
+    if not model:
+        return None
+    matches = [name for name in MODEL_PRICES if model.startswith(name)]
+    return MODEL_PRICES[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(model: Optional[str], input_tokens: int, output_tokens: int) -> float:
+    """추정 비용(USD), 가격표에 없는 모델은 0"""
+    price = model_price(model)
+    if price is None:
+        return 0.0
+    return (input_tokens * price[0] + output_tokens * price[1]) / 1_000_000
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 토큰 수 추정: 비ASCII(한글 등) 글자당 1, ASCII 4글자당 1"""
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+class UsageMeter:
+    """한 요청 동안의 LLM/임베딩 호출 기록"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, model: Optional[str], input_tokens: int, output_tokens: int = 0,
+            step: Optional[str] = None) -> None:
+        call = {
+            "kind": kind, "model": model, "step": step or "unknown",
+            "input_tokens": input_tokens, "output_tokens": output_tokens,
+            "cost_usd": estimate_cost(model, input_tokens, output_tokens),
+        }
+        with self._lock:
+            self.calls.append(call)
+
+    @property
+    def elapsed_ms(self) -> int:
+        return int((time.time() - self.started_at) * 1000)
+
+    def summary(self) -> Dict[str, Any]:
+        """응답 dict에 붙일 합계: 호출 수, 토큰, 추정 비용, 단계별 합계"""
+        with self._lock:
+            calls = list(self.calls)
+        by_step: Dict[str, Dict[str, Any]] = {}
+        for c in calls:
+            step = by_step.setdefault(c["step"], {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0})
+            step["calls"] += 1
+            step["input_tokens"] += c["input_tokens"]
+            step["output_tokens"] += c["output_tokens"]
+            step["cost_usd"] += c["cost_usd"]
+        for step in by_step.values():
+            step["cost_usd"] = round(step["cost_usd"], 6)
+        return {
+            "llm_calls": sum(1 for c in calls if c["kind"] == "llm"),
+            "embedding_calls": sum(1 for c in calls if c["kind"] == "embedding"),
+            "input_tokens": sum(c["input_tokens"] for c in calls),
+            "output_tokens": sum(c["output_tokens"] for c in calls),
+            "cost_usd": round(sum(c["cost_usd"] for c in calls), 6),
+            "by_step": by_step,
+        }
+
+
+def current_meter() -> Optional[UsageMeter]:
+    return _CURRENT_METER.get()
+
+
+@contextmanager
+def track_usage(meter: Optional[UsageMeter] = None) -> Iterator[UsageMeter]:
+    """블록 동안의 LLM/임베딩 호출을 meter에 기록 (없으면 새로 만듦)"""
+    meter = meter if meter is not None else UsageMeter()
+    token = _CURRENT_METER.set(meter)
+    try:
+        yield meter
+    finally:
+        _CURRENT_METER.reset(token)
+
+
+def iterate_metered(meter: Optional[UsageMeter], events: Iterator[Any]) -> Iterator[Any]:
+    """이터레이터의 각 next()를 meter 안에서 실행 — 스트리밍 중의 LLM 호출도 요청에 합산"""
+    iterator = iter(events)
+    while True:
+        with track_usage(meter):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def _current_step() -> Optional[str]:
+    s = current_span()
+    return s.name if s is not None else None
+
+
+def record_embedding(model: str, texts: List[str]) -> None:
+    """임베딩 호출 기록 (요청 밖이면 무시)"""
+    meter = _CURRENT_METER.get()
+    if meter is not None:
+        meter.add("embedding", model, sum(estimate_tokens(t) for t in texts), step=_current_step())
+
+
+class UsageCallback(BaseCallbackHandler):
+    """LLM 호출마다 모델/토큰/추정 비용을 현재 요청 meter에 더하는 LangChain 콜백"""
+
+    # 비동기 호출에서도 호출한 쪽 context(현재 meter/span)에서 실행
+    run_inline = True
+
+    def __init__(self):
+        self._models: Dict[Any, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: Any, kwargs: Dict[str, Any]) -> None:
+        if _CURRENT_METER.get() is None:
+            return
+        with self._lock:
+            self._models[run_id] = llm_model_name(kwargs)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            model = self._models.pop(run_id, None)
+        meter = _CURRENT_METER.get()
+        if meter is None:
+            return
+        # 응답의 모델명이 실제 과금 모델 (gpt-4o-mini-2024-07-18 등)
+        model = (getattr(response, "llm_output", None) or {}).get("model_name") or model
+        usage = token_usage(response)
+        meter.add("llm", model, usage.get("input_tokens", 0), usage.get("output_tokens", 0), step=_current_step())
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            model = self._models.pop(run_id, None)
+        meter = _CURRENT_METER.get()
+        if meter is not None:
+            # 실패한 호출도 호출 수에는 포함 (토큰은 알 수 없음)
+            meter.add("llm", model, 0, 0, step=_current_step())
+
+
+_USAGE_CALLBACK = None  # singleton
+
+
+def get_usage_callback() -> UsageCallback:
+    """공용 사용량 콜백 (llm_clients.get_chat_model이 모든 ChatOpenAI에 붙임)"""
+    global _USAGE_CALLBACK
+    if _USAGE_CALLBACK is None:
+        _USAGE_CALLBACK = UsageCallback()
+    return _USAGE_CALLBACK
+
+
+class UsageStore:
+    """요청별 사용량 SQLite 저장소 (db_path=None이면 메모리 전용)"""
+
+    def __init__(self, db_path: Optional[str] = USAGE_METRICS_PATH, max_rows: int = USAGE_METRICS_MAX_ROWS):
+        self.db_path = db_path
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._con = sqlite3.connect(db_path or ":memory:", timeout=5.0, check_same_thread=False)
+        if db_path:
+            self._con.execute("PRAGMA journal_mode=WAL")
+            self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute(
+            "CREATE TABLE IF NOT EXISTS usage_requests ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL NOT NULL, session_id TEXT, trace_id TEXT,"
+            " kind TEXT, intent TEXT, cache_status TEXT, question TEXT,"
+            " llm_calls INTEGER, embedding_calls INTEGER, input_tokens INTEGER, output_tokens INTEGER,"
+            " cost_usd REAL, elapsed_ms INTEGER, steps TEXT)"
+        )
+        self._con.execute("CREATE INDEX IF NOT EXISTS usage_requests_session ON usage_requests(session_id)")
+        self._con.commit()
+
+    def record(self, usage: Dict[str, Any], *, question: str, intent: Optional[str], kind: str = "ask",
+               session_id: Optional[str] = None, trace_id: Optional[str] = None,
+               cache_status: Optional[str] = None, elapsed_ms: Optional[int] = None) -> None:
+        with self._lock:
+            self._con.execute(
+                "INSERT INTO usage_requests (created_at, session_id, trace_id, kind, intent, cache_status, question,"
+                " llm_calls, embedding_calls, input_tokens, output_tokens, cost_usd, elapsed_ms, steps)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), session_id, trace_id, kind, intent, cache_status, question,
+                 usage["llm_calls"], usage["embedding_calls"], usage["input_tokens"], usage["output_tokens"],
+                 usage["cost_usd"], elapsed_ms, json.dumps(usage["by_step"], ensure_ascii=False)),
+            )
+            # 한도를 넘으면 오래된 요청부터 삭제
+            self._con.execute(
+                "DELETE FROM usage_requests WHERE id IN ("
+                " SELECT id FROM usage_requests ORDER BY id DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            )
+            self._con.commit()
+
+    def summary(self, session_id: Optional[str] = None, since: Optional[float] = None) -> Dict[str, Any]:
+        """요청 수/LLM 호출/토큰/비용/평균 지연 합계와 의도별(by_intent), 단계별(by_step) 합계"""
+        where, params = [], []
+        if session_id is not None:
+            where.append("session_id = ?")
+            params.append(session_id)
+        if since is not None:
+            where.append("created_at >= ?")
+            params.append(since)
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        with self._lock:
+            rows = self._con.execute(
+                "SELECT intent, llm_calls, embedding_calls, input_tokens, output_tokens, cost_usd, elapsed_ms, steps"
+                f" FROM usage_requests{clause}", params,
+            ).fetchall()
+
+        def _empty():
+            return {"requests": 0, "llm_calls": 0, "embedding_calls": 0, "input_tokens": 0, "output_tokens": 0,
+                    "cost_usd": 0.0, "elapsed_ms": 0}
+
+        total, by_intent, by_step = _empty(), {}, {}
+        for intent, llm_calls, embedding_calls, input_tokens, output_tokens, cost_usd, elapsed_ms, steps in rows:
+            for agg in (total, by_intent.setdefault(intent or "unknown", _empty())):
+                agg["requests"] += 1
+                agg["llm_calls"] += llm_calls
+                agg["embedding_calls"] += embedding_calls
+                agg["input_tokens"] += input_tokens
+                agg["output_tokens"] += output_tokens
+                agg["cost_usd"] += cost_usd
+                agg["elapsed_ms"] += elapsed_ms or 0
+            for name, step in json.loads(steps or "{}").items():
+                agg = by_step.setdefault(name, {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0})
+                for key in agg:
+                    agg[key] += step.get(key, 0)
+
+        for agg in (total, *by_intent.values()):
+            agg["cost_usd"] = round(agg["cost_usd"], 6)
+            agg["avg_elapsed_ms"] = int(agg.pop("elapsed_ms") / agg["requests"]) if agg["requests"] else 0
+        for agg in by_step.values():
+            agg["cost_usd"] = round(agg["cost_usd"], 6)
+        return {**total, "by_intent": by_intent, "by_step": by_step}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._con.execute("DELETE FROM usage_requests")
+            self._con.commit()
+
+
+_USAGE_STORE = None  # singleton
+
+
+def get_usage_store() -> Optional[UsageStore]:
+    """공용 사용량 저장소 (USAGE_METRICS_ENABLED=false이거나 DB를 열 수 없으면 None)"""
+    global _USAGE_STORE
+    if _USAGE_STORE is None and USAGE_METRICS_ENABLED:
+        try:
+            _USAGE_STORE = UsageStore()
+        except sqlite3.Error:
+            return None
+    return _USAGE_STORE
+
+
+def record_usage(usage: Dict[str, Any], **meta: Any) -> None:
+    """요청 사용량을 공용 저장소에 기록 (저장 실패는 응답을 막지 않음)"""
+    store = get_usage_store()
+    if store is None:
+        return
+    try:
+        store.record(usage, **meta)
+    except sqlite3.Error as e:
+        logger.warning(f"사용량 기록 실패: {e}")
@@ -0,0 +1,123 @@
+"""
+에이전트 스택 warm-up
+
+무거운 모듈(langchain_openai, chromadb, DuckDB 등)은 import 시점이 아니라 첫 사용 시점에
+로드되도록 지연시켰다. 그 대가로 첫 요청이 느려지지 않도록, 앱 시작 직후 백그라운드 스레드에서
+각 Agent 모듈 import, 컴파일된 그래프, LLM 클라이언트/체인, DuckDB, Chroma 벡터스토어를 미리 만든다.
+
+- 모든 대상은 모듈 싱글톤이라 warm-up과 실제 요청 중 먼저 도착한 쪽이 한 번만 생성한다.
+- 단계별 소요 시간/오류를 기록하고, 한 단계가 실패해도 나머지는 계속한다 (요청 경로는 영향 없음).
+- Streamlit은 상호작용마다 스크립트를 다시 실행하므로 start_warmup은 프로세스당 한 번만 스레드를 띄운다.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("AGENT_WARMUP_ENABLED", "true").lower() == "true"
+DOCS_INDEX_DIR = ".chroma/sagemaker_web"
+DOCS_EMBED_MODEL = "text-embedding-3-small"
+
+# 전역 warm-up 상태(singleton)
+_WARMUP_THREAD: Optional[threading.Thread] = None
+_WARMUP_STATUS: Dict[str, Any] = {"state": "idle", "steps": {}}
+_LOCK = threading.Lock()
+
+
+def _warm_router() -> None:
+    from .router.intent_router import _get_llm
+    from .router.fast_intent import get_intent_index
+    from .router.intent_cache import get_intent_cache
+    _get_llm()
+    get_intent_index()
+    get_intent_cache()
+
+
+def _warm_sql() -> None:
+    from .sql_agent.nl2sql import get_nl2sql_chain
+    from .sql_agent.repair import get_repair_chain
+    from .sql_agent.summary import _get_summary_chain
+    from .sql_agent.example_store import get_example_store
+    get_nl2sql_chain()
+    get_repair_chain()
+    _get_summary_chain()
+    get_example_store()
+
+
+def _warm_duckdb() -> None:
+    # 쿼리 연결은 요청마다 새로 만들지만(메모리 한도/취소 격리) 라이브러리 초기화는 한 번
+    from .sql_agent.executor import _connect
+    con = _connect()
+    try:
+        con.execute("SELECT 1").fetchall()
+    finally:
+        con.close()
+
+
+def _warm_general() -> None:
+    from .general_agent.graph import _get_general_chain
+    _get_general_chain()
+
+
+def _warm_docs() -> None:
+    from .docs_agent.graph import _get_answer_chain
+    from .docs_agent.retriever import get_vectorstore
+    _get_answer_chain()
+    if os.path.isdir(DOCS_INDEX_DIR):
+        get_vectorstore(DOCS_INDEX_DIR, DOCS_EMBED_MODEL)
+
+
+# (이름, 함수) — 첫 요청에 가장 많이 쓰이는 순서
+WARMUP_STEPS: List[Tuple[str, Callable[[], Any]]] = [
+    ("router", _warm_router),
+    ("sql_agent", _warm_sql),
+    ("duckdb", _warm_duckdb),
+    ("general_agent", _warm_general),
+    ("docs_agent", _warm_docs),
+]
+
+
+def warm_up(steps: Optional[List[Tuple[str, Callable[[], Any]]]] = None) -> Dict[str, Any]:
+    """warm-up 단계를 순서대로 실행하고 단계별 결과 반환
+
+    Returns:
+        {"state": "done", "total_sec", "steps": {이름: {"ok", "sec", "error"?}}}
+    """
+    started = time.perf_counter()
+    with _LOCK:
+        _WARMUP_STATUS.update({"state": "running", "steps": {}})
+    for name, step in (WARMUP_STEPS if steps is None else steps):
+        t0 = time.perf_counter()
+        try:
+            step()
+            entry = {"ok": True, "sec": round(time.perf_counter() - t0, 4)}
+        except Exception as e:
+            logger.warning(f"warm-up {name} 실패: {e}")
+            entry = {"ok": False, "sec": round(time.perf_counter() - t0, 4), "error": str(e)}
+        with _LOCK:
+            _WARMUP_STATUS["steps"][name] = entry
+    with _LOCK:
+        _WARMUP_STATUS.update({"state": "done", "total_sec": round(time.perf_counter() - started, 4)})
+        return {**_WARMUP_STATUS, "steps": dict(_WARMUP_STATUS["steps"])}
+
+
+def start_warmup() -> Optional[threading.Thread]:
+    """백그라운드 warm-up 스레드 시작 (프로세스당 한 번, 비활성화 시 None)"""
+    global _WARMUP_THREAD
+    if not WARMUP_ENABLED:
+        return None
+    with _LOCK:
+        if _WARMUP_THREAD is None:
+            _WARMUP_THREAD = threading.Thread(target=warm_up, name="agent-warmup", daemon=True)
+            _WARMUP_THREAD.start()
+        return _WARMUP_THREAD
+
+
+def warmup_status() -> Dict[str, Any]:
+    """현재 warm-up 진행 상태 (state: idle | running | done)"""
+    with _LOCK:
+        return {**_WARMUP_STATUS, "steps": dict(_WARMUP_STATUS["steps"])}
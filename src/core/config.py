@@ -26,6 +26,9 @@ class Config:
     USE_LLM_NORMALIZATION = os.getenv('USE_LLM_NORMALIZATION', 'false').lower() == 'true'
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
     
+    # 시맨틱 뷰 사전 집계 (semantic/*.parquet) 생성 여부
+    MATERIALIZE_SEMANTIC_VIEWS = os.getenv('MATERIALIZE_SEMANTIC_VIEWS', 'true').lower() == 'true'
+    
     @classmethod
     def validate_redshift_config(cls) -> bool:
         """Redshift 연결 설정이 완전한지 검증"""
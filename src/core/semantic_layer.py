@@ -0,0 +1,274 @@
+"""
+시맨틱 레이어: 표준 지표 뷰를 한 곳에서 정의하고 DuckDB 연결에 등록
+
+- 정의: SEMANTIC_VIEWS (뷰 이름 → 설명 + fact 기반 SQL)
+- 등록: register_semantic_views(con, base_dir) — SQL Agent 실행 연결마다 CREATE VIEW
+- 사전 집계: ETL이 materialize_semantic_views(processed_dir)로 semantic/*.parquet를 만들어 두면
+  등록 시 fact 테이블 대신 작은 사전 집계 파일을 읽는다.
+
+NL2SQL은 README 표준 시나리오(총비용, Endpoint 사용 시간, Spot 비중, 태그 누락률,
+태그 미부착 비용)에서 fact 테이블을 직접 스캔하지 않고 이 뷰를 사용한다.
+
+여러 달 질의는 register_month_range_views로 요청한 월의 파일만 묶은 논리 테이블
+(cur_costs, cur_monthly)을 등록한다. 파일 목록 자체가 billing_ym 파티션 프루닝 역할을 한다.
+"""
+
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import duckdb
+
+
+FACT_FILE = "fact_sagemaker_costs.parquet"
+SEMANTIC_DIR = "semantic"
+TAG_COLUMNS = [f"usertag{i}" for i in range(10)]
+
+# v_cost_by_service의 service 값: (fact 플래그 컬럼, 값), 위에서부터 먼저 일치하는 값 (나머지는 'Other')
+SERVICE_TYPE_FLAGS: List[Tuple[str, str]] = [
+    ("is_endpoint", "Endpoint"),
+    ("is_training", "Training"),
+    ("is_notebook", "Notebook"),
+    ("is_studio", "Studio"),
+    ("is_processing", "Processing"),
+    ("is_featurestore", "FeatureStore"),
+    ("is_data_transfer", "DataTransfer"),
+    ("is_storage", "Storage"),
+]
+SERVICE_TYPES = tuple(service for _, service in SERVICE_TYPE_FLAGS) + ("Other",)
+
+# {fact}: fact parquet 스캔, {tagged}: 태그가 하나라도 있는 행 조건
+SEMANTIC_VIEWS: Dict[str, Dict[str, str]] = {
+    "v_total_cost": {
+        "description": "월별 전체 SageMaker 비용 (total_cost=Unblended, blended_cost=Blended)",
+        "sql": """
+            SELECT billing_ym,
+                   SUM(lineitem_unblendedcost) AS total_cost,
+                   SUM(lineitem_blendedcost) AS blended_cost
+            FROM {fact}
+            GROUP BY billing_ym
+        """,
+    },
+    "v_cost_by_service": {
+        "description": "서비스 유형(Endpoint/Training/Notebook/Studio/Processing/...)별 비용과 사용 시간",
+        "sql": """
+            SELECT CASE
+                       """ + "\n                       ".join(
+                           f"WHEN {flag} THEN '{service}'" for flag, service in SERVICE_TYPE_FLAGS) + """
+                       ELSE 'Other'
+                   END AS service,
+                   SUM(lineitem_unblendedcost) AS cost,
+                   SUM(usage_hours) AS usage_hours
+            FROM {fact}
+            GROUP BY service
+        """,
+    },
+    "v_endpoint_hours": {
+        "description": "Endpoint별 사용 시간(endpoint_hours)과 비용",
+        "sql": """
+            SELECT lineitem_resourceid AS resource_id,
+                   product_instancetype AS instance_type,
+                   SUM(usage_hours) AS endpoint_hours,
+                   SUM(lineitem_unblendedcost) AS cost
+            FROM {fact}
+            WHERE is_endpoint
+            GROUP BY lineitem_resourceid, product_instancetype
+        """,
+    },
+    "v_spot_share": {
+        "description": "Spot 비용 비중 (spot_share: 전체, training_spot_share: Training Job 기준, 0~1)",
+        "sql": """
+            SELECT SUM(lineitem_unblendedcost) FILTER (WHERE is_spot) AS spot_cost,
+                   SUM(lineitem_unblendedcost) FILTER (WHERE NOT is_spot) AS ondemand_cost,
+                   SUM(lineitem_unblendedcost) AS total_cost,
+                   SUM(lineitem_unblendedcost) FILTER (WHERE is_spot)
+                       / NULLIF(SUM(lineitem_unblendedcost), 0) AS spot_share,
+                   SUM(lineitem_unblendedcost) FILTER (WHERE is_spot AND is_training)
+                       / NULLIF(SUM(lineitem_unblendedcost) FILTER (WHERE is_training), 0) AS training_spot_share
+            FROM {fact}
+        """,
+    },
+    "v_tag_missing_rate": {
+        "description": "계정별 태그 누락률 (tag_missing_rate: 태그가 없는 라인 아이템 비율, 0~1)과 태그 미부착 비용",
+        "sql": """
+            SELECT lineitem_usageaccountid AS account_id,
+                   COUNT(*) AS line_items,
+                   COUNT(*) FILTER (WHERE NOT ({tagged})) AS untagged_line_items,
+                   COUNT(*) FILTER (WHERE NOT ({tagged})) / COUNT(*) AS tag_missing_rate,
+                   COALESCE(SUM(lineitem_unblendedcost) FILTER (WHERE NOT ({tagged})), 0) AS untagged_cost,
+                   SUM(lineitem_unblendedcost) AS total_cost
+            FROM {fact}
+            GROUP BY lineitem_usageaccountid
+        """,
+    },
+    "v_untagged_cost": {
+        "description": "태그가 하나도 없는 리소스의 비용 합계 (untagged_cost, untagged_share: 0~1)",
+        "sql": """
+            SELECT COALESCE(SUM(lineitem_unblendedcost) FILTER (WHERE NOT ({tagged})), 0) AS untagged_cost,
+                   SUM(lineitem_unblendedcost) AS total_cost,
+                   SUM(lineitem_unblendedcost) FILTER (WHERE NOT ({tagged}))
+                       / NULLIF(SUM(lineitem_unblendedcost), 0) AS untagged_share
+            FROM {fact}
+        """,
+    },
+}
+
+SEMANTIC_VIEW_NAMES = frozenset(SEMANTIC_VIEWS)
+
+# 여러 달 논리 테이블: 이름 → (월 폴더의 원본 파일, 설명)
+MONTH_RANGE_VIEWS: Dict[str, Tuple[str, str]] = {
+    "cur_costs": (FACT_FILE, "요청한 월들의 상세 비용 (fact_sagemaker_costs와 같은 컬럼, billing_ym으로 월 구분)"),
+    "cur_monthly": ("monthly_summary.parquet", "요청한 월들의 월별 총비용 요약 (월별 추이/비교에 우선 사용)"),
+}
+MONTH_RANGE_VIEW_NAMES = frozenset(MONTH_RANGE_VIEWS)
+
+
+def _sql_literal(path: str) -> str:
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def _tagged_condition(con: duckdb.DuckDBPyConnection, fact_path: str) -> str:
+    """fact에 존재하는 usertag 컬럼 중 하나라도 값이 있으면 태그된 것으로 간주"""
+    columns = {
+        row[0].lower()
+        for row in con.execute(f"DESCRIBE SELECT * FROM read_parquet({_sql_literal(fact_path)})").fetchall()
+    }
+    present = [c for c in TAG_COLUMNS if c in columns]
+    if not present:
+        return "FALSE"
+    return " OR ".join(f"COALESCE(CAST({c} AS VARCHAR), '') <> ''" for c in present)
+
+
+def _fact_view_sql(con: duckdb.DuckDBPyConnection, name: str, fact_path: str) -> str:
+    return SEMANTIC_VIEWS[name]["sql"].format(
+        fact=f"read_parquet({_sql_literal(fact_path)})",
+        tagged=_tagged_condition(con, fact_path),
+    ).strip()
+
+
+def materialize_semantic_views(processed_dir: str) -> List[str]:
+    """fact 테이블로부터 시맨틱 뷰를 semantic/*.parquet 사전 집계로 저장 (ETL 단계)
+
+    Returns:
+        저장된 파일 경로 목록 (fact가 없으면 빈 목록)
+    """
+    fact_path = os.path.join(processed_dir, FACT_FILE)
+    if not os.path.exists(fact_path):
+        return []
+    out_dir = Path(processed_dir) / SEMANTIC_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    con = duckdb.connect()
+    try:
+        saved = []
+        for name in SEMANTIC_VIEWS:
+            path = out_dir / f"{name}.parquet"
+            con.execute(f"COPY ({_fact_view_sql(con, name, fact_path)}) TO {_sql_literal(path)} (FORMAT PARQUET)")
+            saved.append(str(path))
+        return saved
+    finally:
+        con.close()
+
+
+def _source_signature(base_dir: str) -> Tuple[str, int, int]:
+    real = os.path.realpath(base_dir)
+    fact = os.path.join(real, FACT_FILE)
+    semantic = os.path.join(real, SEMANTIC_DIR)
+    fact_mtime = os.stat(fact).st_mtime_ns if os.path.exists(fact) else 0
+    semantic_mtime = os.stat(semantic).st_mtime_ns if os.path.isdir(semantic) else 0
+    return real, fact_mtime, semantic_mtime
+
+
+@lru_cache(maxsize=32)
+def _view_definitions(real_base: str, fact_mtime: int, semantic_mtime: int) -> Tuple[Tuple[str, str], ...]:
+    """(뷰 이름, CREATE VIEW 본문) 목록 — 사전 집계가 있으면 그 파일을, 없으면 fact를 사용"""
+    fact_path = os.path.join(real_base, FACT_FILE)
+    con = duckdb.connect()
+    try:
+        definitions = []
+        for name in SEMANTIC_VIEWS:
+            materialized = os.path.join(real_base, SEMANTIC_DIR, f"{name}.parquet")
+            if os.path.exists(materialized):
+                definitions.append((name, f"SELECT * FROM read_parquet({_sql_literal(materialized)})"))
+            elif fact_mtime:
+                body = _fact_view_sql(con, name, fact_path)
+                try:
+                    # fact에 필요한 컬럼이 없는 뷰(예: 구버전 스냅샷)는 등록하지 않음
+                    con.execute(f"DESCRIBE {body}")
+                except duckdb.Error:
+                    continue
+                definitions.append((name, body))
+        return tuple(definitions)
+    finally:
+        con.close()
+
+
+def register_semantic_views(con: duckdb.DuckDBPyConnection, base_dir: str) -> List[str]:
+    """base_dir 데이터에 대한 시맨틱 뷰를 연결에 등록하고 등록된 뷰 이름을 반환"""
+    names = []
+    for name, body in _view_definitions(*_source_signature(base_dir)):
+        con.execute(f"CREATE OR REPLACE VIEW {name} AS {body}")
+        names.append(name)
+    return names
+
+
+@lru_cache(maxsize=32)
+def _describe(real_base: str, fact_mtime: int, semantic_mtime: int) -> str:
+    con = duckdb.connect()
+    try:
+        lines = []
+        for name, body in _view_definitions(real_base, fact_mtime, semantic_mtime):
+            columns = [row[0] for row in con.execute(f"DESCRIBE {body}").fetchall()]
+            lines.append(f"- {name}({', '.join(columns)}): {SEMANTIC_VIEWS[name]['description']}")
+        return "\n".join(lines)
+    finally:
+        con.close()
+
+
+def describe_semantic_views(base_dir: str) -> str:
+    """NL2SQL 프롬프트용 뷰 목록 ("- 이름(컬럼...): 설명"), 등록 가능한 뷰가 없으면 빈 문자열"""
+    return _describe(*_source_signature(base_dir))
+
+
+def _month_range_definitions(month_dirs: List[str]) -> List[Tuple[str, str]]:
+    definitions = []
+    for name, (file_name, _) in MONTH_RANGE_VIEWS.items():
+        paths = [os.path.join(d, file_name) for d in month_dirs if os.path.exists(os.path.join(d, file_name))]
+        if paths:
+            file_list = "[" + ", ".join(_sql_literal(p) for p in paths) + "]"
+            definitions.append((name, f"SELECT * FROM read_parquet({file_list}, union_by_name = true)"))
+    return definitions
+
+
+def register_month_range_views(con: duckdb.DuckDBPyConnection, month_dirs: List[str]) -> List[str]:
+    """요청한 월 폴더의 파일만 union한 논리 테이블(cur_costs, cur_monthly)을 등록
+
+    DuckDB는 나열된 파일만 읽으므로 요청하지 않은 월은 스캔하지 않는다.
+    """
+    names = []
+    for name, body in _month_range_definitions(month_dirs):
+        con.execute(f"CREATE OR REPLACE VIEW {name} AS {body}")
+        names.append(name)
+    return names
+
+
+def get_month_range_schema(month_dirs: List[str]) -> Dict[str, List[str]]:
+    """논리 테이블별 컬럼 목록 (NL2SQL 스키마용)"""
+    con = duckdb.connect()
+    try:
+        return {
+            name: [row[0] for row in con.execute(f"DESCRIBE {body}").fetchall()]
+            for name, body in _month_range_definitions(month_dirs)
+        }
+    finally:
+        con.close()
+
+
+def describe_month_range_views(month_dirs: List[str], months: List[str]) -> str:
+    """NL2SQL 프롬프트용 여러 달 논리 테이블 설명"""
+    period = f"{months[0]}~{months[-1]}" if months else ""
+    lines = [f"여러 달 질문({period}, {len(months)}개월): 아래 논리 테이블만 사용하고 read_parquet는 쓰지 않는다."]
+    for name, columns in get_month_range_schema(month_dirs).items():
+        lines.append(f"- {name}({', '.join(columns)}): {MONTH_RANGE_VIEWS[name][1]}")
+    return "\n".join(lines)
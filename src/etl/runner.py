@@ -14,7 +14,7 @@ from ..utils.lock import etl_lock
 from .extract import extract_cur_from_redshift, load_raw_from_csv, save_raw
 from .transform import transform_all, get_transform_stats
 from .clean import clean_data
-from .store import write_processed, write_manifest, make_latest_symlink, get_processed_summary
+from .store import write_processed, write_semantic_aggregates, write_manifest, make_latest_symlink, get_processed_summary
 from ..core.contracts import ContractManager
 
 def main():
@@ -120,6 +120,10 @@ def main():
             # 5. 처리된 데이터 저장
             write_processed(dfs_transformed, billing_ym, output_paths)
             
+            # 5-1. 시맨틱 뷰 사전 집계 (옵션)
+            if Config.MATERIALIZE_SEMANTIC_VIEWS:
+                write_semantic_aggregates(output_paths)
+            
             # 6. 매니페스트 생성
             row_counts = get_transform_stats(dfs_transformed)
             write_manifest(billing_ym, row_counts, output_paths)
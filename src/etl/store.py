@@ -7,6 +7,7 @@ from typing import Dict
 import pandas as pd
 
 from ..core.config import Config
+from ..core.semantic_layer import materialize_semantic_views
 from ..utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -40,6 +41,18 @@ def write_processed(dfs: Dict[str, pd.DataFrame], billing_ym: str, output_paths:
     logger.info(f"총 {len(saved_files)}개 파일 저장 완료")
     return saved_files
 
+def write_semantic_aggregates(output_paths: dict):
+    """시맨틱 뷰(v_*)를 semantic/*.parquet 사전 집계로 저장"""
+    processed_dir = output_paths['processed_dir']
+    try:
+        saved = materialize_semantic_views(str(processed_dir))
+        logger.info(f"시맨틱 뷰 사전 집계 {len(saved)}개 저장 완료")
+        return saved
+    except Exception as e:
+        # 사전 집계가 없어도 SQL Agent는 fact 기반 뷰로 동작하므로 경고만 남김
+        logger.warning(f"시맨틱 뷰 사전 집계 실패: {e}")
+        return []
+
 def write_manifest(billing_ym: str, row_counts: Dict[str, int], output_paths: dict, schema_version: str = "1.0"):
     """매니페스트 파일 생성"""
     manifest_path = output_paths['manifest']
@@ -0,0 +1,80 @@
+"""
+LLM 풀 포화 벤치마크: 가짜 OpenAI 엔드포인트(httpx.MockTransport)에 동시 요청을 보내
+전역 제한기(LLM_MAX_CONCURRENCY)와 429 백오프가 지연/대기 히스토그램에 어떻게 나타나는지 본다.
+
+대기열 대기(queue_wait) p95가 호출 지연(latency)과 비슷해지면 풀이 포화된 것이다.
+
+사용법:
+    python -m src.test.bench_llm_pool
+    python -m src.test.bench_llm_pool --requests 200 --workers 64 --max-concurrency 8 --latency-ms 300
+    python -m src.test.bench_llm_pool --rate-limit-every 20 --json-out pool.json
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from src.agent import llm_clients
+from src.agent.llm_clients import LLMLimiter, LimitedTransport
+
+
+def run(requests: int, workers: int, max_concurrency: int, latency_ms: float, rate_limit_every: int) -> dict:
+    counter = itertools.count(1)
+    lock = threading.Lock()
+
+    def handler(request):
+        with lock:
+            n = next(counter)
+        if rate_limit_every and n % rate_limit_every == 0:
+            return httpx.Response(429, headers={"retry-after-ms": str(int(latency_ms))})
+        time.sleep(latency_ms / 1000)
+        return httpx.Response(200, json={})
+
+    limiter = LLMLimiter(max_concurrency=max_concurrency)
+    client = httpx.Client(transport=LimitedTransport(httpx.MockTransport(handler), "bench", limiter))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda _: client.get("https://api.test/v1/chat/completions"), range(requests)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": requests, "workers": workers, "max_concurrency": max_concurrency,
+        "elapsed_sec": round(elapsed, 2), "throughput_rps": round(requests / elapsed, 1),
+        "limiter": limiter.stats(), "pool": llm_clients.get_pool_stats("bench").snapshot(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM HTTP 풀/전역 제한기 포화 벤치마크 (가짜 엔드포인트)")
+    parser.add_argument("--requests", type=int, default=100, help="총 요청 수")
+    parser.add_argument("--workers", type=int, default=32, help="동시 호출 스레드 수")
+    parser.add_argument("--max-concurrency", type=int, default=llm_clients.LLM_MAX_CONCURRENCY,
+                        help="전역 동시 요청 한도")
+    parser.add_argument("--latency-ms", type=float, default=200, help="가짜 엔드포인트 응답 지연")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="N번째 요청마다 429 응답 (0이면 없음)")
+    parser.add_argument("--json-out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    result = run(args.requests, args.workers, args.max_concurrency, args.latency_ms, args.rate_limit_every)
+
+    print(f"{result['requests']}건 / {result['elapsed_sec']}s ({result['throughput_rps']} req/s), "
+          f"동시 한도 {result['max_concurrency']}, 429 {result['limiter']['throttled']}회")
+    for name in ("latency", "queue_wait"):
+        hist = result["pool"][name]
+        print(f"\n[{name}] avg {hist['avg_ms']} ms · p50 ≤{hist['p50_ms']} ms · p95 ≤{hist['p95_ms']} ms")
+        for label, count in hist["buckets"].items():
+            print(f"  {label:>8} ms  {'#' * min(count, 60)} {count}")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+NL2SQL few-shot 예시 벤치마크
+
+시드 예시와 표현이 다른 질문 세트로 다음을 측정한다.
+- 오프라인: 예시 검색 top-1이 기대 테이블을 가리키는 비율, 검색 지연(p50/p95)
+- 온라인(--online, OPENAI_API_KEY + data/processed/latest 필요):
+  few-shot 유무별 테이블 선택 정확도, repair 재시도 횟수, 전체 지연
+
+사용법:
+    python -m src.test.bench_nl2sql_examples
+    python -m src.test.bench_nl2sql_examples --online --month latest
+"""
+
+import argparse
+import re
+import statistics
+import time
+
+from src.agent.sql_agent import nl2sql
+from src.agent.sql_agent.example_store import SQLExampleStore
+
+# (질문, 기대 테이블) — 시드 예시와 다른 표현
+BENCH_QUESTIONS = [
+    ("이번 달 전체 비용 합계 알려줘", "monthly_summary"),
+    ("이번달 세이지메이커에 돈 얼마 썼어?", "monthly_summary"),
+    ("엔드포인트 비용 합계는?", "agg_endpoint_hours"),
+    ("엔드포인트 인스턴스 타입별 사용 시간", "agg_endpoint_hours"),
+    ("가장 오래 켜져 있던 엔드포인트는?", "v_endpoint_hours"),
+    ("노트북 인스턴스별 비용 보여줘", "agg_notebook_hours"),
+    ("노트북 사용 시간 합계", "agg_notebook_hours"),
+    ("스팟 인스턴스 비중은?", "v_spot_share"),
+    ("온디맨드 대비 스팟 비용 비율", "v_spot_share"),
+    ("트레이닝 잡 스팟 비중", "v_spot_share"),
+    ("학습 비용이 제일 큰 인스턴스 타입", "agg_training_cost"),
+    ("계정별 트레이닝 비용", "agg_training_cost"),
+    ("프로세싱 작업 비용은 인스턴스별로 얼마야?", "agg_processing_cost"),
+    ("스튜디오 사용 비용", "agg_studio_hours"),
+    ("스토리지 비용 얼마나 나왔어?", "agg_storage_cost"),
+    ("데이터 전송 비용 알려줘", "agg_datatransfer_cost"),
+    ("피처 스토어 비용", "agg_featurestore_cost"),
+    ("태그 누락률이 높은 계정은?", "v_tag_missing_rate"),
+    ("태그 없는 리소스 비용 합계", "v_untagged_cost"),
+    ("서비스별 비용 비교", "v_cost_by_service"),
+    ("가장 비싼 리소스 5개", "fact_sagemaker_costs"),
+]
+
+_TABLE = re.compile(r"([\w\-]+)\.parquet")
+_VIEW = re.compile(r"\b(v_\w+)\b")
+
+
+def _tables(sql: str) -> set:
+    """SQL이 참조하는 parquet 파일명과 시맨틱 뷰 이름"""
+    return set(_TABLE.findall(sql or "")) | set(_VIEW.findall(sql or ""))
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else 0.0
+
+
+def bench_retrieval():
+    """오프라인: 예시 검색 정확도/지연"""
+    store = SQLExampleStore(confirmed_path=None)
+    hits, latencies = 0, []
+    print(f"📚 예시 {len(store)}개, 질문 {len(BENCH_QUESTIONS)}개")
+    for question, expected in BENCH_QUESTIONS:
+        start = time.perf_counter()
+        examples = store.search(question, k=3)
+        latencies.append((time.perf_counter() - start) * 1000)
+        top = examples[0] if examples else None
+        ok = top is not None and expected in _tables(top["sql"])
+        hits += ok
+        print(f"  {'✅' if ok else '❌'} {question} → {top['question'] if top else '(없음)'}")
+    print(f"\n🎯 top-1 테이블 정확도: {hits}/{len(BENCH_QUESTIONS)} ({hits / len(BENCH_QUESTIONS):.0%})")
+    print(f"⏱️ 검색 지연: p50 {_pct(latencies, 0.5):.2f}ms, p95 {_pct(latencies, 0.95):.2f}ms")
+
+
+def bench_online(month: str):
+    """온라인: few-shot 유무별 NL2SQL 정확도/재시도/지연"""
+    from src.agent.sql_agent.graph import ask_with_debug
+
+    for k in (0, nl2sql.FEW_SHOT_K or 3):
+        nl2sql.FEW_SHOT_K = k
+        correct, repairs, latencies = 0, 0, []
+        for question, expected in BENCH_QUESTIONS:
+            start = time.perf_counter()
+            result = ask_with_debug(question, month)
+            latencies.append(time.perf_counter() - start)
+            correct += expected in _tables(result.get("sql")) and not result.get("error")
+            repairs += result.get("repair_attempts", 0)
+        print(f"\n🧪 few-shot k={k}")
+        print(f"  🎯 정확도: {correct}/{len(BENCH_QUESTIONS)} ({correct / len(BENCH_QUESTIONS):.0%})")
+        print(f"  🔁 repair 재시도: {repairs}회")
+        print(f"  ⏱️ 지연: p50 {statistics.median(latencies):.2f}s, p95 {_pct(latencies, 0.95):.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NL2SQL few-shot 예시 벤치마크")
+    parser.add_argument("--online", action="store_true", help="LLM을 호출하여 end-to-end 측정")
+    parser.add_argument("--month", default="latest", help="분석할 월 (기본값: latest)")
+    args = parser.parse_args()
+
+    bench_retrieval()
+    if args.online:
+        bench_online(args.month)
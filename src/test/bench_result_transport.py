@@ -0,0 +1,104 @@
+"""
+SQL 결과 전달 방식 메모리 벤치마크: pandas vs Arrow
+
+리소스 단위의 넓은 결과(문자열 컬럼이 많은 per-resource 상세)를 대상으로
+요약 프롬프트용 샘플 + UI 페이지 표시까지의 경로를 두 방식으로 비교한다.
+- pandas: 결과 전체를 DataFrame으로 가져와 샘플(to_dict)/페이지(iloc)
+- Arrow: 결과를 Arrow Table로 유지하고 샘플/페이지는 zero-copy slice,
+  변환은 샘플 JSON(to_pylist)과 UI 페이지에서만
+
+사용법:
+    python -m src.test.bench_result_transport
+    python -m src.test.bench_result_transport --rows 500000 --tag-columns 30
+"""
+
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+import duckdb
+import pyarrow as pa
+
+from src.agent.sql_agent import executor
+from src.agent.sql_agent.executor import QueryResult
+from src.agent.sql_agent.summary import _sample_for_prompt
+
+
+def _make_wide_parquet(rows: int, tag_columns: int) -> str:
+    """리소스 ID/ARN/태그 문자열 컬럼이 많은 합성 CUR 상세 parquet"""
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_transport_"), "fact_resource_costs.parquet")
+    tags = ", ".join(f"'tag{i}-' || (range % {50 + i}) AS tag_{i}" for i in range(tag_columns))
+    duckdb.execute(f"""
+        COPY (SELECT 'arn:aws:sagemaker:ap-northeast-2:123456789012:endpoint/ep-' || range AS resource_arn,
+                     'ep-' || range AS resource_id,
+                     'ml.m5.' || (range % 4) || 'xlarge' AS instance_type,
+                     (range % 24)::INTEGER AS hours,
+                     (range % 997) * 0.013 AS cost,
+                     {tags}
+              FROM range({rows})) TO '{path}'
+    """)
+    return path
+
+
+def _pandas_path(sql: str, page_size: int) -> dict:
+    con = duckdb.connect()
+    df = con.sql(sql).df()
+    sample = _sample_for_prompt(df.head(5).to_dict(orient="records"))
+    page = df.iloc[:page_size].copy()
+    resident = int(df.memory_usage(deep=True).sum())
+    con.close()
+    return {"resident": resident, "sample_chars": len(sample), "page_rows": len(page)}
+
+
+def _arrow_path(sql: str, page_size: int, max_rows: int) -> dict:
+    con = duckdb.connect()
+    table = con.sql(sql).limit(max_rows).arrow()
+    con.close()
+    with QueryResult.from_arrow(sql, table, max_rows=max_rows) as result:
+        sample = _sample_for_prompt(result.sample_rows(5))
+        page = result.fetch_page_arrow(0, page_size)
+    return {"resident": table.nbytes, "sample_chars": len(sample), "page_rows": page.num_rows}
+
+
+def _measure(label: str, fn) -> dict:
+    gc.collect()
+    arrow_before = pa.total_allocated_bytes()
+    tracemalloc.start()
+    start = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - start
+    _, py_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    out.update(label=label, elapsed=elapsed, py_peak=py_peak,
+               arrow_delta=pa.total_allocated_bytes() - arrow_before)
+    mb = 1024 * 1024
+    print(f"  {label:<8} 결과 상주 {out['resident'] / mb:8.1f}MB  파이썬 힙 피크 {py_peak / mb:8.1f}MB  "
+          f"{elapsed:6.2f}s  (샘플 {out['sample_chars']}자, 페이지 {out['page_rows']}행)")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQL 결과 전달 방식 메모리 벤치마크")
+    parser.add_argument("--rows", type=int, default=200_000, help="합성 결과 행 수")
+    parser.add_argument("--tag-columns", type=int, default=25, help="추가 문자열(태그) 컬럼 수")
+    parser.add_argument("--page-size", type=int, default=50, help="UI 페이지 행 수")
+    args = parser.parse_args()
+
+    path = _make_wide_parquet(args.rows, args.tag_columns)
+    sql = f"SELECT * FROM read_parquet('{path}')"
+    max_rows = max(args.rows, executor.MAX_FETCH_ROWS)
+    print(f"📋 {args.rows:,}행 × {args.tag_columns + 5}컬럼 per-resource 결과")
+
+    pandas_out = _measure("pandas", lambda: _pandas_path(sql, args.page_size))
+    arrow_out = _measure("arrow", lambda: _arrow_path(sql, args.page_size, max_rows))
+
+    saved = 1 - arrow_out["resident"] / pandas_out["resident"]
+    peak_saved = 1 - arrow_out["py_peak"] / max(1, pandas_out["py_peak"])
+    print(f"\n💾 결과 상주 메모리 {saved:.0%} 절감, 파이썬 힙 피크 {peak_saved:.0%} 절감")
+
+
+if __name__ == "__main__":
+    main()
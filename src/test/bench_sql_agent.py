@@ -0,0 +1,456 @@
+"""
+SQL Agent 오프라인 벤치마크: 합성 CUR + 고정 질문 세트 + LLM 응답 녹화/재생
+
+OpenAI 없이 노트북에서 sql_agent 성능 변경을 비교하기 위한 하네스.
+- 합성 CUR: ETL(transform_all)과 같은 컬럼/파생 규칙의 fact + 집계 + 시맨틱 사전 집계를
+  DuckDB로 직접 생성 (월당 10k ~ 50M행, --data-dir로 재사용)
+- 질문 세트: BENCH_CASES (질문, 기준 SQL) — 기대 결과는 합성 데이터에 기준 SQL을 실행해 구함
+- LLM 재생: NL2SQL/repair/요약 체인을 카세트(JSON) 응답으로 교체
+    · 카세트 없음: 기준 SQL을 돌려주는 오라클 카세트 (지연은 --llm-delay)
+    · --record PATH: 실제 LLM으로 실행하며 응답/지연을 녹화 (OPENAI_API_KEY 필요)
+    · --cassette PATH: 녹화한 응답 재생 (--latency-scale로 녹화 지연 재현)
+- 보고: 단계별(schema, nl2sql, exec, repair, summary) p50/p95 지연, 정확도, 메모리(RSS 피크)
+
+사용법:
+    python -m src.test.bench_sql_agent
+    python -m src.test.bench_sql_agent --rows 5000000 --data-dir /tmp/cur_5m --repeat 3
+    python -m src.test.bench_sql_agent --record cassettes/sql_agent.json --rows 100000
+    python -m src.test.bench_sql_agent --cassette cassettes/sql_agent.json --latency-scale 1 --json-out before.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import numbers
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import duckdb
+import pyarrow as pa
+from langchain_core.runnables import RunnableLambda
+
+from src.agent.sql_agent import executor, graph, nl2sql, repair, schema_provider, summary
+from src.core.semantic_layer import materialize_semantic_views
+
+STAGES = ["schema", "nl2sql", "exec", "repair", "summary", "total"]
+LLM_PATH_PREFIX = "data/processed/latest"
+
+# (질문, 기준 SQL[, 여러 달 질의 월 수]) — 경로는 NL2SQL 프롬프트와 같이 data/processed/latest 기준
+BENCH_CASES: List[Dict[str, Any]] = [
+    {"question": "이번 달 SageMaker 총 비용은?",
+     "sql": "SELECT total_cost FROM v_total_cost;"},
+    {"question": "서비스별 비용을 비교해줘",
+     "sql": "SELECT service, cost FROM v_cost_by_service ORDER BY cost DESC;"},
+    {"question": "가장 오래 켜져 있던 엔드포인트 5개",
+     "sql": "SELECT resource_id, endpoint_hours FROM v_endpoint_hours ORDER BY endpoint_hours DESC LIMIT 5;"},
+    {"question": "엔드포인트 인스턴스 타입별 사용 시간",
+     "sql": f"SELECT instance_type, SUM(hours) AS hours FROM read_parquet('{LLM_PATH_PREFIX}/agg_endpoint_hours.parquet') "
+            "GROUP BY instance_type ORDER BY hours DESC;"},
+    {"question": "스팟 비용 비중은?",
+     "sql": "SELECT spot_share FROM v_spot_share;"},
+    {"question": "트레이닝 잡 스팟 비중",
+     "sql": "SELECT training_spot_share FROM v_spot_share;"},
+    {"question": "계정별 트레이닝 비용",
+     "sql": f"SELECT account_id, SUM(cost) AS cost FROM read_parquet('{LLM_PATH_PREFIX}/agg_training_cost.parquet') "
+            "GROUP BY account_id ORDER BY cost DESC;"},
+    {"question": "노트북 인스턴스별 비용",
+     "sql": f"SELECT instance_type, cost FROM read_parquet('{LLM_PATH_PREFIX}/agg_notebook_hours.parquet') "
+            "ORDER BY cost DESC;"},
+    {"question": "태그 누락률이 높은 계정은?",
+     "sql": "SELECT account_id, tag_missing_rate FROM v_tag_missing_rate ORDER BY tag_missing_rate DESC;"},
+    {"question": "태그 없는 리소스 비용 합계",
+     "sql": "SELECT untagged_cost FROM v_untagged_cost;"},
+    {"question": "가장 비싼 리소스 10개",
+     "sql": f"SELECT lineitem_resourceid AS resource_id, SUM(lineitem_unblendedcost) AS cost "
+            f"FROM read_parquet('{LLM_PATH_PREFIX}/fact_sagemaker_costs.parquet') "
+            "GROUP BY lineitem_resourceid ORDER BY cost DESC LIMIT 10;"},
+    {"question": "리전/인스턴스 패밀리별 상세 비용 내역",
+     "sql": f"SELECT product_region, product_instancetypefamily, lineitem_usagetype, SUM(lineitem_unblendedcost) AS cost "
+            f"FROM read_parquet('{LLM_PATH_PREFIX}/fact_sagemaker_costs.parquet') "
+            "GROUP BY ALL ORDER BY cost DESC;"},
+    {"question": "최근 3개월 월별 비용 추이", "months": 3,
+     "sql": "SELECT billing_ym, SUM(unblended_cost) AS cost FROM cur_monthly GROUP BY billing_ym ORDER BY billing_ym;"},
+]
+
+
+# ─────────────────────────────────────────────────────────────
+# 합성 CUR 데이터
+# ─────────────────────────────────────────────────────────────
+# 사용 유형별 (usagetype, operation, instance_type, pricing_unit) — 20개 슬롯으로 비중 조절
+_USAGE_KINDS = (
+    [("APN2-Host:ml.m5.xlarge", "RunInstance", "ml.m5.xlarge", "Hrs")] * 4
+    + [("APN2-Host:ml.g5.2xlarge", "RunInstance", "ml.g5.2xlarge", "Hrs")] * 2
+    + [("APN2-Train:ml.p3.2xlarge", "CreateTrainingJob", "ml.p3.2xlarge", "Hrs")] * 3
+    + [("APN2-Spot-Train:ml.g4dn.xlarge", "CreateTrainingJob", "ml.g4dn.xlarge", "Hrs")] * 2
+    + [("APN2-Notebk:ml.t3.medium", "RunInstance", "ml.t3.medium", "Hrs")] * 2
+    + [("APN2-Studio:ml.t3.large", "RunInstance", "ml.t3.large", "Hrs")]
+    + [("APN2-Processing:ml.m5.large", "CreateProcessingJob", "ml.m5.large", "Hrs")]
+    + [("APN2-FeatureStore:WriteRequestUnits", "PutRecord", None, "Units")]
+    + [("APN2-DataTransfer-Out-Bytes", "RunInstance", None, "GB")]
+    + [("APN2-VolumeUsage.gp2", "RunInstance", None, "GB-Mo")] * 2
+    + [("APN2-Host:ml.c5.large", "RunInstance", "ml.c5.large", "Hrs")]
+)
+
+
+def _sql_list(values) -> str:
+    return "[" + ", ".join("NULL" if v is None else f"'{v}'" for v in values) + "]"
+
+
+def _fact_sql(billing_ym: str, rows: int) -> str:
+    """transform_all과 같은 파생 규칙(is_*, usage_hours)을 적용한 합성 fact SELECT"""
+    usage, operation, instance, unit = (_sql_list(col) for col in zip(*_USAGE_KINDS))
+    tags = ", ".join(
+        f"CASE WHEN (r * {7 + i}) % 10 < {8 - i // 2} THEN 'team-' || ((r // 97 + {i}) % 12) END AS usertag{i}"
+        for i in range(10)
+    )
+    return f"""
+        WITH base AS (
+            SELECT range AS r, (range % {len(_USAGE_KINDS)}) + 1 AS k FROM range({rows})
+        ), raw AS (
+            SELECT '{billing_ym}' AS billing_ym,
+                   '11112222' || lpad(((r // 7) % 6)::VARCHAR, 4, '0') AS lineitem_usageaccountid,
+                   'arn:aws:sagemaker:ap-northeast-2:111122220000:resource/res-' || (r % 5003) AS lineitem_resourceid,
+                   ((r % 37) + 1) * 0.25 AS lineitem_usageamount,
+                   round(((r * 7919) % 1000) * 0.0173 + k * 0.05, 6) AS lineitem_unblendedcost,
+                   round(((r * 7919) % 1000) * 0.0171 + k * 0.05, 6) AS lineitem_blendedcost,
+                   'USD' AS lineitem_currencycode,
+                   'AmazonSageMaker' AS lineitem_productcode,
+                   {usage}[k] AS lineitem_usagetype,
+                   {operation}[k] AS lineitem_operation,
+                   'Usage' AS lineitem_lineitemtype,
+                   'Amazon SageMaker' AS product_productname,
+                   {instance}[k] AS product_instancetype,
+                   split_part({instance}[k], '.', 2) AS product_instancetypefamily,
+                   (['ap-northeast-2', 'us-east-1', 'us-west-2'])[(r % 3) + 1] AS product_region,
+                   {unit}[k] AS pricing_unit,
+                   CASE WHEN {usage}[k] ILIKE '%Spot%' THEN 'Spot' ELSE 'OnDemand' END AS pricing_term,
+                   {tags}
+            FROM base
+        )
+        SELECT *,
+               (lineitem_usagetype ILIKE '%Host%' OR lineitem_usagetype ILIKE '%Endpoint%') AS is_endpoint,
+               (lineitem_usagetype ILIKE '%Notebook%' OR lineitem_usagetype ILIKE '%Notebk%') AS is_notebook,
+               (lineitem_usagetype ILIKE '%Train%' OR lineitem_operation ILIKE '%Train%') AS is_training,
+               lineitem_usagetype ILIKE '%Spot%' AS is_spot,
+               lineitem_usagetype ILIKE '%Studio%' AS is_studio,
+               lineitem_usagetype ILIKE '%FeatureStore%' AS is_featurestore,
+               lineitem_usagetype ILIKE '%Processing%' AS is_processing,
+               (lineitem_usagetype ILIKE '%Data-Bytes%' OR lineitem_usagetype ILIKE '%DataTransfer%') AS is_data_transfer,
+               (lineitem_usagetype ILIKE '%VolumeUsage%' OR lineitem_usagetype ILIKE '%Storage%') AS is_storage,
+               CASE WHEN pricing_unit ILIKE '%Hrs%' OR pricing_unit ILIKE '%Hour%'
+                    THEN lineitem_usageamount END AS usage_hours
+        FROM raw
+    """
+
+
+# transform_all의 집계 테이블과 같은 컬럼
+_AGGREGATES = {
+    "agg_endpoint_hours": "SELECT lineitem_resourceid AS resource_id, product_instancetype AS instance_type, "
+                          "SUM(usage_hours) AS hours, SUM(lineitem_unblendedcost) AS cost FROM fact WHERE is_endpoint GROUP BY ALL",
+    "agg_training_cost": "SELECT lineitem_usageaccountid AS account_id, product_instancetype AS instance_type, "
+                         "SUM(lineitem_unblendedcost) AS cost FROM fact WHERE is_training GROUP BY ALL",
+    "agg_notebook_hours": "SELECT product_instancetype AS instance_type, SUM(usage_hours) AS hours, "
+                          "SUM(lineitem_unblendedcost) AS cost FROM fact WHERE is_notebook GROUP BY ALL",
+    "agg_studio_hours": "SELECT product_instancetype AS instance_type, SUM(usage_hours) AS hours, "
+                        "SUM(lineitem_unblendedcost) AS cost FROM fact WHERE is_studio GROUP BY ALL",
+    "agg_featurestore_cost": "SELECT lineitem_usagetype AS usage_type, SUM(lineitem_unblendedcost) AS cost "
+                             "FROM fact WHERE is_featurestore GROUP BY ALL",
+    "agg_processing_cost": "SELECT product_instancetype AS instance_type, SUM(lineitem_unblendedcost) AS cost "
+                           "FROM fact WHERE is_processing GROUP BY ALL",
+    "agg_datatransfer_cost": "SELECT lineitem_usagetype AS usage_type, SUM(lineitem_unblendedcost) AS cost "
+                             "FROM fact WHERE is_data_transfer GROUP BY ALL",
+    "agg_storage_cost": "SELECT lineitem_usagetype AS usage_type, SUM(lineitem_unblendedcost) AS cost "
+                        "FROM fact WHERE is_storage GROUP BY ALL",
+    "agg_spot_ratio": "SELECT CASE WHEN is_spot THEN 'Spot' ELSE 'OnDemand' END AS pricing_type, "
+                      "SUM(lineitem_unblendedcost) AS cost FROM fact GROUP BY ALL",
+    "monthly_summary": "SELECT billing_ym, SUM(lineitem_unblendedcost) AS unblended_cost, "
+                       "SUM(lineitem_blendedcost) AS blended_cost FROM fact GROUP BY billing_ym",
+}
+
+
+def _month_names(count: int, last: str = "202508") -> List[str]:
+    year, month = int(last[:4]), int(last[4:])
+    names = []
+    for _ in range(count):
+        names.append(f"{year:04d}{month:02d}")
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return sorted(names)
+
+
+def build_synthetic_cur(data_root: str, rows: int, months: int = 3) -> List[str]:
+    """data_root/YYYYMM에 합성 processed 데이터를 생성 (같은 행 수의 manifest가 있으면 재사용)
+
+    Returns:
+        생성된 월 목록 (오름차순)
+    """
+    names = _month_names(months)
+    for ym in names:
+        base = os.path.join(data_root, ym)
+        manifest_path = os.path.join(base, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                if json.load(f).get("row_counts", {}).get("fact_sagemaker_costs") == rows:
+                    continue
+        os.makedirs(base, exist_ok=True)
+        fact_path = os.path.join(base, "fact_sagemaker_costs.parquet")
+        con = duckdb.connect()
+        try:
+            con.execute(f"COPY ({_fact_sql(ym, rows)}) TO '{fact_path}' (FORMAT PARQUET)")
+            con.execute(f"CREATE VIEW fact AS SELECT * FROM read_parquet('{fact_path}')")
+            row_counts = {"fact_sagemaker_costs": rows}
+            for name, body in _AGGREGATES.items():
+                con.execute(f"COPY ({body}) TO '{os.path.join(base, name)}.parquet' (FORMAT PARQUET)")
+                row_counts[name] = con.execute(f"SELECT count(*) FROM ({body})").fetchone()[0]
+        finally:
+            con.close()
+        materialize_semantic_views(base)
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"billing_ym": ym, "schema_version": "1.0", "row_counts": row_counts,
+                       "source": "bench_sql_agent"}, f, indent=2)
+    return names
+
+
+# ─────────────────────────────────────────────────────────────
+# LLM 응답 녹화/재생
+# ─────────────────────────────────────────────────────────────
+CHAINS = {
+    "nl2sql": (nl2sql, "_NL2SQL_CHAIN", nl2sql.get_nl2sql_chain),
+    "repair": (repair, "_REPAIR_CHAIN", repair.get_repair_chain),
+    "summary": (summary, "_SUMMARY_CHAIN", summary._get_summary_chain),
+}
+
+
+def _portable(output: Any, base_dirs: List[str]) -> Any:
+    # 녹화한 SQL의 실제 데이터 경로는 프롬프트 기준 경로로 되돌려 다른 데이터 폴더에서도 재생
+    if not isinstance(output, str):
+        return output
+    for base_dir in base_dirs:
+        output = output.replace(base_dir.rstrip("/"), LLM_PATH_PREFIX)
+    return output
+
+
+def install_recorder(cassette: Dict[str, Dict[str, Any]], base_dirs: List[str]) -> None:
+    """실제 체인을 감싸 질문별 응답과 지연을 cassette에 기록"""
+    for kind, (module, attr, getter) in CHAINS.items():
+        real = getter()
+        entries = cassette.setdefault(kind, {})
+
+        def _record(inputs, real=real, entries=entries):
+            start = time.perf_counter()
+            output = real.invoke(inputs)
+            entries[inputs["question"]] = {"output": _portable(output, base_dirs),
+                                           "latency": round(time.perf_counter() - start, 4)}
+            return output
+
+        async def _arecord(inputs, real=real, entries=entries):
+            start = time.perf_counter()
+            output = await real.ainvoke(inputs)
+            entries[inputs["question"]] = {"output": _portable(output, base_dirs),
+                                           "latency": round(time.perf_counter() - start, 4)}
+            return output
+
+        setattr(module, attr, RunnableLambda(_record, afunc=_arecord))
+
+
+def install_replayer(cassette: Dict[str, Dict[str, Any]], latency_scale: float) -> Dict[str, int]:
+    """체인을 cassette 응답으로 교체 (없는 질문은 KeyError → 해당 질문 오류 처리)
+
+    Returns:
+        체인별 재생 횟수/누락 횟수 (실행 중 갱신)
+    """
+    counts = {"calls": 0, "misses": 0}
+    for kind, (module, attr, _) in CHAINS.items():
+        entries = cassette.get(kind, {})
+
+        def _lookup(inputs, kind=kind, entries=entries):
+            counts["calls"] += 1
+            entry = entries.get(inputs["question"])
+            if entry is None:
+                counts["misses"] += 1
+                raise KeyError(f"카세트에 없는 {kind} 응답: {inputs['question']}")
+            return entry
+
+        def _replay(inputs, lookup=_lookup):
+            entry = lookup(inputs)
+            time.sleep(entry.get("latency", 0.0) * latency_scale)
+            return entry["output"]
+
+        async def _areplay(inputs, lookup=_lookup):
+            entry = lookup(inputs)
+            await asyncio.sleep(entry.get("latency", 0.0) * latency_scale)
+            return entry["output"]
+
+        setattr(module, attr, RunnableLambda(_replay, afunc=_areplay))
+    return counts
+
+
+def oracle_cassette(llm_delay: float) -> Dict[str, Dict[str, Any]]:
+    """기준 SQL을 NL2SQL 응답으로, 고정 문장을 요약 응답으로 쓰는 카세트"""
+    return {
+        "nl2sql": {c["question"]: {"output": c["sql"], "latency": llm_delay} for c in BENCH_CASES},
+        "repair": {c["question"]: {"output": c["sql"], "latency": llm_delay} for c in BENCH_CASES},
+        "summary": {c["question"]: {"output": f"{c['question']} 요약", "latency": llm_delay} for c in BENCH_CASES},
+    }
+
+
+# ─────────────────────────────────────────────────────────────
+# 실행/측정
+# ─────────────────────────────────────────────────────────────
+def _rss_mb() -> float:
+    # ru_maxrss: Linux는 KB, macOS는 bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _case_state(case: Dict[str, Any], months: List[str]) -> Dict[str, Any]:
+    scope = months[-case["months"]:] if case.get("months") else None
+    return graph._build_state(case["question"], months[-1], scope)
+
+
+def expected_results(cases: List[Dict[str, Any]], months: List[str]) -> List[Dict[str, Any]]:
+    """기준 SQL을 합성 데이터에 실행한 결과 (행 수 + 앞 5행)"""
+    expected = []
+    for case in cases:
+        state = _case_state(case, months)
+        sql = nl2sql._sanitize_paths(case["sql"], state["base_dir"])
+        with executor.execute_safe_sql(sql, base_dir=state["base_dir"], month_dirs=state.get("month_dirs")) as r:
+            expected.append({"row_count": r.row_count(), "rows": r.sample_rows(5)})
+    return expected
+
+
+def _numbers(row: Dict[str, Any]) -> List[float]:
+    return [float(v) for v in row.values() if isinstance(v, numbers.Number) and not isinstance(v, bool)]
+
+
+def is_correct(result: Dict[str, Any], expected: Dict[str, Any]) -> bool:
+    """행 수가 같고, 기대 결과 첫 행의 숫자 값이 모두 실제 첫 행에 있으면 정답 (컬럼 별칭/추가 컬럼 허용)"""
+    if result.get("error") or result.get("row_count") != expected["row_count"]:
+        return False
+    if not expected["rows"]:
+        return True
+    actual = _numbers((result.get("sample_rows") or [{}])[0])
+    return all(any(abs(a - e) <= 1e-6 * max(1.0, abs(e)) for a in actual)
+               for e in _numbers(expected["rows"][0]))
+
+
+def run_case(case: Dict[str, Any], months: List[str]) -> Dict[str, Any]:
+    """질문 하나를 그래프로 실행하며 노드 완료 시점으로 단계별 지연 측정"""
+    timings = {stage: 0.0 for stage in STAGES}
+    start = time.perf_counter()
+    final: Dict[str, Any] = {}
+    try:
+        state = _case_state(case, months)
+        mark = time.perf_counter()
+        timings["schema"] = mark - start
+        # 그래프는 순차 실행이므로 업데이트 간격 = 해당 노드 실행 시간 (repair ↔ exec 반복은 합산)
+        for update in graph.SQL_GRAPH.stream(state, stream_mode="updates"):
+            now = time.perf_counter()
+            for node, value in update.items():
+                timings[node if node in timings else "summary"] += now - mark
+                final = value
+            mark = now
+        result = final["result"]
+    except Exception as e:
+        result = summary.summarize_error(case["question"], e)
+    timings["total"] = time.perf_counter() - start
+    return {"question": case["question"], "result": result, "timings": timings}
+
+
+def _pct(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else 0.0
+
+
+def report(runs: List[Dict[str, Any]], accuracy: float, memory: Dict[str, float]) -> Dict[str, Any]:
+    stages = {}
+    print(f"\n{'단계':<10}{'p50(ms)':>10}{'p95(ms)':>10}{'평균(ms)':>10}")
+    for stage in STAGES:
+        values = [r["timings"][stage] * 1000 for r in runs]
+        stages[stage] = {"p50_ms": round(_pct(values, 0.5), 2), "p95_ms": round(_pct(values, 0.95), 2),
+                         "mean_ms": round(statistics.mean(values), 2)}
+        print(f"{stage:<10}{stages[stage]['p50_ms']:>10.1f}{stages[stage]['p95_ms']:>10.1f}{stages[stage]['mean_ms']:>10.1f}")
+    print(f"\n🎯 정확도 {accuracy:.0%}  💾 RSS 피크 {memory['rss_peak_mb']:.0f}MB "
+          f"(실행 중 +{memory['rss_growth_mb']:.0f}MB, Arrow 잔여 {memory['arrow_residual_mb']:.1f}MB)")
+    return {"stages": stages, "accuracy": accuracy, "memory": memory}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQL Agent 오프라인 벤치마크 (합성 CUR + LLM 녹화/재생)")
+    parser.add_argument("--rows", type=int, default=100_000, help="월별 합성 fact 행 수 (10k ~ 50M)")
+    parser.add_argument("--months", type=int, default=3, help="합성 데이터 월 수")
+    parser.add_argument("--data-dir", default=None, help="합성 데이터 폴더 (재사용, 기본값: 임시 폴더)")
+    parser.add_argument("--repeat", type=int, default=3, help="질문 세트 반복 횟수")
+    parser.add_argument("--cassette", default=None, help="재생할 LLM 응답 카세트 (없으면 기준 SQL 오라클)")
+    parser.add_argument("--record", default=None, help="실제 LLM 응답을 녹화할 카세트 경로")
+    parser.add_argument("--latency-scale", type=float, default=0.0, help="카세트 지연 재현 배율 (0이면 대기 없음)")
+    parser.add_argument("--llm-delay", type=float, default=0.0, help="오라클 카세트의 LLM 지연(초)")
+    parser.add_argument("--result-cache", action="store_true", help="결과 캐시 사용 (기본: 매번 실행)")
+    parser.add_argument("--json-out", default=None, help="결과를 JSON으로 저장 (변경 전후 비교용)")
+    args = parser.parse_args()
+
+    data_root = args.data_dir or tempfile.mkdtemp(prefix="bench_sql_agent_")
+    started = time.perf_counter()
+    months = build_synthetic_cur(data_root, args.rows, args.months)
+    print(f"📦 합성 CUR {len(months)}개월 × {args.rows:,}행 ({time.perf_counter() - started:.1f}s): {data_root}")
+
+    schema_provider.DATA_ROOT = data_root
+    graph.DATA_ROOT = data_root
+    if not args.result_cache:
+        executor.CACHE_ENABLED = False
+    cases = [c for c in BENCH_CASES if c.get("months", 1) <= len(months)]
+    expected = expected_results(cases, months)
+
+    cassette: Dict[str, Dict[str, Any]] = {}
+    if args.record:
+        install_recorder(cassette, [os.path.join(data_root, ym) for ym in months])
+        mode = f"녹화 → {args.record}"
+    elif args.cassette:
+        with open(args.cassette, encoding="utf-8") as f:
+            replay = install_replayer(json.load(f), args.latency_scale)
+        mode = f"재생 ← {args.cassette}"
+    else:
+        replay = install_replayer(oracle_cassette(args.llm_delay), 1.0)
+        mode = "오라클 카세트"
+    print(f"🎬 LLM: {mode}, 질문 {len(cases)}개 × {args.repeat}회")
+
+    gc.collect()
+    rss_before, arrow_before = _rss_mb(), pa.total_allocated_bytes()
+    runs, correct = [], 0
+    for _ in range(args.repeat):
+        for case, exp in zip(cases, expected):
+            run = run_case(case, months)
+            run["correct"] = is_correct(run["result"], exp)
+            correct += run["correct"]
+            runs.append(run)
+    gc.collect()
+    memory = {"rss_peak_mb": round(_rss_mb(), 1), "rss_growth_mb": round(_rss_mb() - rss_before, 1),
+              "arrow_residual_mb": round((pa.total_allocated_bytes() - arrow_before) / 1024 / 1024, 2)}
+
+    wrong = sorted({r["question"] for r in runs if not r["correct"]})
+    if wrong:
+        print("❌ 오답/오류: " + ", ".join(wrong))
+    if not args.record and replay["misses"]:
+        print(f"⚠️ 카세트 누락 {replay['misses']}건")
+    summary_out = report(runs, correct / len(runs), memory)
+
+    if args.record:
+        os.makedirs(os.path.dirname(os.path.abspath(args.record)), exist_ok=True)
+        with open(args.record, "w", encoding="utf-8") as f:
+            json.dump(cassette, f, ensure_ascii=False, indent=2)
+    if args.json_out:
+        summary_out.update(rows=args.rows, months=len(months), repeat=args.repeat, mode=mode,
+                           questions=[{"question": r["question"], "correct": r["correct"],
+                                       "timings_ms": {k: round(v * 1000, 2) for k, v in r["timings"].items()}}
+                                      for r in runs])
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(summary_out, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
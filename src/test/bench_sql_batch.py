@@ -0,0 +1,119 @@
+"""
+SQL Agent 배치 질의 처리량 벤치마크
+
+같은 질문 세트를 ask로 하나씩 처리할 때와 ask_batch로 처리할 때의 전체 시간/처리량을 비교한다.
+- 오프라인(기본): 임시 폴더의 합성 데이터 + LLM 지연을 흉내내는 가짜 체인 (--llm-delay 초)
+- 온라인(--online, OPENAI_API_KEY + data/processed 필요): 실제 LLM과 --month 데이터
+
+사용법:
+    python -m src.test.bench_sql_batch
+    python -m src.test.bench_sql_batch --repeat 2 --llm-delay 0.8
+    python -m src.test.bench_sql_batch --online --month latest
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import duckdb
+from langchain_core.runnables import RunnableLambda
+
+from src.agent.sql_agent import executor, graph, nl2sql, schema_provider, summary
+from src.agent.sql_agent.batch import ask_batch
+from src.test.bench_nl2sql_examples import BENCH_QUESTIONS
+
+
+def _setup_offline(llm_delay: float) -> dict:
+    """합성 데이터 폴더를 만들고 NL2SQL/요약 체인을 지연만 있는 가짜 체인으로 교체"""
+    root = tempfile.mkdtemp(prefix="bench_sql_batch_")
+    base = os.path.join(root, "202508")
+    os.makedirs(base)
+    path = os.path.join(base, "agg_endpoint_hours.parquet")
+    duckdb.execute(f"""
+        COPY (SELECT 'ep-' || range AS resource_id, 'ml.m5.large' AS instance_type,
+                     range % 24 AS hours, (range % 97) * 0.31 AS cost
+              FROM range(50000)) TO '{path}'
+    """)
+    schema_provider.DATA_ROOT = root
+    executor.CACHE_ENABLED = False
+
+    counts = {"nl2sql": 0, "summary": 0, "batch_summary": 0}
+    # 절반은 템플릿 답변(단일 값), 절반은 LLM 요약이 필요한 Top-N 상세 결과
+    sqls = [
+        f"SELECT sum(cost) AS total_cost FROM read_parquet('{path}');",
+        f"SELECT resource_id, instance_type, hours, cost FROM read_parquet('{path}') ORDER BY cost DESC LIMIT 20;",
+    ]
+
+    def _sync(name, output):
+        def _fn(inputs):
+            counts[name] += 1
+            time.sleep(llm_delay)
+            return output(inputs)
+        return _fn
+
+    def _async(name, output):
+        async def _fn(inputs):
+            counts[name] += 1
+            await asyncio.sleep(llm_delay)
+            return output(inputs)
+        return _fn
+
+    def _sql(inputs):
+        return sqls[hash(inputs["question"]) % 2]
+
+    def _batch_answers(inputs):
+        return [{"id": item["id"], "answer": "요약"} for item in json.loads(inputs["items"])]
+
+    nl2sql._NL2SQL_CHAIN = RunnableLambda(_sync("nl2sql", _sql), afunc=_async("nl2sql", _sql))
+    summary._SUMMARY_CHAIN = RunnableLambda(_sync("summary", lambda _: "요약"), afunc=_async("summary", lambda _: "요약"))
+    summary._BATCH_SUMMARY_CHAIN = RunnableLambda(_sync("batch_summary", _batch_answers),
+                                                  afunc=_async("batch_summary", _batch_answers))
+    return counts
+
+
+def _measure(label: str, fn, n: int, counts: dict = None):
+    if counts is not None:
+        for k in counts:
+            counts[k] = 0
+    start = time.perf_counter()
+    results = fn()
+    elapsed = time.perf_counter() - start
+    errors = sum(1 for r in results if r.get("error"))
+    calls = f", LLM 호출 {counts}" if counts is not None else ""
+    print(f"  {label:<28} {elapsed:6.2f}s  {n / elapsed:6.2f} q/s  오류 {errors}{calls}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQL Agent 배치 질의 처리량 벤치마크")
+    parser.add_argument("--online", action="store_true", help="실제 LLM/데이터로 측정")
+    parser.add_argument("--month", default="latest", help="온라인 측정 월 (기본값: latest)")
+    parser.add_argument("--repeat", type=int, default=2, help="질문 세트 반복 횟수 (중복 질문 포함)")
+    parser.add_argument("--llm-delay", type=float, default=0.5, help="오프라인 가짜 LLM 지연(초)")
+    parser.add_argument("--concurrency", type=int, default=8, help="ask_batch 동시 실행 수")
+    args = parser.parse_args()
+
+    counts = None
+    month = args.month
+    if not args.online:
+        counts = _setup_offline(args.llm_delay)
+        month = "202508"
+
+    questions = [q for q, _ in BENCH_QUESTIONS] * args.repeat
+    n = len(questions)
+    print(f"📋 질문 {n}개 (고유 {len(set(questions))}개), month={month}")
+
+    sequential = _measure("ask (순차)", lambda: [graph.ask(q, month) for q in questions], n, counts)
+    batched = _measure("ask_batch", lambda: ask_batch(questions, month, max_concurrency=args.concurrency),
+                       n, counts)
+    summarized = _measure("ask_batch + 요약 묶음",
+                          lambda: ask_batch(questions, month, max_concurrency=args.concurrency,
+                                            batch_summaries=True), n, counts)
+    print(f"\n🚀 처리량 향상: ask_batch {sequential / batched:.1f}x, 요약 묶음 {sequential / summarized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
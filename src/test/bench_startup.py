@@ -0,0 +1,97 @@
+"""
+시작(import) 시간 벤치마크: python -X importtime 기반
+
+새 인터프리터에서 모듈을 import하고 -X importtime 출력(stderr)을 파싱해
+전체 import 시간과 누적 시간이 큰 모듈을 보여준다. 무거운 의존성이 import 시점에
+다시 끌려 들어오는 회귀는 test_startup.py가 LAZY_MODULES로 막는다.
+
+사용법:
+    python -m src.test.bench_startup
+    python -m src.test.bench_startup --module src.agent.router.graph --module src.agent.sql_agent --top 30
+    python -m src.test.bench_startup --warmup --json-out startup.json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+# 요청 경로에서 첫 사용 시점에만 로드해야 하는 무거운 모듈
+LAZY_MODULES = ("langchain_openai", "openai", "chromadb", "langchain_community", "langchain_tavily")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """-X importtime 출력 → [{"module", "self_us", "cumulative_us", "depth"}] (출력 순서)"""
+    rows = []
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append({"module": m.group(4), "self_us": int(m.group(1)),
+                         "cumulative_us": int(m.group(2)), "depth": (len(m.group(3)) - 1) // 2})
+    return rows
+
+
+def measure_import(module: str, warmup: bool = False) -> Dict[str, Any]:
+    """새 인터프리터에서 module을 import한 시간/모듈 목록 (warmup=True면 warm_up 소요 시간도)"""
+    code = f"import {module}"
+    if warmup:
+        code += "; import json; from src.agent.warmup import warm_up; print(json.dumps(warm_up()))"
+    env = {**os.environ, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "dummy")}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=PROJECT_ROOT, env=env,
+                          capture_output=True, text=True, check=False)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{module} import 실패:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    # warm-up 이전 import만 (warm-up 중 import된 모듈은 top-level 모듈 뒤에 출력됨)
+    end = next(i for i, r in enumerate(rows) if r["module"] == module and r["depth"] == 0) + 1
+    imported = rows[:end]
+    result = {
+        "module": module,
+        "total_sec": round(sum(r["self_us"] for r in imported) / 1e6, 4),
+        "modules": [r["module"] for r in imported],
+        "top": sorted(imported, key=lambda r: r["cumulative_us"], reverse=True),
+    }
+    if warmup:
+        result["warmup"] = json.loads(proc.stdout.strip().splitlines()[-1])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모듈 import 시간 벤치마크 (-X importtime)")
+    parser.add_argument("--module", action="append", help="측정할 모듈 (여러 번 지정 가능)")
+    parser.add_argument("--top", type=int, default=15, help="누적 시간 상위 모듈 수")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (최소값 사용)")
+    parser.add_argument("--warmup", action="store_true", help="import 후 warm_up 소요 시간도 측정")
+    parser.add_argument("--json-out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    report = []
+    for module in args.module or ["src.agent.router.graph", "src.agent.sql_agent", "src.agent.docs_agent.graph"]:
+        best = min((measure_import(module, args.warmup) for _ in range(args.repeat)),
+                   key=lambda r: r["total_sec"])
+        lazy = [m for m in LAZY_MODULES if m in best["modules"]]
+        print(f"\n{module}: {best['total_sec']:.3f}s, 모듈 {len(best['modules'])}개"
+              f"{', 지연 대상 import됨: ' + ', '.join(lazy) if lazy else ''}")
+        for row in best["top"][:args.top]:
+            print(f"  {row['cumulative_us'] / 1000:9.1f}ms  {'  ' * row['depth']}{row['module']}")
+        if args.warmup:
+            print(f"  warm-up: {best['warmup']['total_sec']:.3f}s "
+                  + ", ".join(f"{k}={v['sec']:.3f}s" for k, v in best["warmup"]["steps"].items()))
+        report.append({k: v for k, v in best.items() if k != "top"} | {"top": best["top"][:args.top],
+                                                                         "lazy_imported": lazy})
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
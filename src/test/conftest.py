@@ -0,0 +1,47 @@
+"""
+테스트 공용 fixture: 테스트 전용 SQL 결과 캐시, fact parquet 생성, 부수 경로를 끈 라우터
+"""
+
+import json
+
+import duckdb
+import pytest
+
+from src.agent.sql_agent import executor
+from src.agent.sql_agent.result_cache import ResultCache
+
+
+@pytest.fixture
+def result_cache(monkeypatch):
+    """전역 결과 캐시 대신 테스트 전용 메모리 캐시 사용 (모듈에서 pytestmark usefixtures로 적용)"""
+    cache = ResultCache(cache_dir=None)
+    monkeypatch.setattr(executor, "get_result_cache", lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def make_fact():
+    """테스트용 fact parquet + manifest를 만드는 함수 → (base_dir, parquet 경로)"""
+    def _make_fact(base_dir, rows: int = 1000):
+        base_dir.mkdir(parents=True, exist_ok=True)
+        path = base_dir / "fact_sagemaker_costs.parquet"
+        duckdb.execute(
+            f"COPY (SELECT range AS id, 'res-' || range AS resource_id, "
+            f"range * 0.25 AS cost, (range % 7)::INTEGER AS hours FROM range({rows})) TO '{path}'"
+        )
+        (base_dir / "manifest.json").write_text(json.dumps({"billing_ym": "202508"}))
+        return str(base_dir), str(path)
+
+    return _make_fact
+
+
+@pytest.fixture
+def isolated_router(monkeypatch):
+    """응답 캐시/프리페치/추측 실행을 끈 라우터 (테스트는 분류기/Agent만 가짜로 교체)"""
+    # 라우터 모듈은 LLM 클라이언트를 함께 불러오므로 필요한 테스트에서만 import
+    from src.agent.router import graph as router_graph
+
+    monkeypatch.setattr(router_graph, "get_response_cache", lambda: None)
+    monkeypatch.setattr(router_graph, "PREFETCHERS", {})
+    monkeypatch.setattr(router_graph, "SPECULATIVE_ENABLED", False)
+    return router_graph
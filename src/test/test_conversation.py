@@ -0,0 +1,184 @@
+"""
+대화 상태 테스트: 후속 질문 판별, 단일 월 해석, 슬롯/요약 갱신과 토큰 예산, 라우터의 후속 질문 처리
+"""
+
+import pytest
+
+from src.agent import conversation, sql_agent
+from src.agent.conversation import Conversation, ConversationStore, extract_services, is_followup
+from src.agent.router import graph as router_graph
+from src.agent.router import intent_router
+from src.agent.sql_agent import schema_provider
+from src.agent.sql_agent.month_range import parse_month
+from src.agent.streaming import final_event
+from src.agent.usage import estimate_tokens
+from src.core.semantic_layer import SERVICE_TYPES
+
+MONTHS = ["202506", "202507", "202508"]
+
+
+@pytest.fixture(autouse=True)
+def _months(monkeypatch):
+    monkeypatch.setattr(schema_provider, "list_processed_months", lambda: MONTHS)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = ConversationStore()
+    monkeypatch.setattr(conversation, "_CONVERSATION_STORE", store)
+    monkeypatch.setattr(conversation, "CONVERSATION_ENABLED", True)
+    return store
+
+
+def _sql_result(tmp_path, ym="202508", answer="이번달 Endpoint 비용은 $120.50입니다. 상세는 표를 참고하세요."):
+    return {"answer": answer, "intent": "sql", "error": False, "base_dir": str(tmp_path / ym)}
+
+
+def test_followup_detection():
+    assert is_followup("그럼 지난달은?")
+    assert is_followup("Notebook도?")
+    assert is_followup("그 계정의 Training 비용 알려줘")
+    assert not is_followup("이번달 SageMaker Endpoint 비용 알려줘")
+    assert not is_followup("안녕하세요")
+
+
+def test_services_match_semantic_view_values():
+    """서비스 슬롯 값은 v_cost_by_service의 service 값과 같아야 SQL 조건으로 그대로 쓸 수 있음"""
+    assert set(conversation._SERVICES.values()) <= set(SERVICE_TYPES)
+    assert extract_services("Feature Store랑 스토리지 비용") == ["FeatureStore", "Storage"]
+    assert extract_services("Canvas 비용") == []
+
+
+def test_parse_single_month():
+    """상대 표현은 최신 월 기준, 연도 없는 월은 가장 최근 해당 월"""
+    assert parse_month("이번달 비용", MONTHS) == ["202508"]
+    assert parse_month("그럼 지난달은?", MONTHS) == ["202507"]
+    assert parse_month("지지난 달 비용", MONTHS) == ["202506"]
+    assert parse_month("2025년 7월 비용", MONTHS) == ["202507"]
+    assert parse_month("6월은?", MONTHS) == ["202506"]
+    assert parse_month("2024년 1월", MONTHS) is None
+    assert parse_month("Notebook 비용", MONTHS) is None
+
+
+def test_slots_and_context(tmp_path):
+    """독립 질문은 슬롯을 새로 채우고, 후속 질문은 기간이 없으면 슬롯의 기간을 사용"""
+    conv = Conversation()
+    assert conv.context_for("그럼 지난달은?") is None  # 이전 대화가 없으면 독립 질문
+
+    conv.update("이번달 SageMaker Endpoint 비용 (계정 123456789012)", _sql_result(tmp_path))
+    assert conv.slots == {"months": ["202508"], "intent": "sql", "service": ["Endpoint"],
+                          "account": "123456789012"}
+    assert conv.context_for("이번달 Notebook 비용 알려줘") is None
+
+    ctx = conv.context_for("그럼 지난달은?")
+    assert ctx["months"] == ["202507"]
+    assert ctx["intent"] == "sql"
+    assert "기간 2025-08 · 서비스 Endpoint · 계정 123456789012" in ctx["text"]
+    assert "A: 이번달 Endpoint 비용은 $120.50입니다." in ctx["text"]
+    assert conv.context_for("Notebook도?")["months"] == ["202508"]
+
+    conv.update("Notebook도?", _sql_result(tmp_path), followup=True)
+    assert conv.slots["service"] == ["Notebook"]
+    assert conv.slots["account"] == "123456789012"  # 후속 질문은 덮어쓰기만
+    conv.update("Studio 설정 방법", {"answer": "Studio는 ...", "intent": "docs"})
+    assert conv.slots == {"months": ["202508"], "intent": "docs", "service": ["Studio"]}
+
+
+def test_render_fits_token_budget(tmp_path):
+    """요약이 예산을 넘으면 오래된 턴부터 빠지고 최근 턴은 남음"""
+    conv = Conversation(token_budget=120, max_turns=10)
+    for i in range(8):
+        conv.update(f"{i}번째 질문: 이번달 Endpoint 비용을 서비스별로 자세히 알려줘",
+                    _sql_result(tmp_path, answer=f"{i}번째 답변입니다. " + "세부 내용 " * 50))
+
+    text = conv.render()
+    assert estimate_tokens(text) <= 120
+    assert "7번째 질문" in text and "0번째 질문" not in text
+    assert "세부 내용 세부 내용" not in text  # 답변은 첫 문장만
+
+
+def test_store_expires_idle_sessions():
+    store = ConversationStore(max_sessions=2, ttl_sec=60)
+    a = store.get("a")
+    assert store.get("a") is a
+    a.updated_at -= 120
+    assert store.get("a") is not a
+    store.get("b"), store.get("c")
+    assert "a" not in store._sessions
+
+
+def test_context_goes_right_before_question():
+    """맥락은 지침 뒤, 질문 바로 앞 → 맥락이 달라도 프롬프트 앞부분(prefix)은 동일"""
+    plain = intent_router._prompt.format_messages(question="Q", conversation="")[0].content
+    with_context = intent_router._prompt.format_messages(question="Q", conversation="[대화 맥락]\n...\n\n")[0].content
+    assert with_context.startswith(plain[:plain.rindex("질문: Q")])
+    assert with_context.endswith("[대화 맥락]\n...\n\n질문: Q")
+
+
+def test_followup_classification_skips_fast_path_and_cache(monkeypatch):
+    calls = []
+    monkeypatch.setattr(intent_router, "_classify_with_llm",
+                        lambda q, fallback=None, context="": calls.append(context) or
+                        {"intent": "sql", "confidence": 0.9, "reason": "맥락", "source": "llm"})
+    monkeypatch.setattr(intent_router, "get_intent_cache", lambda: pytest.fail("캐시 조회"))
+
+    assert intent_router.classify_intent("그럼 지난달은?", context="[대화 맥락]\n")["intent"] == "sql"
+    assert calls == ["[대화 맥락]\n"]
+
+
+@pytest.fixture
+def router(monkeypatch, tmp_path, isolated_router):
+    """분류/응답 캐시 조회/SQL Agent 호출 인자를 기록하는 라우터"""
+    calls = {"classify": [], "cache": [], "sql": []}
+
+    def _classify(q, context=None):
+        calls["classify"].append(context)
+        return {"intent": "sql", "confidence": 1.0, "reason": "test", "source": "llm"}
+
+    def _lookup(q, intent):
+        calls["cache"].append(q)
+        return None, "off", None
+
+    def _sql(q, prefetch=None, conversation=None, months=None):
+        calls["sql"].append({"conversation": conversation, "months": months})
+        return _sql_result(tmp_path, ym=(months or ["202508"])[-1])
+
+    monkeypatch.setattr(router_graph, "classify_intent", _classify)
+    monkeypatch.setattr(router_graph, "_lookup_response", _lookup)
+    monkeypatch.setattr(sql_agent, "ask", _sql)
+    return calls
+
+
+def test_router_threads_context_into_followup(store, router):
+    """후속 질문은 맥락과 함께 분류/NL2SQL, 기간은 질문의 "지난달", 응답 캐시는 건너뜀"""
+    router_graph.ask("이번달 SageMaker Endpoint 비용", session_id="s1")
+    router_graph.ask("그럼 지난달은?", session_id="s1")
+
+    assert router["classify"][0] is None
+    assert "서비스 Endpoint" in router["classify"][1]
+    assert router["cache"] == ["이번달 SageMaker Endpoint 비용"]
+    assert router["sql"][1] == {"conversation": router["classify"][1], "months": ["202507"]}
+    assert store.get("s1").slots["months"] == ["202507"]
+    # 다른 세션에는 맥락이 없음
+    assert store.get("s2").context_for("그럼 지난달은?") is None
+
+
+def test_router_stream_threads_context(store, router, monkeypatch):
+    seen = []
+    monkeypatch.setattr(router_graph, "STREAMERS", {**router_graph.STREAMERS, "sql": lambda state: (
+        seen.append(router_graph._sql_context(state)) or
+        iter([final_event(router_graph.dispatch_sql_node(state)["final_result"])]))})
+
+    list(router_graph.ask_stream("이번달 Endpoint 비용", session_id="s1"))
+    list(router_graph.ask_stream("Notebook도?", session_id="s1"))
+
+    assert seen[0] == {}
+    assert seen[1]["months"] == ["202508"]
+    assert store.get("s1").slots["service"] == ["Notebook"]
+
+
+def test_router_without_session_is_stateless(store, router):
+    router_graph.ask("이번달 비용")
+    router_graph.ask("그럼 지난달은?")
+    assert router["classify"] == [None, None]
+    assert router["sql"][1] == {"conversation": None, "months": None}
@@ -0,0 +1,102 @@
+"""
+의도 분류 캐시 테스트: 질문 정규화, TTL, 오류 미캐시, 프로세스 간 공유, 적중률
+"""
+
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.agent.router import intent_router
+from src.agent.router.intent_cache import IntentCache, normalize_question
+
+LLM_RESULT = {"intent": "docs", "confidence": 0.9, "reason": "llm", "source": "llm"}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = IntentCache(db_path=None)
+    monkeypatch.setattr(intent_router, "get_intent_cache", lambda: cache)
+    # 로컬 분류기를 건너뛰어 항상 LLM 경로로
+    monkeypatch.setattr(intent_router, "FAST_INTENT_THRESHOLD", 1.01)
+    return cache
+
+
+def _fake_llm(monkeypatch, fail=False):
+    calls = []
+
+    def _respond(prompt_value):
+        calls.append(prompt_value.to_string())
+        if fail:
+            raise RuntimeError("rate limited")
+        return '{"intent": "docs", "confidence": 0.9, "reason": "llm"}'
+
+    monkeypatch.setattr(intent_router, "_llm", RunnableLambda(_respond))
+    return calls
+
+
+def test_normalize_question():
+    """공백/문장부호/전각 문자 차이는 같은 키"""
+    assert normalize_question("  이번달   비용?? ") == normalize_question("이번달 비용")
+    assert normalize_question("ＳａｇｅＭａｋｅｒ 비용!") == "sagemaker 비용"
+    assert normalize_question("이번달 비용") != normalize_question("지난달 비용")
+
+
+def test_llm_result_is_cached_across_variants(monkeypatch, cache):
+    """LLM 결과는 정규화된 키로 캐시되어 표기만 다른 질문은 LLM을 다시 부르지 않음"""
+    calls = _fake_llm(monkeypatch)
+
+    first = intent_router.classify_intent("Studio 설정 방법")
+    second = intent_router.classify_intent("studio   설정 방법?")
+
+    assert len(calls) == 1
+    assert first == second
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["writes"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_errors_are_not_cached(monkeypatch, cache):
+    """LLM 실패로 만든 결과는 저장하지 않고 다음 호출에서 다시 시도"""
+    calls = _fake_llm(monkeypatch, fail=True)
+
+    result = intent_router.classify_intent("Studio 설정 방법")
+    intent_router.classify_intent("Studio 설정 방법")
+
+    assert result["source"] in ("fallback", "default")
+    assert len(calls) == 2
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["skipped"] == 2
+
+
+def test_ttl_expiry(monkeypatch):
+    """TTL이 지난 항목은 조회 시 삭제되고 miss로 집계"""
+    cache = IntentCache(db_path=None, ttl_sec=10)
+    cache.put("비용", LLM_RESULT)
+    assert cache.get("비용") == LLM_RESULT
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("비용") is None
+    assert cache.stats()["expired"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_shared_between_instances(tmp_path):
+    """같은 SQLite 파일을 쓰는 다른 인스턴스(워커/재시작)도 결과를 공유"""
+    path = str(tmp_path / "intent.sqlite3")
+    IntentCache(db_path=path).put("Studio 설정 방법", LLM_RESULT)
+
+    assert IntentCache(db_path=path).get("studio 설정 방법") == LLM_RESULT
+
+
+def test_max_entries_keeps_newest():
+    """최대 항목 수를 넘으면 오래된 항목부터 삭제"""
+    cache = IntentCache(db_path=None, max_entries=2)
+    for i in range(3):
+        cache.put(f"질문 {i}", LLM_RESULT)
+        time.sleep(0.01)
+
+    assert cache.get("질문 0") is None
+    assert cache.get("질문 2") == LLM_RESULT
+    assert cache.stats()["entries"] == 2
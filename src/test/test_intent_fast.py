@@ -0,0 +1,115 @@
+"""
+로컬 의도 분류기 테스트: 규칙 + 예시 kNN 1단계 분류, 임계값 미만 시 LLM 폴백
+"""
+
+import json
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.agent.router import intent_router
+from src.agent.router.fast_intent import INTENT_EXAMPLES_PATH, classify_intent_fast
+from src.agent.router.intent_cache import IntentCache
+from src.test.test_intent_router import EDGE_CASES, GOLDEN_TEST_CASES
+
+
+@pytest.fixture(autouse=True)
+def _isolated_cache(monkeypatch):
+    """공용 SQLite 캐시 대신 테스트 전용 메모리 캐시 사용"""
+    cache = IntentCache(db_path=None)
+    monkeypatch.setattr(intent_router, "get_intent_cache", lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    """LLM 분류를 호출 기록만 남기는 가짜로 교체"""
+    calls = []
+
+    def _fake(q, fallback=None):
+        calls.append(q)
+        return {"intent": "docs", "confidence": 0.9, "reason": "llm", "source": "llm"}
+
+    monkeypatch.setattr(intent_router, "_classify_with_llm", _fake)
+    return calls
+
+
+def test_examples_do_not_contain_test_questions():
+    """골든셋/엣지 케이스는 예시에 없어야 평가가 정확 일치(0.99)로 새지 않음"""
+    examples = {ex["question"] for ex in json.loads(INTENT_EXAMPLES_PATH.read_text(encoding="utf-8"))}
+    assert examples.isdisjoint(GOLDEN_TEST_CASES)
+    assert examples.isdisjoint(EDGE_CASES)
+
+
+def test_golden_cases_held_out():
+    """예시에 없는 골든셋: 대부분 로컬에서 맞히고, 임계값 이상으로 틀리는 질문은 없음"""
+    local_correct = 0
+    for question, expected in GOLDEN_TEST_CASES.items():
+        result = classify_intent_fast(question)
+        if result and result["confidence"] >= intent_router.FAST_INTENT_THRESHOLD:
+            assert result["intent"] == expected, question
+            local_correct += 1
+    assert local_correct / len(GOLDEN_TEST_CASES) >= 0.8
+
+
+@pytest.mark.parametrize("question", [
+    "SageMaker 비용 최적화 팁 알려줘",
+    "GPU 인스턴스 요금표 보여줘",
+    "Spot 인스턴스 비중을 높이려면?",
+    "Endpoint 비용",
+])
+def test_lone_cost_keyword_is_not_confident(question):
+    """비용/요금/비중 단어만 있고 집계/기간 신호가 없으면 sql로 확신하지 않음 (LLM 판단)"""
+    result = classify_intent_fast(question)
+    assert not (result["intent"] == "sql" and result["confidence"] >= intent_router.FAST_INTENT_THRESHOLD)
+
+
+@pytest.mark.parametrize("question,expected", [
+    ("8월 엔드포인트 비용 알려줘", "sql"),
+    ("학습 비용 합계", "sql"),
+    ("엔드포인트 배포하는 방법", "docs"),
+    ("고맙습니다!", "general"),
+    ("이 시스템은 어떻게 사용하나요?", "general"),
+])
+def test_unseen_clear_questions_are_fast(question, expected):
+    """예시에 없는 명확한 질문도 임계값 이상의 신뢰도로 분류"""
+    result = classify_intent_fast(question)
+    assert result["intent"] == expected
+    assert result["confidence"] >= intent_router.FAST_INTENT_THRESHOLD
+
+
+def test_mixed_signals_fall_back_to_llm(llm_calls):
+    """수치/문서 신호가 섞여 확신이 낮으면 LLM 분류 사용"""
+    result = intent_router.classify_intent("비용 알림 설정 방법")
+    assert llm_calls == ["비용 알림 설정 방법"]
+    assert result["source"] == "llm"
+
+
+def test_threshold_controls_fallback(monkeypatch, llm_calls):
+    """임계값을 올리면 명확한 질문도 LLM으로"""
+    monkeypatch.setattr(intent_router, "FAST_INTENT_THRESHOLD", 1.01)
+    intent_router.classify_intent("이번달 SageMaker 비용")
+    assert llm_calls == ["이번달 SageMaker 비용"]
+
+
+def test_llm_failure_uses_local_guess(monkeypatch):
+    """LLM 실패 시 임계값 미만이라도 로컬 추정을 사용 (general 기본값 대신)"""
+    def _fail(_):
+        raise RuntimeError("rate limited")
+
+    monkeypatch.setattr(intent_router, "_llm", RunnableLambda(_fail))
+    monkeypatch.setattr(intent_router, "FAST_INTENT_THRESHOLD", 1.01)
+
+    result = intent_router.classify_intent("이번달 SageMaker 비용")
+    assert result["intent"] == "sql"
+    assert "LLM 실패" in result["reason"]
+
+
+def test_fast_path_latency():
+    """로컬 분류는 질문당 1ms 수준"""
+    classify_intent_fast("워밍업")
+    start = time.perf_counter()
+    for i in range(200):
+        classify_intent_fast(f"{i}월 Endpoint 비용 합계")
+    assert (time.perf_counter() - start) / 200 < 0.005
@@ -0,0 +1,85 @@
+"""
+의도+답변 통합 호출 테스트: LLM 분류 호출이 general 답변까지 만들면 General Agent 호출 생략
+"""
+
+import json
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.agent.general_agent import graph as general_graph
+from src.agent.router import graph as router_graph
+from src.agent.router import intent_router
+from src.agent.router.intent_cache import IntentCache
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    """LLM 분류 경로를 강제하고, 질문에 따라 general 답변 또는 docs 분류를 돌려주는 가짜 LLM"""
+    calls = []
+
+    def _respond(prompt_value):
+        prompt = prompt_value.to_string()
+        calls.append(prompt)
+        if "문서" in prompt.rsplit("질문:", 1)[-1]:
+            return json.dumps({"intent": "docs", "confidence": 0.9, "reason": "문서", "answer": "무시할 답변"})
+        return json.dumps({"intent": "general", "confidence": 0.9, "reason": "잡담", "answer": " 네, 반갑습니다! "},
+                          ensure_ascii=False)
+
+    cache = IntentCache(db_path=None)
+    monkeypatch.setattr(intent_router, "get_intent_cache", lambda: cache)
+    monkeypatch.setattr(intent_router, "FAST_INTENT_THRESHOLD", 1.01)
+    monkeypatch.setattr(intent_router, "_llm", RunnableLambda(_respond))
+    monkeypatch.setattr(router_graph, "PREFETCHERS", {})
+    monkeypatch.setattr(router_graph, "SPECULATIVE_ENABLED", False)
+
+    def _no_second_call(q):
+        raise AssertionError("General Agent가 호출되면 안 됨")
+
+    monkeypatch.setattr(general_graph, "ask", _no_second_call)
+    monkeypatch.setattr(general_graph, "ask_stream", _no_second_call)
+    return calls
+
+
+def test_prompt_requests_answer_with_general_guide(llm_calls):
+    """분류 프롬프트에 answer 필드와 General Assistant 지침이 포함"""
+    intent_router.classify_intent("오늘 날씨 좋네")
+    assert '"answer"' in llm_calls[0]
+    assert "General Assistant" in llm_calls[0]
+
+
+def test_general_answer_is_returned_with_intent(llm_calls):
+    """general이면 분류 결과에 답변이 포함되고, 다른 의도의 answer는 버림"""
+    general = intent_router.classify_intent("오늘 날씨 좋네")
+    docs = intent_router.classify_intent("문서 좀 찾아줘")
+
+    assert general["answer"] == "네, 반갑습니다!"
+    assert docs["intent"] == "docs"
+    assert "answer" not in docs
+
+
+def test_router_skips_general_agent(llm_calls):
+    """라우터는 분류 호출의 답변을 그대로 사용해 LLM을 한 번만 호출"""
+    result = router_graph.ask("오늘 날씨 좋네")
+
+    assert {k: result[k] for k in ("answer", "intent", "error")} == {
+        "answer": "네, 반갑습니다!", "intent": "general", "error": False}
+    assert len(llm_calls) == 1
+
+
+def test_router_stream_skips_general_agent(llm_calls):
+    """스트리밍도 분류 호출의 답변을 token + final로 전달"""
+    events = list(router_graph.ask_stream("오늘 날씨 좋네"))
+
+    assert [e["type"] for e in events] == ["intent", "token", "final"]
+    assert events[1]["text"] == "네, 반갑습니다!"
+    assert len(llm_calls) == 1
+
+
+def test_cached_answer_needs_no_llm_call(llm_calls):
+    """캐시된 분류 결과의 답변도 재사용되어 두 번째 질문은 LLM 호출 없음"""
+    router_graph.ask("오늘 날씨 좋네")
+    result = router_graph.ask("오늘 날씨 좋네!")
+
+    assert result["answer"] == "네, 반갑습니다!"
+    assert len(llm_calls) == 1
@@ -0,0 +1,198 @@
+"""
+LLM 클라이언트 레지스트리 테스트: 공용 인스턴스/HTTP 풀, 전역 동시성 제한, 429 백오프 재시도, 지연 히스토그램
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from src.agent import llm_clients
+from src.agent.llm_clients import (
+    LLMLimiter, LimitedTransport, AsyncLimitedTransport, LatencyHistogram,
+    get_chat_model, get_http_client, get_pool_stats, retry_delay,
+)
+from src.agent.usage import get_usage_callback
+
+
+@pytest.fixture(autouse=True)
+def _fresh_registry(monkeypatch):
+    """테스트마다 빈 레지스트리/통계와 짧은 백오프"""
+    monkeypatch.setattr(llm_clients, "_POOL_STATS", {})
+    monkeypatch.setattr(llm_clients, "LLM_BACKOFF_BASE_SEC", 0.01)
+    yield
+    llm_clients.close_http_clients()
+
+
+def _completion(content="안녕"):
+    return {
+        "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini-2024-07-18",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15},
+    }
+
+
+def test_same_settings_share_one_instance_and_pool():
+    """같은 설정은 같은 ChatOpenAI, 같은 모델은 같은 HTTP 풀, 콜백은 항상 부착"""
+    a = get_chat_model("gpt-4o-mini", temperature=0.0, timeout=25.0)
+    b = get_chat_model("gpt-4o-mini", temperature=0.0, timeout=25.0)
+    c = get_chat_model("gpt-4o-mini", temperature=0.2, timeout=20.0)
+
+    assert a is b and a is not c
+    assert a.http_client is c.http_client is get_http_client("gpt-4o-mini")
+    assert get_usage_callback() in a.callbacks
+
+
+def test_rate_limited_request_is_retried_after_retry_after():
+    """429는 Retry-After만큼 전체 요청을 멈춘 뒤 같은 요청을 다시 보냄"""
+    statuses = iter([429, 429, 200])
+
+    def handler(request):
+        status = next(statuses)
+        return httpx.Response(status, headers={"retry-after-ms": "30"} if status == 429 else {}, json={})
+
+    limiter = LLMLimiter(max_concurrency=4)
+    client = httpx.Client(transport=LimitedTransport(httpx.MockTransport(handler), "m", limiter))
+
+    start = time.perf_counter()
+    assert client.post("https://api.test/v1/chat", json={}).status_code == 200
+    assert time.perf_counter() - start >= 0.06
+    assert limiter.stats()["throttled"] == 2
+    assert limiter.stats()["in_flight"] == 0
+    assert get_pool_stats("m").snapshot()["throttled"] == 2
+
+
+def test_rate_limit_gives_up_after_retries():
+    limiter = LLMLimiter()
+    transport = LimitedTransport(httpx.MockTransport(lambda r: httpx.Response(429)), "m", limiter, retries=1)
+    assert httpx.Client(transport=transport).get("https://api.test/").status_code == 429
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_concurrency_limit_is_global_and_wait_is_observed():
+    """동시 요청 수는 제한기 한도를 넘지 않고, 대기 시간이 히스토그램에 기록"""
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def handler(request):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return httpx.Response(200, json={})
+
+    limiter = LLMLimiter(max_concurrency=2)
+    client = httpx.Client(transport=LimitedTransport(httpx.MockTransport(handler), "m", limiter))
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(lambda _: client.get("https://api.test/"), range(6)))
+
+    stats = get_pool_stats("m").snapshot()
+    assert peak[0] == 2
+    assert limiter.stats()["max_in_flight"] == 2
+    assert stats["latency"]["count"] == 6
+    assert stats["queue_wait"]["buckets"]["<=50"] < 6  # 뒤 요청들은 앞 요청이 끝나길 기다림
+
+
+def test_streamed_response_holds_slot_until_closed():
+    """스트리밍 응답은 본문을 다 읽거나 닫을 때 슬롯을 반환"""
+    limiter = LLMLimiter(max_concurrency=1)
+    client = httpx.Client(transport=LimitedTransport(
+        httpx.MockTransport(lambda r: httpx.Response(200, content=b"data: 1\n\n")), "m", limiter))
+
+    with client.stream("GET", "https://api.test/") as response:
+        assert limiter.stats()["in_flight"] == 1
+        assert response.read() == b"data: 1\n\n"
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_async_transport_shares_limiter_and_retries():
+    statuses = iter([429, 200])
+
+    async def handler(request):
+        return httpx.Response(next(statuses), headers={"retry-after": "0"}, json={})
+
+    limiter = LLMLimiter(max_concurrency=1)
+
+    async def _run():
+        async with httpx.AsyncClient(transport=AsyncLimitedTransport(
+                httpx.MockTransport(handler), "m", limiter)) as client:
+            return (await client.get("https://api.test/")).status_code
+
+    assert asyncio.run(_run()) == 200
+    stats = limiter.stats()
+    assert (stats["acquired"], stats["throttled"], stats["in_flight"]) == (2, 1, 0)
+
+
+def test_async_client_uses_a_pool_per_event_loop(monkeypatch):
+    """공유 AsyncClient는 어느 루프에서든 쓸 수 있고, 커넥션 풀은 루프마다 따로 만들어짐"""
+    pools = []
+
+    def _transport(**kwargs):
+        pools.append(httpx.MockTransport(lambda r: httpx.Response(200, json={})))
+        return pools[-1]
+
+    monkeypatch.setattr(llm_clients.httpx, "AsyncHTTPTransport", _transport)
+    client = llm_clients.get_async_http_client("m")
+
+    async def _get_twice():
+        return [(await client.get("https://api.test/")).status_code for _ in range(2)]
+
+    assert asyncio.run(_get_twice()) == [200, 200]
+    assert asyncio.run(_get_twice()) == [200, 200]
+    assert llm_clients.run_async(_get_twice()) == [200, 200]
+    assert llm_clients.get_async_http_client("m") is client
+    assert len(pools) == 3  # 같은 루프 안에서는 풀 재사용, 닫힌 루프의 풀은 재사용하지 않음
+
+
+def test_rpm_limit_blocks_until_window_frees(monkeypatch):
+    """분당 요청 수를 넘으면 가장 오래된 요청 후 60초까지 대기"""
+    now = [1000.0]
+    monkeypatch.setattr(llm_clients.time, "monotonic", lambda: now[0])
+    limiter = LLMLimiter(max_concurrency=10, max_rpm=2)
+    with limiter._cond:
+        assert limiter._try_acquire() is None
+        assert limiter._try_acquire() is None
+        assert limiter._try_acquire() == pytest.approx(60.0)
+        now[0] += 60
+        assert limiter._try_acquire() is None
+
+
+def test_chat_model_call_goes_through_pool():
+    """ChatOpenAI 호출이 모델별 풀/제한기를 거치며 지연이 기록되고 429는 SDK 재시도 없이 복구"""
+    statuses = iter([429, 200])
+
+    def handler(request):
+        status = next(statuses)
+        if status == 429:
+            return httpx.Response(429, headers={"retry-after": "0"}, json={"error": {"message": "rate limit"}})
+        return httpx.Response(200, json=_completion())
+
+    from langchain_openai import ChatOpenAI
+    llm = ChatOpenAI(model="gpt-4o-mini", api_key="dummy", max_retries=0,
+                     http_client=httpx.Client(transport=LimitedTransport(httpx.MockTransport(handler), "gpt-4o-mini")))
+
+    assert llm.invoke("hi").content == "안녕"
+    stats = get_pool_stats("gpt-4o-mini").snapshot()
+    assert stats["requests"] == 2
+    assert stats["throttled"] == 1
+    assert stats["latency"]["count"] == 2
+
+
+def test_retry_delay_prefers_headers():
+    assert retry_delay(httpx.Response(429, headers={"retry-after-ms": "250"}), 0) == 0.25
+    assert retry_delay(httpx.Response(429, headers={"retry-after": "2"}), 0) == 2.0
+    assert 0 < retry_delay(httpx.Response(429), 3) <= 0.08
+
+
+def test_histogram_quantiles():
+    hist = LatencyHistogram(buckets_ms=(10, 100, 1000))
+    for ms in (5, 5, 50, 500, 5000):
+        hist.observe(ms)
+    snap = hist.snapshot()
+    assert snap["buckets"] == {"<=10": 2, "<=100": 1, "<=1000": 1, ">1000": 1}
+    assert snap["p50_ms"] == 100.0
+    assert snap["p95_ms"] == float("inf")
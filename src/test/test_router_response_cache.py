@@ -0,0 +1,160 @@
+"""
+라우터 응답 캐시 테스트: (질문, 의도, 데이터 버전) 캐시, stale-while-revalidate, 오류 미캐시
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from src.agent import sql_agent
+from src.agent.router import graph as router_graph
+from src.agent.router import response_cache
+from src.agent.router.response_cache import ResponseCache
+from src.agent.sql_agent import schema_provider
+from src.agent.streaming import token_event, final_event
+
+
+@pytest.fixture
+def env(monkeypatch, isolated_router):
+    """sql로 분류되는 라우터 + 호출 횟수를 답에 담는 가짜 SQL Agent + 조작 가능한 데이터 버전"""
+    env = {"cache": ResponseCache(), "versions": {"sql": "v1"}, "calls": [], "delay": 0.0, "fail": False}
+    monkeypatch.setattr(router_graph, "get_response_cache", lambda: env["cache"])
+    monkeypatch.setattr(router_graph, "data_version", lambda intent: env["versions"][intent])
+    monkeypatch.setattr(router_graph, "classify_intent",
+                        lambda q: {"intent": "sql", "confidence": 1.0, "reason": "test"})
+
+    def _sql(q, prefetch=None):
+        env["calls"].append(q)
+        time.sleep(env["delay"])
+        if env["fail"]:
+            return {"error": True, "message": "실패", "intent": "sql"}
+        return {"answer": f"답변 {len(env['calls'])}", "intent": "sql", "error": False}
+
+    monkeypatch.setattr(sql_agent, "ask", _sql)
+    return env
+
+
+def _wait_refreshed(cache, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while cache.stats()["refreshing"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_repeated_question_is_served_from_cache(env):
+    """같은 질문(표기 차이 포함)은 Agent를 다시 실행하지 않음"""
+    first = router_graph.ask("이번달 SageMaker 비용")
+    state = router_graph.ROUTER_GRAPH.invoke({"question": "이번달  sagemaker 비용?"})
+
+    assert state["cache_status"] == "hit"
+    assert state["final_result"]["answer"] == first["answer"]
+    assert len(env["calls"]) == 1
+
+
+def test_data_version_change_serves_stale_and_refreshes(env):
+    """ETL 게시(버전 변경) 후 첫 요청은 이전 응답을 즉시 받고, 백그라운드 갱신 후 새 응답"""
+    router_graph.ask("이번달 SageMaker 비용")
+    env["versions"]["sql"] = "v2"
+    env["delay"] = 0.2
+
+    start = time.perf_counter()
+    stale = router_graph.ROUTER_GRAPH.invoke({"question": "이번달 SageMaker 비용"})
+    assert time.perf_counter() - start < 0.2
+    assert stale["cache_status"] == "stale"
+    assert stale["final_result"]["answer"] == "답변 1"
+
+    _wait_refreshed(env["cache"])
+    fresh = router_graph.ROUTER_GRAPH.invoke({"question": "이번달 SageMaker 비용"})
+    assert fresh["cache_status"] == "hit"
+    assert fresh["final_result"]["answer"] == "답변 2"
+
+
+def test_concurrent_stale_hits_refresh_once(env):
+    """갱신 중 들어온 stale 요청은 갱신을 중복 실행하지 않음"""
+    router_graph.ask("이번달 SageMaker 비용")
+    env["versions"]["sql"] = "v2"
+    env["delay"] = 0.3
+
+    threads = [threading.Thread(target=router_graph.ask, args=("이번달 SageMaker 비용",)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    _wait_refreshed(env["cache"])
+
+    assert len(env["calls"]) == 2
+    assert env["cache"].stats()["refreshes"] == 1
+
+
+def test_error_responses_are_not_cached(env):
+    env["fail"] = True
+    router_graph.ask("이번달 SageMaker 비용")
+    router_graph.ask("이번달 SageMaker 비용")
+
+    assert len(env["calls"]) == 2
+    assert env["cache"].stats()["skipped"] == 2
+
+
+def test_uncacheable_intent_skips_cache(env, monkeypatch):
+    """general 등 캐시 대상이 아닌 의도는 조회/저장하지 않음"""
+    monkeypatch.setattr(router_graph, "CACHEABLE_INTENTS", frozenset({"docs"}))
+    state = router_graph.ROUTER_GRAPH.invoke({"question": "이번달 SageMaker 비용"})
+    assert state["cache_status"] == "off"
+    assert env["cache"].stats()["entries"] == 0
+
+
+def test_stream_uses_and_fills_cache(env, monkeypatch):
+    """스트리밍 miss는 final 결과를 저장하고, hit은 Agent 스트림 없이 답변을 전달"""
+    streamed = []
+
+    def _stream_sql(state):
+        streamed.append(state["question"])
+        yield token_event("스트림 답변")
+        yield final_event({"answer": "스트림 답변", "intent": "sql", "error": False})
+
+    monkeypatch.setattr(router_graph, "STREAMERS", {**router_graph.STREAMERS, "sql": _stream_sql})
+
+    list(router_graph.ask_stream("이번달 SageMaker 비용"))
+    events = list(router_graph.ask_stream("이번달 SageMaker 비용"))
+
+    assert streamed == ["이번달 SageMaker 비용"]
+    assert [e["type"] for e in events] == ["intent", "token", "final"]
+    assert events[-1]["result"]["answer"] == "스트림 답변"
+
+
+def test_ttl_and_max_stale(monkeypatch):
+    """TTL이 지나면 stale, 최대 stale 기간이 지나면 miss"""
+    cache = ResponseCache(ttl_sec=10, max_stale_sec=100)
+    cache.put("비용", "sql", "v1", {"answer": "a"})
+    assert cache.get("비용", "sql", "v1") == ({"answer": "a"}, False)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("비용", "sql", "v1") == ({"answer": "a"}, True)
+    monkeypatch.setattr(time, "time", lambda: now + 101)
+    assert cache.get("비용", "sql", "v1") is None
+
+
+def test_sql_data_version_follows_manifest(tmp_path, monkeypatch):
+    """sql 데이터 버전은 월 폴더 manifest가 바뀌면 달라짐"""
+    month_dir = tmp_path / "202508"
+    month_dir.mkdir()
+    (month_dir / "manifest.json").write_text('{"rows": 1}')
+    os.symlink(month_dir, tmp_path / "latest")
+    monkeypatch.setattr(schema_provider, "DATA_ROOT", str(tmp_path))
+
+    before = response_cache.data_version("sql")
+    assert response_cache.data_version("sql") == before
+    (month_dir / "manifest.json").write_text('{"rows": 2}')
+    assert response_cache.data_version("sql") != before
+
+
+def test_docs_data_version_follows_manifest(tmp_path, monkeypatch):
+    manifest = tmp_path / "manifest.json"
+    monkeypatch.setattr(response_cache, "DOCS_MANIFEST_PATH", str(manifest))
+    assert response_cache.data_version("docs") == "none"
+    manifest.write_text('{"chunks": 10}')
+    first = response_cache.data_version("docs")
+    manifest.write_text('{"chunks": 11}')
+    assert response_cache.data_version("docs") not in ("none", first)
@@ -0,0 +1,103 @@
+"""
+라우터 추측 실행 테스트: LLM 의도 분류 동안 로컬 추정 Agent를 미리 실행하고 최종 의도로 확정
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.agent import sql_agent
+from src.agent.general_agent import graph as general_graph
+from src.agent.router import graph as router_graph
+from src.agent.streaming import token_event, final_event
+
+DELAY = 0.3
+
+
+@pytest.fixture
+def calls(monkeypatch, isolated_router):
+    """느린 LLM 분류/Agent를 흉내 내는 가짜로 교체하고 Agent 호출을 기록 (추측 실행은 다시 켬)"""
+    calls = {"sql": [], "general": []}
+    monkeypatch.setattr(router_graph, "SPECULATIVE_ENABLED", True)
+    monkeypatch.setattr(router_graph, "_speculation_candidates", lambda q: ["sql"])
+
+    def _sql(q, prefetch=None):
+        calls["sql"].append(threading.current_thread().name)
+        time.sleep(DELAY)
+        return {"answer": "sql"}
+
+    def _general(q):
+        calls["general"].append(threading.current_thread().name)
+        return {"answer": "general"}
+
+    monkeypatch.setattr(sql_agent, "ask", _sql)
+    monkeypatch.setattr(general_graph, "ask", _general)
+    return calls
+
+
+def _slow_classify(intent):
+    def _classify(q):
+        time.sleep(DELAY)
+        return {"intent": intent, "confidence": 0.9, "reason": "test"}
+    return _classify
+
+
+def test_correct_guess_overlaps_classification(monkeypatch, calls):
+    """추정이 맞으면 분류와 Agent 실행이 겹쳐 직렬 실행보다 빠르고 Agent는 한 번만 실행"""
+    monkeypatch.setattr(router_graph, "classify_intent", _slow_classify("sql"))
+
+    start = time.perf_counter()
+    result = router_graph.ask("비용 알림 설정 방법")
+    elapsed = time.perf_counter() - start
+
+    assert result["answer"] == "sql"
+    assert len(calls["sql"]) == 1
+    assert calls["sql"][0].startswith("router-speculation")
+    assert elapsed < 2 * DELAY * 0.9
+
+
+def test_wrong_guess_is_discarded(monkeypatch, calls):
+    """추정이 틀리면 추측 결과를 버리고 최종 의도의 Agent를 실행"""
+    monkeypatch.setattr(router_graph, "classify_intent", _slow_classify("general"))
+
+    state = router_graph.ROUTER_GRAPH.invoke({"question": "비용 알림 설정 방법"})
+
+    assert state["intent"] == "general"
+    assert state["final_result"] == {"answer": "general"}
+    assert state["speculation"] == {}
+    assert len(calls["general"]) == 1
+
+
+def test_confident_local_intent_does_not_speculate(monkeypatch):
+    """로컬 분류로 바로 확정되는 질문은 LLM 대기가 없으므로 추측 실행하지 않음"""
+    assert router_graph._speculation_candidates("이번달 SageMaker 비용") == []
+    monkeypatch.setattr(router_graph, "SPECULATIVE_ENABLED", False)
+    assert router_graph._speculation_candidates("비용 알림 설정 방법") == []
+
+
+def test_ambiguous_question_has_candidates():
+    """확신이 낮은 질문은 로컬 추정 상위 후보를 추측 실행"""
+    candidates = router_graph._speculation_candidates("비용 알림 설정 방법")
+    assert len(candidates) == router_graph.SPECULATIVE_TOP_K
+    assert candidates[0] in ("sql", "docs", "general")
+
+
+def test_stream_uses_speculative_events(monkeypatch, calls):
+    """스트리밍도 추측 실행한 스트림의 이벤트를 순서대로 전달"""
+    started = []
+
+    def _stream_sql(state):
+        started.append(threading.current_thread().name)
+        yield token_event("비")
+        yield token_event("용")
+        yield final_event({"answer": "sql"})
+
+    monkeypatch.setattr(router_graph, "STREAMERS", {**router_graph.STREAMERS, "sql": _stream_sql})
+    monkeypatch.setattr(router_graph, "classify_intent", _slow_classify("sql"))
+
+    events = list(router_graph.ask_stream("비용 알림 설정 방법"))
+
+    assert [e["type"] for e in events] == ["intent", "token", "token", "final"]
+    assert "".join(e["text"] for e in events if e["type"] == "token") == "비용"
+    assert started and started[0].startswith("router-speculation")
@@ -0,0 +1,111 @@
+"""
+시맨틱 레이어 테스트: 표준 지표 뷰 등록, ETL 사전 집계, 가드레일/NL2SQL 연동
+"""
+
+import json
+import os
+
+import duckdb
+import pytest
+
+from src.agent.sql_agent.executor import execute_safe_sql
+from src.agent.sql_agent.guardrails import SQLGuardrailError
+from src.core.semantic_layer import (
+    SEMANTIC_VIEWS, register_semantic_views, materialize_semantic_views, describe_semantic_views,
+)
+
+pytestmark = pytest.mark.usefixtures("result_cache")
+
+# (usagetype, account, resource, instance, hours, cost, is_endpoint, is_training, is_spot, usertag0)
+_ROWS = [
+    ("USE1-Host:ml.m5.large", "111", "ep-a", "ml.m5.large", 10.0, 5.0, True, False, False, "team-a"),
+    ("USE1-Host:ml.m5.large", "111", "ep-b", "ml.m5.large", 30.0, 15.0, True, False, False, None),
+    ("USE1-Train:ml.g5.xlarge", "222", "job-1", "ml.g5.xlarge", 2.0, 20.0, False, True, False, "team-b"),
+    ("USE1-Spot-Train:ml.g5.xlarge", "222", "job-2", "ml.g5.xlarge", 4.0, 10.0, False, True, True, ""),
+]
+
+
+@pytest.fixture
+def base_dir(tmp_path):
+    """ETL transform 결과와 같은 컬럼의 fact parquet 생성"""
+    base = tmp_path / "202508"
+    base.mkdir()
+    values = ", ".join(
+        f"('{u}', '{a}', '{r}', '{i}', {h}, {c}, {e}, {t}, {s}, {repr(tag) if tag is not None else 'NULL'})"
+        for u, a, r, i, h, c, e, t, s, tag in _ROWS
+    )
+    duckdb.execute(f"""
+        COPY (
+            SELECT '202508' AS billing_ym, usagetype AS lineitem_usagetype,
+                   account AS lineitem_usageaccountid, resource AS lineitem_resourceid,
+                   instance AS product_instancetype, hours AS usage_hours,
+                   cost AS lineitem_unblendedcost, cost AS lineitem_blendedcost,
+                   is_endpoint, is_training, is_spot,
+                   FALSE AS is_notebook, FALSE AS is_studio, FALSE AS is_processing,
+                   FALSE AS is_featurestore, FALSE AS is_data_transfer, FALSE AS is_storage,
+                   usertag0, CAST(NULL AS VARCHAR) AS usertag1
+            FROM (VALUES {values}) t(usagetype, account, resource, instance, hours, cost,
+                                     is_endpoint, is_training, is_spot, usertag0)
+        ) TO '{base / 'fact_sagemaker_costs.parquet'}'
+    """)
+    (base / "manifest.json").write_text(json.dumps({"billing_ym": "202508"}))
+    return str(base)
+
+
+def _metrics(base_dir):
+    con = duckdb.connect()
+    assert set(register_semantic_views(con, base_dir)) == set(SEMANTIC_VIEWS)
+    spot = con.sql("SELECT spot_share, training_spot_share FROM v_spot_share").fetchone()
+    untagged = con.sql("SELECT untagged_cost, untagged_share FROM v_untagged_cost").fetchone()
+    tag_rate = dict(con.sql("SELECT account_id, tag_missing_rate FROM v_tag_missing_rate").fetchall())
+    endpoint = con.sql("SELECT SUM(endpoint_hours) FROM v_endpoint_hours").fetchone()[0]
+    total = con.sql("SELECT total_cost FROM v_total_cost").fetchone()[0]
+    con.close()
+    return spot, untagged, tag_rate, endpoint, total
+
+
+def test_metric_views(base_dir):
+    """지표 정의: Spot 비중, 태그 누락률(빈 문자열도 누락), 태그 미부착 비용, Endpoint 시간"""
+    spot, untagged, tag_rate, endpoint, total = _metrics(base_dir)
+    assert spot == pytest.approx((10 / 50, 10 / 30))
+    assert untagged == pytest.approx((25.0, 25 / 50))
+    assert tag_rate == pytest.approx({"111": 0.5, "222": 0.5})
+    assert endpoint == 40.0
+    assert total == 50.0
+
+
+def test_materialized_views_replace_fact_scan(base_dir):
+    """ETL 사전 집계가 있으면 뷰는 fact 대신 semantic/*.parquet를 읽음"""
+    expected = _metrics(base_dir)
+    saved = materialize_semantic_views(base_dir)
+    assert len(saved) == len(SEMANTIC_VIEWS)
+
+    os.remove(os.path.join(base_dir, "fact_sagemaker_costs.parquet"))
+    assert _metrics(base_dir) == expected
+
+
+def test_views_allowed_through_executor(base_dir):
+    """execute_safe_sql에서 뷰는 허용되고, 그 외 테이블 참조는 여전히 차단"""
+    with execute_safe_sql("SELECT untagged_cost FROM v_untagged_cost", base_dir=base_dir) as result:
+        assert result.sample_rows(1) == [{"untagged_cost": 25.0}]
+    with pytest.raises(SQLGuardrailError):
+        execute_safe_sql("SELECT * FROM duckdb_settings()", base_dir=base_dir)
+    with pytest.raises(SQLGuardrailError):
+        execute_safe_sql("SELECT * FROM v_untagged_cost", base_dir=None)
+
+
+def test_describe_for_prompt(base_dir, tmp_path):
+    """프롬프트용 설명에 뷰 이름과 컬럼이 포함되고, 데이터가 없으면 빈 문자열"""
+    text = describe_semantic_views(base_dir)
+    assert "v_spot_share(spot_cost, ondemand_cost, total_cost, spot_share, training_spot_share)" in text
+    assert describe_semantic_views(str(tmp_path)) == ""
+
+
+def test_views_skipped_when_fact_lacks_columns(tmp_path):
+    """필요한 컬럼이 없는 fact에서는 해당 뷰만 등록하지 않음"""
+    base = tmp_path / "202507"
+    base.mkdir()
+    duckdb.execute(f"COPY (SELECT 1.0 AS lineitem_unblendedcost) TO '{base / 'fact_sagemaker_costs.parquet'}'")
+    con = duckdb.connect()
+    assert register_semantic_views(con, str(base)) == ["v_untagged_cost"]
+    assert con.sql("SELECT untagged_cost FROM v_untagged_cost").fetchone()[0] == 1.0
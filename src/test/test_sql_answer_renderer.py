@@ -0,0 +1,107 @@
+"""
+결정적 답변 렌더러 테스트: 단순한 결과 형태는 LLM 없이 답변
+"""
+
+import pandas as pd
+
+from src.agent.sql_agent import summary
+from src.agent.sql_agent.answer_renderer import render_answer, format_value, NOT_FOUND_ANSWER
+
+
+def test_format_value_units():
+    """컬럼명 기반 단위 포맷"""
+    assert format_value("total_cost", 1234.5) == "1,234.50 USD"
+    assert format_value("usage_hours", 10) == "10.00시간"
+    assert format_value("spot_share", 0.25) == "25.00%"
+    assert format_value("job_count", 3) == "3건"
+    # 사용량(usage_amount)은 금액이 아님
+    assert format_value("usage_amount", 12.5) == "12.50"
+    assert format_value("lineitem_usageamount", 3) == "3"
+    answer = render_answer("SELECT sum(line_item_usage_amount) AS usage_amount FROM t",
+                           ["usage_amount"], [{"usage_amount": 720.0}], 1)
+    assert "USD" not in answer
+
+
+def test_unit_hints_match_whole_tokens():
+    """단위 단서는 식별자 토큰 단위로만 (generated의 rate, duration의 ratio는 비율이 아님)"""
+    assert format_value("operation_count", 12) == "12건"
+    assert format_value("generated_files", 12) == "12"
+    assert format_value("total_duration", 0.75) == "0.75"
+    assert format_value("lineitem_unblendedcost", 3) == "3.00 USD"
+    assert format_value("tag_missing_rate", 0.1) == "10.00%"
+
+    # 비율로 잘못 보면 항목별 비중/합계가 빠짐
+    rows = [{"job": "a", "total_duration": 1.25}, {"job": "b", "total_duration": 2.5}]
+    answer = render_answer("SELECT job, total_duration FROM t", ["job", "total_duration"], rows, 2)
+    assert "1. a: 1.25 (33.3%)" in answer
+    assert "합계는 3.75예요." in answer
+
+
+def test_topic_particle():
+    """받침 유무에 따른 은/는 조사"""
+    from src.agent.sql_agent.answer_renderer import _topic
+    assert _topic("비용") == "비용은"
+    assert _topic("건수") == "건수는"
+    assert _topic("cost") == "cost은(는)"
+
+
+def test_scalar():
+    """1행 × 1열 결과"""
+    answer = render_answer("SELECT sum(cost) AS total_cost FROM t", ["total_cost"], [{"total_cost": 1234.567}], 1)
+    assert answer == "현재 데이터 기준으로 총 비용은 1,234.57 USD예요."
+
+
+def test_empty_result():
+    """빈 결과는 프롬프트 규칙과 같은 안내 문구"""
+    assert render_answer("SELECT 1", ["cost"], [], 0) == NOT_FOUND_ANSWER
+
+
+def test_top_n():
+    """ORDER BY ... LIMIT 결과는 순위 목록"""
+    rows = [{"instance_type": "ml.g5.xlarge", "cost": 300.0}, {"instance_type": "ml.m5.large", "cost": 100.0}]
+    answer = render_answer("SELECT instance_type, cost FROM t ORDER BY cost DESC LIMIT 2",
+                           ["instance_type", "cost"], rows, 2)
+    assert answer.startswith("비용 기준 상위 2개 항목이에요.")
+    assert "1. ml.g5.xlarge: 300.00 USD" in answer
+    assert "%" not in answer
+
+
+def test_breakdown_with_share():
+    """2열 분해 결과는 항목별 비중과 합계 포함"""
+    rows = [{"pricing_type": "Spot", "cost": 25.0}, {"pricing_type": "OnDemand", "cost": 75.0}]
+    answer = render_answer("SELECT pricing_type, cost FROM t", ["pricing_type", "cost"], rows, 2)
+    assert "1. Spot: 25.00 USD (25.0%)" in answer
+    assert "합계는 100.00 USD예요." in answer
+
+
+def test_total_uses_row_precision():
+    """합계는 항목과 같은 자릿수/단위 (소수 항목의 합이 정수여도 4.00)"""
+    rows = [{"job": "a", "total_duration": 1.5}, {"job": "b", "total_duration": 2.5}]
+    answer = render_answer("SELECT job, total_duration FROM t", ["job", "total_duration"], rows, 2)
+    assert "1. a: 1.50 (37.5%)" in answer
+    assert "합계는 4.00예요." in answer
+
+    rows = [{"region": "a", "usage_hours": 1.5}, {"region": "b", "usage_hours": 2.5}]
+    answer = render_answer("SELECT region, usage_hours FROM t", ["region", "usage_hours"], rows, 2)
+    assert "합계는 4.00시간예요." in answer
+
+
+def test_complex_shapes_fall_back_to_llm():
+    """다중 숫자 컬럼, 큰 결과, NULL 값은 LLM 사용"""
+    rows = [{"instance_type": "a", "hours": 1.0, "cost": 2.0}]
+    assert render_answer("SELECT 1", ["instance_type", "hours", "cost"], rows, 1) is None
+    assert render_answer("SELECT 1", ["cost"], [{"cost": 1.0}] * 10, 50) is None
+    assert render_answer("SELECT 1", ["cost"], [{"cost": None}], 1) is None
+
+
+def test_summarize_answer_skips_llm_for_scalar(monkeypatch):
+    """템플릿으로 답변 가능한 결과는 요약 체인을 호출하지 않음"""
+    def _fail():
+        raise AssertionError("요약 LLM이 호출되면 안 됩니다")
+    monkeypatch.setattr(summary, "_get_summary_chain", _fail)
+
+    df = pd.DataFrame({"total_cost": [42.0]})
+    result = summary.summarize_answer("총비용은?", "SELECT sum(cost) AS total_cost FROM t", df)
+    assert result["answer_source"] == "template"
+    assert "42.00 USD" in result["answer"]
+    assert result["row_count"] == 1
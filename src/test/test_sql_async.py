@@ -0,0 +1,115 @@
+"""
+SQL Agent 비동기 파이프라인 테스트: ask_async 동시 처리, 비동기 요약, 공용 루프 실행
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import duckdb
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.agent import llm_clients
+from src.agent.sql_agent import graph, nl2sql, schema_provider, summary
+
+pytestmark = pytest.mark.usefixtures("result_cache")
+
+LLM_DELAY_SEC = 0.2
+
+
+@pytest.fixture
+def data_root(tmp_path, monkeypatch):
+    base = tmp_path / "202508"
+    base.mkdir()
+    duckdb.execute(
+        f"COPY (SELECT 'ml.m5.large' AS instance_type, range AS hours, range * 0.5 AS cost FROM range(10)) "
+        f"TO '{base / 'agg_endpoint_hours.parquet'}'"
+    )
+    (base / "manifest.json").write_text(json.dumps({"billing_ym": "202508"}))
+    monkeypatch.setattr(schema_provider, "DATA_ROOT", str(tmp_path))
+    return tmp_path
+
+
+def _slow_chain(output, calls, inflight=None):
+    """동기 호출은 time.sleep, 비동기 호출은 asyncio.sleep으로 LLM 지연을 흉내내는 가짜 체인
+
+    inflight를 주면 동시에 대기 중인 호출 수(now)와 그 최댓값(max)을 기록한다.
+    """
+    inflight = inflight if inflight is not None else {}
+
+    def _sync(inputs):
+        calls.append("sync")
+        time.sleep(LLM_DELAY_SEC)
+        return output
+
+    async def _async(inputs):
+        calls.append("async")
+        inflight["now"] = inflight.get("now", 0) + 1
+        inflight["max"] = max(inflight.get("max", 0), inflight["now"])
+        await asyncio.sleep(LLM_DELAY_SEC)
+        inflight["now"] -= 1
+        return output
+
+    return RunnableLambda(_sync, afunc=_async)
+
+
+@pytest.mark.asyncio
+async def test_ask_async_runs_questions_concurrently(monkeypatch, data_root):
+    """여러 질문을 한 이벤트 루프에서 동시에 처리 (LLM 대기가 겹쳐 순차 실행보다 빠름)"""
+    path = data_root / "202508" / "agg_endpoint_hours.parquet"
+    calls, inflight = [], {}
+    monkeypatch.setattr(nl2sql, "_NL2SQL_CHAIN",
+                        _slow_chain(f"SELECT sum(cost) AS total_cost FROM read_parquet('{path}');", calls, inflight))
+
+    n = 10
+    start = time.perf_counter()
+    results = await asyncio.gather(*(graph.ask_async(f"Endpoint 비용 {i}", "202508") for i in range(n)))
+    elapsed = time.perf_counter() - start
+
+    assert all(r["error"] is False for r in results)
+    assert all("22.50 USD" in r["answer"] for r in results)
+    assert calls == ["async"] * n
+    assert inflight["max"] > 1
+    assert elapsed < n * LLM_DELAY_SEC
+
+
+@pytest.mark.asyncio
+async def test_async_summary_uses_ainvoke(monkeypatch, data_root):
+    """템플릿으로 답할 수 없는 결과는 요약 체인을 ainvoke로 호출"""
+    path = data_root / "202508" / "agg_endpoint_hours.parquet"
+    calls = []
+    monkeypatch.setattr(nl2sql, "_NL2SQL_CHAIN", _slow_chain(f"SELECT * FROM read_parquet('{path}');", []))
+    monkeypatch.setattr(summary, "_SUMMARY_CHAIN", _slow_chain("요약 답변", calls))
+
+    result = await graph.ask_async("Endpoint 사용 내역", "202508")
+
+    assert result["answer_source"] == "llm"
+    assert result["answer"] == "요약 답변"
+    assert calls == ["async"]
+
+
+@pytest.mark.asyncio
+async def test_ask_async_returns_error_response(data_root):
+    """없는 월은 예외 대신 오류 응답"""
+    result = await graph.ask_async("총 비용은?", "209901")
+    assert result["error"] is True
+
+
+def test_run_async_shares_one_loop_across_threads():
+    """동기 스레드들이 run_async로 같은 백그라운드 루프와 HTTP 풀을 공유"""
+    async def _loop_and_client():
+        await asyncio.sleep(LLM_DELAY_SEC)
+        return id(asyncio.get_running_loop()), id(llm_clients.get_async_http_client())
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            ids = list(pool.map(lambda _: llm_clients.run_async(_loop_and_client()), range(5)))
+        elapsed = time.perf_counter() - start
+
+        assert len(set(ids)) == 1
+        assert elapsed < 5 * LLM_DELAY_SEC
+    finally:
+        llm_clients.close_http_clients()
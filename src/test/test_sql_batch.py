@@ -0,0 +1,124 @@
+"""
+SQL Agent 배치 질의 테스트: 중복 제거, 스키마 공유, 동시 실행 제한, 요약 일괄 생성
+"""
+
+import asyncio
+import json
+
+import duckdb
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.agent.sql_agent import batch, nl2sql, schema_provider, summary
+from src.agent.sql_agent.batch import ask_batch, ask_batch_async
+
+pytestmark = pytest.mark.usefixtures("result_cache")
+
+
+@pytest.fixture
+def endpoint_path(tmp_path, monkeypatch):
+    base = tmp_path / "202508"
+    base.mkdir()
+    path = base / "agg_endpoint_hours.parquet"
+    duckdb.execute(
+        f"COPY (SELECT 'ep-' || range AS resource_id, range AS hours, range * 0.5 AS cost FROM range(10)) TO '{path}'"
+    )
+    (base / "manifest.json").write_text(json.dumps({"billing_ym": "202508"}))
+    monkeypatch.setattr(schema_provider, "DATA_ROOT", str(tmp_path))
+    return path
+
+
+def _nl2sql_by_question(monkeypatch, sql_by_question, inflight=None):
+    """질문별 SQL을 반환하는 가짜 NL2SQL 체인 (호출 질문과 동시 실행 수 기록)"""
+    calls = []
+    inflight = inflight if inflight is not None else {}
+
+    async def _respond(inputs):
+        calls.append(inputs["question"])
+        inflight["now"] = inflight.get("now", 0) + 1
+        inflight["max"] = max(inflight.get("max", 0), inflight["now"])
+        await asyncio.sleep(0.05)
+        inflight["now"] -= 1
+        return sql_by_question[inputs["question"]]
+
+    monkeypatch.setattr(nl2sql, "_NL2SQL_CHAIN", RunnableLambda(lambda _: None, afunc=_respond))
+    return calls
+
+
+def test_batch_dedupes_and_keeps_order(monkeypatch, endpoint_path):
+    """공백만 다른 질문은 한 번만 실행하고 결과는 입력 순서대로"""
+    total = f"SELECT sum(cost) AS total_cost FROM read_parquet('{endpoint_path}');"
+    hours = f"SELECT sum(hours) AS total_hours FROM read_parquet('{endpoint_path}');"
+    calls = _nl2sql_by_question(monkeypatch, {"총 비용": total, "총 사용 시간": hours})
+
+    results = ask_batch(["총 비용", "총 사용 시간", "  총   비용 "], "202508")
+
+    assert sorted(calls) == ["총 비용", "총 사용 시간"]
+    assert [r["error"] for r in results] == [False, False, False]
+    assert "22.50 USD" in results[0]["answer"]
+    assert results[2]["answer"] == results[0]["answer"]
+    assert results[2] is not results[0]
+
+
+def test_batch_builds_schema_once(monkeypatch, endpoint_path):
+    """같은 월의 질문들은 초기 상태(스키마 추출)를 한 번만 만든다"""
+    sql = f"SELECT sum(cost) AS total_cost FROM read_parquet('{endpoint_path}');"
+    questions = [f"질문 {i}" for i in range(5)]
+    _nl2sql_by_question(monkeypatch, {q: sql for q in questions})
+    built = []
+    original = batch._build_state
+    monkeypatch.setattr(batch, "_build_state", lambda *args: built.append(args) or original(*args))
+
+    results = ask_batch(questions, "202508")
+
+    assert len(built) == 1
+    assert [r["error"] for r in results] == [False] * 5
+
+
+@pytest.mark.asyncio
+async def test_batch_concurrency_is_bounded(monkeypatch, endpoint_path):
+    """동시에 실행되는 질문 수는 max_concurrency를 넘지 않음"""
+    sql = f"SELECT sum(cost) AS total_cost FROM read_parquet('{endpoint_path}');"
+    questions = [f"질문 {i}" for i in range(8)]
+    inflight = {}
+    _nl2sql_by_question(monkeypatch, {q: sql for q in questions}, inflight)
+
+    results = await ask_batch_async(questions, "202508", max_concurrency=3)
+
+    assert len(results) == 8
+    assert 1 < inflight["max"] <= 3
+
+
+@pytest.mark.asyncio
+async def test_batch_summaries_in_one_call(monkeypatch, endpoint_path):
+    """LLM 요약이 필요한 결과는 모아서 한 번의 호출로 요약, 빠진 항목은 개별 요약"""
+    sql = f"SELECT * FROM read_parquet('{endpoint_path}');"
+    questions = ["Endpoint 내역 A", "Endpoint 내역 B", "Endpoint 내역 C"]
+    _nl2sql_by_question(monkeypatch, {q: sql for q in questions})
+    batch_calls, single_calls = [], []
+
+    def _batch(inputs):
+        items = json.loads(inputs["items"])
+        batch_calls.append(items)
+        # 마지막 항목은 일부러 누락
+        return [{"id": item["id"], "answer": f"요약 {item['question']}"} for item in items[:-1]]
+
+    def _single(inputs):
+        single_calls.append(inputs["question"])
+        return "개별 요약"
+
+    monkeypatch.setattr(summary, "_BATCH_SUMMARY_CHAIN", RunnableLambda(_batch))
+    monkeypatch.setattr(summary, "_SUMMARY_CHAIN", RunnableLambda(_single))
+
+    results = await ask_batch_async(questions, "202508", batch_summaries=True, summary_batch_size=5)
+
+    assert len(batch_calls) == 1 and len(batch_calls[0]) == 3
+    assert [r["answer"] for r in results] == ["요약 Endpoint 내역 A", "요약 Endpoint 내역 B", "개별 요약"]
+    assert [r["answer_source"] for r in results] == ["llm_batch", "llm_batch", "llm"]
+    assert single_calls == ["Endpoint 내역 C"]
+
+
+def test_batch_reports_per_question_errors(monkeypatch, endpoint_path):
+    """없는 월이면 모든 질문이 오류 응답 (예외 전파 없음)"""
+    results = ask_batch(["총 비용", "총 사용 시간"], "209901")
+    assert [r["error"] for r in results] == [True, True]
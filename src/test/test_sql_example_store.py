@@ -0,0 +1,75 @@
+"""
+NL2SQL few-shot 예시 저장소 테스트: 로컬 벡터 검색, 확정 예시 추가, 프롬프트 삽입
+"""
+
+import json
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.agent.sql_agent import nl2sql, example_store
+from src.agent.sql_agent.example_store import SQLExampleStore, SEED_EXAMPLES_PATH, format_examples
+from src.agent.sql_agent.guardrails import parse_select, check_ast, SQLGuardrailError
+from src.utils.text_vector import embed_text, top_k_similar, embed_texts
+from src.core.semantic_layer import SEMANTIC_VIEW_NAMES, MONTH_RANGE_VIEW_NAMES
+
+
+def test_embedding_similarity():
+    """문자 n-gram 임베딩은 띄어쓰기/조사 변형에 강하고 정규화되어 있음"""
+    a = embed_text("이번달 총비용은?")
+    b = embed_text("이번 달 총 비용")
+    c = embed_text("Endpoint 사용 시간")
+    assert abs(float(a @ a) - 1.0) < 1e-5
+    assert float(a @ b) > float(a @ c)
+    assert top_k_similar(a, embed_texts(["Endpoint 사용 시간", "이번 달 총 비용"]), 1)[0][0] == 1
+
+
+def test_seed_examples_pass_guardrails():
+    """시드 예시 SQL은 모두 가드레일을 통과"""
+    for ex in json.loads(SEED_EXAMPLES_PATH.read_text(encoding="utf-8")):
+        check_ast(parse_select(ex["sql"]), ["data/processed"], SEMANTIC_VIEW_NAMES | MONTH_RANGE_VIEW_NAMES)
+
+
+@pytest.mark.parametrize("question, table", [
+    ("노트북 인스턴스별 비용 보여줘", "agg_notebook_hours"),
+    ("스팟 인스턴스 비중은?", "v_spot_share"),
+    ("계정별 트레이닝 비용", "agg_training_cost"),
+])
+def test_search_picks_matching_table(question, table):
+    """한글 음차 표현도 같은 agg 테이블 예시를 찾음"""
+    store = SQLExampleStore(confirmed_path=None)
+    top = store.search(question, k=3)[0]
+    assert table in top["sql"]
+
+
+def test_add_confirmed_example(tmp_path):
+    """확정 예시는 JSONL로 저장되어 재시작 후에도 검색되고, 같은 질문은 덮어씀"""
+    path = tmp_path / "examples.jsonl"
+    store = SQLExampleStore(seed_path=None, confirmed_path=str(path))
+    base_dir = "/srv/data/processed/202508"
+    store.add("GPU 인스턴스 비용", f"SELECT SUM(cost) AS cost FROM read_parquet('{base_dir}/agg_training_cost.parquet')", base_dir)
+    store.add("GPU 인스턴스 비용", "SELECT 1 AS cost", base_dir)
+
+    reloaded = SQLExampleStore(seed_path=None, confirmed_path=str(path))
+    assert len(reloaded) == 1
+    assert reloaded.search("GPU 인스턴스 비용")[0]["sql"] == "SELECT 1 AS cost"
+    assert "data/processed/latest/agg_training_cost.parquet" in path.read_text(encoding="utf-8").splitlines()[0]
+
+    with pytest.raises(SQLGuardrailError):
+        store.add("삭제", "DROP TABLE x")
+
+
+def test_examples_inserted_into_prompt(monkeypatch):
+    """generate_sql은 유사 예시 top-k를 프롬프트 입력으로 전달"""
+    captured = {}
+
+    def _respond(inputs):
+        captured.update(inputs)
+        return "SELECT 1;"
+
+    monkeypatch.setattr(nl2sql, "_NL2SQL_CHAIN", RunnableLambda(_respond))
+    monkeypatch.setattr(example_store, "_EXAMPLE_STORE", SQLExampleStore(confirmed_path=None))
+
+    nl2sql.generate_sql("스토리지 비용 얼마야?", "{}", "data/processed/202508")
+    assert "agg_storage_cost.parquet" in captured["examples"]
+    assert format_examples([]) == ""
@@ -0,0 +1,123 @@
+"""
+SQL Executor 테스트: 지연 평가 QueryResult, DuckDB 집계 요약, 페이지 조회, Arrow 전달
+"""
+
+import json
+
+import duckdb
+import pandas as pd
+import pytest
+
+from src.agent.sql_agent import executor
+from src.agent.sql_agent.executor import QueryResult, execute_safe_sql, fetch_result_page
+
+pytestmark = pytest.mark.usefixtures("result_cache")
+
+
+def test_numeric_summary_matches_pandas(tmp_path, make_fact):
+    """DuckDB 단일 집계 결과가 pandas 계산과 일치"""
+    base_dir, path = make_fact(tmp_path / "202508")
+    sql = f"SELECT resource_id, cost, hours FROM read_parquet('{path}')"
+
+    with execute_safe_sql(sql, base_dir=base_dir) as result:
+        summary = result.numeric_summary()
+        assert result.row_count() == 1000
+        assert result.columns == ["resource_id", "cost", "hours"]
+        assert set(summary) == {"cost", "hours"}
+
+    df = duckdb.sql(sql).df()
+    for col in ("cost", "hours"):
+        assert abs(summary[col]["sum"] - float(df[col].sum())) < 1e-6
+        assert abs(summary[col]["mean"] - float(df[col].mean())) < 1e-6
+        assert summary[col]["min"] == float(df[col].min())
+        assert summary[col]["max"] == float(df[col].max())
+
+
+def test_empty_result_summary(tmp_path, make_fact):
+    """빈 결과는 0 행, 0.0 통계"""
+    base_dir, path = make_fact(tmp_path / "202508")
+    sql = f"SELECT cost FROM read_parquet('{path}') WHERE cost < 0"
+    with execute_safe_sql(sql, base_dir=base_dir) as result:
+        assert result.row_count() == 0
+        assert result.sample_rows() == []
+        assert result.numeric_summary() == {"cost": {"sum": 0.0, "mean": 0.0, "min": 0.0, "max": 0.0}}
+
+
+def test_sample_and_pagination(tmp_path, make_fact):
+    """샘플은 LIMIT, 페이지는 LIMIT/OFFSET으로 조회"""
+    base_dir, path = make_fact(tmp_path / "202508")
+    sql = f"SELECT id FROM read_parquet('{path}') ORDER BY id"
+
+    with execute_safe_sql(sql, base_dir=base_dir) as result:
+        assert [r["id"] for r in result.sample_rows(5)] == [0, 1, 2, 3, 4]
+
+    page = fetch_result_page(sql, page=2, page_size=10, base_dir=base_dir)
+    assert page["id"].tolist() == list(range(20, 30))
+
+
+def test_small_results_cached_large_results_lazy(tmp_path, monkeypatch, result_cache, make_fact):
+    """작은 결과만 전체를 가져와 캐시하고, 큰 결과는 지연 평가 유지"""
+    base_dir, path = make_fact(tmp_path / "202508")
+    cache = result_cache
+    monkeypatch.setattr(executor, "RESULT_CACHE_MAX_ROWS", 100)
+
+    small_sql = f"SELECT hours, sum(cost) AS cost FROM read_parquet('{path}') GROUP BY hours"
+    with execute_safe_sql(small_sql, base_dir=base_dir) as first:
+        assert not first.cached
+    with execute_safe_sql(small_sql, base_dir=base_dir) as second:
+        assert second.cached
+        assert second.row_count() == 7
+
+    large_sql = f"SELECT * FROM read_parquet('{path}')"
+    with execute_safe_sql(large_sql, base_dir=base_dir) as large:
+        assert large.row_count() == 1000
+    assert cache.stats()["entries"] == 1
+
+
+def test_from_dataframe_compat():
+    """기존 DataFrame 입력도 QueryResult로 감싸 동일하게 요약"""
+    df = pd.DataFrame({"service": ["a", "b"], "cost": [1.5, 2.5]})
+    with QueryResult.from_dataframe("SELECT 1", df) as result:
+        assert result.row_count() == 2
+        assert result.numeric_summary()["cost"]["sum"] == 4.0
+
+
+def test_cached_result_samples_are_zero_copy(tmp_path, make_fact):
+    """캐시된(Arrow) 결과의 샘플/페이지는 같은 버퍼를 가리키는 slice"""
+    base_dir, path = make_fact(tmp_path / "202508")
+    sql = f"SELECT id, resource_id FROM read_parquet('{path}') ORDER BY id LIMIT 50"
+
+    with execute_safe_sql(sql, base_dir=base_dir):
+        pass
+    with execute_safe_sql(sql, base_dir=base_dir) as result:
+        assert result.cached
+        page = result.fetch_page_arrow(offset=10, limit=5)
+        source = result._table.column("id").chunk(0)
+        assert page.column("id").chunk(0).buffers()[1].address == source.buffers()[1].address
+        assert page.column("id").to_pylist() == list(range(10, 15))
+        assert result.sample_rows(2) == [{"id": 0, "resource_id": "res-0"},
+                                         {"id": 1, "resource_id": "res-1"}]
+
+
+def test_record_batches_respect_max_rows(tmp_path, make_fact):
+    """RecordBatchReader는 max_rows까지만 batch_size 단위로 전달"""
+    base_dir, path = make_fact(tmp_path / "202508")
+    sql = f"SELECT id FROM read_parquet('{path}')"
+
+    with execute_safe_sql(sql, base_dir=base_dir, max_rows=250) as result:
+        reader = result.record_batches(batch_size=100)
+        sizes = [batch.num_rows for batch in reader]
+    assert sum(sizes) == 250
+    assert max(sizes) <= 100
+
+
+def test_sample_rows_keep_native_types_for_prompt(tmp_path, make_fact):
+    """샘플 행은 DECIMAL/DATE를 파이썬 값으로 유지하고 프롬프트 JSON에서만 변환"""
+    from src.agent.sql_agent.summary import _sample_for_prompt
+
+    base_dir, _ = make_fact(tmp_path / "202508")
+    sql = "SELECT 12.50::DECIMAL(10,2) AS cost, DATE '2025-08-01' AS usage_date"
+    with execute_safe_sql(sql, base_dir=base_dir) as result:
+        rows = result.sample_rows(1)
+
+    assert json.loads(_sample_for_prompt(rows)) == [{"cost": 12.5, "usage_date": "2025-08-01"}]
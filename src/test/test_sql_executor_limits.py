@@ -0,0 +1,117 @@
+"""
+SQL 실행 한도 테스트: 제한 시간(interrupt watchdog), 메모리 한도, 최대 행 수, 취소
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.agent.sql_agent import executor
+from src.agent.sql_agent.executor import (
+    QueryResult, QueryTimeoutError, QueryMemoryError, QueryCancelledError,
+    execute_safe_sql, run_sql,
+)
+from src.agent.sql_agent.summary import summarize_error
+
+pytestmark = pytest.mark.usefixtures("result_cache")
+
+# 의도적으로 느린 쿼리: 동등 조건이 없는 self join → nested loop (수십억 번 비교)
+SLOW_SQL = "SELECT count(*) FROM range(200000) a, range(200000) b WHERE a.range * 7 + b.range = -1"
+
+
+def test_timeout_interrupts_slow_query():
+    """제한 시간이 지나면 watchdog이 interrupt()로 중단하고 연결은 재사용 가능"""
+    started = time.monotonic()
+    with QueryResult.from_sql(SLOW_SQL, timeout=0.5) as result:
+        with pytest.raises(QueryTimeoutError) as exc_info:
+            result.row_count()
+        assert exc_info.value.limit == 0.5
+        assert exc_info.value.kind == "timeout"
+    assert time.monotonic() - started < 10
+
+
+def test_timeout_budget_is_shared_across_calls():
+    """제한 시간은 결과 생성 시점부터의 전체 예산"""
+    with QueryResult.from_sql("SELECT 1 AS x", timeout=0.05) as result:
+        time.sleep(0.1)
+        with pytest.raises(QueryTimeoutError):
+            result.sample_rows()
+
+
+def test_memory_limit(monkeypatch):
+    """메모리 한도를 넘는 쿼리는 QueryMemoryError"""
+    monkeypatch.setattr(executor, "QUERY_MEMORY_LIMIT", "20MB")
+    sql = "SELECT length(string_agg(repeat('x', 1000), '')) AS n FROM range(1000000)"
+    with pytest.raises(QueryMemoryError) as exc_info:
+        run_sql(sql)
+    assert exc_info.value.limit == "20MB"
+
+
+def test_max_rows_truncation(tmp_path, make_fact):
+    """max_rows를 넘는 결과는 LIMIT으로 잘리고 truncated로 표시"""
+    base_dir, path = make_fact(tmp_path / "202508")
+    sql = f"SELECT * FROM read_parquet('{path}')"
+
+    with execute_safe_sql(sql, base_dir=base_dir, max_rows=100) as result:
+        assert result.row_count() == 100
+        assert result.truncated
+        assert len(result.df()) == 100
+
+    with execute_safe_sql(sql, base_dir=base_dir) as result:
+        assert result.row_count() == 1000
+        assert not result.truncated
+
+
+@pytest.mark.parametrize("max_rows,truncated", [(1000, False), (999, True)])
+def test_exact_max_rows_is_not_truncated(tmp_path, monkeypatch, max_rows, truncated, make_fact):
+    """정확히 max_rows행인 결과는 잘린 것이 아님 (캐시/비캐시 경로 모두, 재조회해도 동일)"""
+    base_dir, path = make_fact(tmp_path / "202508")
+    sql = f"SELECT * FROM read_parquet('{path}')"
+
+    for _ in range(2):
+        with execute_safe_sql(sql, base_dir=base_dir, max_rows=max_rows) as result:
+            assert result.row_count() == max_rows
+            assert result.truncated is truncated
+            assert len(result.arrow()) == max_rows
+    monkeypatch.setattr(executor, "CACHE_ENABLED", False)
+    with execute_safe_sql(sql, base_dir=base_dir, max_rows=max_rows) as result:
+        assert not result.cached
+        assert result.truncated is truncated
+        assert result.row_count() == max_rows
+
+
+def test_cancel_from_another_thread():
+    """다른 스레드에서 cancel()하면 실행 중인 조회가 QueryCancelledError로 중단"""
+    errors = []
+    with QueryResult.from_sql(SLOW_SQL, timeout=60) as result:
+        def _run():
+            try:
+                result.row_count()
+            except Exception as e:
+                errors.append(e)
+
+        worker = threading.Thread(target=_run)
+        worker.start()
+        time.sleep(0.3)
+        result.cancel()
+        worker.join(timeout=10)
+
+    assert not worker.is_alive()
+    assert len(errors) == 1 and isinstance(errors[0], QueryCancelledError)
+
+
+def test_summarize_error_explains_limits():
+    """summarize_error는 중단 사유(error_type)와 한도를 설명"""
+    timeout = summarize_error("비용 알려줘", QueryTimeoutError("시간 초과", limit=30.0, elapsed_sec=30.1))
+    assert timeout["error_type"] == "timeout"
+    assert timeout["error_limit"] == 30.0
+    assert "30초" in timeout["answer"]
+
+    memory = summarize_error("비용 알려줘", QueryMemoryError("메모리 초과", limit="1GB"))
+    assert memory["error_type"] == "memory"
+    assert "1GB" in memory["answer"]
+
+    generic = summarize_error("비용 알려줘", RuntimeError("boom"))
+    assert generic["error_type"] == "execution"
+    assert "boom" in generic["answer"]
@@ -0,0 +1,129 @@
+"""
+SQL 가드레일 테스트: 파서 기반 검증, 경로 제한, EXPLAIN 비용 점검, LIMIT 주입
+"""
+
+import duckdb
+import pytest
+
+from src.agent.sql_agent import executor
+from src.agent.sql_agent.executor import execute_safe_sql, validate_sql
+from src.agent.sql_agent.guardrails import (
+    SQLGuardrailError, guard_sql, check_estimated_cost, estimate_cardinality,
+)
+from src.agent.sql_agent.result_cache import ResultCache
+
+
+@pytest.fixture
+def base_dir(tmp_path, monkeypatch):
+    """테스트용 데이터 디렉토리 (fact 1,000행)"""
+    d = tmp_path / "processed" / "202508"
+    d.mkdir(parents=True)
+    duckdb.execute(
+        f"COPY (SELECT range AS id, range * 0.5 AS cost, now() AS created_at FROM range(1000)) "
+        f"TO '{d / 'fact_sagemaker_costs.parquet'}'"
+    )
+    monkeypatch.setattr(executor, "get_result_cache", lambda: ResultCache(cache_dir=None))
+    return str(d)
+
+
+def _fact(base_dir):
+    return f"read_parquet('{base_dir}/fact_sagemaker_costs.parquet')"
+
+
+def test_column_names_with_keywords_allowed(base_dir):
+    """created_at, updated 같은 컬럼명은 CREATE/UPDATE로 오인되지 않음"""
+    sql = f"SELECT max(created_at) AS last_created_at FROM {_fact(base_dir)}"
+    assert guard_sql(sql, [base_dir])
+    assert validate_sql(sql, [base_dir])
+
+
+@pytest.mark.parametrize("sql", [
+    "INSERT INTO t VALUES (1)",
+    "DROP TABLE t",
+    "COPY (SELECT 1) TO '/tmp/x.csv'",
+    "ATTACH '/tmp/x.db'",
+    "PRAGMA version",
+    "SELECT 1; DROP TABLE t",
+])
+def test_non_select_rejected(sql, base_dir):
+    """SELECT 이외의 문장, 다중 문장 차단"""
+    with pytest.raises(SQLGuardrailError):
+        guard_sql(sql, [base_dir])
+
+
+def test_paths_restricted_to_active_dir(base_dir, tmp_path):
+    """read_parquet 경로는 활성 base_dir 내부만 허용"""
+    outside = tmp_path / "other.parquet"
+    duckdb.execute(f"COPY (SELECT 1 AS a) TO '{outside}'")
+    with pytest.raises(SQLGuardrailError, match="밖의 파일"):
+        guard_sql(f"SELECT * FROM read_parquet('{outside}')", [base_dir])
+    with pytest.raises(SQLGuardrailError, match="밖의 파일"):
+        guard_sql(f"SELECT * FROM read_parquet('{base_dir}/../../other.parquet')", [base_dir])
+    with pytest.raises(SQLGuardrailError, match="테이블 참조"):
+        guard_sql(f"SELECT * FROM '{outside}'", [base_dir])
+
+
+def test_disallowed_functions_rejected(base_dir):
+    """허용 목록 밖의 함수/테이블 함수 차단"""
+    with pytest.raises(SQLGuardrailError, match="테이블 함수"):
+        guard_sql("SELECT * FROM read_csv('/etc/passwd')", [base_dir])
+    with pytest.raises(SQLGuardrailError, match="함수"):
+        guard_sql("SELECT getenv('OPENAI_API_KEY')", [base_dir])
+
+
+def test_window_functions_checked(base_dir):
+    """OVER 절의 윈도우 식도 허용 목록으로 검사 (WINDOW 노드)"""
+    assert guard_sql(f"SELECT id, sum(cost) OVER (ORDER BY id), row_number() OVER () FROM {_fact(base_dir)}",
+                     [base_dir])
+    with pytest.raises(SQLGuardrailError, match="윈도우 함수: kurtosis"):
+        guard_sql(f"SELECT kurtosis(cost) OVER () FROM {_fact(base_dir)}", [base_dir])
+
+
+def test_cte_and_allowed_tables(base_dir):
+    """CTE 이름과 허용된 뷰 이름은 참조 가능"""
+    sql = f"WITH c AS (SELECT cost FROM {_fact(base_dir)}) SELECT sum(cost) FROM c"
+    assert guard_sql(sql, [base_dir])
+    guard_sql("SELECT * FROM sagemaker_costs", [base_dir], allowed_tables={"sagemaker_costs"})
+    with pytest.raises(SQLGuardrailError):
+        guard_sql("SELECT * FROM sagemaker_costs", [base_dir])
+
+
+def test_cte_name_scoped_to_its_query(base_dir, tmp_path):
+    """하위 쿼리의 CTE 이름으로 바깥 FROM의 파일 경로를 가릴 수 없음"""
+    secret = tmp_path / "secret.csv"
+    secret.write_text("token\nabc\n")
+    shadowed = f"SELECT * FROM '{secret}' WHERE EXISTS (WITH \"{secret}\" AS (SELECT 1) SELECT 1)"
+    with pytest.raises(SQLGuardrailError, match="테이블 참조"):
+        guard_sql(shadowed, [base_dir])
+    with pytest.raises(SQLGuardrailError):
+        execute_safe_sql(shadowed, base_dir=base_dir)
+    # 경로처럼 보이는 이름은 자기 범위의 CTE여도 거부
+    with pytest.raises(SQLGuardrailError, match="테이블 참조"):
+        guard_sql('WITH "x.csv" AS (SELECT 1 AS a) SELECT a FROM "x.csv"', [base_dir])
+    # 하위 쿼리 안에서 자기 CTE 참조는 허용
+    nested = f"SELECT (WITH c AS (SELECT cost FROM {_fact(base_dir)}) SELECT sum(cost) FROM c) AS total"
+    assert guard_sql(nested, [base_dir])
+
+
+def test_limit_injection(base_dir):
+    """LIMIT이 없거나 너무 크면 주입, 작은 LIMIT은 유지"""
+    plain = f"SELECT id FROM {_fact(base_dir)};"
+    assert guard_sql(plain, [base_dir], max_rows=100).endswith("LIMIT 100")
+    small = f"SELECT id FROM {_fact(base_dir)} LIMIT 5"
+    assert guard_sql(small, [base_dir], max_rows=100) == small
+    large = f"SELECT id FROM {_fact(base_dir)} LIMIT 100000000"
+    assert guard_sql(large, [base_dir], max_rows=100).endswith("LIMIT 100")
+
+    with execute_safe_sql(plain, base_dir=base_dir) as result:
+        assert result.row_count() == 1000
+
+
+def test_cross_join_blocked_by_estimate(base_dir):
+    """cross join 폭주는 EXPLAIN 추정 카디널리티로 실행 전에 차단"""
+    sql = f"SELECT count(*) FROM {_fact(base_dir)} a, {_fact(base_dir)} b, {_fact(base_dir)} c"
+    con = duckdb.connect()
+    assert estimate_cardinality(con, sql) >= 1000 ** 3
+    with pytest.raises(SQLGuardrailError, match="예상 처리 행 수"):
+        check_estimated_cost(con, sql, max_estimated_rows=10_000_000)
+    with pytest.raises(SQLGuardrailError):
+        execute_safe_sql(sql, base_dir=base_dir)
@@ -0,0 +1,106 @@
+"""
+여러 달 질의 테스트: 기간 표현 해석, 월 범위 논리 테이블(cur_*), 그래프 연동
+"""
+
+import json
+
+import duckdb
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.agent.sql_agent import graph, nl2sql
+from src.agent.sql_agent.executor import execute_safe_sql
+from src.agent.sql_agent.guardrails import SQLGuardrailError
+from src.agent.sql_agent.month_range import parse_month_range
+from src.core.semantic_layer import register_month_range_views, get_month_range_schema
+
+pytestmark = pytest.mark.usefixtures("result_cache")
+
+MONTHS = ["202505", "202506", "202507", "202508"]
+
+
+@pytest.fixture
+def data_root(tmp_path):
+    """월별 fact/monthly_summary parquet 생성 (202505는 읽으면 실패하는 손상 파일)"""
+    for i, ym in enumerate(MONTHS):
+        base = tmp_path / ym
+        base.mkdir()
+        if ym == "202505":
+            (base / "fact_sagemaker_costs.parquet").write_bytes(b"not a parquet")
+            (base / "monthly_summary.parquet").write_bytes(b"not a parquet")
+            continue
+        duckdb.execute(
+            f"COPY (SELECT '{ym}' AS billing_ym, range * {i} AS lineitem_unblendedcost FROM range(5)) "
+            f"TO '{base / 'fact_sagemaker_costs.parquet'}'"
+        )
+        duckdb.execute(
+            f"COPY (SELECT '{ym}' AS billing_ym, {i * 10}.0 AS unblended_cost, {i * 10}.0 AS blended_cost) "
+            f"TO '{base / 'monthly_summary.parquet'}'"
+        )
+        (base / "manifest.json").write_text(json.dumps({"billing_ym": ym}))
+    return tmp_path
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("최근 3개월 비용 추이", ["202506", "202507", "202508"]),
+    ("지난 두 달 동안 비용", ["202507", "202508"]),
+    ("3개월간 Endpoint 비용", ["202506", "202507", "202508"]),
+    ("최근 분기 비용", ["202506", "202507", "202508"]),
+    ("최근 1년 비용", MONTHS),
+    ("2025년 6월부터 7월까지 비용", ["202506", "202507"]),
+    ("202506~202507 비용", ["202506", "202507"]),
+    ("2025-07 ~ 2025-08 비교", ["202507", "202508"]),
+    ("이번달 총비용", None),
+    ("2024년 1월부터 3월까지", None),
+    ("2025년 6월부터 2025년 8월까지", ["202506", "202507", "202508"]),
+    # 끝에 "월"이 없는 숫자는 월이 아님 (단일 월 질문)
+    ("2025년 8월에서 10개 계정의 비용", None),
+])
+def test_parse_month_range(question, expected):
+    """기간 표현 → 사용 가능한 월 목록 (없으면 None)"""
+    assert parse_month_range(question, MONTHS) == expected
+
+
+def test_month_range_views_read_only_requested_months(data_root):
+    """논리 테이블은 요청한 월의 파일만 읽음 (손상된 202505를 포함하지 않으면 성공)"""
+    month_dirs = [str(data_root / ym) for ym in ["202506", "202507", "202508"]]
+    con = duckdb.connect()
+    assert sorted(register_month_range_views(con, month_dirs)) == ["cur_costs", "cur_monthly"]
+    rows = con.execute("SELECT billing_ym, unblended_cost FROM cur_monthly ORDER BY billing_ym").fetchall()
+    assert rows == [("202506", 10.0), ("202507", 20.0), ("202508", 30.0)]
+    assert con.execute("SELECT count(DISTINCT billing_ym) FROM cur_costs").fetchone()[0] == 3
+    con.close()
+
+    assert get_month_range_schema(month_dirs)["cur_monthly"] == ["billing_ym", "unblended_cost", "blended_cost"]
+
+
+def test_execute_safe_sql_with_month_dirs(data_root):
+    """month_dirs를 주면 cur_* 참조 허용, 다른 월 경로는 가드레일에서 차단"""
+    month_dirs = [str(data_root / ym) for ym in ["202507", "202508"]]
+    with execute_safe_sql("SELECT sum(unblended_cost) AS total FROM cur_monthly", month_dirs=month_dirs) as result:
+        assert result.df()["total"].iloc[0] == 50.0
+
+    with pytest.raises(SQLGuardrailError):
+        execute_safe_sql(f"SELECT * FROM read_parquet('{data_root / '202506' / 'monthly_summary.parquet'}')",
+                         month_dirs=month_dirs)
+
+
+def test_ask_resolves_month_range(monkeypatch, data_root):
+    """기간 질문은 여러 달 모드로 NL2SQL에 논리 테이블 스키마를 전달하고 결과에 월 목록을 남김"""
+    calls = []
+
+    def _respond(inputs):
+        calls.append(inputs)
+        return "SELECT billing_ym, unblended_cost FROM cur_monthly ORDER BY billing_ym;"
+
+    monkeypatch.setattr(nl2sql, "_NL2SQL_CHAIN", RunnableLambda(_respond))
+    monkeypatch.setattr(graph, "DATA_ROOT", str(data_root))
+    monkeypatch.setattr(graph, "list_processed_months", lambda: MONTHS)
+
+    result = graph.ask("최근 3개월 비용 추이 보여줘")
+
+    assert result["error"] is False
+    assert result["months"] == ["202506", "202507", "202508"]
+    assert result["row_count"] == 3
+    assert set(json.loads(calls[0]["schema_json"])) == {"cur_costs", "cur_monthly"}
+    assert "202506~202508" in calls[0]["semantic_views"]
@@ -0,0 +1,116 @@
+"""
+SQL Agent 사전 준비(prefetch) 테스트: 상태 재사용, 취소, 라우터 연동
+"""
+
+import json
+import threading
+from concurrent.futures import wait
+
+import duckdb
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+import src.agent.sql_agent as sql_agent
+from src.agent.router import graph as router_graph
+from src.agent.general_agent import graph as general_graph
+from src.agent.sql_agent import graph, nl2sql, prefetch, schema_provider
+
+pytestmark = pytest.mark.usefixtures("result_cache")
+
+
+@pytest.fixture
+def data_root(tmp_path, monkeypatch):
+    base = tmp_path / "202508"
+    base.mkdir()
+    duckdb.execute(
+        f"COPY (SELECT range AS hours, range * 0.5 AS cost FROM range(10)) "
+        f"TO '{base / 'agg_endpoint_hours.parquet'}'"
+    )
+    (base / "manifest.json").write_text(json.dumps({"billing_ym": "202508"}))
+    monkeypatch.setattr(schema_provider, "DATA_ROOT", str(tmp_path))
+    return tmp_path
+
+
+class _FakeHandle:
+    def __init__(self, question):
+        self.question = question
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def test_ask_reuses_prefetched_state(monkeypatch, data_root):
+    """같은 질문/월의 사전 준비 상태가 있으면 상태를 다시 만들지 않음"""
+    path = data_root / "202508" / "agg_endpoint_hours.parquet"
+    monkeypatch.setattr(nl2sql, "_NL2SQL_CHAIN",
+                        RunnableLambda(lambda _: f"SELECT sum(cost) AS total_cost FROM read_parquet('{path}');"))
+
+    handle = prefetch.start_prefetch("Endpoint 총 비용", "202508")
+    assert "agg_endpoint_hours.parquet" in handle.state(timeout=10)["schema_json"]
+    assert handle.elapsed_sec is not None
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("prefetch 상태를 재사용해야 함")
+
+    monkeypatch.setattr(graph, "_build_state", _fail)
+    result = graph.ask("Endpoint 총 비용", "202508", prefetch=handle)
+    assert result["error"] is False
+    assert "22.50 USD" in result["answer"]
+
+
+def test_cancel_stops_prefetch_between_steps(monkeypatch, data_root):
+    """실행 중 취소하면 다음 단계(시맨틱 뷰/예시 준비)를 실행하지 않음"""
+    started, release, later_steps = threading.Event(), threading.Event(), []
+
+    def _slow_build_state(question, month):
+        started.set()
+        release.wait(10)
+        return {"base_dir": str(data_root / "202508")}
+
+    monkeypatch.setattr(prefetch, "_build_state", _slow_build_state)
+    monkeypatch.setattr(prefetch, "describe_semantic_views", lambda base_dir: later_steps.append(base_dir))
+
+    handle = prefetch.start_prefetch("Endpoint 총 비용")
+    assert started.wait(10)
+    handle.cancel()
+    release.set()
+    wait([handle._future], timeout=10)
+
+    assert handle.cancelled
+    assert handle.state() is None
+    assert later_steps == []
+
+
+def test_ask_falls_back_when_prefetch_does_not_match(monkeypatch, data_root):
+    """다른 질문/월의 사전 준비나 실패한 준비는 무시하고 상태를 새로 구성"""
+    handle = prefetch.start_prefetch("다른 질문", "209901")
+    assert handle.state(timeout=10) is None  # 없는 월 → 실패
+
+    monkeypatch.setattr(nl2sql, "_NL2SQL_CHAIN", RunnableLambda(lambda _: "SELECT 1 AS x;"))
+    result = graph.ask("Endpoint 총 비용", "202508", prefetch=handle)
+    assert result["error"] is False
+
+
+@pytest.mark.parametrize("intent, cancelled", [("sql", False), ("general", True)])
+def test_router_prefetch_follows_intent(monkeypatch, intent, cancelled):
+    """라우터는 분류 전에 사전 준비를 시작하고, 의도가 sql이 아니면 취소"""
+    handles, sql_calls = [], []
+
+    def _start(question):
+        handles.append(_FakeHandle(question))
+        return handles[-1]
+
+    monkeypatch.setattr(router_graph, "PREFETCHERS", {"sql": _start})
+    monkeypatch.setattr(router_graph, "get_response_cache", lambda: None)
+    monkeypatch.setattr(router_graph, "classify_intent",
+                        lambda q: {"intent": intent, "confidence": 1.0, "reason": "test"})
+    monkeypatch.setattr(sql_agent, "ask", lambda q, prefetch=None: sql_calls.append(prefetch) or {"answer": "sql"})
+    monkeypatch.setattr(general_graph, "ask", lambda q: {"answer": "general"})
+
+    result = router_graph.ask("이번달 비용")
+
+    assert result["answer"] == intent
+    assert handles[0].question == "이번달 비용"
+    assert handles[0].cancelled is cancelled
+    assert sql_calls == ([handles[0]] if intent == "sql" else [])
@@ -0,0 +1,195 @@
+"""
+SQL 자가 수정 루프 테스트: 오류 분류, 스키마 축소, 제한된 repair 시도, 분류별 성공률
+"""
+
+import json
+import asyncio
+import time
+
+import duckdb
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.agent.sql_agent import nl2sql, repair
+from src.agent.sql_agent.executor import QueryTimeoutError
+from src.agent.sql_agent.graph import SQL_GRAPH
+from src.agent.sql_agent.guardrails import SQLGuardrailError
+from src.agent.sql_agent.repair import classify_error, prune_schema, get_repair_stats
+from src.agent.sql_agent.schema_provider import get_schema_json
+
+
+@pytest.fixture(autouse=True)
+def _isolated(result_cache):
+    """테스트 전용 결과 캐시 + 통계 초기화"""
+    get_repair_stats().reset()
+    yield
+    get_repair_stats().reset()
+
+
+@pytest.fixture
+def base_dir(tmp_path):
+    base = tmp_path / "202508"
+    base.mkdir()
+    duckdb.execute(
+        f"COPY (SELECT range AS id, range * 0.5 AS cost FROM range(10)) "
+        f"TO '{base / 'fact_sagemaker_costs.parquet'}'"
+    )
+    duckdb.execute(f"COPY (SELECT 1.0 AS total_cost) TO '{base / 'monthly_summary.parquet'}'")
+    (base / "manifest.json").write_text(json.dumps({"billing_ym": "202508"}))
+    return str(base)
+
+
+def _fake_chain(monkeypatch, module, name, outputs):
+    """체인 singleton을 정해진 SQL을 차례로 반환하는 가짜 체인으로 교체"""
+    calls = []
+
+    def _respond(inputs):
+        calls.append(inputs)
+        return outputs[min(len(calls), len(outputs)) - 1]
+
+    monkeypatch.setattr(module, name, RunnableLambda(_respond))
+    return calls
+
+
+def _run(question, base_dir):
+    return SQL_GRAPH.invoke({
+        "question": question,
+        "month": "202508",
+        "base_dir": base_dir,
+        "schema_json": get_schema_json(base_dir),
+        "source_files": [],
+    })["result"]
+
+
+def test_classify_error():
+    """DuckDB 오류 메시지/예외 타입별 분류"""
+    con = duckdb.connect()
+    with pytest.raises(duckdb.Error) as binder:
+        con.sql("SELECT foo FROM range(3)")
+    assert classify_error(RuntimeError(f"SQL 실행 오류: {binder.value}")) == "binder_column"
+    assert classify_error(RuntimeError("Catalog Error: Scalar Function with name x does not exist!")) == "catalog"
+    assert classify_error(RuntimeError('IO Error: No files found that match the pattern "a.parquet"')) == "missing_file"
+    assert classify_error(SQLGuardrailError("허용되지 않은 함수: read_csv")) == "guardrail"
+    assert classify_error(QueryTimeoutError("시간 초과", limit=1)) == "timeout"
+    assert classify_error(RuntimeError("boom")) == "other"
+
+
+def test_prune_schema_keeps_referenced_files(base_dir):
+    """실패한 SQL이 참조한 파일의 스키마만 남김"""
+    schema_json = get_schema_json(base_dir)
+    pruned = json.loads(prune_schema(schema_json, f"SELECT x FROM read_parquet('{base_dir}/monthly_summary.parquet')"))
+    assert list(pruned) == ["monthly_summary.parquet"]
+    assert prune_schema(schema_json, "SELECT 1") == schema_json
+
+
+def test_repair_fixes_binder_error(monkeypatch, base_dir):
+    """바인더 오류는 오류 메시지와 함께 repair 체인에 전달되어 수정 SQL로 재실행"""
+    path = f"{base_dir}/fact_sagemaker_costs.parquet"
+    _fake_chain(monkeypatch, nl2sql, "_NL2SQL_CHAIN", [f"SELECT sum(costs) AS total_cost FROM read_parquet('{path}');"])
+    repair_calls = _fake_chain(monkeypatch, repair, "_REPAIR_CHAIN", [f"SELECT sum(cost) AS total_cost FROM read_parquet('{path}');"])
+
+    result = _run("총 비용은?", base_dir)
+
+    assert result["error"] is False
+    assert result["repair_attempts"] == 1
+    assert "22.50 USD" in result["answer"]
+    assert "costs" in repair_calls[0]["error"]
+    assert list(json.loads(repair_calls[0]["schema_json"])) == ["fact_sagemaker_costs.parquet"]
+    assert get_repair_stats().snapshot()["binder_column"] == {"attempts": 1, "successes": 1, "success_rate": 1.0}
+
+
+def test_repair_keeps_conversation_context(monkeypatch, base_dir):
+    """후속 질문의 대화 맥락은 repair 프롬프트에도 질문 앞에 들어감 (sync/async 모두)"""
+    path = f"{base_dir}/fact_sagemaker_costs.parquet"
+    context = "[대화 맥락]\n기억된 조건: 서비스 Endpoint\n\n"
+    _fake_chain(monkeypatch, nl2sql, "_NL2SQL_CHAIN", [f"SELECT sum(costs) AS total_cost FROM read_parquet('{path}');"])
+    repair_calls = _fake_chain(monkeypatch, repair, "_REPAIR_CHAIN", [f"SELECT sum(cost) AS total_cost FROM read_parquet('{path}');"])
+    state = {
+        "question": "그럼 지난달은?",
+        "month": "202508",
+        "base_dir": base_dir,
+        "schema_json": get_schema_json(base_dir),
+        "source_files": [],
+        "conversation": context,
+    }
+
+    assert SQL_GRAPH.invoke(state)["result"]["error"] is False
+    assert asyncio.run(SQL_GRAPH.ainvoke(state))["result"]["error"] is False
+
+    assert [c["conversation"] for c in repair_calls] == [context, context]
+    assert repair.REPAIR_USER_TEMPLATE.format(**repair_calls[0]).startswith(context + "[질문]\n그럼 지난달은?")
+
+
+def test_repair_attempts_are_bounded(monkeypatch, base_dir):
+    """계속 실패하면 REPAIR_MAX_ATTEMPTS회 시도 후 오류 응답"""
+    bad_sql = f"SELECT nope FROM read_parquet('{base_dir}/fact_sagemaker_costs.parquet');"
+    _fake_chain(monkeypatch, nl2sql, "_NL2SQL_CHAIN", [bad_sql])
+    repair_calls = _fake_chain(monkeypatch, repair, "_REPAIR_CHAIN", [bad_sql])
+    monkeypatch.setattr("src.agent.sql_agent.graph.REPAIR_MAX_ATTEMPTS", 2)
+
+    result = _run("총 비용은?", base_dir)
+
+    assert result["error"] is True
+    assert result["repair_attempts"] == 2
+    assert len(repair_calls) == 2
+    stats = get_repair_stats().snapshot()["binder_column"]
+    assert stats["attempts"] == 2 and stats["success_rate"] == 0.0
+
+
+def _slow_chain(monkeypatch, delay, output):
+    """delay초 뒤에 정해진 SQL을 반환하는 느린 repair 체인"""
+    def _respond(inputs):
+        time.sleep(delay)
+        return output
+
+    async def _arespond(inputs):
+        await asyncio.sleep(delay)
+        return output
+
+    monkeypatch.setattr(repair, "_REPAIR_CHAIN", RunnableLambda(_respond, afunc=_arespond))
+
+
+def test_repair_stays_within_budget(monkeypatch, base_dir):
+    """늦게 시작한 repair도 남은 예산 안에서 끊김: LLM 호출과 수정 SQL 재실행 모두 (sync/async)"""
+    bad_sql = f"SELECT nope FROM read_parquet('{base_dir}/fact_sagemaker_costs.parquet');"
+    _fake_chain(monkeypatch, nl2sql, "_NL2SQL_CHAIN", [bad_sql])
+    monkeypatch.setattr("src.agent.sql_agent.graph.REPAIR_BUDGET_SEC", 0.5)
+    state = {"question": "총 비용은?", "month": "202508", "base_dir": base_dir,
+             "schema_json": get_schema_json(base_dir), "source_files": []}
+
+    # 느린 LLM: 예산이 지나면 수정 SQL 없이 원래 오류로 종료
+    _slow_chain(monkeypatch, 3.0, "SELECT 1;")
+    for run in (lambda: SQL_GRAPH.invoke(state), lambda: asyncio.run(SQL_GRAPH.ainvoke(state))):
+        started = time.monotonic()
+        result = run()["result"]
+        assert time.monotonic() - started < 2.0
+        assert result["error"] is True and result["repair_attempts"] == 0
+
+    # 빠른 LLM + 느린 수정 SQL: 재실행은 남은 예산을 제한 시간으로 사용
+    # 10행 팩트 테이블 9중 cross join → 10억 행 비교 (가드레일을 통과하는 느린 쿼리)
+    fact = f"read_parquet('{base_dir}/fact_sagemaker_costs.parquet')"
+    aliases = "abcdefghi"
+    slow_sql = (
+        "SELECT count(*) AS n FROM " + ", ".join(f"{fact} {a}" for a in aliases)
+        + " WHERE " + " + ".join(f"{a}.cost" for a in aliases) + " = -1;"
+    )
+    _slow_chain(monkeypatch, 0.0, slow_sql)
+    # 실행 전 비용 추정 검사는 건너뛰어 실제 실행 시간 제한으로만 끊기는지 확인
+    monkeypatch.setattr("src.agent.sql_agent.executor.check_estimated_cost", lambda con, sql: None)
+    started = time.monotonic()
+    result = SQL_GRAPH.invoke(state)["result"]
+    assert time.monotonic() - started < 2.0
+    assert result["error"] is True and result["repair_attempts"] == 1
+    assert result["error_type"] == "timeout"
+
+
+def test_no_repair_without_budget_or_for_unrepairable(monkeypatch, base_dir):
+    """지연 예산이 없거나 수정 불가 오류(제한 시간 등)는 바로 오류 응답"""
+    _fake_chain(monkeypatch, nl2sql, "_NL2SQL_CHAIN", [f"SELECT nope FROM read_parquet('{base_dir}/fact_sagemaker_costs.parquet');"])
+    repair_calls = _fake_chain(monkeypatch, repair, "_REPAIR_CHAIN", ["SELECT 1;"])
+    monkeypatch.setattr("src.agent.sql_agent.graph.REPAIR_BUDGET_SEC", 0)
+
+    result = _run("총 비용은?", base_dir)
+    assert result["error"] is True
+    assert result["repair_attempts"] == 0
+    assert repair_calls == []
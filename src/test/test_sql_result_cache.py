@@ -0,0 +1,130 @@
+"""
+SQL 결과 캐시 테스트: 정규화 키, 바이트 기준 LRU, 디스크 spill, 스냅샷 무효화
+"""
+
+import os
+import json
+
+import duckdb
+import pyarrow as pa
+
+from src.agent.sql_agent.result_cache import ResultCache, normalize_sql
+
+
+def _make_snapshot(base_dir, created_at: str = "2025-08-31T00:00:00"):
+    """테스트용 처리 데이터 디렉토리(parquet + manifest) 생성"""
+    base_dir.mkdir(parents=True, exist_ok=True)
+    duckdb.execute(
+        f"COPY (SELECT range AS id, range * 1.5 AS cost FROM range(100)) "
+        f"TO '{base_dir / 'fact_sagemaker_costs.parquet'}'"
+    )
+    (base_dir / "manifest.json").write_text(json.dumps({"billing_ym": "202508", "created_at": created_at}))
+    return str(base_dir)
+
+
+def _table(n: int) -> pa.Table:
+    return pa.table({"id": list(range(n)), "cost": [float(i) for i in range(n)]})
+
+
+def test_normalize_sql():
+    """공백/대소문자/세미콜론/주석은 무시하고 문자열 리터럴은 유지"""
+    a = "SELECT  SUM(cost)\nFROM t -- 합계\nWHERE pricing_type = 'Spot';"
+    b = "select sum(cost) from t where pricing_type = 'Spot'"
+    assert normalize_sql(a) == normalize_sql(b)
+    assert normalize_sql(b) != normalize_sql(b.replace("'Spot'", "'spot'"))
+
+
+def test_hit_after_put(tmp_path):
+    """같은 SQL은 정규화 후 동일 키로 조회"""
+    base_dir = _make_snapshot(tmp_path / "processed" / "202508")
+    cache = ResultCache(cache_dir=str(tmp_path / "cache"))
+
+    assert cache.get("SELECT 1", base_dir) is None
+    cache.put("SELECT 1", base_dir, _table(3))
+    assert cache.get("select   1;", base_dir).num_rows == 3
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_lru_by_bytes_spills_to_disk(tmp_path):
+    """메모리 한도를 넘으면 오래된 항목이 디스크로 밀려나고 다시 읽힌다"""
+    base_dir = _make_snapshot(tmp_path / "processed" / "202508")
+    one = _table(1000)
+    cache = ResultCache(max_memory_bytes=int(one.nbytes * 1.5), cache_dir=str(tmp_path / "cache"))
+
+    cache.put("SELECT 'a'", base_dir, one)
+    cache.put("SELECT 'b'", base_dir, _table(1000))
+
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["evictions"] == 1
+    assert stats["memory_bytes"] <= cache.max_memory_bytes
+    assert len(list((tmp_path / "cache").glob("*.arrow"))) == 1
+
+    restored = cache.get("SELECT 'a'", base_dir)
+    assert restored is not None and restored.equals(one)
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_invalidated_on_new_snapshot(tmp_path):
+    """ETL이 새 manifest를 게시하면 이전 스냅샷 항목은 메모리/디스크에서 제거"""
+    month_dir = tmp_path / "processed" / "202508"
+    base_dir = _make_snapshot(month_dir)
+    cache = ResultCache(max_memory_bytes=1, cache_dir=str(tmp_path / "cache"))
+
+    cache.put("SELECT 1", base_dir, _table(10))  # 한도 초과 → 디스크에만 저장
+    assert cache.get("SELECT 1", base_dir) is not None
+
+    _make_snapshot(month_dir, created_at="2025-09-01T00:00:00")
+    assert cache.get("SELECT 1", base_dir) is None
+    assert list((tmp_path / "cache").glob("*.arrow")) == []
+
+
+def test_restart_drops_stale_spills(tmp_path):
+    """재시작 후에도 이전 스냅샷의 spill 파일은 디렉토리를 처음 조회할 때 삭제"""
+    month_dir = tmp_path / "processed" / "202508"
+    base_dir = _make_snapshot(month_dir)
+    other_dir = _make_snapshot(tmp_path / "processed" / "202507")
+    cache_dir = tmp_path / "cache"
+
+    cache = ResultCache(max_memory_bytes=1, cache_dir=str(cache_dir))
+    cache.put("SELECT 1", base_dir, _table(10))
+    cache.put("SELECT 1", other_dir, _table(10))
+    assert len(list(cache_dir.glob("*.arrow"))) == 2
+
+    # 프로세스 종료 후 ETL이 새 스냅샷 게시 → 새 프로세스
+    _make_snapshot(month_dir, created_at="2025-09-01T00:00:00")
+    restarted = ResultCache(max_memory_bytes=1, cache_dir=str(cache_dir))
+    assert restarted.get("SELECT 1", base_dir) is None
+    assert len(list(cache_dir.glob("*.arrow"))) == 1
+    assert restarted.get("SELECT 1", other_dir) is not None  # 다른 디렉토리는 유지
+
+
+def test_startup_prunes_old_and_partial_files(tmp_path):
+    """시작 시 보관 기한이 지난 파일, 쓰다 만 .tmp, 이름 형식이 다른 파일 삭제"""
+    base_dir = _make_snapshot(tmp_path / "processed" / "202508")
+    cache_dir = tmp_path / "cache"
+    cache = ResultCache(max_memory_bytes=1, cache_dir=str(cache_dir))
+    cache.put("SELECT 1", base_dir, _table(10))
+    cache.put("SELECT 2", base_dir, _table(10))
+    old, fresh = sorted(cache_dir.glob("*.arrow"))
+    os.utime(old, (0, 0))
+    (cache_dir / "partial.tmp").write_bytes(b"x")
+    (cache_dir / "legacy_key.arrow").write_bytes(b"x")
+
+    ResultCache(cache_dir=str(cache_dir), max_disk_age_sec=3600)
+    assert sorted(p.name for p in cache_dir.iterdir()) == [fresh.name]
+
+
+def test_latest_symlink_shares_entries(tmp_path):
+    """latest 링크와 실제 월 폴더는 같은 스냅샷으로 취급"""
+    month_dir = tmp_path / "processed" / "202508"
+    base_dir = _make_snapshot(month_dir)
+    latest = tmp_path / "processed" / "latest"
+    latest.symlink_to(month_dir, target_is_directory=True)
+
+    cache = ResultCache(cache_dir=None)
+    cache.put("SELECT 1", base_dir, _table(2))
+    assert cache.get("SELECT 1", str(latest)) is not None
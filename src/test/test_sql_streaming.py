@@ -0,0 +1,102 @@
+"""
+스트리밍 응답 테스트: 요약 체인 토큰 이벤트, 템플릿/오류 답변, 라우터 이벤트 순서
+"""
+
+import json
+
+import duckdb
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from src.agent.router import graph as router_graph
+from src.agent.sql_agent import graph, nl2sql, schema_provider, summary
+from src.agent.streaming import answer_events
+
+pytestmark = pytest.mark.usefixtures("result_cache")
+
+SUMMARY_TEXT = "Endpoint 사용 내역은 총 10건이에요 가장 많이 쓴 시간은 9시간이에요"
+
+
+@pytest.fixture
+def endpoint_path(tmp_path, monkeypatch):
+    base = tmp_path / "202508"
+    base.mkdir()
+    path = base / "agg_endpoint_hours.parquet"
+    duckdb.execute(f"COPY (SELECT range AS hours, range * 0.5 AS cost FROM range(10)) TO '{path}'")
+    (base / "manifest.json").write_text(json.dumps({"billing_ym": "202508"}))
+    monkeypatch.setattr(schema_provider, "DATA_ROOT", str(tmp_path))
+    return path
+
+
+@pytest.fixture
+def streaming_summary(monkeypatch):
+    """토큰 단위로 스트리밍하는 가짜 LLM으로 요약 체인 교체"""
+    llm = GenericFakeChatModel(messages=iter([AIMessage(SUMMARY_TEXT)] * 10))
+    chain = ChatPromptTemplate.from_template(summary.SUMMARY_PROMPT) | llm | StrOutputParser()
+    monkeypatch.setattr(summary, "_SUMMARY_CHAIN", chain)
+
+
+def _fake_nl2sql(monkeypatch, sql):
+    monkeypatch.setattr(nl2sql, "_NL2SQL_CHAIN", RunnableLambda(lambda _: sql))
+
+
+def test_stream_emits_summary_tokens_then_final(monkeypatch, endpoint_path, streaming_summary):
+    """LLM 요약은 여러 token 이벤트로 나뉘고 이어 붙이면 최종 답변과 같음"""
+    _fake_nl2sql(monkeypatch, f"SELECT * FROM read_parquet('{endpoint_path}');")
+
+    events = list(graph.ask_stream("Endpoint 사용 내역", "202508"))
+    tokens = [e["text"] for e in events if e["type"] == "token"]
+
+    assert len(tokens) > 1
+    assert events[-1]["type"] == "final"
+    assert [e["type"] for e in events].count("final") == 1
+    result = events[-1]["result"]
+    assert result["answer_source"] == "llm"
+    assert "".join(tokens) == result["answer"] == SUMMARY_TEXT
+
+
+@pytest.mark.asyncio
+async def test_astream_matches_stream(monkeypatch, endpoint_path, streaming_summary):
+    """비동기 스트림도 같은 토큰/최종 결과"""
+    _fake_nl2sql(monkeypatch, f"SELECT * FROM read_parquet('{endpoint_path}');")
+
+    events = [e async for e in graph.ask_astream("Endpoint 사용 내역", "202508")]
+    assert len([e for e in events if e["type"] == "token"]) > 1
+    assert events[-1]["result"]["answer"] == SUMMARY_TEXT
+
+
+def test_template_answer_is_single_token(monkeypatch, endpoint_path):
+    """템플릿 답변은 LLM을 거치지 않으므로 token 1개 + final"""
+    _fake_nl2sql(monkeypatch, f"SELECT sum(cost) AS total_cost FROM read_parquet('{endpoint_path}');")
+
+    events = list(graph.ask_stream("Endpoint 총 비용", "202508"))
+
+    assert [e["type"] for e in events] == ["token", "final"]
+    assert events[0]["text"] == events[1]["result"]["answer"]
+    assert "22.50 USD" in events[0]["text"]
+
+
+def test_error_is_streamed_as_final(endpoint_path):
+    """없는 월 등 오류도 token + final 이벤트로 전달"""
+    events = list(graph.ask_stream("총 비용은?", "209901"))
+    assert events[-1]["type"] == "final"
+    assert events[-1]["result"]["error"] is True
+
+
+def test_router_stream_emits_intent_first(monkeypatch):
+    """라우터 스트림은 intent 이벤트 후 해당 Agent의 이벤트를 그대로 전달"""
+    monkeypatch.setattr(router_graph, "PREFETCHERS", {})
+    monkeypatch.setattr(router_graph, "classify_intent",
+                        lambda q: {"intent": "general", "confidence": 1.0, "reason": "test"})
+    monkeypatch.setattr(router_graph, "STREAMERS",
+                        {"general": lambda state: answer_events({"answer": "안녕하세요", "intent": "general"})})
+
+    events = list(router_graph.ask_stream("안녕"))
+
+    assert [e["type"] for e in events] == ["intent", "token", "final"]
+    assert events[0]["intent"] == "general"
+    assert events[-1]["result"]["answer"] == "안녕하세요"
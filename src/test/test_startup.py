@@ -0,0 +1,77 @@
+"""
+시작 시간 테스트: 무거운 모듈 지연 import, 백그라운드 warm-up, 공유 Chroma 스토어
+"""
+
+import os
+
+import pytest
+
+from src.agent import warmup
+from src.agent.docs_agent import retriever
+from src.test.bench_startup import LAZY_MODULES, measure_import
+
+# 이 머신 기준 ~1초 (이전 ~2초), CI 편차를 감안한 상한
+IMPORT_BUDGET_SEC = float(os.getenv("STARTUP_IMPORT_BUDGET_SEC", "3.0"))
+
+
+@pytest.mark.parametrize("module", ["src.agent.router.graph", "src.agent.sql_agent", "src.agent.docs_agent.graph"])
+def test_heavy_modules_are_not_imported_at_startup(module):
+    """Agent 모듈 import만으로는 langchain_openai/chromadb/tavily 등을 로드하지 않음"""
+    result = measure_import(module)
+    assert [m for m in LAZY_MODULES if m in result["modules"]] == []
+
+
+def test_router_import_within_budget():
+    """라우터 import 시간이 예산 이내 (-X importtime self 시간 합계)"""
+    assert measure_import("src.agent.router.graph")["total_sec"] < IMPORT_BUDGET_SEC
+
+
+def test_warm_up_continues_after_failed_step():
+    """한 단계가 실패해도 나머지 단계를 실행하고 오류를 기록"""
+    ran = []
+
+    def _fail():
+        raise RuntimeError("no index")
+
+    status = warmup.warm_up([("first", lambda: ran.append("first")), ("bad", _fail),
+                             ("last", lambda: ran.append("last"))])
+
+    assert ran == ["first", "last"]
+    assert status["state"] == "done"
+    assert status["steps"]["bad"] == {"ok": False, "sec": status["steps"]["bad"]["sec"], "error": "no index"}
+    assert status["steps"]["last"]["ok"] is True
+
+
+def test_start_warmup_runs_once_per_process(monkeypatch):
+    """Streamlit 재실행마다 호출돼도 warm-up 스레드는 하나"""
+    calls = []
+    monkeypatch.setattr(warmup, "_WARMUP_THREAD", None)
+    monkeypatch.setattr(warmup, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(warmup, "WARMUP_STEPS", [("noop", lambda: calls.append(1))])
+
+    first = warmup.start_warmup()
+    second = warmup.start_warmup()
+    first.join(timeout=5)
+
+    assert first is second
+    assert calls == [1]
+    assert warmup.warmup_status()["state"] == "done"
+
+
+def test_warmup_disabled(monkeypatch):
+    monkeypatch.setattr(warmup, "_WARMUP_THREAD", None)
+    monkeypatch.setattr(warmup, "WARMUP_ENABLED", False)
+    assert warmup.start_warmup() is None
+
+
+def test_vectorstore_is_loaded_once(monkeypatch):
+    """검색마다 Chroma를 다시 열지 않고 (경로, 모델)별로 재사용"""
+    loads = []
+    monkeypatch.setattr(retriever, "_VECTORSTORES", {})
+    monkeypatch.setattr(retriever, "load_vectorstore", lambda d, m: loads.append((d, m)) or object())
+
+    first = retriever.get_vectorstore("/tmp/index", "emb")
+    assert retriever.get_vectorstore("/tmp/index", "emb") is first
+    retriever.get_vectorstore("/tmp/other", "emb")
+
+    assert loads == [("/tmp/index", "emb"), ("/tmp/other", "emb")]
@@ -0,0 +1,163 @@
+"""
+추적 테스트: span 중첩, OTLP/JSON 파일 내보내기, LangGraph 노드/LLM 호출 span, 라우터 응답의 trace 요약
+"""
+
+import asyncio
+import json
+import uuid
+from typing import TypedDict
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph, END
+
+from src.agent import sql_agent
+from src.agent import tracing
+from src.agent.router import graph as router_graph
+from src.agent.streaming import token_event, final_event
+from src.agent.tracing import SpanStore, span, annotate, traced_node, trace_summary, get_llm_callback
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = SpanStore(export_path=str(tmp_path / "spans.otlp.jsonl"))
+    monkeypatch.setattr(tracing, "_SPAN_STORE", store)
+    return store
+
+
+def _names(store, trace_id):
+    return [s["name"] for s in store.get_trace(trace_id)]
+
+
+def test_nested_spans_are_exported_as_otlp(store):
+    """루트 span이 끝나면 trace 전체가 OTLP/JSON 한 줄로 기록"""
+    with span("root", question="q") as root:
+        with span("child"):
+            annotate(**{"cache.hit": True, "rows": 3})
+
+    lines = store.export_path.read_text().splitlines()
+    assert len(lines) == 1
+    spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    by_name = {s["name"]: s for s in spans}
+    assert by_name["child"]["parentSpanId"] == by_name["root"]["spanId"]
+    assert by_name["child"]["traceId"] == root.trace_id
+    assert {"key": "cache.hit", "value": {"boolValue": True}} in by_name["child"]["attributes"]
+    assert {"key": "rows", "value": {"intValue": "3"}} in by_name["child"]["attributes"]
+    assert int(by_name["root"]["endTimeUnixNano"]) >= int(by_name["child"]["endTimeUnixNano"])
+
+
+def test_error_status_is_recorded(store):
+    with pytest.raises(ValueError):
+        with span("failing"):
+            raise ValueError("boom")
+    trace_id = store.recent_trace_ids(1)[0]
+    assert store.get_trace(trace_id)[0]["status"] == "error"
+    assert "boom" in store.get_trace(trace_id)[0]["error"]
+
+
+class _State(TypedDict):
+    value: int
+
+
+def _graph():
+    def _sync(state):
+        return {"value": state["value"] + 1}
+
+    async def _async(state):
+        return {"value": state["value"] + 1}
+
+    g = StateGraph(_State)
+    g.add_node("plain", traced_node("t.plain", _sync))
+    g.add_node("lambda", traced_node("t.lambda", RunnableLambda(_sync, afunc=_async)))
+    g.set_entry_point("plain")
+    g.add_edge("plain", "lambda")
+    g.add_edge("lambda", END)
+    return g.compile()
+
+
+def test_traced_nodes_nest_under_caller_sync_and_async(store):
+    """LangGraph 노드 span은 invoke/ainvoke 모두 호출한 쪽 span의 자식"""
+    compiled = _graph()
+    with span("sync-root") as sync_root:
+        assert compiled.invoke({"value": 0}) == {"value": 2}
+
+    async def _run():
+        with span("async-root") as root:
+            await compiled.ainvoke({"value": 0})
+        return root
+
+    async_root = asyncio.run(_run())
+
+    for root in (sync_root, async_root):
+        spans = store.get_trace(root.trace_id)
+        assert [s["name"] for s in spans][1:] == ["t.plain", "t.lambda"]
+        assert all(s["parent_id"] == root.span_id for s in spans[1:])
+        assert spans[1]["attributes"]["langgraph.node"] == "t.plain"
+
+
+def test_llm_callback_records_model_and_tokens(store):
+    """LLM 호출마다 모델/입출력 토큰이 현재 span의 자식으로 기록되고 trace 요약에 합산"""
+    cb = get_llm_callback()
+    with span("root") as root:
+        run_id = uuid.uuid4()
+        cb.on_chat_model_start({}, [[]], run_id=run_id, invocation_params={"model": "gpt-4o-mini"})
+        cb.on_llm_end(LLMResult(generations=[], llm_output={
+            "token_usage": {"prompt_tokens": 120, "completion_tokens": 30}}), run_id=run_id)
+        FakeListChatModel(responses=["안녕"], callbacks=[cb]).invoke("hi")
+
+    spans = store.get_trace(root.trace_id)
+    llm = [s for s in spans if s["name"].startswith("llm ")]
+    assert len(llm) == 2
+    assert llm[0]["name"] == "llm gpt-4o-mini"
+    assert llm[0]["attributes"]["gen_ai.usage.input_tokens"] == 120
+    assert all(s["parent_id"] == root.span_id for s in llm)
+    assert trace_summary(root.trace_id)["tokens"] == {"input": 120, "output": 30}
+
+
+def test_llm_call_outside_span_is_not_recorded(store):
+    FakeListChatModel(responses=["안녕"], callbacks=[get_llm_callback()]).invoke("hi")
+    assert store.recent_trace_ids() == []
+
+
+@pytest.fixture
+def router(monkeypatch, isolated_router):
+    monkeypatch.setattr(router_graph, "classify_intent",
+                        lambda q: {"intent": "sql", "confidence": 1.0, "reason": "test"})
+
+    def _sql(q, prefetch=None):
+        with span("sql.ask"):
+            return {"answer": "sql", "intent": "sql", "error": False}
+
+    def _stream_sql(state):
+        with span("sql.stream"):
+            yield token_event("sql")
+        yield final_event({"answer": "sql", "intent": "sql", "error": False})
+
+    monkeypatch.setattr(sql_agent, "ask", _sql)
+    monkeypatch.setattr(router_graph, "STREAMERS", {**router_graph.STREAMERS, "sql": _stream_sql})
+
+
+def test_router_result_has_trace_summary(store, router):
+    """라우터 응답에 trace_id, elapsed_ms, 노드별 시간이 붙고 span 저장소에서 조회 가능"""
+    result = router_graph.ask("이번달 비용")
+
+    assert result["answer"] == "sql"
+    assert result["elapsed_ms"] >= 0
+    names = [t["name"] for t in result["timings"]]
+    assert names[0] == "router.ask"
+    assert {"router.prepare", "router.dispatch_sql", "sql.ask"} <= set(names)
+    assert next(t for t in result["timings"] if t["name"] == "sql.ask")["depth"] == 2
+    assert _names(store, result["trace_id"]) == names
+    prepare = next(s for s in store.get_trace(result["trace_id"]) if s["name"] == "router.prepare")
+    assert prepare["attributes"]["router.intent"] == "sql"
+
+
+def test_router_stream_spans_share_root_trace(store, router):
+    """스트리밍 중 실행되는 Agent 작업도 같은 trace에 기록되고 final 결과에 요약이 붙음"""
+    events = list(router_graph.ask_stream("이번달 비용"))
+
+    result = events[-1]["result"]
+    assert {"router.ask_stream", "router.prepare", "sql.stream"} <= set(_names(store, result["trace_id"]))
+    assert len(store.recent_trace_ids()) == 1
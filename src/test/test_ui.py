@@ -3,9 +3,11 @@ UI 컴포넌트 테스트
 """
 
 import pytest
-from src.ui.components.chat_message import render_user, render_assistant
+from src.ui.components.chat_message import render_user, render_assistant, render_assistant_stream
 from src.ui.components.citations import render_citations
 from src.ui.components.metrics import render_metrics
+from src.ui.components.result_table import render_result_table
+from src.ui.components.feedback import render_sql_feedback
 from src.ui.utils.session import init_session, append_history
 
 
@@ -21,6 +23,7 @@ def test_chat_message_components():
     """채팅 메시지 컴포넌트 테스트"""
     assert callable(render_user)
     assert callable(render_assistant)
+    assert callable(render_assistant_stream)
 
 
 def test_citations_component():
@@ -33,6 +36,16 @@ def test_metrics_component():
     assert callable(render_metrics)
 
 
+def test_result_table_component():
+    """결과 표 컴포넌트 테스트"""
+    assert callable(render_result_table)
+
+
+def test_sql_feedback_component():
+    """SQL 피드백 컴포넌트 테스트"""
+    assert callable(render_sql_feedback)
+
+
 def test_router_import():
     """Router import 테스트"""
     try:
@@ -49,6 +62,8 @@ if __name__ == "__main__":
     test_chat_message_components()
     test_citations_component()
     test_metrics_component()
+    test_result_table_component()
+    test_sql_feedback_component()
     test_router_import()
     
     print("✅ 모든 테스트 통과!")
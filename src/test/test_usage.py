@@ -0,0 +1,160 @@
+"""
+사용량 집계 테스트: LLM 콜백 토큰/비용 집계, 요청 meter 전달(비동기/스레드/스트리밍), 요청·세션별 저장소
+"""
+
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.outputs import LLMResult
+
+from src.agent import sql_agent
+from src.agent import usage
+from src.agent.docs_agent import retriever
+from src.agent.router import graph as router_graph
+from src.agent.streaming import token_event, final_event
+from src.agent.tracing import span, submit_in_context
+from src.agent.usage import UsageStore, track_usage, get_usage_callback, estimate_cost, record_embedding
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = UsageStore(db_path=None)
+    monkeypatch.setattr(usage, "_USAGE_STORE", store)
+    return store
+
+
+def _llm_call(input_tokens, output_tokens, model="gpt-4o-mini-2024-07-18"):
+    """실제 ChatOpenAI 호출이 콜백에 전달하는 것과 같은 시작/종료 이벤트"""
+    cb = get_usage_callback()
+    run_id = uuid.uuid4()
+    cb.on_chat_model_start({}, [[]], run_id=run_id, invocation_params={"model": "gpt-4o-mini"})
+    cb.on_llm_end(LLMResult(generations=[], llm_output={
+        "model_name": model,
+        "token_usage": {"prompt_tokens": input_tokens, "completion_tokens": output_tokens}}), run_id=run_id)
+
+
+def test_cost_uses_longest_model_prefix():
+    """버전이 붙은 모델명은 가장 긴 접두사 가격으로 (gpt-4o-mini-... ≠ gpt-4o)"""
+    assert estimate_cost("gpt-4o-mini-2024-07-18", 1_000_000, 1_000_000) == pytest.approx(0.75)
+    assert estimate_cost("gpt-4o-2024-08-06", 1_000_000, 0) == pytest.approx(2.50)
+    assert estimate_cost("unknown-model", 1000, 1000) == 0.0
+
+
+def test_callback_aggregates_calls_by_step():
+    """호출마다 토큰/비용이 meter에 더해지고 현재 span 이름으로 단계별 합계"""
+    with track_usage() as meter:
+        with span("sql.nl2sql"):
+            _llm_call(1000, 200)
+        with span("sql.summary"):
+            _llm_call(500, 100)
+            _llm_call(500, 100)
+
+    summary = meter.summary()
+    assert summary["llm_calls"] == 3
+    assert (summary["input_tokens"], summary["output_tokens"]) == (2000, 400)
+    assert summary["cost_usd"] == pytest.approx((2000 * 0.15 + 400 * 0.60) / 1e6)
+    assert summary["by_step"]["sql.summary"]["calls"] == 2
+    assert summary["by_step"]["sql.nl2sql"]["input_tokens"] == 1000
+
+
+def test_meter_follows_async_and_thread_pool_calls():
+    """ainvoke(콜백 inline 실행)와 submit_in_context 스레드의 호출도 같은 요청에 합산"""
+    llm = FakeListChatModel(responses=["a", "b"], callbacks=[get_usage_callback()])
+
+    async def _run():
+        await llm.ainvoke("hi")
+
+    with track_usage() as meter, ThreadPoolExecutor(1) as pool:
+        asyncio.run(_run())
+        submit_in_context(pool, llm.invoke, "hi").result()
+        pool.submit(llm.invoke, "hi").result()  # context를 넘기지 않은 호출은 제외
+
+    assert meter.summary()["llm_calls"] == 2
+
+
+def test_calls_outside_request_are_ignored():
+    """요청 meter 밖의 호출(워밍업 등)은 기록하지 않고 실행 중 호출 정보도 남기지 않음"""
+    _llm_call(10, 10)
+    record_embedding("text-embedding-3-small", ["질문"])
+    assert usage.current_meter() is None
+    assert get_usage_callback()._models == {}
+
+
+def test_retriever_records_query_embedding(monkeypatch):
+    """문서 검색의 질의 임베딩 호출도 (추정 토큰으로) 집계"""
+    class _FakeStore:
+        def similarity_search_with_relevance_scores(self, question, k):
+            return []
+
+    monkeypatch.setattr(retriever, "get_vectorstore", lambda index_dir, embed_model: _FakeStore())
+    with track_usage() as meter, span("docs.retrieve"):
+        retriever.retrieve("SageMaker 비용 계산 방법")
+
+    summary = meter.summary()
+    assert summary["embedding_calls"] == 1
+    assert summary["llm_calls"] == 0
+    assert summary["by_step"]["docs.retrieve"]["input_tokens"] > 0
+
+
+@pytest.fixture
+def router(monkeypatch, isolated_router):
+    """분류 1회 + SQL Agent 2회 LLM 호출을 흉내 내는 라우터"""
+
+    def _classify(q):
+        _llm_call(300, 20)
+        return {"intent": "sql", "confidence": 1.0, "reason": "test"}
+
+    def _sql(q, prefetch=None):
+        with span("sql.nl2sql"):
+            _llm_call(1000, 100)
+        with span("sql.summary"):
+            _llm_call(800, 150)
+        return {"answer": "sql", "intent": "sql", "error": False}
+
+    def _stream_sql(state):
+        with span("sql.summary"):
+            _llm_call(800, 150)
+        yield token_event("sql")
+        yield final_event({"answer": "sql", "intent": "sql", "error": False})
+
+    monkeypatch.setattr(router_graph, "classify_intent", _classify)
+    monkeypatch.setattr(sql_agent, "ask", _sql)
+    monkeypatch.setattr(router_graph, "STREAMERS", {**router_graph.STREAMERS, "sql": _stream_sql})
+
+
+def test_router_result_carries_usage_and_is_stored(store, router):
+    """응답에 요청 사용량이 붙고, 저장소에 세션/의도/단계별로 집계"""
+    result = router_graph.ask("이번달 비용", session_id="s1")
+
+    assert result["usage"]["llm_calls"] == 3
+    assert result["usage"]["input_tokens"] == 2100
+    summary = store.summary(session_id="s1")
+    assert summary["requests"] == 1
+    assert summary["by_intent"]["sql"]["output_tokens"] == 270
+    assert summary["by_step"]["sql.summary"]["calls"] == 1
+    assert summary["cost_usd"] == result["usage"]["cost_usd"]
+
+
+def test_router_stream_counts_calls_made_while_streaming(store, router):
+    events = list(router_graph.ask_stream("이번달 비용", session_id="s2"))
+
+    assert events[-1]["result"]["usage"]["llm_calls"] == 2
+    assert store.summary(session_id="s2")["input_tokens"] == 1100
+
+
+def test_store_summary_filters_and_trims():
+    """세션/기간 필터와 최대 행 수 유지"""
+    store = UsageStore(db_path=None, max_rows=2)
+    with track_usage() as meter:
+        _llm_call(100, 10)
+    for session_id in ("a", "a", "b"):
+        store.record(meter.summary(), question="q", intent="docs", session_id=session_id, elapsed_ms=100)
+
+    assert store.summary()["requests"] == 2
+    assert store.summary(session_id="a")["requests"] == 1
+    assert store.summary(since=0)["by_intent"]["docs"]["avg_elapsed_ms"] == 100
+    store.clear()
+    assert store.summary()["requests"] == 0
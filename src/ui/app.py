@@ -4,13 +4,17 @@ import time
 import streamlit as st
 from pathlib import Path
 
-# Router 엔트리포인트
-from src.agent.router.graph import ask as router_ask
+# Router 엔트리포인트 (토큰 스트리밍)
+from src.agent.router.graph import ask_stream as router_ask_stream
+from src.agent.warmup import start_warmup
+from src.agent.usage import get_usage_store
 
-from src.ui.utils.session import init_session, append_history
-from src.ui.components.chat_message import render_user, render_assistant
+from src.ui.utils.session import init_session, reset_session, append_history
+from src.ui.components.chat_message import render_user, render_assistant, render_assistant_stream
 from src.ui.components.citations import render_citations
 from src.ui.components.metrics import render_metrics
+from src.ui.components.result_table import render_result_table
+from src.ui.components.feedback import render_sql_feedback
 
 st.set_page_config(page_title="FinOps RAG Agent", page_icon="💬", layout="wide")
 
@@ -30,8 +34,13 @@ with st.sidebar:
     show_citations = st.checkbox("Show citations (참고문헌 표시)", value=True)
     
     st.caption("LangSmith tracing is enabled via environment if configured.")
+    # 후속 질문("그럼 지난달은?")은 이 대화의 맥락을 이어받음 → 주제를 바꿀 때 초기화
+    if st.button("🧹 새 대화", help="이전 질문의 기간/서비스/계정 맥락을 지우고 새로 시작"):
+        reset_session()
 
 init_session()
+# Agent 모듈/LLM 클라이언트/DuckDB/Chroma를 백그라운드에서 미리 준비 (프로세스당 한 번)
+start_warmup()
 
 st.title("🤖 FinOps AI 어시스턴트")
 st.markdown("""
@@ -46,9 +55,40 @@ st.markdown("""
 자연어로 질문하시면 AI가 자동으로 분석하여 답변해드립니다.
 """)
 
+def render_result_extras(record, index):
+    """assistant 히스토리 레코드의 부가정보 (SQL/지표/결과 표/피드백/참고문헌)
+
+    위젯 key는 메시지 위치로 정하므로, 페이지 이동/버튼 클릭으로 rerun되어도 같은 위젯이 유지된다.
+    """
+    result = record["content"]
+    intent = result.get("intent", "general")
+
+    # Intent별 부가정보
+    if intent == "sql":
+        sql = record.get("sql")
+        if show_sql and sql:
+            st.code(sql, language="sql")
+        if show_metrics and result.get("numeric_summary"):
+            render_metrics(result["numeric_summary"])
+        if show_table and sql and record.get("row_count"):
+            render_result_table(sql, record["row_count"],
+                                key=f"result_page_{index}",
+                                base_dir=record.get("base_dir"),
+                                month_dirs=record.get("month_dirs"))
+        if sql and not result.get("error"):
+            render_sql_feedback(record.get("question", ""), sql, key=f"sql_feedback_{index}")
+    elif intent == "docs":
+        if show_citations and result.get("citations"):
+            render_citations(result["citations"])
+
+    if debug:
+        with st.expander("Debug JSON"):
+            st.json(result)
+
+
 # 기존 히스토리 렌더 (먼저 표시)
 if "history" in st.session_state and st.session_state["history"]:
-    for msg in st.session_state["history"]:
+    for i, msg in enumerate(st.session_state["history"]):
         if msg["role"] == "user":
             render_user(msg["content"])
         else:
@@ -58,7 +98,11 @@ if "history" in st.session_state and st.session_state["history"]:
                 render_assistant(res.get("answer") or res.get("message","(no content)"),
                                  intent=res.get("intent","general"),
                                  extra={"elapsed_ms": res.get("elapsed_ms"),
-                                        "trace_id": res.get("trace_id")})
+                                        "first_token_ms": res.get("first_token_ms"),
+                                        "trace_id": res.get("trace_id"),
+                                        "timings": res.get("timings"),
+                                        "usage": res.get("usage")})
+                render_result_extras(msg, i)
             else:
                 render_assistant(str(res))
 
@@ -67,39 +111,23 @@ question = st.chat_input("메시지를 입력하세요…")
 if question:
     # 새로운 사용자 메시지 렌더
     render_user(question)
-    start = time.time()
 
-    # Router 호출 (month 파라미터를 NL2SQL에서 사용하려면 질문에 주입 or 내부 처리)
-    result = router_ask(question)  # 내부 에이전트들이 month를 쓸 수 있게 이미 구성돼 있다고 가정
-    elapsed = int((time.time() - start) * 1000)
+    # Router 호출 — 답변 토큰을 받는 대로 렌더링하고 최종 구조화 결과를 받음
+    result = render_assistant_stream(router_ask_stream(question, session_id=st.session_state["session_id"]))
 
-    # 세션 히스토리 저장
+    # 세션 히스토리 저장 — 결과 표/피드백을 다음 rerun에서도 다시 그릴 수 있도록 조회 조건을 함께 보관
     append_history({"role": "user", "content": question})
-    append_history({"role": "assistant", "content": result})
-
-    # --- 응답 렌더링 ---
-    intent = result.get("intent", "general")
-    answer = result.get("answer") or result.get("message") or "(no content)"
-    extra = {
-        "elapsed_ms": result.get("elapsed_ms", elapsed),
-        "trace_id": result.get("trace_id")
-    }
-    render_assistant(answer, intent=intent, extra=extra)
-
-    # Intent별 부가정보
-    if intent == "sql":
-        if show_sql and result.get("sql"):
-            st.code(result["sql"], language="sql")
-        if show_metrics and result.get("numeric_summary"):
-            render_metrics(result["numeric_summary"])
-        if show_table and result.get("sample_rows"):
-            import pandas as pd
-            df = pd.DataFrame(result["sample_rows"])
-            st.dataframe(df, width='stretch')
-    elif intent == "docs":
-        if show_citations and result.get("citations"):
-            render_citations(result["citations"])
+    record = {"role": "assistant", "content": result, "question": question,
+              "sql": result.get("sql"), "base_dir": result.get("base_dir"),
+              "month_dirs": result.get("month_dirs"), "row_count": result.get("row_count")}
+    append_history(record)
+    render_result_extras(record, len(st.session_state["history"]) - 1)
 
-    if debug:
-        with st.expander("Debug JSON"):
-            st.json(result)
+# --- 이 대화의 누적 LLM 사용량 (마지막 답변까지 반영되도록 맨 뒤에서 렌더) ---
+usage_store = get_usage_store()
+if usage_store is not None:
+    session_usage = usage_store.summary(session_id=st.session_state["session_id"])
+    with st.sidebar:
+        st.caption(f"🪙 이 대화: LLM {session_usage['llm_calls']}회 · "
+                   f"{session_usage['input_tokens'] + session_usage['output_tokens']:,} tokens · "
+                   f"${session_usage['cost_usd']:.4f}")
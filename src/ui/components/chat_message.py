@@ -1,5 +1,33 @@
+import time
+from typing import Any, Dict, Iterable
+
 import streamlit as st
 
+_ICONS = {"sql": "🧮", "docs": "📚", "general": "💬"}
+
+
+def _header(intent: str) -> str:
+    return f"{_ICONS.get(intent, '💬')} **{intent.upper()}**"
+
+
+def _render_meta(extra: dict):
+    meta = []
+    if extra.get("first_token_ms") is not None:
+        meta.append(f"⚡ 첫 응답 {extra['first_token_ms']} ms")
+    if extra.get("elapsed_ms") is not None:
+        meta.append(f"⏱ {extra['elapsed_ms']} ms")
+    usage = extra.get("usage") or {}
+    if usage.get("llm_calls") or usage.get("embedding_calls"):
+        meta.append(f"🪙 LLM {usage['llm_calls']}회 · {usage['input_tokens'] + usage['output_tokens']:,} tokens"
+                    f" · ${usage['cost_usd']:.4f}")
+    if extra.get("trace_id"):
+        meta.append(f"🧵 trace: `{extra['trace_id']}`")
+    if meta:
+        st.caption(" · ".join(meta))
+    if extra.get("timings"):
+        with st.expander("단계별 소요 시간"):
+            st.text("\n".join(f"{'  ' * t['depth']}{t['name']}  {t['ms']} ms" for t in extra["timings"]))
+
 def render_user(text: str):
     """사용자 메시지 렌더링"""
     with st.chat_message("user"):
@@ -7,14 +35,32 @@ def render_user(text: str):
 
 def render_assistant(text: str, intent: str = "general", extra: dict = None):
     """어시스턴트 메시지 렌더링"""
-    icon = {"sql": "🧮", "docs": "📚", "general": "💬"}.get(intent, "💬")
     with st.chat_message("assistant"):
-        st.markdown(f"{icon} **{intent.upper()}**\n\n{text}")
+        st.markdown(f"{_header(intent)}\n\n{text}")
         if extra:
-            meta = []
-            if extra.get("elapsed_ms") is not None:
-                meta.append(f"⏱ {extra['elapsed_ms']} ms")
-            if extra.get("trace_id"):
-                meta.append(f"🧵 trace: `{extra['trace_id']}`")
-            if meta:
-                st.caption(" · ".join(meta))
+            _render_meta(extra)
+
+def render_assistant_stream(events: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """스트리밍 이벤트(intent/token/final)를 받아 답변을 토큰 단위로 렌더링하고 최종 결과 반환"""
+    start = time.time()
+    final: Dict[str, Any] = {}
+    timing: Dict[str, int] = {}
+
+    with st.chat_message("assistant"):
+        header = st.empty()
+
+        def _tokens():
+            for event in events:
+                if event["type"] == "intent":
+                    header.markdown(_header(event["intent"]))
+                elif event["type"] == "token":
+                    timing.setdefault("first_token_ms", int((time.time() - start) * 1000))
+                    yield event["text"]
+                elif event["type"] == "final":
+                    final.update(event["result"])
+
+        st.write_stream(_tokens())
+        final.setdefault("elapsed_ms", int((time.time() - start) * 1000))
+        final.setdefault("first_token_ms", timing.get("first_token_ms"))
+        _render_meta(final)
+    return final
@@ -0,0 +1,14 @@
+import streamlit as st
+
+from src.agent.sql_agent.example_store import confirm_sql_example
+
+def _confirm(question: str, sql: str):
+    try:
+        confirm_sql_example(question, sql)
+        st.toast("정답 예시로 저장했어요. 비슷한 질문에 참고할게요.")
+    except Exception as e:
+        st.toast(f"예시 저장 실패: {e}")
+
+def render_sql_feedback(question: str, sql: str, key: str):
+    """SQL 답변 피드백: 정답으로 확인된 질문/SQL을 few-shot 예시로 저장"""
+    st.button("👍 정확한 답변이에요", key=key, on_click=_confirm, args=(question, sql))
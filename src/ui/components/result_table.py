@@ -0,0 +1,25 @@
+import math
+from typing import List, Optional
+
+import streamlit as st
+
+from src.agent.sql_agent.executor import fetch_result_page_arrow
+
+def render_result_table(sql: str, row_count: int, key: str, page_size: int = 50,
+                        base_dir: Optional[str] = None, month_dirs: Optional[List[str]] = None):
+    """SQL 결과 표 렌더링 (요청한 페이지만 조회, 답변과 같은 데이터 범위로 실행)"""
+    st.subheader("📋 Query Result")
+    pages = max(1, math.ceil(row_count / page_size))
+    page = 0
+    if pages > 1:
+        page = st.number_input("page", min_value=1, max_value=pages, value=1, key=key) - 1
+    try:
+        # Arrow Table을 그대로 넘겨 pandas 변환 없이 표시
+        table = fetch_result_page_arrow(sql, page=page, page_size=page_size,
+                                        base_dir=base_dir, month_dirs=month_dirs)
+    except Exception as e:
+        st.warning(f"결과를 불러오지 못했습니다: {e}")
+        return
+    st.dataframe(table, width='stretch')
+    start = page * page_size
+    st.caption(f"{row_count:,}행 중 {start + 1:,}–{min(start + page_size, row_count):,}행")
@@ -1,9 +1,19 @@
+import uuid
+
 import streamlit as st
 
 def init_session():
     """세션 상태 초기화"""
     if "history" not in st.session_state:
         st.session_state["history"] = []
+    if "session_id" not in st.session_state:
+        # 대화 맥락(후속 질문)과 사용량(토큰/비용) 세션별 집계 키
+        st.session_state["session_id"] = uuid.uuid4().hex
+
+def reset_session():
+    """새 대화: 히스토리를 비우고 세션 ID를 새로 발급 (이전 대화 맥락은 더 이상 참조되지 않음)"""
+    st.session_state["history"] = []
+    st.session_state["session_id"] = uuid.uuid4().hex
 
 def append_history(item):
     """히스토리에 메시지 추가"""
@@ -0,0 +1,61 @@
+"""
+로컬 텍스트 벡터화: 문자 n-gram 해싱 임베딩 (외부 모델/API 호출 없음)
+
+한국어 질문은 띄어쓰기/조사 변형이 많아 단어 단위보다 문자 n-gram이 안정적이다.
+결과 벡터는 L2 정규화되어 내적이 곧 코사인 유사도다.
+"""
+
+import re
+import zlib
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+
+DEFAULT_DIM = 1024
+DEFAULT_NGRAMS = (2, 3)
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def _normalize(text: str) -> str:
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def _ngrams(text: str, ngrams: Iterable[int]) -> Iterable[str]:
+    for token in _normalize(text).split():
+        padded = f" {token} "
+        for n in ngrams:
+            for i in range(len(padded) - n + 1):
+                gram = padded[i:i + n]
+                if gram.strip():
+                    yield gram
+
+
+def embed_text(text: str, dim: int = DEFAULT_DIM, ngrams: Tuple[int, ...] = DEFAULT_NGRAMS) -> np.ndarray:
+    """문자 n-gram을 해싱하여 dim 차원의 L2 정규화 벡터로 변환"""
+    vec = np.zeros(dim, dtype=np.float32)
+    for gram in _ngrams(text, ngrams):
+        h = zlib.crc32(gram.encode("utf-8"))
+        vec[h % dim] += 1.0 if (h >> 31) == 0 else -1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+def embed_texts(texts: List[str], dim: int = DEFAULT_DIM,
+                ngrams: Tuple[int, ...] = DEFAULT_NGRAMS) -> np.ndarray:
+    """여러 텍스트를 (len(texts), dim) 행렬로 변환"""
+    if not texts:
+        return np.zeros((0, dim), dtype=np.float32)
+    return np.vstack([embed_text(t, dim, ngrams) for t in texts])
+
+
+def top_k_similar(query: np.ndarray, matrix: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """코사인 유사도 상위 k개의 (행 인덱스, 점수) 목록"""
+    if matrix.shape[0] == 0 or k <= 0:
+        return []
+    scores = matrix @ query
+    k = min(k, len(scores))
+    idx = np.argpartition(-scores, k - 1)[:k]
+    idx = idx[np.argsort(-scores[idx])]
+    return [(int(i), float(scores[i])) for i in idx]